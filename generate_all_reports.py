@@ -1,19 +1,22 @@
 #!/usr/bin/env python3
 """
 Generate PDF reports for all tickers and store in SQLite
+
+Tickers run concurrently (see src/batch_engine.py): OpenAI, Yahoo and audio
+calls are capped and rate limited per provider, and PDFs render in a
+process pool.
 """
 
 import sys
 import os
 import csv
-import time
-from datetime import datetime
-from pathlib import Path
 
 # Add src to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
 
 from src.agent import TickerAnalysisAgent
+from src.batch_engine import (DEFAULT_AUDIO_CONCURRENCY, DEFAULT_LLM_CONCURRENCY, DEFAULT_MAX_TICKERS,
+                              DEFAULT_YAHOO_CONCURRENCY, BatchEngine, format_batch_summary)
 
 
 def load_tickers(csv_path='data/tickers.csv'):
@@ -27,21 +30,21 @@ def load_tickers(csv_path='data/tickers.csv'):
     return tickers
 
 
-def generate_all_reports(output_dir='reports', delay_between_requests=2):
+def generate_all_reports(output_dir='reports', **engine_options):
     """
     Generate PDF reports for all tickers and store in SQLite
-    
+
     Args:
         output_dir: Directory to save PDF files
-        delay_between_requests: Delay in seconds between ticker requests (to avoid rate limiting)
+        **engine_options: BatchEngine limits (max_tickers, llm_concurrency,
+            llm_rate, yahoo_concurrency, yahoo_rate, audio_concurrency,
+            audio_rate, pdf_workers)
     """
     print("=" * 80)
     print("BATCH PDF REPORT GENERATION FOR ALL TICKERS")
     print("=" * 80)
     print()
 
-    # Create output directory
-    Path(output_dir).mkdir(exist_ok=True)
     print(f"📁 PDF reports will be saved to: {output_dir}/")
     print()
 
@@ -51,10 +54,10 @@ def generate_all_reports(output_dir='reports', delay_between_requests=2):
     print(f"✅ Loaded {len(tickers)} tickers")
     print()
 
-    # Initialize agent
+    # Initialize agent and batch engine (builds the OpenAI client)
     print("🔄 Initializing agent...")
     try:
-        agent = TickerAnalysisAgent()
+        engine = BatchEngine(TickerAnalysisAgent(), output_dir=output_dir, **engine_options)
         print("✅ Agent initialized")
     except Exception as e:
         if "api_key" in str(e).lower() or "OPENAI_API_KEY" in str(e):
@@ -67,105 +70,23 @@ def generate_all_reports(output_dir='reports', delay_between_requests=2):
         raise
     print()
 
-    # Statistics
-    results = {
-        'success': [],
-        'failed': [],
-        'skipped': []
-    }
-
-    # Process each ticker
+    # Process all tickers (price histories are prefetched in batched downloads first)
     print("=" * 80)
-    print("GENERATING REPORTS")
+    print(f"GENERATING REPORTS ({engine.max_tickers} tickers at a time, {engine.pdf_workers} PDF workers)")
     print("=" * 80)
     print()
 
-    for i, ticker in enumerate(tickers, 1):
-        print(f"[{i}/{len(tickers)}] Processing {ticker}...")
-        
-        try:
-            # Run the graph to get full state (this automatically saves to SQLite)
-            initial_state = {
-                "messages": [],
-                "ticker": ticker,
-                "ticker_data": {},
-                "indicators": {},
-                "percentiles": {},
-                "chart_patterns": [],
-                "pattern_statistics": {},
-                "strategy_performance": {},
-                "news": [],
-                "news_summary": {},
-                "chart_base64": "",
-                "report": "",
-                "audio_base64": "",
-                "error": ""
-            }
-
-            final_state = agent.graph.invoke(initial_state)
-
-            # Check for errors
-            if final_state.get("error"):
-                error_msg = final_state['error']
-                print(f"   ⚠️  Error: {error_msg}")
-                results['failed'].append((ticker, error_msg))
-                
-                # Rate limiting even on errors
-                if i < len(tickers):
-                    time.sleep(delay_between_requests)
-                continue
-
-            # Generate PDF
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_filename = os.path.join(output_dir, f"{ticker}_report_{timestamp}.pdf")
-
-            pdf_bytes = agent.pdf_generator.generate_report(
-                ticker=ticker,
-                ticker_data=final_state.get("ticker_data", {}),
-                indicators=final_state.get("indicators", {}),
-                percentiles=final_state.get("percentiles", {}),
-                news=final_state.get("news", []),
-                news_summary=final_state.get("news_summary", {}),
-                chart_base64=final_state.get("chart_base64", ""),
-                report=final_state.get("report", ""),
-                output_path=output_filename
-            )
-
-            # Get faithfulness score
-            faithfulness_score = final_state.get("faithfulness_score")
-            overall_score = faithfulness_score.overall_score if faithfulness_score else None
-
-            print(f"   ✅ PDF generated: {output_filename} ({len(pdf_bytes)/1024:.1f} KB)")
-            if overall_score:
-                print(f"   📊 Faithfulness Score: {overall_score:.1f}/100")
-            print(f"   💾 Report saved to SQLite database")
-
-            results['success'].append({
-                'ticker': ticker,
-                'pdf_file': output_filename,
-                'pdf_size': len(pdf_bytes),
-                'faithfulness_score': overall_score
-            })
-
-            # Rate limiting - be nice to APIs
-            if i < len(tickers):
-                print(f"   ⏳ Waiting {delay_between_requests}s before next ticker...")
-                time.sleep(delay_between_requests)
-            print()
-
-        except KeyboardInterrupt:
-            print("\n⚠️  Interrupted by user")
-            break
-        except Exception as e:
-            print(f"   ❌ Unexpected error: {str(e)}")
-            results['failed'].append((ticker, str(e)))
-            import traceback
-            traceback.print_exc()
-            print()
-            
-            # Rate limiting even on errors
-            if i < len(tickers):
-                time.sleep(delay_between_requests)
+    try:
+        summary = engine.run(tickers)
+    except KeyboardInterrupt:
+        print("\n⚠️  Interrupted by user")
+        return False
+
+    for ticker, error in summary['prefetch_failed'].items():
+        print(f"   ⚠️  Prefetch failed for {ticker}: {error} (retried individually)")
+
+    succeeded = [r for r in summary['results'] if r['status'] == 'success']
+    failed = [r for r in summary['results'] if r['status'] != 'success']
 
     # Print summary
     print()
@@ -173,23 +94,22 @@ def generate_all_reports(output_dir='reports', delay_between_requests=2):
     print("SUMMARY")
     print("=" * 80)
     print()
-    print(f"✅ Successfully processed: {len(results['success'])}")
-    print(f"❌ Failed: {len(results['failed'])}")
-    print(f"📊 Total: {len(tickers)}")
+    print(format_batch_summary(summary))
     print()
 
-    if results['success']:
+    if succeeded:
         print("✅ Successful Reports:")
-        avg_faithfulness = sum(r['faithfulness_score'] for r in results['success'] if r['faithfulness_score']) / len([r for r in results['success'] if r['faithfulness_score']])
-        print(f"   Average Faithfulness Score: {avg_faithfulness:.1f}/100")
-        total_size = sum(r['pdf_size'] for r in results['success'])
+        scores = [r['faithfulness_score'] for r in succeeded if r['faithfulness_score']]
+        if scores:
+            print(f"   Average Faithfulness Score: {sum(scores) / len(scores):.1f}/100")
+        total_size = sum(r['pdf_size'] for r in succeeded)
         print(f"   Total PDF Size: {total_size/1024/1024:.1f} MB")
         print()
 
-    if results['failed']:
+    if failed:
         print("❌ Failed Tickers:")
-        for ticker, error in results['failed']:
-            print(f"   - {ticker}: {error}")
+        for result in failed:
+            print(f"   - {result['ticker']}: {result['error']}")
         print()
 
     print("💾 All reports have been saved to SQLite database:")
@@ -198,7 +118,7 @@ def generate_all_reports(output_dir='reports', delay_between_requests=2):
     print()
     print("=" * 80)
 
-    return len(results['success']) > 0
+    return len(succeeded) > 0
 
 
 if __name__ == "__main__":
@@ -213,15 +133,30 @@ if __name__ == "__main__":
         default="reports",
         help="Directory to save PDF files (default: reports)"
     )
-    parser.add_argument(
-        "--delay",
-        type=float,
-        default=2.0,
-        help="Delay in seconds between ticker requests (default: 2.0)"
-    )
+    parser.add_argument("--max-tickers", type=int, default=DEFAULT_MAX_TICKERS,
+                        help=f"Tickers processed at once (default: {DEFAULT_MAX_TICKERS})")
+    parser.add_argument("--llm-concurrency", type=int, default=DEFAULT_LLM_CONCURRENCY,
+                        help=f"Parallel OpenAI calls (default: {DEFAULT_LLM_CONCURRENCY})")
+    parser.add_argument("--llm-rate", type=float, default=None, help="OpenAI calls per second (default: unlimited)")
+    parser.add_argument("--yahoo-concurrency", type=int, default=DEFAULT_YAHOO_CONCURRENCY,
+                        help=f"Parallel Yahoo Finance calls (default: {DEFAULT_YAHOO_CONCURRENCY})")
+    parser.add_argument("--yahoo-rate", type=float, default=2.0,
+                        help="Yahoo Finance calls per second (default: 2.0)")
+    parser.add_argument("--audio-concurrency", type=int, default=DEFAULT_AUDIO_CONCURRENCY,
+                        help=f"Parallel Botnoi/ElevenLabs calls (default: {DEFAULT_AUDIO_CONCURRENCY})")
+    parser.add_argument("--audio-rate", type=float, default=None, help="Audio calls per second (default: unlimited)")
+    parser.add_argument("--pdf-workers", type=int, default=None,
+                        help="PDF render processes (default: CPU count; 0 renders in-process)")
 
     args = parser.parse_args()
     generate_all_reports(
         output_dir=args.output_dir,
-        delay_between_requests=args.delay
+        max_tickers=args.max_tickers,
+        llm_concurrency=args.llm_concurrency,
+        llm_rate=args.llm_rate,
+        yahoo_concurrency=args.yahoo_concurrency,
+        yahoo_rate=args.yahoo_rate,
+        audio_concurrency=args.audio_concurrency,
+        audio_rate=args.audio_rate,
+        pdf_workers=args.pdf_workers
     )
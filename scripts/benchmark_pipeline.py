@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark the analysis pipeline against recorded market data
+
+Record once (live Yahoo, responses saved to disk):
+    python scripts/benchmark_pipeline.py --mode record --tickers 10
+
+Replay offline with 50 ms artificial latency per provider call:
+    python scripts/benchmark_pipeline.py --mode replay --latency 0.05
+
+Bars and reports are written to a temporary database, never data/ticker_data.db,
+and in replay mode history periods are counted back from the recording's
+last bar, so every run sees the same data however old the recording is.
+
+By default only the non-LLM nodes (fetch_data, fetch_news, analyze_technical,
+generate_chart) are timed, so no OpenAI key is needed. Pass --full to time
+the complete graph.invoke (requires OPENAI_API_KEY). --trace records spans
+for every node and external call and prints p50/p95/p99 per span name.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.config import MARKET_DATA_RECORD_DIR
+from src.data_fetcher import DataFetcher
+from src.database import TickerDatabase
+from src.market_data import RecordingProvider, ReplayProvider, YahooFinanceProvider
+from src.tracing import format_latency_summary, tracer
+
+DATA_NODES = ["fetch_data", "fetch_news", "analyze_technical", "generate_chart"]
+
+
+def build_provider(mode, record_dir, latency):
+    """Create the provider for the benchmark mode"""
+    if mode == 'record':
+        return RecordingProvider(YahooFinanceProvider(), record_dir=record_dir)
+    if mode == 'replay':
+        return ReplayProvider(record_dir=record_dir, latency=latency)
+    return YahooFinanceProvider()
+
+
+def run_data_nodes(agent, ticker, node_times):
+    """Run the non-LLM nodes in order, recording per-node latency"""
+    state = agent.initial_state(ticker)
+    for node in DATA_NODES:
+        start = time.perf_counter()
+        with tracer.span(f"node.{node}"):
+            state = getattr(agent, node)(state)
+        node_times.setdefault(node, []).append(time.perf_counter() - start)
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ticker analysis pipeline")
+    parser.add_argument("--mode", choices=["live", "record", "replay"], default="replay")
+    parser.add_argument("--record-dir", default=MARKET_DATA_RECORD_DIR)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Artificial latency per provider call in replay mode (seconds)")
+    parser.add_argument("--tickers", type=int, default=10, help="Number of tickers from tickers.csv")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--full", action="store_true", help="Time the full graph.invoke (calls OpenAI)")
+    parser.add_argument("--trace", action="store_true", help="Print span latency percentiles")
+    args = parser.parse_args()
+    tracer.enabled = tracer.enabled or args.trace
+
+    if not args.full:
+        # ChatOpenAI validates the key at construction; the LLM is never called here
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark-no-llm")
+
+    from src.agent import TickerAnalysisAgent, pipeline_latency
+
+    provider = build_provider(args.mode, args.record_dir, args.latency)
+    agent = TickerAnalysisAgent()
+    agent.db = TickerDatabase(db_path=os.path.join(tempfile.mkdtemp(prefix='benchmark-'), 'ticker_data.db'))
+    agent.market_data = provider
+    as_of = provider.last_date() if isinstance(provider, ReplayProvider) else None
+    agent.data_fetcher = DataFetcher(store=agent.db, provider=provider, as_of=as_of)
+
+    tickers = list(agent.ticker_map)[:args.tickers]
+    iterations = 1 if args.mode == 'record' else args.iterations
+
+    print("=" * 70)
+    print(f"Pipeline benchmark: mode={args.mode} tickers={len(tickers)} iterations={iterations}")
+    print("=" * 70)
+
+    node_times = {}
+    run_times = []
+    critical_paths = []
+    errors = 0
+    start_all = time.perf_counter()
+
+    for _ in range(iterations):
+        for ticker in tickers:
+            start = time.perf_counter()
+            if args.full:
+                with tracer.trace("benchmark", ticker=ticker):
+                    state = agent.graph.invoke(agent.initial_state(ticker))
+                latency = pipeline_latency(state.get("node_timings", {}))
+                critical_paths.append(latency['critical_path_seconds'])
+                for node, timing in state.get("node_timings", {}).items():
+                    node_times.setdefault(node, []).append(timing['duration'])
+            else:
+                with tracer.trace("benchmark", ticker=ticker):
+                    state = run_data_nodes(agent, ticker, node_times)
+            run_times.append(time.perf_counter() - start)
+            if state.get("error"):
+                errors += 1
+                print(f"   ⚠️  {ticker}: {state['error']}")
+
+    total = time.perf_counter() - start_all
+
+    print(f"\nRuns: {len(run_times)} ({errors} with errors) in {total:.2f}s")
+    print(f"Throughput: {len(run_times) / total:.2f} tickers/s")
+    print(f"Per-ticker latency: mean {statistics.mean(run_times) * 1000:.1f} ms | "
+          f"median {statistics.median(run_times) * 1000:.1f} ms | max {max(run_times) * 1000:.1f} ms")
+
+    if critical_paths:
+        print(f"Critical path: mean {statistics.mean(critical_paths) * 1000:.1f} ms")
+
+    for node, times in node_times.items():
+        print(f"  {node:<24} mean {statistics.mean(times) * 1000:8.1f} ms")
+
+    if args.trace:
+        print("\nSpan latency:")
+        print(format_latency_summary(tracer.latency_summary()))
+
+    if args.mode == 'record':
+        print(f"\n💾 Responses recorded to {args.record_dir}/")
+
+
+if __name__ == "__main__":
+    main()
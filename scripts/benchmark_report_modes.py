@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Compare generate_report modes (latency, LLM calls and tokens per report)
+
+Data nodes run once per ticker against recorded market data; the report is
+then generated in every mode from the same state. Requires OPENAI_API_KEY.
+
+    python scripts/benchmark_report_modes.py --tickers 5
+    python scripts/benchmark_report_modes.py --modes two_pass rule --mode live
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.config import MARKET_DATA_RECORD_DIR, REPORT_MODES
+from scripts.benchmark_pipeline import build_provider, run_data_nodes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generate_report modes")
+    parser.add_argument("--mode", choices=["live", "record", "replay"], default="replay")
+    parser.add_argument("--record-dir", default=MARKET_DATA_RECORD_DIR)
+    parser.add_argument("--tickers", type=int, default=5, help="Number of tickers from tickers.csv")
+    parser.add_argument("--modes", nargs="+", choices=REPORT_MODES, default=list(REPORT_MODES))
+    args = parser.parse_args()
+
+    from src.agent import TickerAnalysisAgent, summarize_report_metrics
+
+    provider = build_provider(args.mode, args.record_dir, 0.0)
+    agent = TickerAnalysisAgent()
+    agent.market_data = provider
+    agent.data_fetcher.provider = provider
+    agent.news_fetcher.provider = provider
+
+    tickers = list(agent.ticker_map)[:args.tickers]
+    print("=" * 70)
+    print(f"Report mode benchmark: tickers={len(tickers)} modes={', '.join(args.modes)}")
+    print("=" * 70)
+
+    metrics = []
+    for ticker in tickers:
+        state = run_data_nodes(agent, ticker, {})
+        if state.get("error"):
+            print(f"   ⚠️  {ticker}: {state['error']}")
+            continue
+        for mode in args.modes:
+            agent.report_mode = mode
+            # fresh: modes share prompts, so cached answers would skew the comparison
+            result = agent.generate_report({**state, "fresh": True})
+            if result.get("report_metrics"):
+                metrics.append(result["report_metrics"])
+
+    print(f"\n{'mode':<12} {'reports':>7} {'latency':>10} {'calls':>6} {'in tok':>8} {'out tok':>8} {'total':>8}")
+    for mode, row in summarize_report_metrics(metrics).items():
+        print(f"{mode:<12} {row['reports']:>7} {row['mean_latency_seconds']:>9.2f}s {row['mean_llm_calls']:>6.2f} "
+              f"{row['mean_input_tokens']:>8.0f} {row['mean_output_tokens']:>8.0f} {row['mean_total_tokens']:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,28 @@
 #!/usr/bin/env python3
 """
-Fetch 30 days historical prices for all tickers in tickers.csv
+Fetch historical prices (30 days by default) for all tickers in tickers.csv
+
+After storing each ticker's bars, its persisted indicator state is rolled
+forward (src/indicator_state.py) and the day's indicators are saved, so the
+daily refresh costs one O(1) update per new bar instead of a full recompute.
+
+The ticker's monthly percentile sketches (src/quantile_sketch.py) are then
+folded from its full stored bar history, so ?lookback=3y/5y requests read
+sketches covering everything stored rather than just the analysis fetch.
+Run once with --period 5y to backfill the bar store they are seeded from.
 """
+import os
 import sys
 import csv
-import yfinance as yf
 import sqlite3
-from datetime import datetime, timedelta
-import time
+import argparse
 
-sys.path.insert(0, 'src')
-from database import TickerDatabase
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.data_fetcher import DataFetcher, normalize_bars
+from src.database import TickerDatabase
+from src.indicator_state import refresh_indicator_state
+from src.technical_analysis import TechnicalAnalyzer
+from src.config import PERCENTILE_SKETCHES_ENABLED
 
 def load_tickers(csv_path='data/tickers.csv'):
     """Load tickers from CSV"""
@@ -21,64 +33,21 @@ def load_tickers(csv_path='data/tickers.csv'):
             tickers[row['Symbol']] = row['Ticker']
     return tickers
 
-def fetch_30day_history(ticker):
-    """Fetch 30 days of historical data for a ticker"""
-    try:
-        stock = yf.Ticker(ticker)
-        # Fetch 30 days of data
-        hist = stock.history(period='30d')
-        
-        if hist.empty:
-            print(f"  ⚠️  No data for {ticker}")
-            return None
-        
-        return hist
-    except Exception as e:
-        print(f"  ❌ Error fetching {ticker}: {str(e)}")
-        return None
-
-def store_historical_data(db, symbol, ticker, hist_data):
-    """Store historical data in database"""
-    conn = sqlite3.connect(db.db_path)
-    cursor = conn.cursor()
-    
-    stored_count = 0
-    for date, row in hist_data.iterrows():
-        try:
-            date_str = date.strftime('%Y-%m-%d')
-            
-            # Insert or ignore (since we have UNIQUE constraint)
-            cursor.execute('''
-                INSERT OR IGNORE INTO ticker_data 
-                (symbol, ticker, date, open, high, low, close, volume)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                symbol, 
-                ticker, 
-                date_str,
-                float(row['Open']),
-                float(row['High']),
-                float(row['Low']),
-                float(row['Close']),
-                int(row['Volume'])
-            ))
-            
-            if cursor.rowcount > 0:
-                stored_count += 1
-                
-        except Exception as e:
-            print(f"    Error storing {date_str}: {str(e)}")
-            continue
-    
-    conn.commit()
-    conn.close()
-    
-    return stored_count
+def refresh_percentile_sketches(db, analyzer, ticker):
+    """Fold a ticker's full stored bar history into its monthly percentile sketches"""
+    stored = db.get_price_history(ticker)
+    if stored.empty:
+        return 0
+    return analyzer.update_percentile_sketches(db, ticker, analyzer.compute_indicator_frame(stored))
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Fetch historical prices for all tickers")
+    parser.add_argument("--period", default="30d", help="yfinance history period (e.g. 5y to backfill)")
+    args = parser.parse_args()
+
     print("=" * 70)
-    print("Fetching 30 Days Historical Prices for All Tickers")
+    print(f"Fetching {args.period} Historical Prices for All Tickers")
     print("=" * 70)
     
     # Load tickers
@@ -89,27 +58,37 @@ def main():
     # Initialize database
     db = TickerDatabase()
     
-    # Fetch and store data for each ticker
+    # Fetch all histories in batched requests, then store each ticker
     print("\n2. Fetching historical data...")
+    frames, failed = DataFetcher().fetch_many(list(tickers.values()), period=args.period)
+    analyzer = TechnicalAnalyzer()
     total_stored = 0
     success_count = 0
-    
+
     for i, (symbol, ticker) in enumerate(tickers.items(), 1):
         print(f"\n[{i}/{len(tickers)}] {symbol} ({ticker})")
-        
-        # Fetch historical data
-        hist = fetch_30day_history(ticker)
-        
-        if hist is not None:
-            # Store in database
-            count = store_historical_data(db, symbol, ticker, hist)
-            print(f"   ✓ Stored {count} new records ({len(hist)} total days fetched)")
-            total_stored += count
-            success_count += 1
-        
-        # Rate limiting - be nice to Yahoo Finance
-        if i < len(tickers):
-            time.sleep(0.5)  # 500ms delay between requests
+
+        hist = frames.get(ticker)
+        if hist is None:
+            print(f"  ❌ Error fetching {ticker}: {failed.get(ticker, 'No data returned')}")
+            continue
+
+        # Store in database (re-fetched bars, e.g. a partial intraday bar, are overwritten)
+        count = db.upsert_price_history(ticker, normalize_bars(hist), symbol)
+        print(f"   ✓ Stored {count} records ({len(hist)} total days fetched)")
+        total_stored += count
+
+        # Roll the incremental indicator state forward to the newest bar
+        indicators = refresh_indicator_state(db, ticker, hist)
+        if indicators is not None:
+            last_date = hist.index[-1].strftime('%Y-%m-%d')
+            db.insert_technical_indicators(ticker, last_date, indicators)
+            print(f"   ✓ Indicators updated for {last_date}")
+
+        if PERCENTILE_SKETCHES_ENABLED:
+            written = refresh_percentile_sketches(db, analyzer, ticker)
+            print(f"   ✓ {written} percentile sketch months updated")
+        success_count += 1
     
     # Summary
     print("\n" + "=" * 70)
@@ -117,7 +96,7 @@ def main():
     print(f"  Total tickers processed: {len(tickers)}")
     print(f"  Successful: {success_count}")
     print(f"  Failed: {len(tickers) - success_count}")
-    print(f"  New records stored: {total_stored}")
+    print(f"  Records stored: {total_stored}")
     print("=" * 70)
     
     # Show database stats
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Import-time profile of the src entry points
+
+    python scripts/profile_imports.py                 # budgeted entry points
+    python scripts/profile_imports.py src.pdf_generator --top 20
+    python scripts/profile_imports.py --check         # exit 1 on a budget violation (time budgets enforced)
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.import_profile import IMPORT_BUDGETS, check_budgets, format_profile, profile_import
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile import time of src modules")
+    parser.add_argument("modules", nargs="*", help="Modules to profile (default: budgeted entry points)")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports shown per module")
+    parser.add_argument("--check", action="store_true", help="Check IMPORT_BUDGETS and deferred imports")
+    args = parser.parse_args()
+
+    if args.check:
+        profiles, violations = check_budgets(enforce_time=True)
+        for module, profile in profiles.items():
+            print(f"{module:<24} {profile['seconds'] * 1000:7.0f} ms (budget {IMPORT_BUDGETS[module] * 1000:.0f} ms)")
+        for violation in violations:
+            print(f"❌ {violation}")
+        if violations:
+            sys.exit(1)
+        print("✅ All import budgets met")
+        return
+
+    for module in args.modules or list(IMPORT_BUDGETS):
+        print(format_profile(profile_import(module), top=args.top))
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Sweep fast/slow SMA pairs for every supported ticker and report the best pair
+
+    python scripts/sweep_sma.py --period 10y --workers 8 --output data/sma_sweep.csv
+
+Histories are batch-downloaded once (and stored in the bar store); the grid is
+then evaluated per ticker in a process pool reading prices from shared memory.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_fetcher import DataFetcher
+from src.database import TickerDatabase
+from src.strategy_sweep import METRIC_COLUMNS, best_parameters, sweep_sma_grid
+
+
+def parse_periods(text):
+    """'5:50:5' -> range(5, 51, 5); '10,20,30' -> [10, 20, 30]"""
+    if ':' in text:
+        start, stop, step = (int(part) for part in text.split(':'))
+        return list(range(start, stop + 1, step))
+    return [int(part) for part in text.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep SMA crossover parameters across tickers")
+    parser.add_argument("--period", default="5y", help="yfinance history period")
+    parser.add_argument("--fast", default="5:50:5", help="Fast periods (start:stop:step or comma list)")
+    parser.add_argument("--slow", default="20:200:10", help="Slow periods (start:stop:step or comma list)")
+    parser.add_argument("--rank-by", default="sharpe_ratio", choices=METRIC_COLUMNS)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--tickers", nargs="*", help="Yahoo tickers (default: all in tickers.csv)")
+    parser.add_argument("--output", help="Write the full ranked table to this CSV path")
+    args = parser.parse_args()
+
+    fetcher = DataFetcher(store=TickerDatabase())
+    tickers = args.tickers or list(fetcher.load_tickers().values())
+
+    print(f"📥 Downloading {len(tickers)} histories ({args.period})...")
+    histories, failed = fetcher.fetch_many(tickers, period=args.period)
+    for ticker, error in failed.items():
+        print(f"   ⚠️  {ticker}: {error}")
+
+    fast_periods = parse_periods(args.fast)
+    slow_periods = parse_periods(args.slow)
+    print(f"🔁 Sweeping {len(fast_periods)} x {len(slow_periods)} periods over {len(histories)} tickers...")
+
+    start = time.perf_counter()
+    results = sweep_sma_grid(histories, fast_periods, slow_periods, rank_by=args.rank_by,
+                             max_workers=args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"✅ {len(results)} backtests in {elapsed:.2f}s")
+
+    for ticker, strategies in best_parameters(results).items():
+        for strategy, best in strategies.items():
+            print(f"  {ticker:<12} {strategy:<10} SMA {best['fast_period']:>3}/{best['slow_period']:<3} "
+                  f"sharpe {best['sharpe_ratio']:6.2f} | return {best['total_return_pct']:+8.2f}% | "
+                  f"win {best['win_rate']:5.1f}% | trades {best['num_trades']}")
+
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,31 @@
 from typing import TypedDict, Annotated, Sequence
-from langgraph.graph import StateGraph, END
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, AIMessage
+import asyncio
 import operator
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from datetime import datetime, timedelta, timezone
 import re
+from dataclasses import asdict
 import pandas as pd
 from src.data_fetcher import DataFetcher
 from src.technical_analysis import TechnicalAnalyzer
+from src.quantile_sketch import lookback_coverage
 from src.database import TickerDatabase
 from src.news_fetcher import NewsFetcher
-from src.chart_generator import ChartGenerator
-from src.pdf_generator import PDFReportGenerator
-from src.audio_generator import AudioGenerator
-from src.faithfulness_scorer import FaithfulnessScorer
-from src.completeness_scorer import CompletenessScorer
-from src.reasoning_quality_scorer import ReasoningQualityScorer
+from src.market_data import get_market_data_provider
+from src.faithfulness_scorer import FaithfulnessScore, FaithfulnessScorer
+from src.completeness_scorer import CompletenessScore, CompletenessScorer
+from src.reasoning_quality_scorer import ReasoningQualityScore, ReasoningQualityScorer
+from src.scoring_worker import ScoringWorker
+from src.strategy_statistics import StrategyBootstrap
+from src.llm_cache import CachedLLM, LLMCache
+from src.cache import format_component_timings, lazy_component
+from src.tracing import traced, tracer
+from src.config import STRATEGY_BOOTSTRAP, STRATEGY_BOOTSTRAP_RESAMPLES, REPORT_MODE, REPORT_MODES, REPORT_CLASSIFIER_MODEL
+from src.config import PERCENTILE_SKETCHES_ENABLED, REPORT_CACHE_ENABLED, REPORT_CACHE_MAX_AGE, SCORING_MODE, SCORING_MODES, SCORING_WAIT_TIMEOUT
+from src.config import LLM_CACHE_ENABLED, LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES
 try:
     from src.strategy import SMAStrategyBacktester
     HAS_STRATEGY = True
@@ -23,11 +33,136 @@ except ImportError:
     HAS_STRATEGY = False
     SMAStrategyBacktester = None
 
+def merge_dicts(left: dict, right: dict) -> dict:
+    """State reducer: merge dict updates from nodes that ran in the same step"""
+    return {**(left or {}), **(right or {})}
+
+
+# Node -> nodes it waits for. build_graph wires the edges from this, so
+# independent nodes share a superstep and run concurrently.
+GRAPH_DEPENDENCIES = {
+    "fetch_data": [],
+    "fetch_news": [],
+    "analyze_technical": ["fetch_data"],
+    "check_cache": ["analyze_technical", "fetch_news"],
+    # After check_cache rather than analyze_technical so the chart renders in the same
+    # step as the report (a LangGraph step waits for its slowest node)
+    "generate_chart": ["check_cache"],
+    "generate_report": ["check_cache"],
+    "generate_audio_thai": ["generate_report"],
+    "generate_audio_english": ["generate_report"],
+}
+
+# Nodes that can cut the run short: node -> (state flag, dependents skipped when it is set)
+GRAPH_EXITS = {
+    "check_cache": ("cache_hit", ("generate_report",)),
+}
+
+# State key -> score dataclass of the narrative scores
+SCORE_TYPES = {
+    "faithfulness_score": FaithfulnessScore,
+    "completeness_score": CompletenessScore,
+    "reasoning_quality_score": ReasoningQualityScore,
+}
+
+
+def critical_path(node_timings: dict, dependencies: dict = None):
+    """
+    Critical-path latency of a graph run
+
+    Args:
+        node_timings: State node_timings (node -> {'start', 'end', 'duration'})
+        dependencies: Node -> prerequisite nodes (defaults to GRAPH_DEPENDENCIES)
+
+    Returns:
+        (latency_seconds, path): the longest chain of node durations through
+        the dependency graph and the nodes on it, in order
+    """
+    dependencies = GRAPH_DEPENDENCIES if dependencies is None else dependencies
+    finish = {}
+    previous = {}
+
+    def resolve(node):
+        if node not in finish:
+            ready, before = 0.0, None
+            for dependency in dependencies.get(node, []):
+                if dependency in node_timings and resolve(dependency) > ready:
+                    ready, before = finish[dependency], dependency
+            finish[node] = ready + node_timings[node]['duration']
+            previous[node] = before
+        return finish[node]
+
+    if not node_timings:
+        return 0.0, []
+
+    last = max(node_timings, key=resolve)
+    path = []
+    while last is not None:
+        path.append(last)
+        last = previous[last]
+    return finish[path[0]], path[::-1]
+
+
+def pipeline_latency(node_timings: dict, dependencies: dict = None) -> dict:
+    """
+    Latency summary of a graph run
+
+    Returns:
+        Dict with wall_seconds (first node start to last node end),
+        critical_path_seconds and critical_path (see critical_path) and
+        sequential_seconds (sum of node durations, i.e. the old linear graph)
+    """
+    if not node_timings:
+        return {'wall_seconds': 0.0, 'critical_path_seconds': 0.0, 'critical_path': [], 'sequential_seconds': 0.0}
+
+    latency, path = critical_path(node_timings, dependencies)
+    return {
+        'wall_seconds': max(t['end'] for t in node_timings.values()) - min(t['start'] for t in node_timings.values()),
+        'critical_path_seconds': latency,
+        'critical_path': path,
+        'sequential_seconds': sum(t['duration'] for t in node_timings.values())
+    }
+
+
+def format_pipeline_latency(node_timings: dict) -> str:
+    """One-line latency report for logs"""
+    latency = pipeline_latency(node_timings)
+    return (f"⏱️  Pipeline {latency['wall_seconds']:.2f}s wall | critical path "
+            f"{latency['critical_path_seconds']:.2f}s ({' → '.join(latency['critical_path'])}) | "
+            f"sequential {latency['sequential_seconds']:.2f}s")
+
+
+def summarize_report_metrics(metrics: list) -> dict:
+    """
+    Average generate_report cost per report mode
+
+    Args:
+        metrics: report_metrics dicts from analyzed states
+
+    Returns:
+        Dict of mode -> {'reports', 'mean_latency_seconds', 'mean_llm_calls',
+        'mean_cache_hits', 'mean_input_tokens', 'mean_output_tokens', 'mean_total_tokens'}
+    """
+    by_mode = {}
+    for entry in metrics:
+        by_mode.setdefault(entry['mode'], []).append(entry)
+
+    summary = {}
+    for mode, entries in by_mode.items():
+        count = len(entries)
+        summary[mode] = {'reports': count,
+                         'mean_latency_seconds': sum(e['latency_seconds'] for e in entries) / count}
+        for key in ('llm_calls', 'cache_hits', 'input_tokens', 'output_tokens', 'total_tokens'):
+            summary[mode][f'mean_{key}'] = sum(e.get(key, 0) for e in entries) / count
+    return summary
+
+
 class AgentState(TypedDict):
     messages: Annotated[Sequence[HumanMessage | AIMessage], operator.add]
     ticker: str
     ticker_data: dict
     indicators: dict
+    indicator_frame: pd.DataFrame  # Per-date indicator series shared with the chart
     percentiles: dict  # Add percentiles field
     chart_patterns: list  # Add chart patterns field
     pattern_statistics: dict  # Add pattern statistics field
@@ -37,56 +172,230 @@ class AgentState(TypedDict):
     chart_base64: str  # Add chart image field (base64 PNG)
     report: str
     faithfulness_score: dict  # Add faithfulness scoring field
+    completeness_score: dict
+    reasoning_quality_score: dict
+    scores_pending: bool  # Scores are being computed by the background scoring worker
+    report_metrics: dict  # LLM calls, tokens and latency of generate_report
+    fresh: bool  # Bypass the LLM response cache
+    use_report_cache: bool  # Let check_cache answer with a stored report
+    percentile_lookback: str  # '1y'/'3y'/'5y' reads percentiles from the monthly sketches (None: full history)
+    percentile_coverage: dict  # Months of the lookback the stored sketches cover (see lookback_coverage)
+    cache_hit: bool  # Report served from the database by check_cache
     audio_base64: str  # Thai audio (base64 MP3)
     audio_english_base64: str  # English audio (base64 MP3)
     error: str
+    node_timings: Annotated[dict, merge_dicts]  # node -> {'start', 'end', 'duration'} (perf_counter seconds)
 
 class TickerAnalysisAgent:
     def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4o", temperature=0.8)
-        self.data_fetcher = DataFetcher()
-        self.technical_analyzer = TechnicalAnalyzer()
-        self.news_fetcher = NewsFetcher()
-        self.chart_generator = ChartGenerator()
-        self.pdf_generator = PDFReportGenerator(use_thai_font=True)
-        # Initialize audio generator (optional - will skip if API keys not set)
+        # Components are built on first use (see lazy_component): a LINE reply
+        # never pays for the PDF generator, audio clients or scorers
+        if REPORT_MODE not in REPORT_MODES:
+            raise ValueError(f"Unknown REPORT_MODE '{REPORT_MODE}' (expected one of {REPORT_MODES})")
+        if SCORING_MODE not in SCORING_MODES:
+            raise ValueError(f"Unknown SCORING_MODE '{SCORING_MODE}' (expected one of {SCORING_MODES})")
+        self.report_mode = REPORT_MODE
+        self.scoring_mode = SCORING_MODE
+        self.classifier_llm = None
+        # Optional wrapper applied to the classifier model when it is built (BatchEngine's OpenAI limit)
+        self.classifier_llm_limit = None
+        self.component_timings = {}
+        self._reported_components = set()
+
+    @lazy_component
+    def llm(self):
+        from langchain_openai import ChatOpenAI
+        llm = ChatOpenAI(model="gpt-4o", temperature=0.8)
+        # Identical prompts (same ticker, same trading day) are answered from disk
+        if self.llm_cache is not None:
+            llm = CachedLLM(llm, self.llm_cache)
+        return llm
+
+    @lazy_component
+    def llm_cache(self):
+        if not LLM_CACHE_ENABLED:
+            return None
+        return LLMCache(LLM_CACHE_PATH, ttl_seconds=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES)
+
+    @lazy_component
+    def db(self):
+        return TickerDatabase()
+
+    @lazy_component
+    def market_data(self):
+        return get_market_data_provider()
+
+    @lazy_component
+    def data_fetcher(self):
+        return DataFetcher(store=self.db, provider=self.market_data)
+
+    @lazy_component
+    def technical_analyzer(self):
+        return TechnicalAnalyzer()
+
+    @lazy_component
+    def news_fetcher(self):
+        return NewsFetcher(provider=self.market_data)
+
+    @lazy_component
+    def chart_generator(self):
+        from src.chart_generator import ChartGenerator  # matplotlib
+        return ChartGenerator()
+
+    @lazy_component
+    def pdf_generator(self):
+        from src.pdf_generator import PDFReportGenerator  # reportlab
+        return PDFReportGenerator(use_thai_font=True)
+
+    @lazy_component
+    def audio_generator(self):
+        # Optional - None if API keys are not set
+        from src.audio_generator import AudioGenerator  # httpx
         try:
-            self.audio_generator = AudioGenerator()
+            return AudioGenerator()
         except (ValueError, Exception) as e:
             print(f"⚠️  Audio generator not available: {str(e)}")
             print("   Note: Botnoi API key required for Thai audio, ElevenLabs API key required for English audio")
-            self.audio_generator = None
-        self.faithfulness_scorer = FaithfulnessScorer()
-        self.completeness_scorer = CompletenessScorer()
-        self.reasoning_quality_scorer = ReasoningQualityScorer()
-        self.db = TickerDatabase()
-        self.strategy_backtester = SMAStrategyBacktester(fast_period=20, slow_period=50)
-        self.ticker_map = self.data_fetcher.load_tickers()
-        self.graph = self.build_graph()
-
-    def build_graph(self):
-        """Build LangGraph workflow"""
+            return None
+
+    @lazy_component
+    def faithfulness_scorer(self):
+        return FaithfulnessScorer()
+
+    @lazy_component
+    def completeness_scorer(self):
+        return CompletenessScorer()
+
+    @lazy_component
+    def reasoning_quality_scorer(self):
+        return ReasoningQualityScorer()
+
+    @lazy_component
+    def scoring_worker(self):
+        return ScoringWorker()
+
+    @lazy_component
+    def strategy_backtester(self):
+        return SMAStrategyBacktester(fast_period=20, slow_period=50)
+
+    @lazy_component
+    def strategy_bootstrap(self):
+        return StrategyBootstrap(n_resamples=STRATEGY_BOOTSTRAP_RESAMPLES) if STRATEGY_BOOTSTRAP else None
+
+    @lazy_component
+    def ticker_map(self):
+        return self.data_fetcher.load_tickers()
+
+    @lazy_component
+    def graph(self):
+        return self.build_graph()
+
+    @lazy_component
+    def async_graph(self):
+        return self.build_graph(asynchronous=True)
+
+    def new_component_timings(self) -> dict:
+        """Build times (seconds) of components constructed since the last call"""
+        timings = self.__dict__.setdefault('component_timings', {})
+        reported = self.__dict__.setdefault('_reported_components', set())
+        new = {name: seconds for name, seconds in timings.items() if name not in reported}
+        reported.update(new)
+        return new
+
+    def log_component_timings(self):
+        """Print the cold-start cost of components this request had to build"""
+        new = self.new_component_timings()
+        if new:
+            print(format_component_timings(new))
+
+    def build_graph(self, asynchronous=False):
+        """
+        Build LangGraph workflow
+
+        Nodes without a dependency path between them run in the same step:
+        price and news fetches together, chart rendering alongside the report
+        LLM calls, and the Thai and English audio alongside each other.
+
+        Args:
+            asynchronous: Use the async node implementations (a<node>); the
+                compiled graph must then be run with ainvoke
+        """
+        from langgraph.graph import StateGraph, START, END
+
         workflow = StateGraph(AgentState)
 
         # Add nodes
-        workflow.add_node("fetch_data", self.fetch_data)
-        workflow.add_node("fetch_news", self.fetch_news)
-        workflow.add_node("analyze_technical", self.analyze_technical)
-        workflow.add_node("generate_chart", self.generate_chart)
-        workflow.add_node("generate_report", self.generate_report)
-        workflow.add_node("generate_audio", self.generate_audio)
+        for name in GRAPH_DEPENDENCIES:
+            if asynchronous:
+                workflow.add_node(name, self._async_graph_node(name, getattr(self, f"a{name}")))
+            else:
+                workflow.add_node(name, self._graph_node(name, getattr(self, name)))
 
         # Add edges
-        workflow.set_entry_point("fetch_data")
-        workflow.add_edge("fetch_data", "fetch_news")
-        workflow.add_edge("fetch_news", "analyze_technical")
-        workflow.add_edge("analyze_technical", "generate_chart")
-        workflow.add_edge("generate_chart", "generate_report")
-        workflow.add_edge("generate_report", "generate_audio")
-        workflow.add_edge("generate_audio", END)
+        for name, dependencies in GRAPH_DEPENDENCIES.items():
+            if not dependencies:
+                workflow.add_edge(START, name)
+            elif len(dependencies) == 1:
+                if dependencies[0] not in GRAPH_EXITS:
+                    workflow.add_edge(dependencies[0], name)
+            else:
+                # Join: wait for every dependency
+                workflow.add_edge(dependencies, name)
+
+        # Exit nodes skip some dependents (or route to END) when their flag is set
+        for name, (flag, skipped) in GRAPH_EXITS.items():
+            dependents = [node for node, dependencies in GRAPH_DEPENDENCIES.items() if dependencies == [name]]
+            kept = [node for node in dependents if node not in skipped] or END
+            workflow.add_conditional_edges(
+                name,
+                lambda state, flag=flag, dependents=dependents, kept=kept: kept if state.get(flag) else dependents,
+                dependents + [END]
+            )
+
+        upstream = {dependency for dependencies in GRAPH_DEPENDENCIES.values() for dependency in dependencies}
+        for name in GRAPH_DEPENDENCIES:
+            if name not in upstream:
+                workflow.add_edge(name, END)
 
         return workflow.compile()
 
+    def _graph_node(self, name, func):
+        """
+        Wrap a node so it returns only the keys it changed, plus its timing
+
+        Nodes update the state dict in place; parallel branches may only write
+        disjoint keys, so the wrapper diffs against the input and hands
+        LangGraph just the updates.
+        """
+        def node(state):
+            before = dict(state)
+            start = time.perf_counter()
+            with tracer.span(f"node.{name}"):
+                result = func(state)
+            end = time.perf_counter()
+            return self._node_updates(name, before, result, start, end)
+
+        return node
+
+    def _async_graph_node(self, name, func):
+        """_graph_node for async node implementations"""
+        async def node(state):
+            before = dict(state)
+            start = time.perf_counter()
+            with tracer.span(f"node.{name}"):
+                result = await func(state)
+            end = time.perf_counter()
+            return self._node_updates(name, before, result, start, end)
+
+        return node
+
+    def _node_updates(self, name, before, result, start, end):
+        """Keys a node changed, plus its node_timings entry"""
+        updates = {key: value for key, value in result.items()
+                   if key not in before or before[key] is not value}
+        updates["node_timings"] = {name: {'start': start, 'end': end, 'duration': end - start}}
+        return updates
+
     def fetch_data(self, state: AgentState) -> AgentState:
         """Fetch ticker data from Yahoo Finance"""
         ticker = state["ticker"]
@@ -154,6 +463,96 @@ class TickerAnalysisAgent:
 
         return state
 
+    def check_cache(self, state: AgentState) -> AgentState:
+        """
+        Serve the stored report when nothing has changed since it was written
+
+        Only runs for requests that opt in with state["use_report_cache"]
+        (PDF and batch runs regenerate). A report saved for the latest bar's
+        date and close is reused unless a high-impact news item was published
+        after it. The node runs after analyze_technical, alongside
+        generate_chart, so a hit still returns fresh indicators, percentiles
+        and chart: it only skips the report LLM calls, audio and scoring.
+        """
+        state["cache_hit"] = False
+        if state.get("error") or not state.get("use_report_cache") or not REPORT_CACHE_ENABLED:
+            return state
+
+        yahoo_ticker = self.ticker_map.get(state["ticker"].upper())
+        latest_date = state["ticker_data"].get("date")
+        if not yahoo_ticker or latest_date is None:
+            return state
+
+        # A report older than the newest high-impact news is stale
+        news_times = [self._utc_time(news['timestamp']) for news in state.get("news", [])
+                      if news.get('timestamp')]
+        cached = self.db.get_cached_report(yahoo_ticker, latest_date,
+                                           generated_after=max(news_times, default=None),
+                                           close=state["ticker_data"].get("close"))
+        if cached:
+            print(f"♻️  Serving cached report for {state['ticker']} ({latest_date})")
+            state["report"] = cached
+            state["cache_hit"] = True
+
+        return state
+
+    def stored_report(self, ticker: str) -> str | None:
+        """
+        Report for the latest stored bar, looked up before anything is fetched
+
+        analyze_ticker and the LINE bot only return the report text, so a
+        repeat request served here skips the Yahoo and news fetches, the
+        analysis and the chart. The store only sees newer bars and news when
+        a request fetches them, so only reports younger than
+        REPORT_CACHE_MAX_AGE seconds are reused; older ones fall through to
+        the graph, where check_cache applies the bar and news invalidation.
+        """
+        if not REPORT_CACHE_ENABLED or REPORT_CACHE_MAX_AGE <= 0:
+            return None
+
+        yahoo_ticker = self.ticker_map.get(ticker.upper())
+        if not yahoo_ticker:
+            return None
+
+        _, last_date = self.db.get_price_date_range(yahoo_ticker)
+        if last_date is None:
+            return None
+
+        latest_bar = self.db.get_price_history(yahoo_ticker, start_date=last_date)
+        generated_after = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=REPORT_CACHE_MAX_AGE)
+        cached = self.db.get_cached_report(yahoo_ticker, last_date, generated_after=generated_after,
+                                           close=latest_bar['Close'].iloc[-1])
+        if cached:
+            print(f"♻️  Serving stored report for {ticker} ({last_date}) without fetching")
+        return cached
+
+    def _utc_time(self, timestamp: datetime) -> datetime:
+        """Naive UTC datetime (naive news timestamps are local time)"""
+        return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+    # yfinance, pandas/NumPy, SQLite and matplotlib have no async API: the async
+    # graph runs these nodes on the default thread pool so the event loop stays free
+
+    async def afetch_data(self, state: AgentState) -> AgentState:
+        """Async fetch_data"""
+        return await asyncio.to_thread(self.fetch_data, state)
+
+    async def afetch_news(self, state: AgentState) -> AgentState:
+        """Async fetch_news"""
+        return await asyncio.to_thread(self.fetch_news, state)
+
+    async def acheck_cache(self, state: AgentState) -> AgentState:
+        """Async check_cache"""
+        return await asyncio.to_thread(self.check_cache, state)
+
+    async def aanalyze_technical(self, state: AgentState) -> AgentState:
+        """Async analyze_technical"""
+        return await asyncio.to_thread(self.analyze_technical, state)
+
+    async def agenerate_chart(self, state: AgentState) -> AgentState:
+        """Async generate_chart"""
+        return await asyncio.to_thread(self.generate_chart, state)
+
     def analyze_technical(self, state: AgentState) -> AgentState:
         """Analyze technical indicators with percentile analysis"""
         if state.get("error"):
@@ -182,16 +581,20 @@ class TickerAnalysisAgent:
         strategy_performance = {}
         if self.strategy_backtester:
             try:
-                buy_results = self.strategy_backtester.backtest_buy_only(hist_data)
-                sell_results = self.strategy_backtester.backtest_sell_only(hist_data)
+                # One signal pass shared by both backtests and both last-signal lookups
+                signals = self.strategy_backtester.detect_signals(hist_data)
+                buy_results = self.strategy_backtester.backtest_buy_only(hist_data, signals=signals)
+                sell_results = self.strategy_backtester.backtest_sell_only(hist_data, signals=signals)
                 
                 if buy_results and sell_results:
                     strategy_performance = {
                         'buy_only': buy_results,
                         'sell_only': sell_results,
-                        'last_buy_signal': self._get_last_buy_signal(hist_data),
-                        'last_sell_signal': self._get_last_sell_signal(hist_data)
+                        'last_buy_signal': self._get_last_buy_signal(hist_data, signals=signals),
+                        'last_sell_signal': self._get_last_sell_signal(hist_data, signals=signals)
                     }
+                    if self.strategy_bootstrap:
+                        self.strategy_bootstrap.attach(strategy_performance, signals)
             except Exception as e:
                 print(f"Error calculating strategy performance: {str(e)}")
                 strategy_performance = {}
@@ -202,7 +605,21 @@ class TickerAnalysisAgent:
             yahoo_ticker, ticker_data['date'], indicators
         )
 
+        # Answer a fixed lookback from the monthly sketches (folded by the daily refresh job).
+        # The coverage says how many of its months are stored; with none, the fetched history is used.
+        # Keys that are not sketched (cumulative VWAP) keep their fetched-history ranks
+        lookback = state.get("percentile_lookback")
+        if PERCENTILE_SKETCHES_ENABLED and lookback:
+            coverage = lookback_coverage(self.db, yahoo_ticker, lookback, as_of=ticker_data['date'])
+            if coverage['months_covered']:
+                sketched = self.technical_analyzer.calculate_sketch_percentiles(
+                    self.db, yahoo_ticker, indicators, lookback, as_of=ticker_data['date'])
+                if sketched:
+                    percentiles = {**percentiles, **sketched}
+            state["percentile_coverage"] = coverage
+
         state["indicators"] = indicators
+        state["indicator_frame"] = result.get('indicator_frame')
         state["percentiles"] = percentiles
         state["chart_patterns"] = chart_patterns
         state["pattern_statistics"] = pattern_statistics
@@ -224,7 +641,8 @@ class TickerAnalysisAgent:
                 ticker_data=ticker_data,
                 indicators=indicators,
                 ticker_symbol=ticker,
-                days=90
+                days=90,
+                indicator_frame=state.get("indicator_frame")
             )
 
             state["chart_base64"] = chart_base64
@@ -242,40 +660,242 @@ class TickerAnalysisAgent:
         if state.get("error"):
             return state
 
-        ticker = state["ticker"]
-        ticker_data = state["ticker_data"]
-        indicators = state["indicators"]
-        percentiles = state.get("percentiles", {})
-        chart_patterns = state.get("chart_patterns", [])
-        pattern_statistics = state.get("pattern_statistics", {})
+        metrics = self._new_report_metrics()
+        start = time.perf_counter()
+        fresh = state.get("fresh", False)
+
+        steps = self._report_steps(state)
+        try:
+            requests = next(steps)
+            while True:
+                requests = steps.send(self._run_llm_requests(requests, metrics, fresh))
+        except StopIteration as done:
+            report = done.value
+
+        metrics['latency_seconds'] = time.perf_counter() - start
+        state["report_metrics"] = metrics
+        return self._finish_report(state, report)
+
+    async def agenerate_report(self, state: AgentState) -> AgentState:
+        """Async generate_report: LLM calls are awaited instead of blocking a thread"""
+        if state.get("error"):
+            return state
+
+        metrics = self._new_report_metrics()
+        start = time.perf_counter()
+        fresh = state.get("fresh", False)
+
+        steps = self._report_steps(state)
+        try:
+            requests = next(steps)
+            while True:
+                requests = steps.send(await self._arun_llm_requests(requests, metrics, fresh))
+        except StopIteration as done:
+            report = done.value
+
+        metrics['latency_seconds'] = time.perf_counter() - start
+        state["report_metrics"] = metrics
+
+        # Database write and scoring are local blocking work
+        return await asyncio.to_thread(self._finish_report, state, report)
+
+    def _report_steps(self, state: AgentState):
+        """
+        The LLM calls of the configured report mode, as a generator
+
+        Yields each round of (llm, prompt) requests (several run concurrently)
+        and is sent back their texts in the same order; returns the report.
+        generate_report and agenerate_report only differ in how they run a round.
+        """
         strategy_performance = state.get("strategy_performance", {})
-        news = state.get("news", [])
-        news_summary = state.get("news_summary", {})
 
-        # First pass: Generate report without strategy data to determine recommendation
-        context = self.prepare_context(ticker, ticker_data, indicators, percentiles, news, news_summary, strategy_performance=None)
+        if self.report_mode == 'two_pass' or not self._strategy_can_align(strategy_performance):
+            # First pass: Generate report without strategy data to determine recommendation
+            report, = yield [(self.llm, self._report_prompt(state))]
+
+            # Second pass: If aligned, regenerate with strategy data
+            if self._needs_strategy_pass(state, report):
+                report, = yield [(self.llm, self._report_prompt(state, strategy_performance=strategy_performance))]
+
+        elif self.report_mode == 'concurrent':
+            # Both generations at once; keep the one matching the plain report's recommendation
+            report, strategy_report = yield [
+                (self.llm, self._report_prompt(state)),
+                (self.llm, self._report_prompt(state, strategy_performance=strategy_performance))
+            ]
+            if self._needs_strategy_pass(state, report):
+                report = strategy_report
+
+        else:
+            # Decide the recommendation up front, then generate once
+            if self.report_mode == 'classify':
+                answer, = yield [(self._get_classifier_llm(), self._classifier_prompt(state))]
+                recommendation = self._parse_recommendation(answer)
+            else:
+                recommendation = self._rule_recommendation(state["indicators"])
+            include_strategy = self._check_strategy_alignment(recommendation, strategy_performance)
+            report, = yield [(self.llm, self._report_prompt(state, strategy_performance if include_strategy else None))]
+
+        return report
+
+    def _run_llm_requests(self, requests: list, metrics: dict, fresh: bool = False) -> list:
+        """Texts for one round of _report_steps requests (several run on a thread pool)"""
+        if len(requests) == 1:
+            llm, prompt = requests[0]
+            return [self._llm_text(llm, prompt, metrics, fresh)]
+
+        with ThreadPoolExecutor(max_workers=len(requests)) as pool:
+            # copy_context keeps every call inside the request's trace
+            futures = [pool.submit(copy_context().run, self._invoke_llm, llm, prompt, fresh)
+                       for llm, prompt in requests]
+            return [self._record_llm_call(future.result(), metrics) for future in futures]
+
+    async def _arun_llm_requests(self, requests: list, metrics: dict, fresh: bool = False) -> list:
+        """Async _run_llm_requests (several requests are awaited together)"""
+        return list(await asyncio.gather(*(self._allm_text(llm, prompt, metrics, fresh)
+                                           for llm, prompt in requests)))
+
+    def _new_report_metrics(self) -> dict:
+        """Per-report LLM usage counters (see REPORT_MODES)"""
+        return {'mode': self.report_mode, 'llm_calls': 0, 'cache_hits': 0, 'input_tokens': 0,
+                'output_tokens': 0, 'total_tokens': 0, 'latency_seconds': 0.0}
+
+    def _record_llm_call(self, response, metrics: dict) -> str:
+        """Add a response's token usage to the metrics and return its text"""
+        response_metadata = getattr(response, 'response_metadata', None)
+        if isinstance(response_metadata, dict) and response_metadata.get('cached'):
+            metrics['cache_hits'] += 1
+            return response.content
+
+        metrics['llm_calls'] += 1
+        usage = getattr(response, 'usage_metadata', None)
+        if isinstance(usage, dict):
+            for key in ('input_tokens', 'output_tokens', 'total_tokens'):
+                metrics[key] += usage.get(key, 0) or 0
+        return response.content
+
+    def _invoke_llm(self, llm, prompt: str, fresh: bool = False):
+        """llm.invoke on one prompt; fresh skips the response cache"""
+        kwargs = {'bypass_cache': True} if fresh and isinstance(llm, CachedLLM) else {}
+        with tracer.span("openai.chat") as span:
+            response = llm.invoke([HumanMessage(content=prompt)], **kwargs)
+            span.set(**self._llm_span_attributes(response))
+        return response
+
+    def _llm_text(self, llm, prompt: str, metrics: dict, fresh: bool = False) -> str:
+        return self._record_llm_call(self._invoke_llm(llm, prompt, fresh), metrics)
+
+    async def _allm_text(self, llm, prompt: str, metrics: dict, fresh: bool = False) -> str:
+        kwargs = {'bypass_cache': True} if fresh and isinstance(llm, CachedLLM) else {}
+        with tracer.span("openai.chat") as span:
+            response = await llm.ainvoke([HumanMessage(content=prompt)], **kwargs)
+            span.set(**self._llm_span_attributes(response))
+        return self._record_llm_call(response, metrics)
+
+    def _llm_span_attributes(self, response) -> dict:
+        """Cache hit flag and token usage for an openai.chat span"""
+        response_metadata = getattr(response, 'response_metadata', None)
+        usage = getattr(response, 'usage_metadata', None)
+        return {
+            'cached': bool(isinstance(response_metadata, dict) and response_metadata.get('cached')),
+            'total_tokens': usage.get('total_tokens', 0) if isinstance(usage, dict) else 0
+        }
+
+    def _strategy_can_align(self, strategy_performance: dict) -> bool:
+        """Whether strategy data could be included for a BUY or a SELL at all"""
+        return any(self._check_strategy_alignment(recommendation, strategy_performance)
+                   for recommendation in ('BUY', 'SELL'))
+
+    def _get_classifier_llm(self):
+        """Small model for the 'classify' report mode (created on first use)"""
+        if self.classifier_llm is None:
+            from langchain_openai import ChatOpenAI
+            self.classifier_llm = ChatOpenAI(model=REPORT_CLASSIFIER_MODEL, temperature=0, max_tokens=5)
+            if self.classifier_llm_limit is not None:
+                # Inside the cache wrapper, so cache hits are not limited
+                self.classifier_llm = self.classifier_llm_limit(self.classifier_llm)
+            if self.llm_cache is not None:
+                self.classifier_llm = CachedLLM(self.classifier_llm, self.llm_cache)
+        return self.classifier_llm
+
+    def _classifier_prompt(self, state: AgentState) -> str:
+        """Short prompt asking only for the BUY/SELL/HOLD decision"""
+        context = self.prepare_context(
+            state["ticker"], state["ticker_data"], state["indicators"], state.get("percentiles", {}),
+            state.get("news", []), state.get("news_summary", {}), strategy_performance=None
+        )
+        return f"""You are a financial analyst. Based on the data below, decide whether an investor should BUY MORE, SELL or HOLD.
+Answer with exactly one word: BUY, SELL or HOLD.
+
+{context}"""
+
+    def _parse_recommendation(self, text: str) -> str:
+        """BUY/SELL/HOLD from a classifier answer (HOLD if unclear)"""
+        match = re.search(r'\b(BUY|SELL|HOLD)\b', text.upper())
+        return match.group(1) if match else 'HOLD'
+
+    def _rule_recommendation(self, indicators: dict) -> str:
+        """
+        Deterministic BUY/SELL/HOLD from trend, MACD and RSI
+
+        Each of price-vs-SMA trend, MACD vs signal line and RSI extremes votes
+        +1 (bullish) or -1 (bearish); a net score of 2 or more is BUY, -2 or
+        less is SELL, otherwise HOLD.
+        """
+        score = 0
+        price = indicators.get('current_price')
+        sma_20, sma_50 = indicators.get('sma_20'), indicators.get('sma_50')
+        if price and sma_20 and sma_50:
+            if price > sma_20 > sma_50:
+                score += 1
+            elif price < sma_20 < sma_50:
+                score -= 1
+
+        macd, macd_signal = indicators.get('macd'), indicators.get('macd_signal')
+        if macd is not None and macd_signal is not None:
+            score += 1 if macd > macd_signal else -1
+
+        rsi = indicators.get('rsi')
+        if rsi is not None:
+            if rsi < 30:
+                score += 1
+            elif rsi > 70:
+                score -= 1
+
+        if score >= 2:
+            return 'BUY'
+        if score <= -2:
+            return 'SELL'
+        return 'HOLD'
+
+    def _report_prompt(self, state: AgentState, strategy_performance: dict = None) -> str:
+        """Report LLM prompt, with strategy performance for the second pass"""
+        indicators = state["indicators"]
+        context = self.prepare_context(
+            state["ticker"], state["ticker_data"], indicators, state.get("percentiles", {}),
+            state.get("news", []), state.get("news_summary", {}), strategy_performance=strategy_performance
+        )
         uncertainty_score = indicators.get('uncertainty_score', 0)
-        
-        prompt = self._build_prompt(context, uncertainty_score, strategy_performance=None)
-        response = self.llm.invoke([HumanMessage(content=prompt)])
-        initial_report = response.content
+        return self._build_prompt(context, uncertainty_score, strategy_performance=strategy_performance)
+
+    def _needs_strategy_pass(self, state: AgentState, initial_report: str) -> bool:
+        """Whether strategy performance aligns with the first-pass recommendation"""
+        strategy_performance = state.get("strategy_performance", {})
 
         # Extract recommendation from initial report
         recommendation = self._extract_recommendation(initial_report)
-        
+
         # Check if strategy performance aligns with recommendation
         include_strategy = self._check_strategy_alignment(recommendation, strategy_performance)
-        
-        # Second pass: If aligned, regenerate with strategy data
-        if include_strategy and strategy_performance:
-            context_with_strategy = self.prepare_context(
-                ticker, ticker_data, indicators, percentiles, news, news_summary, strategy_performance=strategy_performance
-            )
-            prompt_with_strategy = self._build_prompt(context_with_strategy, uncertainty_score, strategy_performance=strategy_performance)
-            response = self.llm.invoke([HumanMessage(content=prompt_with_strategy)])
-            report = response.content
-        else:
-            report = initial_report
+        return bool(include_strategy and strategy_performance)
+
+    def _finish_report(self, state: AgentState, report: str) -> AgentState:
+        """Append references, save the report and score it (or queue the scoring)"""
+        ticker = state["ticker"]
+        ticker_data = state["ticker_data"]
+        indicators = state["indicators"]
+        percentiles = state.get("percentiles", {})
+        news = state.get("news", [])
 
         # Add news references at the end if news exists
         if news:
@@ -296,112 +916,201 @@ class TickerAnalysisAgent:
                 'report_text': report,
                 'technical_summary': self.technical_analyzer.analyze_trend(indicators, indicators.get('current_price')),
                 'fundamental_summary': f"P/E: {ticker_data.get('pe_ratio', 'N/A')}",
-                'sector_analysis': ticker_data.get('sector', 'N/A')
+                'sector_analysis': ticker_data.get('sector', 'N/A'),
+                'close': ticker_data.get('close')
             }
         )
 
         state["report"] = report
 
+        if self.scoring_mode == 'background':
+            # Scores are off the critical path; get_report_scores fetches them on request
+            self.scoring_worker.submit((yahoo_ticker, str(ticker_data['date'])), self._score_report,
+                                       yahoo_ticker, report, ticker_data, indicators, percentiles, news)
+            state["scores_pending"] = True
+            return state
+
+        state.update(self._score_report(yahoo_ticker, report, ticker_data, indicators, percentiles, news))
+        return state
+
+    def _score_report(self, yahoo_ticker: str, report: str, ticker_data: dict, indicators: dict,
+                      percentiles: dict, news: list) -> dict:
+        """
+        Score a finished report, print the score reports and store the scores
+
+        Returns:
+            Dict of state key -> score (see SCORE_TYPES)
+        """
         # Score narrative faithfulness
         faithfulness_score = self._score_narrative_faithfulness(
             report, indicators, percentiles, news, ticker_data
         )
-        state["faithfulness_score"] = faithfulness_score
 
         # Score narrative completeness
         completeness_score = self._score_narrative_completeness(
             report, ticker_data, indicators, percentiles, news
         )
-        state["completeness_score"] = completeness_score
 
         # Score reasoning quality
         reasoning_quality_score = self._score_reasoning_quality(
             report, indicators, percentiles, ticker_data
         )
-        state["reasoning_quality_score"] = reasoning_quality_score
 
         # Print all score reports
         print("\n" + self.faithfulness_scorer.format_score_report(faithfulness_score))
         print("\n" + self.completeness_scorer.format_score_report(completeness_score))
         print("\n" + self.reasoning_quality_scorer.format_score_report(reasoning_quality_score))
 
-        return state
+        scores = {
+            "faithfulness_score": faithfulness_score,
+            "completeness_score": completeness_score,
+            "reasoning_quality_score": reasoning_quality_score
+        }
+        self.db.save_report_scores(yahoo_ticker, ticker_data['date'], report,
+                                   {key: asdict(score) for key, score in scores.items()})
+        return scores
 
-    def generate_audio(self, state: AgentState) -> AgentState:
-        """Generate audio from report text using Botnoi Voice API (Thai) and ElevenLabs (English)"""
-        if state.get("error"):
-            state["audio_base64"] = ""
-            state["audio_english_base64"] = ""
-            return state
-        
-        # Skip if audio generator not available
-        if not self.audio_generator:
-            state["audio_base64"] = ""
-            state["audio_english_base64"] = ""
-            return state
-        
-        report = state.get("report", "")
-        
-        if not report:
-            state["audio_base64"] = ""
-            state["audio_english_base64"] = ""
-            return state
-        
+    def get_report_scores(self, state: AgentState, timeout: float = SCORING_WAIT_TIMEOUT) -> dict:
+        """
+        Narrative scores of a final state's report
+
+        Uses the scores already in the state, else waits up to timeout seconds
+        for the pending background job, else reads the stored scores (also
+        covers reports served by check_cache).
+
+        Returns:
+            Dict of state key -> score (see SCORE_TYPES), or {} if unavailable
+        """
+        if all(state.get(key) for key in SCORE_TYPES):
+            return {key: state[key] for key in SCORE_TYPES}
+
+        yahoo_ticker = self.ticker_map.get(state["ticker"].upper())
+        date = state.get("ticker_data", {}).get("date")
+        if not yahoo_ticker or date is None or not state.get("report"):
+            return {}
+
+        # Only a worker that was built can have a pending job
+        if 'scoring_worker' in self.__dict__:
+            scores = self.scoring_worker.wait((yahoo_ticker, str(date)), timeout=timeout)
+            if scores:
+                return scores
+
+        stored = self.db.get_report_scores(yahoo_ticker, date, report_text=state["report"])
+        if not stored:
+            return {}
+        return {key: score_type(**stored[key]) for key, score_type in SCORE_TYPES.items() if key in stored}
+
+    def drain_scoring(self, timeout: float = SCORING_WAIT_TIMEOUT) -> int:
+        """
+        Wait for queued background scoring jobs to store their scores
+
+        Returns:
+            Number of jobs still running after timeout seconds (0 if no
+            worker was ever built)
+        """
+        if 'scoring_worker' not in self.__dict__:
+            return 0
+        return self.scoring_worker.drain(timeout=timeout)
+
+    def _report_for_audio(self, state: AgentState):
+        """TTS-cleaned report text, or None when audio should be skipped"""
+        if state.get("error") or not self.audio_generator or not state.get("report"):
+            return None
+        return self.audio_generator.clean_text_for_tts(state["report"])
+
+    def generate_audio_thai(self, state: AgentState) -> AgentState:
+        """Generate Thai audio from the report using Botnoi Voice API"""
+        return self._run_audio_steps(state, "audio_base64", "Thai", self._thai_audio_steps(state))
+
+    async def agenerate_audio_thai(self, state: AgentState) -> AgentState:
+        """Async generate_audio_thai (non-blocking HTTP to Botnoi)"""
+        return await self._arun_audio_steps(state, "audio_base64", "Thai", self._thai_audio_steps(state))
+
+    def generate_audio_english(self, state: AgentState) -> AgentState:
+        """Translate the report and generate English audio using ElevenLabs"""
+        return self._run_audio_steps(state, "audio_english_base64", "English", self._english_audio_steps(state))
+
+    async def agenerate_audio_english(self, state: AgentState) -> AgentState:
+        """Async generate_audio_english (awaited translation and ElevenLabs HTTP)"""
+        return await self._arun_audio_steps(state, "audio_english_base64", "English",
+                                            self._english_audio_steps(state))
+
+    def _thai_audio_steps(self, state: AgentState):
+        """
+        Thai audio as a generator: yields audio_generator calls as
+        (method name, args, kwargs), is sent their results and returns the
+        base64 MP3 (see _run_audio_steps)
+        """
+        cleaned_text = self._report_for_audio(state)
+        if cleaned_text is None:
+            return ""
+
+        # Generate Thai audio using Botnoi (native Thai TTS)
+        audio_base64 = yield ('generate_audio_base64', (cleaned_text,), {'language': 'th', 'speed': 1.0})
+        print(f"✅ Thai audio generated successfully ({len(audio_base64):,} chars base64)")
+        return audio_base64
+
+    def _english_audio_steps(self, state: AgentState):
+        """English audio as a generator (see _thai_audio_steps)"""
+        cleaned_text = self._report_for_audio(state)
+        if cleaned_text is None:
+            return ""
+
+        # Translate Thai report to English
+        english_text = yield ('translate_to_english', (cleaned_text, self.llm), {})
+        print(f"✅ Report translated to English ({len(english_text)} characters)")
+
+        # Clean English text for TTS, then generate English audio using ElevenLabs
+        cleaned_english = self.audio_generator.clean_text_for_tts(english_text)
+        audio_english_base64 = yield ('generate_audio_base64', (cleaned_english,), {'language': 'en'})
+        self._save_english_audio(state, audio_english_base64)
+        return audio_english_base64
+
+    def _run_audio_steps(self, state: AgentState, key: str, label: str, steps) -> AgentState:
+        """Run audio steps with blocking audio_generator calls and store the result under state[key]"""
         try:
-            # Clean text for TTS (remove markdown, emojis, etc.)
-            cleaned_text = self.audio_generator.clean_text_for_tts(report)
-            
-            # Generate Thai audio using Botnoi (native Thai TTS)
-            try:
-                audio_base64 = self.audio_generator.generate_audio_base64(
-                    cleaned_text,
-                    language='th',
-                    speed=1.0
-                )
-                state["audio_base64"] = audio_base64
-                print(f"✅ Thai audio generated successfully ({len(audio_base64):,} chars base64)")
-            except Exception as e:
-                print(f"⚠️  Thai audio generation failed: {str(e)}")
-                state["audio_base64"] = ""
-            
-            # Generate English audio using ElevenLabs
-            try:
-                # Translate Thai report to English
-                english_text = self.audio_generator.translate_to_english(cleaned_text, self.llm)
-                print(f"✅ Report translated to English ({len(english_text)} characters)")
-                
-                # Clean English text for TTS
-                cleaned_english = self.audio_generator.clean_text_for_tts(english_text)
-                
-                # Generate English audio using ElevenLabs
-                audio_english_base64 = self.audio_generator.generate_audio_base64(
-                    cleaned_english,
-                    language='en'
-                )
-                state["audio_english_base64"] = audio_english_base64
-                print(f"✅ English audio generated successfully ({len(audio_english_base64):,} chars base64)")
-                
-                # Save English audio file
-                import base64
-                audio_bytes = base64.b64decode(audio_english_base64)
-                ticker = state.get("ticker", "UNKNOWN")
-                audio_file = f"report_{ticker}_english.mp3"
-                with open(audio_file, "wb") as f:
-                    f.write(audio_bytes)
-                print(f"✅ English audio saved to: {audio_file} ({len(audio_bytes)/1024:.1f} KB)")
-                
-            except Exception as e:
-                print(f"⚠️  English audio generation failed: {str(e)}")
-                state["audio_english_base64"] = ""
-            
+            call = next(steps)
+            while True:
+                name, args, kwargs = call
+                call = steps.send(getattr(self.audio_generator, name)(*args, **kwargs))
+        except StopIteration as done:
+            state[key] = done.value
         except Exception as e:
-            print(f"⚠️  Audio generation failed: {str(e)}")
+            print(f"⚠️  {label} audio generation failed: {str(e)}")
             # Don't set error - audio is optional, continue without it
-            state["audio_base64"] = ""
-            state["audio_english_base64"] = ""
-        
+            state[key] = ""
+
+        return state
+
+    async def _arun_audio_steps(self, state: AgentState, key: str, label: str, steps) -> AgentState:
+        """Async _run_audio_steps: awaits the a-prefixed audio_generator methods"""
+        try:
+            call = next(steps)
+            while True:
+                name, args, kwargs = call
+                call = steps.send(await getattr(self.audio_generator, f"a{name}")(*args, **kwargs))
+        except StopIteration as done:
+            state[key] = done.value
+        except Exception as e:
+            print(f"⚠️  {label} audio generation failed: {str(e)}")
+            state[key] = ""
+
         return state
 
+    def _save_english_audio(self, state: AgentState, audio_english_base64: str):
+        """Store English audio in the state and save it as an MP3 file"""
+        state["audio_english_base64"] = audio_english_base64
+        print(f"✅ English audio generated successfully ({len(audio_english_base64):,} chars base64)")
+
+        # Save English audio file
+        import base64
+        audio_bytes = base64.b64decode(audio_english_base64)
+        ticker = state.get("ticker", "UNKNOWN")
+        audio_file = f"report_{ticker}_english.mp3"
+        with open(audio_file, "wb") as f:
+            f.write(audio_bytes)
+        print(f"✅ English audio saved to: {audio_file} ({len(audio_bytes)/1024:.1f} KB)")
+
     def _build_prompt(self, context: str, uncertainty_score: float, strategy_performance: dict = None) -> str:
         """Build LLM prompt with optional strategy performance data"""
         base_intro = f"""You are a world-class financial analyst like Aswath Damodaran. Write in Thai, but think like him - tell stories with data, don't just list numbers.
@@ -626,6 +1335,7 @@ Write entirely in Thai, naturally flowing like Damodaran's style - narrative sup
         context += "\n**IMPORTANT**: Use these percentile values naturally in your narrative to add historical context. Don't just list them - weave them into the story!"
         return context
 
+    @traced("score.faithfulness")
     def _score_narrative_faithfulness(
         self,
         report: str,
@@ -657,6 +1367,7 @@ Write entirely in Thai, naturally flowing like Damodaran's style - narrative sup
 
         return faithfulness_score
     
+    @traced("score.completeness")
     def _score_narrative_completeness(
         self,
         report: str,
@@ -676,6 +1387,7 @@ Write entirely in Thai, naturally flowing like Damodaran's style - narrative sup
         
         return completeness_score
     
+    @traced("score.reasoning_quality")
     def _score_reasoning_quality(
         self,
         report: str,
@@ -745,10 +1457,8 @@ Bollinger: {self.technical_analyzer.analyze_bollinger(indicators)}"""
             impact_score = news_item.get('impact_score', 0)
             timestamp = news_item.get('timestamp')
 
-            # Calculate time ago
-            now = datetime.now(timestamp.tzinfo) if timestamp.tzinfo else datetime.now()
-            hours_ago = (now - timestamp).total_seconds() / 3600
-            time_str = f"{int(hours_ago)}h ago" if hours_ago < 24 else f"{int(hours_ago / 24)}d ago"
+            # Publish time, not "hours ago": the prompt (and its LLM cache key) must not change with the clock
+            time_str = f"Published: {timestamp.strftime('%Y-%m-%d %H:%M')}"
 
             sentiment_indicator = {
                 'positive': '📈 POSITIVE',
@@ -774,6 +1484,7 @@ Bollinger: {self.technical_analyzer.analyze_bollinger(indicators)}"""
         fundamental_section = self._format_fundamental_section(ticker_data)
         technical_section = self._format_technical_section(indicators, current_price)
         news_section = self._format_news_section(news, news_summary)
+        strategy_section = self._format_strategy_section(strategy_performance)
         
         context = f"""
 สัญลักษณ์: {ticker}
@@ -798,10 +1509,40 @@ Bollinger: {self.technical_analyzer.analyze_bollinger(indicators)}"""
 - จำนวนนักวิเคราะห์: {ticker_data.get('analyst_count', 'N/A')}
 - ราคาสูงสุด 52 สัปดาห์: {ticker_data.get('fifty_two_week_high', 'N/A')}
 - ราคาต่ำสุด 52 สัปดาห์: {ticker_data.get('fifty_two_week_low', 'N/A')}
-{news_section}"""
+{news_section}{strategy_section}"""
         
         return context
 
+    def _format_strategy_section(self, strategy_performance: dict) -> str:
+        """Format backtested strategy performance (only passed on the second report pass)"""
+        if not strategy_performance:
+            return ""
+
+        strategy_text = "\n\nผลการทดสอบกลยุทธ์ย้อนหลัง (Strategy Performance):\n"
+        for key, label, signal_key in [('buy_only', 'Buy-only', 'last_buy_signal'),
+                                       ('sell_only', 'Sell-only', 'last_sell_signal')]:
+            perf = strategy_performance.get(key)
+            if not perf:
+                continue
+            strategy_text += (f"- {label}: ผลตอบแทนรวม {perf.get('total_return_pct', 0):+.2f}% | "
+                              f"ผลตอบแทนเฉลี่ยต่อครั้ง {perf.get('avg_return_pct', 0):+.2f}% | "
+                              f"Sharpe {perf.get('sharpe_ratio', 0):.2f} | "
+                              f"อัตราชนะ {perf.get('win_rate', 0):.0f}% | "
+                              f"Max drawdown {perf.get('max_drawdown_pct', 0):.2f}% | "
+                              f"จำนวนครั้ง {perf.get('num_trades', 0)}\n")
+            intervals = perf.get('confidence_intervals')
+            if intervals:
+                level = f"{intervals['confidence'] * 100:.0f}%"
+                strategy_text += (f"  ช่วงความเชื่อมั่น {level} (bootstrap): "
+                                  f"ผลตอบแทนเฉลี่ย {intervals['avg_return_pct']['lower']:+.2f}% ถึง {intervals['avg_return_pct']['upper']:+.2f}% | "
+                                  f"Sharpe {intervals['sharpe_ratio']['lower']:.2f} ถึง {intervals['sharpe_ratio']['upper']:.2f} | "
+                                  f"อัตราชนะ {intervals['win_rate']['lower']:.0f}% ถึง {intervals['win_rate']['upper']:.0f}%\n")
+            signal = strategy_performance.get(signal_key)
+            if signal:
+                strategy_text += f"  สัญญาณล่าสุด: {pd.Timestamp(signal['date']).strftime('%Y-%m-%d')} ที่ราคา {signal['price']:.2f}\n"
+
+        return strategy_text
+
     def _format_number(self, value):
         """Format large numbers"""
         if value is None:
@@ -821,48 +1562,24 @@ Bollinger: {self.technical_analyzer.analyze_bollinger(indicators)}"""
             return "N/A"
         return f"{value*100:.2f}%"
 
-    def _get_last_buy_signal(self, hist_data):
-        """Get last buy signal information"""
+    def _get_last_buy_signal(self, hist_data, signals=None):
+        """Get last buy signal information (reuses a detect_signals frame when given)"""
         try:
-            df = self.strategy_backtester.detect_signals(hist_data)
-            if df is None or df.empty:
-                return None
-            
-            buy_signals = df[df['Buy_Signal'] == True]
-            if buy_signals.empty:
-                return None
-            
-            last_buy = buy_signals.iloc[-1]
-            return {
-                'date': last_buy.name,
-                'price': float(last_buy['Close']),
-                'sma_fast': float(last_buy['SMA_Fast']) if pd.notna(last_buy['SMA_Fast']) else None,
-                'sma_slow': float(last_buy['SMA_Slow']) if pd.notna(last_buy['SMA_Slow']) else None
-            }
+            if signals is None:
+                signals = self.strategy_backtester.detect_signals(hist_data)
+            return self.strategy_backtester.last_signal(signals, 'Buy_Signal')
         except Exception as e:
             print(f"Error getting last buy signal: {str(e)}")
             return None
 
-    def _get_last_sell_signal(self, hist_data):
-        """Get last sell signal information"""
+    def _get_last_sell_signal(self, hist_data, signals=None):
+        """Get last sell signal information (reuses a detect_signals frame when given)"""
         if not self.strategy_backtester:
             return None
         try:
-            df = self.strategy_backtester.detect_signals(hist_data)
-            if df is None or df.empty:
-                return None
-            
-            sell_signals = df[df['Sell_Signal'] == True]
-            if sell_signals.empty:
-                return None
-            
-            last_sell = sell_signals.iloc[-1]
-            return {
-                'date': last_sell.name,
-                'price': float(last_sell['Close']),
-                'sma_fast': float(last_sell['SMA_Fast']) if pd.notna(last_sell['SMA_Fast']) else None,
-                'sma_slow': float(last_sell['SMA_Slow']) if pd.notna(last_sell['SMA_Slow']) else None
-            }
+            if signals is None:
+                signals = self.strategy_backtester.detect_signals(hist_data)
+            return self.strategy_backtester.last_signal(signals, 'Sell_Signal')
         except Exception as e:
             print(f"Error getting last sell signal: {str(e)}")
             return None
@@ -914,9 +1631,44 @@ Bollinger: {self.technical_analyzer.analyze_bollinger(indicators)}"""
         # For HOLD, we don't include strategy data
         return False
 
-    def analyze_ticker(self, ticker: str) -> str:
-        """Main entry point to analyze ticker"""
-        initial_state = {
+    def prefetch(self, tickers: list, period: str = "1y") -> dict:
+        """
+        Batch mode: download price histories for many symbols in one go so
+        each ticker's fetch_data node is served from memory
+
+        Args:
+            tickers: Symbols from tickers.csv (e.g. 'DBS19')
+            period: yfinance period string
+
+        Returns:
+            Dict of symbols that failed to download -> error message
+        """
+        symbol_by_yahoo = {}
+        for ticker in tickers:
+            yahoo_ticker = self.ticker_map.get(ticker.upper())
+            if yahoo_ticker:
+                symbol_by_yahoo[yahoo_ticker] = ticker
+
+        failed = self.data_fetcher.prefetch_histories(list(symbol_by_yahoo), period=period)
+        return {symbol_by_yahoo[yahoo_ticker]: error for yahoo_ticker, error in failed.items()}
+
+    def clear_prefetch(self):
+        """End of a batch: release the prefetched histories (they would go stale)"""
+        self.data_fetcher.clear_prefetched()
+
+    def initial_state(self, ticker: str, fresh: bool = False, use_report_cache: bool = False,
+                      percentile_lookback: str | None = None) -> AgentState:
+        """
+        Empty AgentState for a ticker
+
+        Args:
+            ticker: Ticker symbol
+            fresh: Regenerate LLM output instead of reusing cached responses
+            use_report_cache: Return the stored report when it is still current
+            percentile_lookback: '1y', '3y' or '5y' to rank indicators over that
+                window of the persisted sketches instead of the fetched history
+        """
+        return {
             "messages": [],
             "ticker": ticker,
             "ticker_data": {},
@@ -933,12 +1685,46 @@ Bollinger: {self.technical_analyzer.analyze_bollinger(indicators)}"""
             "faithfulness_score": {},
             "completeness_score": {},
             "reasoning_quality_score": {},
+            "scores_pending": False,
+            "fresh": fresh,
+            "use_report_cache": use_report_cache,
+            "percentile_lookback": percentile_lookback,
+            "percentile_coverage": {},
+            "cache_hit": False,
             "error": ""
         }
 
+    def analyze_ticker(self, ticker: str, fresh: bool = False) -> str:
+        """Main entry point to analyze ticker (fresh=True bypasses the report and LLM caches)"""
+        if not fresh:
+            cached = self.stored_report(ticker)
+            if cached:
+                return cached
+
         # Run the graph
-        final_state = self.graph.invoke(initial_state)
+        with tracer.trace("analyze_ticker", ticker=ticker):
+            final_state = self.graph.invoke(self.initial_state(ticker, fresh=fresh, use_report_cache=not fresh))
+        print(format_pipeline_latency(final_state.get("node_timings", {})))
+        self.log_component_timings()
 
+        return self._report_or_error(final_state)
+
+    async def aanalyze_ticker(self, ticker: str, fresh: bool = False) -> str:
+        """Async analyze_ticker: many tickers can be analyzed concurrently on one event loop"""
+        if not fresh:
+            cached = await asyncio.to_thread(self.stored_report, ticker)
+            if cached:
+                return cached
+
+        with tracer.trace("analyze_ticker", ticker=ticker):
+            final_state = await self.async_graph.ainvoke(
+                self.initial_state(ticker, fresh=fresh, use_report_cache=not fresh))
+        print(format_pipeline_latency(final_state.get("node_timings", {})))
+        self.log_component_timings()
+
+        return self._report_or_error(final_state)
+
+    def _report_or_error(self, final_state: AgentState) -> str:
         # Return error or report
         if final_state.get("error"):
             return f"❌ เกิดข้อผิดพลาด: {final_state['error']}"
@@ -956,30 +1742,24 @@ Bollinger: {self.technical_analyzer.analyze_bollinger(indicators)}"""
         Returns:
             PDF bytes if output_path is None, otherwise saves to file and returns bytes
         """
-        # Run analysis
-        initial_state = {
-            "messages": [],
-            "ticker": ticker,
-            "ticker_data": {},
-            "indicators": {},
-            "percentiles": {},
-            "chart_patterns": [],
-            "pattern_statistics": {},
-            "strategy_performance": {},
-            "news": [],
-            "news_summary": {},
-            "chart_base64": "",
-            "report": "",
-            "audio_base64": "",
-            "faithfulness_score": {},
-            "completeness_score": {},
-            "reasoning_quality_score": {},
-            "error": ""
-        }
-
         # Run the graph
-        final_state = self.graph.invoke(initial_state)
+        with tracer.trace("generate_pdf_report", ticker=ticker):
+            final_state = self.graph.invoke(self.initial_state(ticker))
+        print(format_pipeline_latency(final_state.get("node_timings", {})))
+        self.log_component_timings()
+
+        return self._render_pdf(ticker, final_state, output_path)
+
+    async def agenerate_pdf_report(self, ticker: str, output_path: str = None) -> bytes:
+        """Async generate_pdf_report (PDF rendering runs on a worker thread)"""
+        with tracer.trace("generate_pdf_report", ticker=ticker):
+            final_state = await self.async_graph.ainvoke(self.initial_state(ticker))
+        print(format_pipeline_latency(final_state.get("node_timings", {})))
+        self.log_component_timings()
+
+        return await asyncio.to_thread(self._render_pdf, ticker, final_state, output_path)
 
+    def _render_pdf(self, ticker: str, final_state: AgentState, output_path: str = None) -> bytes:
         # Check for errors
         if final_state.get("error"):
             raise ValueError(f"Analysis failed: {final_state['error']}")
@@ -1,11 +1,16 @@
+import asyncio
 import json
 from datetime import datetime
 from typing import TYPE_CHECKING
 from src.agent import TickerAnalysisAgent
+from src.quantile_sketch import LOOKBACK_MONTHS
+from src.tracing import tracer
 
 if TYPE_CHECKING:
     from typing_extensions import TypedDict
 
+    from src.tracing import Trace
+
     class LambdaEvent(TypedDict, total=False):
         queryStringParameters: dict[str, str] | None
         headers: dict[str, str] | None
@@ -111,12 +116,195 @@ def sanitize_dict(data: dict[str, object]) -> dict[str, object]:
     
     return sanitized
 
+def _missing_ticker_response() -> dict[str, object]:
+    """400 response for a request without a ticker parameter"""
+    return {
+        'statusCode': 400,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'  # CORS support
+        },
+        'body': json.dumps({
+            'error': 'Missing required parameter: ticker',
+            'message': 'Please provide a ticker symbol as a query parameter. Example: /analyze?ticker=AAPL'
+        })
+    }
+
+def _invalid_lookback_response(lookback: str) -> dict[str, object]:
+    """400 response for an unsupported lookback parameter"""
+    return {
+        'statusCode': 400,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'
+        },
+        'body': json.dumps({
+            'error': f'Unsupported lookback: {lookback}',
+            'message': f"lookback must be one of {', '.join(LOOKBACK_MONTHS)}"
+        })
+    }
+
+def _query_flag(event: "LambdaEvent", name: str) -> bool:
+    """Boolean query parameter (?name=true)"""
+    query_params = event.get('queryStringParameters') or {}
+    return str(query_params.get(name, '')).lower() in ('1', 'true', 'yes')
+
+def _request_params(event: "LambdaEvent") -> tuple[str | None, bool]:
+    """Ticker and fresh flag (?fresh=true regenerates instead of serving the stored report)"""
+    query_params = event.get('queryStringParameters') or {}
+    return query_params.get('ticker'), _query_flag(event, 'fresh')
+
+def _percentile_lookback(event: "LambdaEvent") -> str | None:
+    """?lookback=1y|3y|5y ranks indicators over that window of the stored sketches"""
+    query_params = event.get('queryStringParameters') or {}
+    return query_params.get('lookback') or None
+
+def _wants_trace(event: "LambdaEvent") -> bool:
+    """?trace=true returns the request's trace in the response (needs TRACING_ENABLED)"""
+    return _query_flag(event, 'trace')
+
+def _wants_scores(event: "LambdaEvent") -> bool:
+    """?scores=true waits for narrative scores that are computed in the background"""
+    return _query_flag(event, 'scores')
+
+def _with_scores(agent_instance: TickerAnalysisAgent, final_state: dict[str, object]) -> dict[str, object]:
+    """Final state with the report's narrative scores filled in (see get_report_scores)"""
+    if final_state.get("error") or not final_state.get("report"):
+        return final_state
+    scores = agent_instance.get_report_scores(final_state)
+    return {**final_state, **scores, "scores_pending": final_state.get("scores_pending") and not scores}
+
+def _with_trace(response: dict[str, object], trace: "Trace | None") -> dict[str, object]:
+    """Add the trace to a JSON response body"""
+    if trace is None:
+        return response
+    body = json.loads(response['body'])
+    body['trace'] = trace.to_dict()
+    return {**response, 'body': json.dumps(body, ensure_ascii=False, default=str)}
+
+def _analysis_response(ticker: str, final_state: dict[str, object]) -> dict[str, object]:
+    """API response (400 on analysis error, 200 with sanitized results) from the final graph state"""
+    # Check for errors
+    if final_state.get("error"):
+        return {
+            'statusCode': 400,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({
+                'error': final_state['error'],
+                'ticker': ticker.upper()
+            })
+        }
+    
+    # Sanitize data for JSON serialization
+    ticker_data = sanitize_ticker_data(final_state.get("ticker_data", {}))
+    indicators = sanitize_dict(final_state.get("indicators", {}))
+    percentiles = sanitize_dict(final_state.get("percentiles", {}))
+    news = sanitize_news(final_state.get("news", []))
+    news_summary = sanitize_dict(final_state.get("news_summary", {}))
+    chart_base64 = final_state.get("chart_base64", "")
+    report = final_state.get("report", "")
+    audio_base64 = final_state.get("audio_base64", "")
+    
+    # Convert dataclass scores to dicts for JSON serialization
+    faithfulness_score_obj = final_state.get("faithfulness_score")
+    completeness_score_obj = final_state.get("completeness_score")
+    reasoning_quality_score_obj = final_state.get("reasoning_quality_score")
+    
+    faithfulness_score = {}
+    completeness_score = {}
+    reasoning_quality_score = {}
+    
+    if faithfulness_score_obj:
+        faithfulness_score = {
+            'overall_score': faithfulness_score_obj.overall_score,
+            'metric_scores': faithfulness_score_obj.metric_scores,
+            'violations': faithfulness_score_obj.violations,
+            'verified_claims': faithfulness_score_obj.verified_claims
+        }
+        faithfulness_score = sanitize_dict(faithfulness_score)
+    
+    if completeness_score_obj:
+        completeness_score = {
+            'overall_score': completeness_score_obj.overall_score,
+            'dimension_scores': completeness_score_obj.dimension_scores,
+            'missing_elements': completeness_score_obj.missing_elements,
+            'covered_elements': completeness_score_obj.covered_elements
+        }
+        completeness_score = sanitize_dict(completeness_score)
+    
+    if reasoning_quality_score_obj:
+        reasoning_quality_score = {
+            'overall_score': reasoning_quality_score_obj.overall_score,
+            'dimension_scores': reasoning_quality_score_obj.dimension_scores,
+            'issues': reasoning_quality_score_obj.issues,
+            'strengths': reasoning_quality_score_obj.strengths
+        }
+        reasoning_quality_score = sanitize_dict(reasoning_quality_score)
+
+    # Build response
+    response_data = {
+        'ticker': ticker.upper(),
+        'ticker_data': ticker_data,
+        'indicators': indicators,
+        'percentiles': percentiles,  # Include percentiles in response
+        'percentile_coverage': final_state.get("percentile_coverage") or None,  # Months a ?lookback covers
+        'news': news,
+        'news_summary': news_summary,
+        'chart_base64': chart_base64,  # Include chart as base64 PNG
+        'report': report,
+        'cached': bool(final_state.get("cache_hit")),  # Report text reused from the database
+        'scores_pending': bool(final_state.get("scores_pending")),  # Ask again with ?scores=true
+        'faithfulness_score': faithfulness_score,
+        'completeness_score': completeness_score,
+        'overall_quality_score': (
+            faithfulness_score.get('overall_score', 0) * 0.8 +
+            completeness_score.get('overall_score', 0) * 0.2
+        ) if faithfulness_score.get('overall_score') is not None and completeness_score.get('overall_score') is not None else None
+    }
+    
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'  # CORS support
+        },
+        'body': json.dumps(response_data, ensure_ascii=False)
+    }
+
+def _server_error_response(e: Exception) -> dict[str, object]:
+    """500 response for an unexpected exception"""
+    print(f"Error in API handler: {str(e)}")
+    import traceback
+    traceback.print_exc()
+    
+    return {
+        'statusCode': 500,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'
+        },
+        'body': json.dumps({
+            'error': 'Internal server error',
+            'message': str(e)
+        })
+    }
+
 def api_handler(event: "LambdaEvent", context: "LambdaContext | None") -> dict[str, object]:
     """
     AWS Lambda handler for REST API endpoint
 
     Expected query parameters:
     - ticker: Ticker symbol (e.g., 'AAPL', 'DBS19')
+    - fresh: Optional 'true' to regenerate instead of serving the stored report
+    - lookback: Optional '1y', '3y' or '5y' to rank indicators over that window of
+      the persisted percentile sketches; percentile_coverage in the response gives the
+      months actually covered (complete=false until the whole window is stored)
+    - trace: Optional 'true' to include the request's spans (TRACING_ENABLED only)
+    - scores: Optional 'true' to wait for narrative scores (SCORING_MODE=background)
+      and include stored scores for cached reports
 
     Expected environment variables:
     - OPENAI_API_KEY: OpenAI API key
@@ -126,153 +314,65 @@ def api_handler(event: "LambdaEvent", context: "LambdaContext | None") -> dict[s
     """
     try:
         # Extract ticker from query parameters
-        query_params = event.get('queryStringParameters') or {}
-        ticker = query_params.get('ticker')
+        ticker, fresh = _request_params(event)
         
         if not ticker:
-            return {
-                'statusCode': 400,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'  # CORS support
-                },
-                'body': json.dumps({
-                    'error': 'Missing required parameter: ticker',
-                    'message': 'Please provide a ticker symbol as a query parameter. Example: /analyze?ticker=AAPL'
-                })
-            }
+            return _missing_ticker_response()
+
+        lookback = _percentile_lookback(event)
+        if lookback is not None and lookback not in LOOKBACK_MONTHS:
+            return _invalid_lookback_response(lookback)
         
         # Get agent instance
         agent_instance = get_agent()
         
-        # Initialize state (AgentState type)
-        from src.agent import AgentState
-        initial_state: AgentState = {
-            "messages": [],
-            "ticker": ticker.upper(),
-            "ticker_data": {},
-            "indicators": {},
-            "percentiles": {},
-            "chart_patterns": [],
-            "pattern_statistics": {},
-            "strategy_performance": {},
-            "news": [],
-            "news_summary": {},
-            "chart_base64": "",
-            "report": "",
-            "audio_base64": "",
-            "faithfulness_score": {},
-            "completeness_score": {},
-            "reasoning_quality_score": {},
-            "error": ""
-        }
-        
         # Run the graph to get full AgentState
-        final_state = agent_instance.graph.invoke(initial_state)
-        
-        # Check for errors
-        if final_state.get("error"):
-            return {
-                'statusCode': 400,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'error': final_state['error'],
-                    'ticker': ticker.upper()
-                })
-            }
-        
-        # Sanitize data for JSON serialization
-        ticker_data = sanitize_ticker_data(final_state.get("ticker_data", {}))
-        indicators = sanitize_dict(final_state.get("indicators", {}))
-        percentiles = sanitize_dict(final_state.get("percentiles", {}))
-        news = sanitize_news(final_state.get("news", []))
-        news_summary = sanitize_dict(final_state.get("news_summary", {}))
-        chart_base64 = final_state.get("chart_base64", "")
-        report = final_state.get("report", "")
-        audio_base64 = final_state.get("audio_base64", "")
-        
-        # Convert dataclass scores to dicts for JSON serialization
-        faithfulness_score_obj = final_state.get("faithfulness_score")
-        completeness_score_obj = final_state.get("completeness_score")
-        reasoning_quality_score_obj = final_state.get("reasoning_quality_score")
-        
-        faithfulness_score = {}
-        completeness_score = {}
-        reasoning_quality_score = {}
-        
-        if faithfulness_score_obj:
-            faithfulness_score = {
-                'overall_score': faithfulness_score_obj.overall_score,
-                'metric_scores': faithfulness_score_obj.metric_scores,
-                'violations': faithfulness_score_obj.violations,
-                'verified_claims': faithfulness_score_obj.verified_claims
-            }
-            faithfulness_score = sanitize_dict(faithfulness_score)
+        with tracer.trace("api", ticker=ticker.upper(), fresh=fresh) as trace:
+            final_state = agent_instance.graph.invoke(agent_instance.initial_state(
+                ticker.upper(), fresh=fresh, use_report_cache=not fresh, percentile_lookback=lookback))
+        agent_instance.log_component_timings()
+
+        if _wants_scores(event):
+            final_state = _with_scores(agent_instance, final_state)
         
-        if completeness_score_obj:
-            completeness_score = {
-                'overall_score': completeness_score_obj.overall_score,
-                'dimension_scores': completeness_score_obj.dimension_scores,
-                'missing_elements': completeness_score_obj.missing_elements,
-                'covered_elements': completeness_score_obj.covered_elements
-            }
-            completeness_score = sanitize_dict(completeness_score)
-        
-        if reasoning_quality_score_obj:
-            reasoning_quality_score = {
-                'overall_score': reasoning_quality_score_obj.overall_score,
-                'dimension_scores': reasoning_quality_score_obj.dimension_scores,
-                'issues': reasoning_quality_score_obj.issues,
-                'strengths': reasoning_quality_score_obj.strengths
-            }
-            reasoning_quality_score = sanitize_dict(reasoning_quality_score)
-
-        # Build response
-        response_data = {
-            'ticker': ticker.upper(),
-            'ticker_data': ticker_data,
-            'indicators': indicators,
-            'percentiles': percentiles,  # Include percentiles in response
-            'news': news,
-            'news_summary': news_summary,
-            'chart_base64': chart_base64,  # Include chart as base64 PNG
-            'report': report,
-            'faithfulness_score': faithfulness_score,
-            'completeness_score': completeness_score,
-            'overall_quality_score': (
-                faithfulness_score.get('overall_score', 0) * 0.8 +
-                completeness_score.get('overall_score', 0) * 0.2
-            ) if faithfulness_score.get('overall_score') is not None and completeness_score.get('overall_score') is not None else None
-        }
-        
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'  # CORS support
-            },
-            'body': json.dumps(response_data, ensure_ascii=False)
-        }
+        response = _analysis_response(ticker, final_state)
+        return _with_trace(response, trace) if _wants_trace(event) else response
         
     except Exception as e:
-        print(f"Error in API handler: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'error': 'Internal server error',
-                'message': str(e)
-            })
-        }
+        return _server_error_response(e)
+
+async def aapi_handler(event: "LambdaEvent", context: "LambdaContext | None") -> dict[str, object]:
+    """
+    Async api_handler for ASGI / async Lambda runtimes
+
+    Runs the agent's async graph, so one process can serve many concurrent
+    ticker requests on a single event loop. Same parameters and response
+    as api_handler.
+    """
+    try:
+        ticker, fresh = _request_params(event)
+
+        if not ticker:
+            return _missing_ticker_response()
+
+        lookback = _percentile_lookback(event)
+        if lookback is not None and lookback not in LOOKBACK_MONTHS:
+            return _invalid_lookback_response(lookback)
+
+        agent_instance = get_agent()
+        with tracer.trace("api", ticker=ticker.upper(), fresh=fresh) as trace:
+            final_state = await agent_instance.async_graph.ainvoke(agent_instance.initial_state(
+                ticker.upper(), fresh=fresh, use_report_cache=not fresh, percentile_lookback=lookback))
+        agent_instance.log_component_timings()
+
+        if _wants_scores(event):
+            final_state = await asyncio.to_thread(_with_scores, agent_instance, final_state)
+
+        response = _analysis_response(ticker, final_state)
+        return _with_trace(response, trace) if _wants_trace(event) else response
+
+    except Exception as e:
+        return _server_error_response(e)
 
 def test_handler() -> None:
     """Test handler locally"""
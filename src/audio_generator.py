@@ -8,10 +8,13 @@ Converts text reports to audio for users who prefer listening
 import os
 import base64
 import requests
+import httpx
 import re
 from typing import Optional
 from dotenv import load_dotenv
 
+from src.tracing import trace_methods, traced
+
 load_dotenv()
 
 
@@ -29,6 +32,18 @@ def detect_language(text: str) -> str:
     return 'en'
 
 
+def _async_error_message(service: str, e: httpx.HTTPError) -> str:
+    """Error message for a failed async request, with the API's error body when available"""
+    error_msg = f"{service} API error: {str(e)}"
+    if isinstance(e, httpx.HTTPStatusError):
+        try:
+            error_msg += f" - {e.response.json()}"
+        except Exception:
+            error_msg += f" - Status: {e.response.status_code}"
+    return error_msg
+
+
+@trace_methods('elevenlabs', names=('generate_audio', 'agenerate_audio'))
 class ElevenLabsGenerator:
     """Generate audio using ElevenLabs API (for English)"""
     
@@ -40,8 +55,8 @@ class ElevenLabsGenerator:
         if not self.api_key:
             raise ValueError("ELEVENLABS_API_KEY not found")
     
-    def generate_audio(self, text: str, voice_id: Optional[str] = None) -> bytes:
-        """Generate audio using ElevenLabs API"""
+    def _request(self, text: str, voice_id: Optional[str] = None):
+        """URL, JSON payload and headers for a text-to-speech request"""
         voice_id = voice_id or self.voice_id
         
         payload = {
@@ -62,6 +77,11 @@ class ElevenLabsGenerator:
         }
         
         url = f"{self.api_url}/{voice_id}"
+        return url, payload, headers
+
+    def generate_audio(self, text: str, voice_id: Optional[str] = None) -> bytes:
+        """Generate audio using ElevenLabs API"""
+        url, payload, headers = self._request(text, voice_id)
         
         try:
             response = requests.post(url, json=payload, headers=headers, timeout=60)
@@ -77,7 +97,20 @@ class ElevenLabsGenerator:
                     error_msg += f" - Status: {e.response.status_code}"
             raise requests.exceptions.RequestException(error_msg) from e
 
+    async def agenerate_audio(self, text: str, voice_id: Optional[str] = None) -> bytes:
+        """Generate audio using ElevenLabs API without blocking the event loop"""
+        url, payload, headers = self._request(text, voice_id)
+
+        try:
+            async with httpx.AsyncClient(timeout=60) as client:
+                response = await client.post(url, json=payload, headers=headers)
+                response.raise_for_status()
+                return response.content
+        except httpx.HTTPError as e:
+            raise requests.exceptions.RequestException(_async_error_message("ElevenLabs", e)) from e
+
 
+@trace_methods('botnoi', names=('generate_audio', 'agenerate_audio'))
 class BotnoiGenerator:
     """Generate audio using Botnoi Voice API (for Thai)"""
     
@@ -90,8 +123,8 @@ class BotnoiGenerator:
         if not self.api_key:
             raise ValueError("BOTNOI_API_KEY not found")
     
-    def generate_audio(self, text: str, voice_id: Optional[str] = None, speed: Optional[float] = None) -> bytes:
-        """Generate audio using Botnoi Voice API"""
+    def _request(self, text: str, voice_id: Optional[str] = None, speed: Optional[float] = None):
+        """JSON payload and headers for a generate_audio_v2 request"""
         voice_id = voice_id or self.voice_id
         if not voice_id:
             raise ValueError("Voice ID (speaker) is required. Set BOTNOI_VOICE_ID environment variable.")
@@ -113,6 +146,11 @@ class BotnoiGenerator:
             "botnoi-token": self.api_key,
             "Content-Type": "application/json"
         }
+        return payload, headers
+
+    def generate_audio(self, text: str, voice_id: Optional[str] = None, speed: Optional[float] = None) -> bytes:
+        """Generate audio using Botnoi Voice API"""
+        payload, headers = self._request(text, voice_id, speed)
         
         try:
             response = requests.post(self.api_url, json=payload, headers=headers, timeout=60)
@@ -136,6 +174,25 @@ class BotnoiGenerator:
                     error_msg += f" - Response: {e.response.text[:200]}"
             raise requests.exceptions.RequestException(error_msg) from e
 
+    async def agenerate_audio(self, text: str, voice_id: Optional[str] = None, speed: Optional[float] = None) -> bytes:
+        """Generate audio using Botnoi Voice API without blocking the event loop"""
+        payload, headers = self._request(text, voice_id, speed)
+
+        try:
+            async with httpx.AsyncClient(timeout=60) as client:
+                response = await client.post(self.api_url, json=payload, headers=headers)
+                response.raise_for_status()
+
+                result = response.json()
+                if 'audio_url' not in result:
+                    raise ValueError(f"Unexpected response format - missing audio_url: {result}")
+
+                audio_response = await client.get(result['audio_url'])
+                audio_response.raise_for_status()
+                return audio_response.content
+        except httpx.HTTPError as e:
+            raise requests.exceptions.RequestException(_async_error_message("Botnoi", e)) from e
+
 
 class AudioGenerator:
     """
@@ -204,6 +261,10 @@ class AudioGenerator:
             ValueError: If text is empty or appropriate TTS service not available
             requests.RequestException: If API call fails
         """
+        return self._select_generator(text, language).generate_audio(text, **kwargs)
+
+    def _select_generator(self, text: str, language: Optional[str] = None):
+        """TTS service for the text's language (auto-detected if not given)"""
         if not text or not text.strip():
             raise ValueError("Text cannot be empty")
         
@@ -215,14 +276,23 @@ class AudioGenerator:
         if language == 'th':
             if not self.botnoi_generator:
                 raise ValueError("Botnoi generator not available. Set BOTNOI_API_KEY.")
-            return self.botnoi_generator.generate_audio(text, **kwargs)
+            return self.botnoi_generator
         elif language == 'en':
             if not self.elevenlabs_generator:
                 raise ValueError("ElevenLabs generator not available. Set ELEVENLABS_API_KEY.")
-            return self.elevenlabs_generator.generate_audio(text, **kwargs)
+            return self.elevenlabs_generator
         else:
             raise ValueError(f"Unsupported language: {language}. Supported: 'th', 'en'")
     
+    async def agenerate_audio(
+        self,
+        text: str,
+        language: Optional[str] = None,
+        **kwargs
+    ) -> bytes:
+        """Async generate_audio: the TTS request is awaited instead of blocking a thread"""
+        return await self._select_generator(text, language).agenerate_audio(text, **kwargs)
+
     def generate_audio_base64(
         self,
         text: str,
@@ -242,7 +312,18 @@ class AudioGenerator:
         """
         audio_bytes = self.generate_audio(text, language=language, **kwargs)
         return base64.b64encode(audio_bytes).decode('utf-8')
+
+    async def agenerate_audio_base64(
+        self,
+        text: str,
+        language: Optional[str] = None,
+        **kwargs
+    ) -> str:
+        """Async generate_audio_base64"""
+        audio_bytes = await self.agenerate_audio(text, language=language, **kwargs)
+        return base64.b64encode(audio_bytes).decode('utf-8')
     
+    @traced("openai.translate")
     def translate_to_english(self, thai_text: str, llm) -> str:
         """
         Translate Thai text to English using LLM
@@ -256,7 +337,19 @@ class AudioGenerator:
         """
         from langchain_core.messages import HumanMessage
         
-        prompt = f"""Translate the following Thai financial report to English. 
+        response = llm.invoke([HumanMessage(content=self._translation_prompt(thai_text))])
+        return response.content
+
+    @traced("openai.translate")
+    async def atranslate_to_english(self, thai_text: str, llm) -> str:
+        """Async translate_to_english (awaits llm.ainvoke)"""
+        from langchain_core.messages import HumanMessage
+
+        response = await llm.ainvoke([HumanMessage(content=self._translation_prompt(thai_text))])
+        return response.content
+
+    def _translation_prompt(self, thai_text: str) -> str:
+        return f"""Translate the following Thai financial report to English. 
 Maintain the same structure, formatting, and meaning. Keep financial terms accurate.
 Keep numbers, percentages, and technical indicators unchanged.
 
@@ -264,9 +357,6 @@ Thai text:
 {thai_text}
 
 Provide only the English translation:"""
-        
-        response = llm.invoke([HumanMessage(content=prompt)])
-        return response.content
     
     def clean_text_for_tts(self, text: str) -> str:
         """
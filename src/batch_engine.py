@@ -0,0 +1,450 @@
+"""
+Concurrent batch report generation
+
+generate_all_reports.py used to run one ticker at a time with a fixed sleep
+between them, so a full run took the sum of every ticker's latency.
+BatchEngine runs many tickers through the agent's async graph on one event
+loop and bounds each shared resource instead of the whole loop:
+
+- ResourceLimiter: a concurrency cap plus an optional token-bucket rate
+  limit. Limits are installed on the agent's OpenAI model, market data
+  provider and audio client with RateLimited, a proxy that runs selected
+  methods inside the limiter. LLM cache hits skip the limit.
+- PDFs render in a process pool (reportlab is CPU-bound and holds the GIL).
+- A progress line is printed per finished ticker. The summary covers
+  throughput, wall time against the summed per-ticker latency, the time
+  spent in each stage and how long callers waited on each resource.
+
+    engine = BatchEngine(TickerAnalysisAgent(), output_dir='reports', llm_concurrency=4)
+    summary = engine.run(tickers)
+    print(format_batch_summary(summary))
+"""
+
+import asyncio
+import functools
+import inspect
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime
+
+from src.llm_cache import CachedLLM
+
+DEFAULT_MAX_TICKERS = 8
+DEFAULT_LLM_CONCURRENCY = 4
+DEFAULT_YAHOO_CONCURRENCY = 4
+DEFAULT_AUDIO_CONCURRENCY = 2
+
+# Provider methods that make network calls
+LLM_METHODS = ('invoke', 'ainvoke')
+MARKET_DATA_METHODS = ('history', 'info', 'news', 'download')
+AUDIO_METHODS = ('generate_audio_base64', 'agenerate_audio_base64')
+
+# Final-state fields the PDF generator reads
+PDF_FIELDS = ('ticker_data', 'indicators', 'percentiles', 'news', 'news_summary', 'chart_base64', 'report')
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` calls per second with bursts of up to `burst`"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Take a token (the balance may go negative) and return the seconds until it is usable"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    def acquire(self):
+        """Block until a call is allowed"""
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self):
+        """acquire without blocking the event loop"""
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class ResourceLimiter:
+    """
+    Concurrency cap and rate limit for one external resource
+
+    limit() is used from worker threads and alimit() from coroutines. Each
+    has its own semaphore; the token bucket and the statistics are shared.
+    """
+
+    def __init__(self, name, concurrency=None, rate=None, burst=1):
+        """
+        Args:
+            name: Resource name in the summary (e.g. 'openai')
+            concurrency: Maximum calls in flight (None for no cap)
+            rate: Maximum calls per second (None for no rate limit)
+            burst: Calls allowed back to back before the rate applies
+        """
+        self.name = name
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self._semaphore = threading.BoundedSemaphore(concurrency) if concurrency else None
+        self._async_semaphores = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.wait_seconds = 0.0
+        self.busy_seconds = 0.0
+        self.active = 0
+        self.peak_active = 0
+
+    def _async_semaphore(self):
+        # asyncio semaphores belong to one event loop
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._async_semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._async_semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return semaphore
+
+    def _enter(self, waited):
+        with self._lock:
+            self.calls += 1
+            self.wait_seconds += waited
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+
+    def _exit(self, busy):
+        with self._lock:
+            self.active -= 1
+            self.busy_seconds += busy
+
+    @contextmanager
+    def limit(self):
+        """Hold a slot for one call (blocking)"""
+        start = time.perf_counter()
+        if self._semaphore is not None:
+            self._semaphore.acquire()
+        try:
+            if self.bucket is not None:
+                self.bucket.acquire()
+            acquired = time.perf_counter()
+            self._enter(acquired - start)
+            try:
+                yield
+            finally:
+                self._exit(time.perf_counter() - acquired)
+        finally:
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+    @asynccontextmanager
+    async def alimit(self):
+        """Hold a slot for one call (async)"""
+        start = time.perf_counter()
+        semaphore = self._async_semaphore() if self.concurrency else None
+        if semaphore is not None:
+            await semaphore.acquire()
+        try:
+            if self.bucket is not None:
+                await self.bucket.aacquire()
+            acquired = time.perf_counter()
+            self._enter(acquired - start)
+            try:
+                yield
+            finally:
+                self._exit(time.perf_counter() - acquired)
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+    def stats(self):
+        """Calls, time spent waiting for a slot and in calls, and peak concurrency"""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'wait_seconds': self.wait_seconds,
+                'busy_seconds': self.busy_seconds,
+                'peak_active': self.peak_active,
+                'concurrency': self.concurrency,
+                'rate': self.bucket.rate if self.bucket else None
+            }
+
+
+class RateLimited:
+    """Proxy running the named methods of `target` inside a ResourceLimiter; everything else is delegated"""
+
+    def __init__(self, target, limiter, methods):
+        self._target = target
+        self._limiter = limiter
+        self._methods = frozenset(methods)
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name not in self._methods or not callable(attr):
+            return attr
+
+        if inspect.iscoroutinefunction(attr):
+            @functools.wraps(attr)
+            async def limited_async(*args, **kwargs):
+                async with self._limiter.alimit():
+                    return await attr(*args, **kwargs)
+            return limited_async
+
+        @functools.wraps(attr)
+        def limited(*args, **kwargs):
+            with self._limiter.limit():
+                return attr(*args, **kwargs)
+        return limited
+
+
+_process_pdf_generator = None
+
+
+def _render_pdf_job(ticker, fields, output_path):
+    """Process pool task: render one PDF with this process's generator"""
+    global _process_pdf_generator
+    if _process_pdf_generator is None:
+        from src.pdf_generator import PDFReportGenerator  # reportlab, loaded once per worker
+        _process_pdf_generator = PDFReportGenerator(use_thai_font=True)
+    # Only the size travels back; the PDF is written to output_path
+    return len(_process_pdf_generator.generate_report(ticker=ticker, output_path=output_path, **fields))
+
+
+class ProgressReporter:
+    """Prints one line per finished ticker with elapsed time and ETA"""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.start = time.perf_counter()
+
+    def update(self, result):
+        self.done += 1
+        elapsed = time.perf_counter() - self.start
+        eta = elapsed / self.done * (self.total - self.done)
+        icon = "✅" if result['status'] == 'success' else "❌"
+        detail = f"{result['seconds']:.1f}s" if result['status'] == 'success' else result['error']
+        print(f"[{self.done}/{self.total}] {icon} {result['ticker']} {detail} | "
+              f"elapsed {elapsed:.1f}s | ETA {eta:.1f}s")
+
+
+class BatchEngine:
+    """Generates reports and PDFs for many tickers concurrently"""
+
+    def __init__(self, agent, output_dir='reports', max_tickers=DEFAULT_MAX_TICKERS,
+                 llm_concurrency=DEFAULT_LLM_CONCURRENCY, llm_rate=None,
+                 yahoo_concurrency=DEFAULT_YAHOO_CONCURRENCY, yahoo_rate=None,
+                 audio_concurrency=DEFAULT_AUDIO_CONCURRENCY, audio_rate=None,
+                 pdf_workers=None, render_pdf=True):
+        """
+        Args:
+            agent: TickerAnalysisAgent (its LLM, market data and audio clients get limiters)
+            output_dir: Directory for the PDF files
+            max_tickers: Tickers in flight at once
+            llm_concurrency, llm_rate: OpenAI calls in flight / per second
+            yahoo_concurrency, yahoo_rate: Market data calls in flight / per second
+            audio_concurrency, audio_rate: Botnoi/ElevenLabs calls in flight / per second
+            pdf_workers: PDF render processes (default: CPU count); 0 renders on a thread
+            render_pdf: False runs the analysis only
+        """
+        self.agent = agent
+        self.output_dir = output_dir
+        self.max_tickers = max_tickers
+        self.pdf_workers = (os.cpu_count() or 1) if pdf_workers is None else pdf_workers
+        self.render_pdf = render_pdf
+        self.limiters = {
+            'openai': ResourceLimiter('openai', llm_concurrency, llm_rate),
+            'yahoo': ResourceLimiter('yahoo', yahoo_concurrency, yahoo_rate),
+            'audio': ResourceLimiter('audio', audio_concurrency, audio_rate),
+        }
+        self._install_limiters()
+
+    def _install_limiters(self):
+        """Wrap the agent's external clients so every call goes through its limiter"""
+        agent = self.agent
+        agent.llm = self._limit_llm(agent.llm)
+        # The 'classify' report mode's small model is a second OpenAI client that the
+        # agent builds on first use: limit it now if it exists, otherwise when it is built
+        if agent.classifier_llm is not None:
+            agent.classifier_llm = self._limit_llm(agent.classifier_llm)
+        agent.classifier_llm_limit = self._limit_llm
+
+        provider = RateLimited(agent.market_data, self.limiters['yahoo'], MARKET_DATA_METHODS)
+        agent.market_data = provider
+        agent.data_fetcher.provider = provider
+        agent.news_fetcher.provider = provider
+
+        if agent.audio_generator is not None:
+            agent.audio_generator = RateLimited(agent.audio_generator, self.limiters['audio'], AUDIO_METHODS)
+
+    def _limit_llm(self, llm):
+        """Route a chat model's calls through the OpenAI limiter"""
+        if isinstance(llm, CachedLLM):
+            # Cache hits cost nothing: limit only the calls that reach OpenAI
+            llm.llm = RateLimited(llm.llm, self.limiters['openai'], LLM_METHODS)
+            return llm
+        return RateLimited(llm, self.limiters['openai'], LLM_METHODS)
+
+    def run(self, tickers, prefetch=True):
+        """Synchronous entry point (see arun)"""
+        return asyncio.run(self.arun(tickers, prefetch=prefetch))
+
+    async def arun(self, tickers, prefetch=True):
+        """
+        Analyze every ticker and render its PDF
+
+        Args:
+            tickers: Symbols from tickers.csv
+            prefetch: Download all price histories in one batched call first
+
+        Returns:
+            Summary dict (see format_batch_summary) with per-ticker 'results'
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        start = time.perf_counter()
+
+        prefetch_failed = {}
+        if prefetch and tickers:
+            prefetch_failed = await asyncio.to_thread(self.agent.prefetch, tickers)
+        prefetch_seconds = time.perf_counter() - start
+
+        progress = ProgressReporter(len(tickers))
+        slots = asyncio.Semaphore(self.max_tickers)
+        pool = None
+        if self.render_pdf and self.pdf_workers > 0:
+            # spawn: forking a process that runs event loop and worker threads is unsafe
+            pool = ProcessPoolExecutor(max_workers=self.pdf_workers, mp_context=multiprocessing.get_context('spawn'))
+
+        async def process(ticker):
+            async with slots:
+                result = await self._process(ticker, pool)
+            progress.update(result)
+            return result
+
+        try:
+            results = await asyncio.gather(*(process(ticker) for ticker in tickers))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            if prefetch and tickers:
+                self.agent.clear_prefetch()
+
+        summary = summarize_batch(results, time.perf_counter() - start,
+                                  {name: limiter.stats() for name, limiter in self.limiters.items()})
+        summary['prefetch_seconds'] = prefetch_seconds
+        summary['prefetch_failed'] = prefetch_failed
+        return summary
+
+    async def _process(self, ticker, pool):
+        """Run one ticker through the graph and render its PDF"""
+        start = time.perf_counter()
+        result = {'ticker': ticker, 'status': 'failed', 'error': None, 'pdf_file': None, 'pdf_size': 0,
+                  'faithfulness_score': None, 'seconds': 0.0, 'stages': {}}
+        try:
+            final_state = await self.agent.async_graph.ainvoke(self.agent.initial_state(ticker))
+            result['stages'] = {node: timing['duration'] for node, timing in final_state.get("node_timings", {}).items()}
+
+            if final_state.get("error"):
+                result['error'] = final_state['error']
+                return result
+
+            faithfulness_score = final_state.get("faithfulness_score")
+            result['faithfulness_score'] = faithfulness_score.overall_score if faithfulness_score else None
+
+            if self.render_pdf:
+                pdf_start = time.perf_counter()
+                output_path = os.path.join(
+                    self.output_dir, f"{ticker}_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf")
+                fields = {field: final_state.get(field) for field in PDF_FIELDS}
+                if pool is not None:
+                    loop = asyncio.get_running_loop()
+                    result['pdf_size'] = await loop.run_in_executor(pool, _render_pdf_job, ticker, fields, output_path)
+                else:
+                    pdf_bytes = await asyncio.to_thread(self.agent.pdf_generator.generate_report,
+                                                        ticker=ticker, output_path=output_path, **fields)
+                    result['pdf_size'] = len(pdf_bytes)
+                result['pdf_file'] = output_path
+                result['stages']['render_pdf'] = time.perf_counter() - pdf_start
+
+            result['status'] = 'success'
+        except Exception as e:
+            result['error'] = str(e)
+        finally:
+            result['seconds'] = time.perf_counter() - start
+        return result
+
+
+def summarize_batch(results, wall_seconds, resources=None):
+    """
+    Throughput and per-stage time of a batch run
+
+    Args:
+        results: Per-ticker results from BatchEngine
+        wall_seconds: Duration of the whole run
+        resources: Optional ResourceLimiter.stats() per resource name
+
+    Returns:
+        Dict with counts, wall_seconds, sum_ticker_seconds (what a serial
+        loop would take), slowest ticker, throughput, per-stage totals and
+        means, resources and results
+    """
+    succeeded = [r for r in results if r['status'] == 'success']
+    stages = {}
+    for result in results:
+        for stage, seconds in result['stages'].items():
+            totals = stages.setdefault(stage, {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+            totals['count'] += 1
+            totals['total_seconds'] += seconds
+            totals['max_seconds'] = max(totals['max_seconds'], seconds)
+    for totals in stages.values():
+        totals['mean_seconds'] = totals['total_seconds'] / totals['count']
+
+    slowest = max(results, key=lambda r: r['seconds'], default=None)
+    return {
+        'total': len(results),
+        'succeeded': len(succeeded),
+        'failed': len(results) - len(succeeded),
+        'wall_seconds': wall_seconds,
+        'sum_ticker_seconds': sum(r['seconds'] for r in results),
+        'slowest_ticker': slowest['ticker'] if slowest else None,
+        'slowest_seconds': slowest['seconds'] if slowest else 0.0,
+        'tickers_per_minute': len(results) / wall_seconds * 60 if wall_seconds else 0.0,
+        'stages': dict(sorted(stages.items(), key=lambda item: item[1]['total_seconds'], reverse=True)),
+        'resources': resources or {},
+        'results': results
+    }
+
+
+def format_batch_summary(summary):
+    """Human-readable batch summary"""
+    lines = [
+        f"Tickers: {summary['succeeded']}/{summary['total']} succeeded, {summary['failed']} failed",
+        f"Wall time: {summary['wall_seconds']:.1f}s (serial would be ~{summary['sum_ticker_seconds']:.1f}s; "
+        f"slowest ticker {summary['slowest_ticker']} {summary['slowest_seconds']:.1f}s)",
+        f"Throughput: {summary['tickers_per_minute']:.1f} tickers/min",
+        "",
+        f"{'stage':<24} {'count':>6} {'total':>9} {'mean':>9} {'max':>9}"
+    ]
+    for stage, totals in summary['stages'].items():
+        lines.append(f"{stage:<24} {totals['count']:>6} {totals['total_seconds']:>8.1f}s "
+                     f"{totals['mean_seconds']:>8.2f}s {totals['max_seconds']:>8.2f}s")
+
+    if summary['resources']:
+        lines.append("")
+        lines.append(f"{'resource':<24} {'calls':>6} {'waited':>9} {'busy':>9} {'peak':>6}")
+        for name, stats in summary['resources'].items():
+            lines.append(f"{name:<24} {stats['calls']:>6} {stats['wait_seconds']:>8.1f}s "
+                         f"{stats['busy_seconds']:>8.1f}s {stats['peak_active']:>6}")
+    return "\n".join(lines)
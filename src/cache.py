@@ -0,0 +1,129 @@
+"""
+In-process caches shared across requests in a warm Lambda or Flask process,
+and lazily built components that keep cold starts cheap
+"""
+
+import threading
+import time
+
+
+class TTLCache:
+    """Thread-safe key/value cache whose entries expire after a fixed TTL"""
+
+    def __init__(self, ttl_seconds, max_entries=1024):
+        """
+        Args:
+            ttl_seconds: Seconds an entry stays valid after it is stored
+            max_entries: Oldest entries are dropped once this size is exceeded
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() < entry[0]:
+                self.hits += 1
+                return entry[1]
+
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        """Store a value for ttl_seconds"""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+
+            # Dicts keep insertion order, so the first key is the oldest
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+
+    def get_or_load(self, key, loader):
+        """
+        Return the cached value, calling loader() on a miss
+
+        Falsy results (e.g. an empty dict from a failed request) are returned
+        but not cached, so the next call retries.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        value = loader()
+        if value:
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        """Drop all entries and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Get hit/miss counters"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / total * 100) if total else 0.0,
+                'size': len(self._entries),
+                'ttl_seconds': self.ttl_seconds
+            }
+
+
+class lazy_component:
+    """
+    cached_property for expensive components, timed on first access
+
+    The first access builds the value under a per-attribute lock (parallel
+    graph nodes may reach a component together) and stores it in the
+    instance __dict__, so later reads - and direct assignment, e.g. test
+    doubles - bypass the descriptor. Build times are recorded in the
+    instance's component_timings dict (seconds).
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+        self._lock = threading.RLock()
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+
+        with self._lock:
+            if self.name in instance.__dict__:
+                return instance.__dict__[self.name]
+
+            start = time.perf_counter()
+            value = self.func(instance)
+            instance.__dict__.setdefault('component_timings', {})[self.name] = time.perf_counter() - start
+            instance.__dict__[self.name] = value
+            return value
+
+
+def format_component_timings(timings):
+    """
+    One-line build-time breakdown, slowest first
+
+    Times are inclusive (a component that builds another one on first use
+    includes its time), so they are not summed.
+    """
+    parts = [f"{name} {seconds * 1000:.1f}ms"
+             for name, seconds in sorted(timings.items(), key=lambda item: item[1], reverse=True)]
+    return f"🧊 Built {len(timings)} components: " + ", ".join(parts)
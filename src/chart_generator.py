@@ -21,6 +21,11 @@ from datetime import datetime
 import io
 import base64
 
+from src.indicators import IndicatorRun
+
+# Indicator series drawn on the chart
+CHART_SERIES = ['SMA_20', 'SMA_50', 'SMA_200', 'BB_Upper', 'BB_Lower', 'RSI', 'MACD', 'MACD_Signal']
+
 
 class ChartGenerator:
     """Generate technical analysis charts for stock data"""
@@ -44,7 +49,8 @@ class ChartGenerator:
         self.color_signal = '#FF9800'  # Orange
 
     def generate_chart(self, ticker_data: dict, indicators: dict,
-                      ticker_symbol: str, days: int = 90) -> str:
+                      ticker_symbol: str, days: int = 90,
+                      indicator_frame: pd.DataFrame = None) -> str:
         """
         Generate comprehensive technical analysis chart
 
@@ -53,6 +59,9 @@ class ChartGenerator:
             indicators: Dict with technical indicators
             ticker_symbol: Ticker symbol for chart title
             days: Number of days to display (default 90)
+            indicator_frame: Indicator series already computed for the analysis
+                (TechnicalAnalyzer.compute_indicator_frame); computed from the
+                full history when not given
 
         Returns:
             Base64-encoded PNG image string
@@ -62,11 +71,8 @@ class ChartGenerator:
         if df is None or df.empty:
             raise ValueError("No historical data available")
 
-        # Limit to specified days
-        df = df.tail(days).copy()
-
-        # Calculate additional data needed for chart
-        df = self._prepare_dataframe(df, indicators)
+        # Limit to specified days and calculate additional data needed for chart
+        df = self._prepare_dataframe(df, indicators, days, indicator_frame)
 
         # Create figure with subplots
         fig = plt.figure(figsize=self.fig_size, dpi=self.dpi)
@@ -92,8 +98,17 @@ class ChartGenerator:
         # Convert to base64
         return self._fig_to_base64(fig)
 
-    def _prepare_dataframe(self, df: pd.DataFrame, indicators: dict) -> pd.DataFrame:
-        """Prepare DataFrame with all needed calculations"""
+    def _prepare_dataframe(self, history: pd.DataFrame, indicators: dict, days: int,
+                           indicator_frame: pd.DataFrame = None) -> pd.DataFrame:
+        """Prepare the last `days` rows with indicator series and candle colors"""
+        # Indicator series over the full history, shared with the analysis when available
+        if indicator_frame is None or not set(CHART_SERIES) <= set(indicator_frame.columns):
+            indicator_frame = IndicatorRun(history).frame(CHART_SERIES)
+
+        df = history.tail(days).copy()
+        for name in CHART_SERIES:
+            df[name] = indicator_frame[name].reindex(df.index)
+
         # Ensure index is datetime
         if not isinstance(df.index, pd.DatetimeIndex):
             df.index = pd.to_datetime(df.index)
@@ -143,16 +158,9 @@ class ChartGenerator:
 
     def _plot_technical_indicators(self, ax, df: pd.DataFrame, indicators: dict):
         """Plot SMA lines and Bollinger Bands"""
-        # Get SMA values from last N days
-        sma_20_values = []
-        sma_50_values = []
-        sma_200_values = []
-
-        # Calculate SMAs for each point (using pandas rolling)
-        if 'Close' in df.columns:
-            sma_20_values = df['Close'].rolling(window=20, min_periods=1).mean()
-            sma_50_values = df['Close'].rolling(window=50, min_periods=1).mean()
-            sma_200_values = df['Close'].rolling(window=200, min_periods=1).mean()
+        sma_20_values = df['SMA_20']
+        sma_50_values = df['SMA_50']
+        sma_200_values = df['SMA_200']
 
         # Plot SMA lines
         if len(sma_20_values) > 0:
@@ -173,12 +181,8 @@ class ChartGenerator:
         bb_lower = indicators.get('bb_lower')
 
         if bb_upper and bb_middle and bb_lower:
-            # Calculate BB for all points
-            bb_period = 20
-            rolling_std = df['Close'].rolling(window=bb_period).std()
-            bb_middle_line = df['Close'].rolling(window=bb_period).mean()
-            bb_upper_line = bb_middle_line + (rolling_std * 2)
-            bb_lower_line = bb_middle_line - (rolling_std * 2)
+            bb_upper_line = df['BB_Upper']
+            bb_lower_line = df['BB_Lower']
 
             ax.plot(df.index, bb_upper_line,
                    color=self.color_bb, linewidth=1, alpha=0.5, linestyle='--')
@@ -211,14 +215,7 @@ class ChartGenerator:
 
     def _plot_rsi(self, ax, df: pd.DataFrame, indicators: dict):
         """Plot RSI indicator"""
-        rsi_period = 14
-
-        # Calculate RSI for all points
-        delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=rsi_period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=rsi_period).mean()
-        rs = gain / loss
-        rsi_values = 100 - (100 / (1 + rs))
+        rsi_values = df['RSI']
 
         # Plot RSI line
         ax.plot(df.index, rsi_values,
@@ -240,11 +237,8 @@ class ChartGenerator:
 
     def _plot_macd(self, ax, df: pd.DataFrame, indicators: dict):
         """Plot MACD indicator"""
-        # Calculate MACD for all points
-        exp1 = df['Close'].ewm(span=12, adjust=False).mean()
-        exp2 = df['Close'].ewm(span=26, adjust=False).mean()
-        macd_line = exp1 - exp2
-        signal_line = macd_line.ewm(span=9, adjust=False).mean()
+        macd_line = df['MACD']
+        signal_line = df['MACD_Signal']
         histogram = macd_line - signal_line
 
         # Plot MACD histogram
@@ -307,7 +301,8 @@ class ChartGenerator:
         return img_base64
 
     def save_chart(self, ticker_data: dict, indicators: dict,
-                   ticker_symbol: str, filepath: str, days: int = 90):
+                   ticker_symbol: str, filepath: str, days: int = 90,
+                   indicator_frame: pd.DataFrame = None):
         """
         Generate and save chart to file
 
@@ -317,14 +312,14 @@ class ChartGenerator:
             ticker_symbol: Ticker symbol
             filepath: Path to save PNG file
             days: Number of days to display
+            indicator_frame: Precomputed indicator series (see generate_chart)
         """
         # Get historical data
         df = ticker_data.get('history')
         if df is None or df.empty:
             raise ValueError("No historical data available")
 
-        df = df.tail(days).copy()
-        df = self._prepare_dataframe(df, indicators)
+        df = self._prepare_dataframe(df, indicators, days, indicator_frame)
 
         # Create figure
         fig = plt.figure(figsize=self.fig_size, dpi=self.dpi)
@@ -9,11 +9,17 @@ LINE_CHANNEL_ACCESS_TOKEN = os.getenv("LINE_CHANNEL_ACCESS_TOKEN")
 LINE_CHANNEL_SECRET = os.getenv("LINE_CHANNEL_SECRET")
 
 # Database Configuration
-SQLITE_DB_PATH = "data/ticker_data.db"
+SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", "data/ticker_data.db")
 QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
 QDRANT_PORT = int(os.getenv("QDRANT_PORT", "6333"))
 QDRANT_COLLECTION = "ticker_reports"
 
+# Market Data Provider: "yahoo" (live), "record" (live + capture to disk)
+# or "replay" (serve captured responses, no network)
+MARKET_DATA_PROVIDER = os.getenv("MARKET_DATA_PROVIDER", "yahoo")
+MARKET_DATA_RECORD_DIR = os.getenv("MARKET_DATA_RECORD_DIR", "data/market_recordings")
+MARKET_DATA_REPLAY_LATENCY = float(os.getenv("MARKET_DATA_REPLAY_LATENCY", "0"))
+
 # Analysis Parameters
 TECHNICAL_INDICATORS = [
     "SMA_20", "SMA_50", "SMA_200",
@@ -23,5 +29,50 @@ TECHNICAL_INDICATORS = [
 
 LOOKBACK_DAYS = 365
 
+# Fundamentals (P/E, market cap, sector...) change at most daily
+FUNDAMENTALS_CACHE_TTL = int(os.getenv("FUNDAMENTALS_CACHE_TTL", "86400"))
+
+# Strategy statistics: bootstrap confidence intervals on backtest metrics (optional stage)
+STRATEGY_BOOTSTRAP = os.getenv("STRATEGY_BOOTSTRAP", "false").lower() == "true"
+STRATEGY_BOOTSTRAP_RESAMPLES = int(os.getenv("STRATEGY_BOOTSTRAP_RESAMPLES", "2000"))
+
+# Report generation mode:
+# - "two_pass": draft without strategy data, regenerate with it if the recommendation aligns
+# - "rule": pick BUY/SELL/HOLD from indicators first, then one generation
+# - "classify": a small-model BUY/SELL/HOLD call first, then one generation
+# - "concurrent": run the with/without-strategy generations in parallel, keep the matching one
+REPORT_MODES = ("two_pass", "rule", "classify", "concurrent")
+REPORT_MODE = os.getenv("REPORT_MODE", "two_pass")
+REPORT_CLASSIFIER_MODEL = os.getenv("REPORT_CLASSIFIER_MODEL", "gpt-4o-mini")
+
+# Narrative scoring (faithfulness, completeness, reasoning quality):
+# - "sync": score inside generate_report (scores are in the final state)
+# - "background": score on a worker thread after the report is produced; scores
+#   are stored in the report_scores table and fetched only when asked for
+SCORING_MODES = ("sync", "background")
+SCORING_MODE = os.getenv("SCORING_MODE", "sync")
+SCORING_MODE_SET = "SCORING_MODE" in os.environ  # Without it the LINE bot scores in the background
+SCORING_WAIT_TIMEOUT = float(os.getenv("SCORING_WAIT_TIMEOUT", "30"))  # Seconds a caller waits for pending scores
+
+# Percentile sketches: the daily refresh (scripts/fetch_historical_prices.py) folds each ticker's
+# stored bars into monthly quantile sketches (src/quantile_sketch.py), so percentiles can also be
+# read over fixed 1y/3y/5y lookbacks
+PERCENTILE_SKETCHES_ENABLED = os.getenv("PERCENTILE_SKETCHES_ENABLED", "true").lower() == "true"
+
+# Report cache: reuse the stored report for the latest bar unless newer high-impact news arrived
+REPORT_CACHE_ENABLED = os.getenv("REPORT_CACHE_ENABLED", "true").lower() == "true"
+# Text-only requests (analyze_ticker, LINE) reuse a report this recent without fetching anything first
+REPORT_CACHE_MAX_AGE = int(os.getenv("REPORT_CACHE_MAX_AGE", "900"))
+
+# LLM response cache: identical prompts within the TTL are answered from SQLite
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "data/llm_cache.db")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+# Tracing: timed spans per graph node and external call (see src/tracing.py)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+TRACE_EXPORT_DIR = os.getenv("TRACE_EXPORT_DIR")  # Write each request trace as JSON here
+
 # Tickers Configuration
 TICKERS_CSV_PATH = "data/tickers.csv"
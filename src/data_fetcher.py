@@ -1,18 +1,84 @@
-import yfinance as yf
 import pandas as pd
+import re
 from datetime import datetime, timedelta
+from src.cache import TTLCache
+from src.config import FUNDAMENTALS_CACHE_TTL
+from src.market_data import get_market_data_provider
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# yfinance corporate action columns: a non-zero value means Yahoo has
+# back-adjusted every earlier bar for that dividend or split
+ACTION_COLUMNS = ['Dividends', 'Stock Splits']
+
+# Days per unit for yfinance period strings ("5d", "6mo", "1y", ...)
+PERIOD_UNIT_DAYS = {'d': 1, 'wk': 7, 'mo': 30, 'y': 365}
+
+# History fetched for each analysis (fetch_ticker_data)
+DEFAULT_PERIOD = "1y"
+
+# A stored history starting this many days after the requested start still
+# counts as complete (weekends and exchange holidays)
+STORE_START_TOLERANCE_DAYS = 7
+
+# Tickers per batch download request in fetch_many
+BATCH_DOWNLOAD_SIZE = 20
+
+# Module-level so every DataFetcher in a warm process shares it
+fundamentals_cache = TTLCache(ttl_seconds=FUNDAMENTALS_CACHE_TTL)
+
+def period_days(period):
+    """Calendar days covered by a yfinance period string (None if open-ended, e.g. 'max')"""
+    match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period or '')
+    if not match:
+        return None
+    return int(match.group(1)) * PERIOD_UNIT_DAYS[match.group(2)]
+
+def _daily_index(index):
+    """Tz-naive, midnight-normalized copy of a provider frame's index"""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize().rename('Date')
+
+def normalize_bars(hist):
+    """Keep OHLCV columns on a tz-naive daily index (the bar store layout)"""
+    bars = hist[OHLCV_COLUMNS].copy()
+    bars.index = _daily_index(bars.index)
+    return bars[~bars.index.duplicated(keep='last')]
+
+def corporate_action_dates(hist):
+    """Dates (daily index) on which a provider frame reports a dividend or split"""
+    actions = hist.reindex(columns=ACTION_COLUMNS).fillna(0.0)
+    return _daily_index(hist.index)[(actions != 0).any(axis=1).to_numpy()]
 
 class DataFetcher:
-    def __init__(self):
-        pass
+    def __init__(self, store=None, info_cache=None, provider=None, as_of=None):
+        """
+        Args:
+            provider: MarketDataProvider to read from (defaults to the
+                configured provider, live Yahoo Finance unless overridden)
+            store: Optional TickerDatabase used as a persistent per-ticker bar
+                store. When set, only bars newer than the last stored date are
+                downloaded.
+            info_cache: TTLCache for Yahoo `.info` fundamentals (defaults to
+                the process-wide fundamentals_cache)
+            as_of: Date that history periods are counted back from (defaults
+                to today; replaying recorded data passes the recording's last date)
+        """
+        self.provider = provider or get_market_data_provider()
+        self.store = store
+        self.as_of = as_of
+        self.info_cache = info_cache if info_cache is not None else fundamentals_cache
+        # (ticker, period) -> history frame filled by prefetch_histories, served
+        # ahead of the store until clear_prefetched (end of the batch run)
+        self.prefetched_history = {}
 
-    def fetch_ticker_data(self, ticker, period="1y"):
+    def fetch_ticker_data(self, ticker, period=DEFAULT_PERIOD):
         """Fetch ticker data from Yahoo Finance"""
         try:
-            stock = yf.Ticker(ticker)
-
             # Get historical data
-            hist = stock.history(period=period)
+            hist = self._load_history(ticker, period)
 
             if hist.empty:
                 return None
@@ -22,7 +88,7 @@ class DataFetcher:
             latest_date = hist.index[-1].date()
 
             # Get fundamental data
-            info = stock.info
+            info = self._get_info(ticker)
 
             data = {
                 'date': latest_date,
@@ -46,14 +112,141 @@ class DataFetcher:
             print(f"Error fetching data for {ticker}: {str(e)}")
             return None
 
+    def _get_info(self, ticker):
+        """
+        Get Yahoo `.info` fundamentals through the TTL cache, so each ticker
+        pays for the (slow) request at most once per TTL window
+        """
+        return self.info_cache.get_or_load(ticker, lambda: self.provider.info(ticker))
+
+    def _period_start(self, period):
+        """Translate a yfinance period string into a start date (None if open-ended)"""
+        days = period_days(period)
+        if days is None:
+            return None
+        return (self.as_of or datetime.now().date()) - timedelta(days=days)
+
+    def _normalize_bars(self, hist):
+        """Keep OHLCV columns on a tz-naive daily index (see normalize_bars)"""
+        return normalize_bars(hist)
+
+    def _load_history(self, ticker, period):
+        """
+        Load daily history, reading the bar store first and downloading only
+        the bars after the last stored date
+        """
+        prefetched = self.prefetched_history.get((ticker, period))
+        if prefetched is not None:
+            return prefetched
+
+        start_date = self._period_start(period)
+        if self.store is None or start_date is None:
+            return self.provider.history(ticker, period=period)
+
+        first_date, last_date = self.store.get_price_date_range(ticker)
+        covered = (
+            first_date is not None and
+            first_date <= start_date + timedelta(days=STORE_START_TOLERANCE_DAYS)
+        )
+
+        if not covered:
+            # Cold store: one full download seeds it
+            hist = self.provider.history(ticker, period=period)
+            if hist.empty:
+                return hist
+            bars = self._normalize_bars(hist)
+            self.store.upsert_price_history(ticker, bars)
+            return bars[bars.index.date >= start_date]
+
+        # Re-request the last stored day too, so a partial intraday bar is refreshed
+        delta = self.provider.history(ticker, start=last_date.strftime('%Y-%m-%d'))
+        if not delta.empty:
+            if (corporate_action_dates(delta).date > last_date).any():
+                # A new dividend or split back-adjusts every stored bar: re-download
+                # the whole stored span so all of it stays on one adjustment basis
+                reseed_start = min(first_date, start_date).strftime('%Y-%m-%d')
+                delta = self.provider.history(ticker, start=reseed_start)
+            self.store.upsert_price_history(ticker, self._normalize_bars(delta))
+
+        return self.store.get_price_history(ticker, start_date=start_date)
+
+    def fetch_many(self, tickers, period="1y", batch_size=BATCH_DOWNLOAD_SIZE):
+        """
+        Download daily histories for many tickers in grouped batch requests
+
+        A failing ticker (or batch) is recorded and skipped; it never aborts
+        the rest of the run.
+
+        Args:
+            tickers: Yahoo Finance ticker symbols
+            period: yfinance period string
+            batch_size: Tickers per download request
+
+        Returns:
+            Tuple of (frames, failed): frames maps ticker -> OHLCV DataFrame,
+            failed maps ticker -> error message
+        """
+        frames = {}
+        failed = {}
+        tickers = list(dict.fromkeys(tickers))
+
+        for i in range(0, len(tickers), batch_size):
+            batch = tickers[i:i + batch_size]
+            try:
+                panel = self.provider.download(batch, period=period)
+            except Exception as e:
+                for ticker in batch:
+                    failed[ticker] = str(e)
+                continue
+
+            for ticker in batch:
+                try:
+                    if isinstance(panel.columns, pd.MultiIndex):
+                        if ticker not in panel.columns.get_level_values(0):
+                            failed[ticker] = "No data returned"
+                            continue
+                        hist = panel[ticker]
+                    else:
+                        hist = panel
+
+                    # Rows from other exchanges' calendars are all-NaN here
+                    hist = hist.dropna(subset=['Close'])
+                    if hist.empty:
+                        failed[ticker] = "No data returned"
+                        continue
+
+                    bars = self._normalize_bars(hist)
+                    if self.store is not None:
+                        self.store.upsert_price_history(ticker, bars)
+                    frames[ticker] = bars
+                except Exception as e:
+                    failed[ticker] = str(e)
+
+        return frames, failed
+
+    def prefetch_histories(self, tickers, period="1y"):
+        """
+        Batch-download histories once so fetch_ticker_data serves them from
+        memory (used by batch jobs before running each ticker's pipeline)
+
+        Returns:
+            Dict of tickers that failed to download -> error message
+        """
+        frames, failed = self.fetch_many(tickers, period=period)
+        for ticker, bars in frames.items():
+            self.prefetched_history[(ticker, period)] = bars
+        return failed
+
+    def clear_prefetched(self):
+        """Drop the prefetched histories so later fetches see new bars again"""
+        self.prefetched_history.clear()
+
     def fetch_historical_data(self, ticker, days=365):
         """Fetch historical data for technical analysis"""
         try:
-            stock = yf.Ticker(ticker)
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
+            start_date = datetime.now() - timedelta(days=days)
 
-            hist = stock.history(start=start_date, end=end_date)
+            hist = self.provider.history(ticker, start=start_date.strftime('%Y-%m-%d'))
 
             return hist
         except Exception as e:
@@ -63,8 +256,7 @@ class DataFetcher:
     def get_ticker_info(self, ticker):
         """Get comprehensive ticker information"""
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            info = self._get_info(ticker)
 
             return {
                 'company_name': info.get('longName', ticker),
@@ -1,10 +1,25 @@
 import sqlite3
 from datetime import datetime
+import hashlib
 import json
+import pandas as pd
+from src.config import SQLITE_DB_PATH
+from src.tracing import trace_methods
 
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+def report_hash(report_text):
+    """SHA-256 of a report's text (ties stored scores to the exact report)"""
+    return hashlib.sha256((report_text or '').encode('utf-8')).hexdigest()
+
+def _json_value(value):
+    """json.dumps fallback for NumPy scalars in score dicts"""
+    return value.item() if hasattr(value, 'item') else str(value)
+
+@trace_methods('sqlite')
 class TickerDatabase:
-    def __init__(self, db_path="data/ticker_data.db"):
-        self.db_path = db_path
+    def __init__(self, db_path=None):
+        self.db_path = db_path or SQLITE_DB_PATH
         self.init_db()
 
     def init_db(self):
@@ -54,6 +69,29 @@ class TickerDatabase:
             )
         """)
 
+        # Table for incremental indicator state (one JSON snapshot per ticker)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS indicator_state (
+                ticker TEXT PRIMARY KEY,
+                last_date DATE NOT NULL,
+                state TEXT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        # Table for monthly indicator distribution sketches (see quantile_sketch.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS indicator_sketches (
+                ticker TEXT NOT NULL,
+                indicator TEXT NOT NULL,
+                month TEXT NOT NULL,
+                sketch TEXT NOT NULL,
+                last_date DATE NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (ticker, indicator, month)
+            )
+        """)
+
         # Table for generated reports
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS reports (
@@ -64,11 +102,29 @@ class TickerDatabase:
                 technical_summary TEXT,
                 fundamental_summary TEXT,
                 sector_analysis TEXT,
+                close REAL,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 UNIQUE(ticker, date)
             )
         """)
 
+        # Databases created before reports stored the bar's close
+        cursor.execute("PRAGMA table_info(reports)")
+        if 'close' not in [column[1] for column in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE reports ADD COLUMN close REAL")
+
+        # Table for narrative scores of generated reports (one row per report)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS report_scores (
+                ticker TEXT NOT NULL,
+                date DATE NOT NULL,
+                report_hash TEXT NOT NULL,
+                scores TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (ticker, date)
+            )
+        """)
+
         conn.commit()
         conn.close()
 
@@ -108,23 +164,277 @@ class TickerDatabase:
         conn.commit()
         conn.close()
 
+    def upsert_price_history(self, ticker, hist, symbol=None):
+        """
+        Store daily OHLCV bars for a ticker, keeping any fundamentals already saved
+
+        Args:
+            ticker: Yahoo Finance ticker symbol
+            hist: DataFrame with Open/High/Low/Close/Volume columns indexed by date
+            symbol: Display symbol (defaults to the Yahoo ticker)
+
+        Returns:
+            Number of bars written
+        """
+        if hist is None or hist.empty:
+            return 0
+
+        # Yahoo often has no volume yet for the current intraday bar: store NULL
+        rows = [
+            (symbol or ticker, ticker, date.strftime('%Y-%m-%d'),
+             float(row['Open']), float(row['High']), float(row['Low']),
+             float(row['Close']), None if pd.isna(row['Volume']) else int(row['Volume']))
+            for date, row in hist[OHLCV_COLUMNS].iterrows()
+        ]
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        # Re-written bars (e.g. a partial intraday bar) only replace prices,
+        # so market_cap / pe_ratio saved by insert_ticker_data survive
+        cursor.executemany("""
+            INSERT INTO ticker_data (symbol, ticker, date, open, high, low, close, volume)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(ticker, date) DO UPDATE SET
+                open = excluded.open,
+                high = excluded.high,
+                low = excluded.low,
+                close = excluded.close,
+                volume = excluded.volume
+        """, rows)
+
+        conn.commit()
+        conn.close()
+        return len(rows)
+
+    def get_price_history(self, ticker, start_date=None):
+        """
+        Get stored daily OHLCV bars for a ticker
+
+        Args:
+            ticker: Yahoo Finance ticker symbol
+            start_date: Optional earliest date (inclusive)
+
+        Returns:
+            DataFrame with Open/High/Low/Close/Volume columns indexed by date
+            (empty if nothing is stored)
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        query = """
+            SELECT date, open, high, low, close, volume FROM ticker_data
+            WHERE ticker = ? AND close IS NOT NULL
+        """
+        params = [ticker]
+        if start_date is not None:
+            query += " AND date >= ?"
+            params.append(str(start_date))
+        query += " ORDER BY date ASC"
+
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        conn.close()
+
+        hist = pd.DataFrame(rows, columns=['Date'] + OHLCV_COLUMNS)
+        hist.index = pd.DatetimeIndex(pd.to_datetime(hist.pop('Date')), name='Date')
+        return hist
+
+    def get_price_date_range(self, ticker):
+        """Get (first_date, last_date) of stored bars for a ticker, or (None, None)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            SELECT MIN(date), MAX(date) FROM ticker_data
+            WHERE ticker = ? AND close IS NOT NULL
+        """, (ticker,))
+
+        row = cursor.fetchone()
+        conn.close()
+
+        if not row or row[0] is None:
+            return None, None
+        return (datetime.strptime(row[0], '%Y-%m-%d').date(),
+                datetime.strptime(row[1], '%Y-%m-%d').date())
+
+    def save_indicator_state(self, ticker, last_date, state):
+        """Persist a ticker's incremental indicator state (IncrementalIndicatorState.to_dict)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            INSERT OR REPLACE INTO indicator_state (ticker, last_date, state, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        """, (ticker, str(last_date), json.dumps(state)))
+
+        conn.commit()
+        conn.close()
+
+    def load_indicator_state(self, ticker):
+        """Get a ticker's persisted indicator state dict, or None"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT state FROM indicator_state WHERE ticker = ?", (ticker,))
+
+        row = cursor.fetchone()
+        conn.close()
+        return json.loads(row[0]) if row else None
+
+    def save_indicator_sketches(self, ticker, sketches):
+        """
+        Persist monthly indicator sketches in one transaction
+
+        Args:
+            ticker: Yahoo Finance ticker symbol
+            sketches: List of (indicator, month, sketch dict, last_date)
+        """
+        if not sketches:
+            return
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.executemany("""
+            INSERT OR REPLACE INTO indicator_sketches (ticker, indicator, month, sketch, last_date, updated_at)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """, [(ticker, indicator, month, json.dumps(sketch), str(last_date))
+              for indicator, month, sketch, last_date in sketches])
+
+        conn.commit()
+        conn.close()
+
+    def get_indicator_sketches(self, ticker, indicator, start_month=None, end_month=None):
+        """
+        Get monthly sketches for a ticker indicator
+
+        Returns:
+            List of (month, sketch dict, last_date) ordered by month
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        query = "SELECT month, sketch, last_date FROM indicator_sketches WHERE ticker = ? AND indicator = ?"
+        params = [ticker, indicator]
+        if start_month is not None:
+            query += " AND month >= ?"
+            params.append(start_month)
+        if end_month is not None:
+            query += " AND month <= ?"
+            params.append(end_month)
+        query += " ORDER BY month ASC"
+
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        conn.close()
+        return [(month, json.loads(sketch), last_date) for month, sketch, last_date in rows]
+
+    def get_latest_indicator_sketches(self, ticker):
+        """
+        Get the newest monthly sketch of each of a ticker's indicators
+
+        Returns:
+            Dict of indicator -> (month, sketch dict, last_date)
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            SELECT indicator, month, sketch, last_date FROM indicator_sketches AS s
+            WHERE ticker = ? AND month = (
+                SELECT MAX(month) FROM indicator_sketches
+                WHERE ticker = s.ticker AND indicator = s.indicator
+            )
+        """, (ticker,))
+
+        rows = cursor.fetchall()
+        conn.close()
+        return {indicator: (month, json.loads(sketch), last_date) for indicator, month, sketch, last_date in rows}
+
+    def get_sketch_months(self, ticker, start_month=None, end_month=None):
+        """Get the months (YYYY-MM, ascending) that have a stored sketch for a ticker"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        query = "SELECT DISTINCT month FROM indicator_sketches WHERE ticker = ?"
+        params = [ticker]
+        if start_month is not None:
+            query += " AND month >= ?"
+            params.append(start_month)
+        if end_month is not None:
+            query += " AND month <= ?"
+            params.append(end_month)
+        query += " ORDER BY month ASC"
+
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        conn.close()
+        return [month for month, in rows]
+
     def save_report(self, ticker, date, report_data):
-        """Save generated report"""
+        """Save generated report (report_data['close'] is the close of the bar it was written from)"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
         cursor.execute("""
             INSERT OR REPLACE INTO reports
-            (ticker, date, report_text, technical_summary, fundamental_summary, sector_analysis)
-            VALUES (?, ?, ?, ?, ?, ?)
+            (ticker, date, report_text, technical_summary, fundamental_summary, sector_analysis, close)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
         """, (ticker, date, report_data.get('report_text'),
               report_data.get('technical_summary'),
               report_data.get('fundamental_summary'),
-              report_data.get('sector_analysis')))
+              report_data.get('sector_analysis'),
+              report_data.get('close')))
+
+        conn.commit()
+        conn.close()
+
+    def save_report_scores(self, ticker, date, report_text, scores):
+        """
+        Save the narrative scores of a report
+
+        Args:
+            ticker: Yahoo ticker the report was saved under
+            date: Trading date of the report
+            report_text: The scored report (its hash is stored with the scores)
+            scores: Dict of score name -> dict of score fields
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            INSERT OR REPLACE INTO report_scores (ticker, date, report_hash, scores)
+            VALUES (?, ?, ?, ?)
+        """, (ticker, str(date), report_hash(report_text), json.dumps(scores, default=_json_value)))
 
         conn.commit()
         conn.close()
 
+    def get_report_scores(self, ticker, date, report_text=None):
+        """
+        Get stored narrative scores
+
+        Args:
+            ticker: Yahoo ticker the report was saved under
+            date: Trading date of the report
+            report_text: Optional report; scores of a different report are ignored
+
+        Returns:
+            Dict of score name -> dict of score fields, or None
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT report_hash, scores FROM report_scores WHERE ticker = ? AND date = ?",
+                       (ticker, str(date)))
+
+        row = cursor.fetchone()
+        conn.close()
+        if row is None or (report_text is not None and row[0] != report_hash(report_text)):
+            return None
+        return json.loads(row[1])
+
     def get_latest_data(self, ticker, days=30):
         """Get latest ticker data"""
         conn = sqlite3.connect(self.db_path)
@@ -157,15 +467,31 @@ class TickerDatabase:
         conn.close()
         return row
 
-    def get_cached_report(self, ticker, date):
-        """Get cached report if available"""
+    def get_cached_report(self, ticker, date, generated_after=None, close=None):
+        """
+        Get cached report if available
+
+        Args:
+            ticker: Yahoo ticker the report was saved under
+            date: Trading date of the bar the report was generated from
+            generated_after: Optional UTC datetime; older reports are ignored
+            close: Optional close of the current bar; a report written from a
+                different close (a revised intraday bar) is ignored
+        """
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
-        cursor.execute("""
-            SELECT report_text FROM reports
-            WHERE ticker = ? AND date = ?
-        """, (ticker, date))
+        query = "SELECT report_text FROM reports WHERE ticker = ? AND date = ?"
+        params = [ticker, str(date)]
+        if close is not None:
+            query += " AND close = ?"
+            params.append(float(close))
+        if generated_after is not None:
+            # created_at is SQLite CURRENT_TIMESTAMP (UTC, 'YYYY-MM-DD HH:MM:SS')
+            query += " AND created_at > ?"
+            params.append(generated_after.strftime('%Y-%m-%d %H:%M:%S'))
+
+        cursor.execute(query, params)
 
         row = cursor.fetchone()
         conn.close()
@@ -0,0 +1,144 @@
+"""
+Import-time profiling and budgets for the src package
+
+Lambda cold starts pay for every module imported at load time. Each entry
+point is imported in a fresh interpreter with `python -X importtime`, and
+the per-module timings are parsed into a profile. check_budgets fails when
+an entry point loads a heavy dependency that should only be imported inside
+the code path that uses it (matplotlib for charts, reportlab for PDFs, ...).
+That check is deterministic. The wall-clock budgets depend on the machine,
+so they are reported and only fail the check when enforced
+(IMPORT_BUDGETS_ENFORCE=true or `scripts/profile_imports.py --check`).
+"""
+
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Cumulative import time budget per entry point (seconds, fresh interpreter)
+IMPORT_BUDGETS = {
+    'src.agent': 1.5,
+    'src.api_handler': 1.5,
+    'src.line_bot': 1.5,
+    'src.lambda_handler': 1.5,
+}
+
+# Fail check_budgets on time overruns (otherwise they are only reported)
+ENFORCE_TIME_BUDGETS = os.getenv("IMPORT_BUDGETS_ENFORCE", "false").lower() == "true"
+
+# Packages the entry points must not load at import time
+DEFERRED_IMPORTS = ('matplotlib', 'reportlab', 'scipy', 'qdrant_client', 'langgraph', 'langchain_openai',
+                    'yfinance', 'httpx')
+
+
+def parse_importtime(output):
+    """
+    Parse `python -X importtime` stderr
+
+    Returns:
+        List of {'module', 'self_seconds', 'cumulative_seconds', 'depth'}
+        in import-completion order
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        entries.append({
+            'module': name.strip(),
+            'self_seconds': int(self_us) / 1e6,
+            'cumulative_seconds': int(cumulative_us) / 1e6,
+            'depth': (len(name) - len(name.lstrip())) // 2
+        })
+    return entries
+
+
+def profile_import(module, python=None):
+    """
+    Import one module in a fresh interpreter and profile it
+
+    Returns:
+        Dict with module, seconds (cumulative import time), entries (see
+        parse_importtime) and packages (top-level packages loaded)
+    """
+    result = subprocess.run(
+        [python or sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise ImportError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    entries = parse_importtime(result.stderr)
+    seconds = next((e['cumulative_seconds'] for e in reversed(entries) if e['module'] == module), 0.0)
+    return {
+        'module': module,
+        'seconds': seconds,
+        'entries': entries,
+        'packages': {e['module'].split('.')[0] for e in entries}
+    }
+
+
+def check_budgets(budgets=None, deferred=DEFERRED_IMPORTS, retries=2, enforce_time=None):
+    """
+    Check entry points against their import budgets
+
+    Loading a deferred package is always a violation. A time overrun is one
+    only when enforce_time is set (default: ENFORCE_TIME_BUDGETS); each
+    profile's 'over_budget' flag reports it either way. When enforcing, a
+    module over its time budget is re-measured up to `retries` more times
+    (best time counts), so a noisy run does not fail the check.
+
+    Returns:
+        (profiles, violations): profile per module (with 'budget' and
+        'over_budget') and a list of messages
+    """
+    budgets = IMPORT_BUDGETS if budgets is None else budgets
+    enforce_time = ENFORCE_TIME_BUDGETS if enforce_time is None else enforce_time
+    profiles = {}
+    violations = []
+
+    for module, budget in budgets.items():
+        profile = profile_import(module)
+        for _ in range(retries if enforce_time else 0):
+            if profile['seconds'] <= budget:
+                break
+            retry = profile_import(module)
+            if retry['seconds'] < profile['seconds']:
+                profile = retry
+        profile['budget'] = budget
+        profile['over_budget'] = profile['seconds'] > budget
+        profiles[module] = profile
+
+        if enforce_time and profile['over_budget']:
+            violations.append(f"{module}: import took {profile['seconds']:.2f}s (budget {budget:.2f}s)")
+        for package in sorted(profile['packages'] & set(deferred)):
+            violations.append(f"{module}: loads {package} at import time")
+
+    return profiles, violations
+
+
+def import_subtree(entries, module):
+    """Entries imported while importing `module` (they precede it, one level deeper or more)"""
+    for index in range(len(entries) - 1, -1, -1):
+        if entries[index]['module'] == module:
+            depth = entries[index]['depth']
+            start = index
+            while start > 0 and entries[start - 1]['depth'] > depth:
+                start -= 1
+            return entries[start:index]
+    return []
+
+
+def format_profile(profile, top=15):
+    """Import time of a module and its slowest imports (two levels deep)"""
+    lines = [f"{profile['module']}: {profile['seconds'] * 1000:.0f} ms"]
+    subtree = import_subtree(profile['entries'], profile['module'])
+    base_depth = min((e['depth'] for e in subtree), default=0)
+    slowest = sorted((e for e in subtree if e['depth'] <= base_depth + 1),
+                     key=lambda e: e['cumulative_seconds'], reverse=True)[:top]
+    for entry in slowest:
+        lines.append(f"  {'  ' * (entry['depth'] - base_depth)}{entry['module']:<40} "
+                     f"{entry['cumulative_seconds'] * 1000:8.1f} ms")
+    return "\n".join(lines)
@@ -0,0 +1,468 @@
+"""
+Incremental (streaming) technical indicator state
+
+IncrementalIndicatorState keeps running sums, EMA states and fixed-size
+ring buffers for each rolling window, so applying one new daily bar costs
+O(1) instead of recomputing every series over the whole history. It
+produces the same `indicators` dict as TechnicalAnalyzer.calculate_all_indicators
+and serializes to a JSON-friendly dict so it can be persisted per ticker.
+
+VWAP is cumulative, like src.indicators.vwap. A state built with
+vwap_window_days only accumulates the bars of that trailing calendar
+window; the persisted per-ticker state uses the analysis fetch window
+(DEFAULT_PERIOD), so its VWAP and uncertainty score match
+calculate_all_indicators on the history the agent fetches.
+
+Window lengths, EMA spans and band widths come from INDICATOR_REGISTRY
+when a state is created and are persisted with it; a saved state built
+with other parameters is re-seeded.
+"""
+
+import math
+from collections import deque
+
+import pandas as pd
+
+from src.data_fetcher import DEFAULT_PERIOD, normalize_bars, period_days
+from src.indicators import indicator_param
+
+# Moving averages kept by the state (named as in TechnicalAnalyzer.INDICATOR_SERIES)
+SMA_SERIES = ('SMA_20', 'SMA_50', 'SMA_200')
+
+# Running sums are rebuilt from their buffers this often to bound float drift
+RESYNC_EVERY = 500
+
+NAN = float('nan')
+
+# Calendar days of history each analysis fetches: the persisted state's VWAP window
+ANALYSIS_WINDOW_DAYS = period_days(DEFAULT_PERIOD)
+
+# Values an update overwrites, restored when a same-date bar replaces the last one
+_SCALARS = ('bars', 'last_date', 'prev_close', 'bb_sum_sq', 'gain_sum', 'loss_sum', 'tr_sum',
+            'volume_sum', 'ema_fast', 'ema_slow', 'macd_signal', 'cum_pv', 'cum_volume', 'latest')
+
+# Ring buffers an update appends exactly one value to
+_BUFFERS = ('closes', 'gains', 'losses', 'true_ranges', 'volumes')
+
+
+def _ema_alpha(span):
+    return 2.0 / (span + 1.0)
+
+
+def indicator_params():
+    """Parameters of the registered indicators the state reproduces, read from INDICATOR_REGISTRY"""
+    return {
+        'sma_windows': {name: indicator_param(name, 'window') for name in SMA_SERIES},
+        'rsi_period': indicator_param('RSI', 'period'),
+        'atr_window': indicator_param('ATR', 'window'),
+        'bb_window': indicator_param('BB_Std', 'window'),
+        'bb_upper_std': indicator_param('BB_Upper', 'num_std'),
+        'bb_lower_std': indicator_param('BB_Lower', 'num_std'),
+        'volume_sma_window': indicator_param('Volume_SMA', 'window'),
+        'fast_span': indicator_param('EMA_12', 'span'),
+        'slow_span': indicator_param('EMA_26', 'span'),
+        'signal_span': indicator_param('MACD_Signal', 'span'),
+    }
+
+
+def _ratio(numerator, denominator):
+    return numerator / denominator if denominator else NAN
+
+
+class IncrementalIndicatorState:
+    """Per-ticker indicator state updated one bar at a time"""
+
+    def __init__(self, vwap_window_days=None, params=None):
+        """
+        Args:
+            vwap_window_days: Only bars within this many calendar days of the
+                latest bar count towards VWAP (None: every bar since the first)
+            params: Indicator parameters (defaults to indicator_params())
+        """
+        self.vwap_window_days = vwap_window_days
+        self.params = params if params is not None else indicator_params()
+        self.bars = 0
+        self.last_date = None
+        self.prev_close = None
+
+        # Ring buffers for rolling windows, with their running sums; the SMAs
+        # and the Bollinger standard deviation share one close buffer
+        self.close_windows = sorted(set(self.params['sma_windows'].values()) | {self.params['bb_window']})
+        self.closes = deque(maxlen=max(self.close_windows))
+        self.close_sums = {window: 0.0 for window in self.close_windows}
+        self.bb_sum_sq = 0.0
+        self.gains = deque(maxlen=self.params['rsi_period'])
+        self.losses = deque(maxlen=self.params['rsi_period'])
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self.true_ranges = deque(maxlen=self.params['atr_window'])
+        self.tr_sum = 0.0
+        self.volumes = deque(maxlen=self.params['volume_sma_window'])
+        self.volume_sum = 0.0
+
+        # EMA states (MACD) and cumulative sums (VWAP)
+        self.ema_fast = None
+        self.ema_slow = None
+        self.macd_signal = None
+        self.cum_pv = 0.0
+        self.cum_volume = 0.0
+        # (date, typical price x volume, volume) of each bar in the VWAP window
+        self.vwap_bars = deque()
+
+        self.latest = {}
+
+        # Undo record of the last bar (see _snapshot), so a revised (intraday)
+        # bar for the same date can replace it
+        self._before_last = None
+
+    @staticmethod
+    def _push(buffer, value, total):
+        """Append to a ring buffer and return the updated running sum"""
+        if len(buffer) == buffer.maxlen:
+            total -= buffer[0]
+        buffer.append(value)
+        return total + value
+
+    def update(self, date, open_, high, low, close, volume):
+        """
+        Apply one daily bar in constant time
+
+        A bar dated before the last applied bar is ignored; a bar with the same
+        date replaces the last one (e.g. a refreshed intraday bar).
+
+        Args:
+            date: Bar date (anything pd.Timestamp accepts)
+            open_, high, low, close, volume: Bar prices and volume
+
+        Returns:
+            True if the bar was applied
+        """
+        timestamp = pd.Timestamp(date)
+        date = timestamp.strftime('%Y-%m-%d')
+        if self.last_date is not None:
+            if date < self.last_date:
+                return False
+            if date == self.last_date and self._before_last is not None:
+                self._undo(self._before_last)
+
+        undo = self._snapshot()
+        close, high, low, volume = float(close), float(high), float(low), float(volume)
+        # A bar without volume (Yahoo's live intraday bar) trades nothing: it adds 0
+        # to the volume SMA and is skipped by VWAP, as pandas cumsum skips NaN
+        traded = 0.0 if math.isnan(volume) else volume
+
+        # Simple moving averages share one close buffer
+        for window in self.close_windows:
+            if len(self.closes) >= window:
+                self.close_sums[window] -= self.closes[-window]
+            self.close_sums[window] += close
+        bb_window = self.params['bb_window']
+        if len(self.closes) >= bb_window:
+            self.bb_sum_sq -= self.closes[-bb_window] ** 2
+        self.bb_sum_sq += close ** 2
+        self.closes.append(close)
+
+        # RSI components (first bar counts as zero change, like Series.diff + where)
+        change = 0.0 if self.prev_close is None else close - self.prev_close
+        self.gain_sum = self._push(self.gains, max(change, 0.0), self.gain_sum)
+        self.loss_sum = self._push(self.losses, max(-change, 0.0), self.loss_sum)
+
+        # True range
+        true_range = high - low
+        if self.prev_close is not None:
+            true_range = max(true_range, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.tr_sum = self._push(self.true_ranges, true_range, self.tr_sum)
+
+        # Volume SMA and cumulative VWAP
+        self.volume_sum = self._push(self.volumes, traded, self.volume_sum)
+        price_volume = (high + low + close) / 3 * traded
+        self.cum_pv += price_volume
+        self.cum_volume += traded
+        if self.vwap_window_days is not None:
+            self.vwap_bars.append((date, price_volume, traded))
+            cutoff = (timestamp - pd.Timedelta(days=self.vwap_window_days)).strftime('%Y-%m-%d')
+            while self.vwap_bars[0][0] < cutoff:
+                dropped = self.vwap_bars.popleft()
+                undo['vwap_dropped'].append(dropped)
+                self.cum_pv -= dropped[1]
+                self.cum_volume -= dropped[2]
+
+        # MACD EMAs (adjust=False recursion, seeded with the first value)
+        if self.ema_fast is None:
+            self.ema_fast = self.ema_slow = close
+        else:
+            self.ema_fast += _ema_alpha(self.params['fast_span']) * (close - self.ema_fast)
+            self.ema_slow += _ema_alpha(self.params['slow_span']) * (close - self.ema_slow)
+        macd = self.ema_fast - self.ema_slow
+        if self.macd_signal is None:
+            self.macd_signal = macd
+        else:
+            self.macd_signal += _ema_alpha(self.params['signal_span']) * (macd - self.macd_signal)
+
+        self.prev_close = close
+        self.last_date = date
+        self.bars += 1
+        if self.bars % RESYNC_EVERY == 0:
+            self._resync()
+
+        self.latest = self._indicators(close, volume, macd)
+        self._before_last = undo
+        return True
+
+    def _buffers(self):
+        return [(name, getattr(self, name)) for name in _BUFFERS]
+
+    def _snapshot(self):
+        """
+        Undo record for the next update: the values it overwrites and the
+        oldest value of each full ring buffer (the one it drops), so taking
+        it and undoing it are O(1) rather than copying every buffer
+        """
+        undo = {name: getattr(self, name) for name in _SCALARS}
+        undo['close_sums'] = {str(window): total for window, total in self.close_sums.items()}
+        undo['dropped'] = {name: buffer[0] if len(buffer) == buffer.maxlen else None
+                           for name, buffer in self._buffers()}
+        # Filled by update with the bars that leave the VWAP window
+        undo['vwap_dropped'] = []
+        return undo
+
+    def _undo(self, undo):
+        """Revert the last update (undo record from _snapshot)"""
+        for name, buffer in self._buffers():
+            buffer.pop()
+            if undo['dropped'][name] is not None:
+                buffer.appendleft(undo['dropped'][name])
+        if self.vwap_window_days is not None:
+            self.vwap_bars.pop()
+            self.vwap_bars.extendleft(tuple(bar) for bar in reversed(undo['vwap_dropped']))
+        for name in _SCALARS:
+            setattr(self, name, undo[name])
+        self.close_sums = {int(window): total for window, total in undo['close_sums'].items()}
+
+    def update_from_history(self, hist_data):
+        """
+        Apply every bar of an OHLCV DataFrame that is not older than last_date
+
+        Returns:
+            Number of bars applied
+        """
+        applied = 0
+        for date, row in hist_data.iterrows():
+            if self.update(date, row['Open'], row['High'], row['Low'], row['Close'], row['Volume']):
+                applied += 1
+        return applied
+
+    @classmethod
+    def from_history(cls, hist_data, vwap_window_days=None, params=None):
+        """Seed a state from a full OHLCV history"""
+        state = cls(vwap_window_days=vwap_window_days, params=params)
+        state.update_from_history(hist_data)
+        return state
+
+    def _resync(self):
+        """Rebuild running sums from their buffers"""
+        closes = list(self.closes)
+        for window in self.close_windows:
+            self.close_sums[window] = math.fsum(closes[-window:])
+        self.bb_sum_sq = math.fsum(c * c for c in closes[-self.params['bb_window']:])
+        self.gain_sum = math.fsum(self.gains)
+        self.loss_sum = math.fsum(self.losses)
+        self.tr_sum = math.fsum(self.true_ranges)
+        self.volume_sum = math.fsum(self.volumes)
+        if self.vwap_window_days is not None:
+            self.cum_pv = math.fsum(bar[1] for bar in self.vwap_bars)
+            self.cum_volume = math.fsum(bar[2] for bar in self.vwap_bars)
+
+    def _sma(self, window):
+        if len(self.closes) < window:
+            return NAN
+        return self.close_sums[window] / window
+
+    def _indicators(self, close, volume, macd):
+        """Current indicator values in the calculate_all_indicators layout"""
+        smas = {name: self._sma(window) for name, window in self.params['sma_windows'].items()}
+
+        # Bollinger Bands: BB_Middle is SMA_20, BB_Std a sample std over its own window
+        bb_window = self.params['bb_window']
+        bb_middle = smas['SMA_20']
+        if len(self.closes) >= bb_window:
+            bb_mean = self._sma(bb_window)
+            variance = (self.bb_sum_sq - bb_window * bb_mean ** 2) / (bb_window - 1)
+            bb_std = math.sqrt(max(variance, 0.0))
+        else:
+            bb_std = NAN
+
+        rsi = NAN
+        if len(self.gains) == self.gains.maxlen:
+            avg_gain = self.gain_sum / self.gains.maxlen
+            avg_loss = self.loss_sum / self.gains.maxlen
+            if avg_loss > 0:
+                rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+            elif avg_gain > 0:
+                rsi = 100.0
+
+        atr = self.tr_sum / self.true_ranges.maxlen if len(self.true_ranges) == self.true_ranges.maxlen else NAN
+        volume_sma = self.volume_sum / self.volumes.maxlen if len(self.volumes) == self.volumes.maxlen else NAN
+        vwap = self.cum_pv / self.cum_volume if self.cum_volume else NAN
+
+        # Uncertainty score (same formula as src.indicators.uncertainty_score)
+        volume_ratio = _ratio(volume, volume_sma)
+        uncertainty_raw = abs(close - vwap) / vwap * volume_ratio * (atr / close)
+        uncertainty_score = 50 * (1 + math.tanh(uncertainty_raw * 10))
+
+        return {
+            'sma_20': smas['SMA_20'],
+            'sma_50': smas['SMA_50'],
+            'sma_200': smas['SMA_200'],
+            'rsi': rsi,
+            'macd': macd,
+            'macd_signal': self.macd_signal,
+            'bb_upper': bb_middle + bb_std * self.params['bb_upper_std'],
+            'bb_middle': bb_middle,
+            'bb_lower': bb_middle - bb_std * self.params['bb_lower_std'],
+            'volume_sma': volume_sma,
+            'current_price': close,
+            'volume': volume,
+            'uncertainty_score': uncertainty_score,
+            'atr': atr,
+            'vwap': vwap
+        }
+
+    def indicators(self):
+        """Latest indicators dict (empty before the first bar)"""
+        return dict(self.latest)
+
+    def series(self):
+        """
+        Latest value of each TechnicalAnalyzer.INDICATOR_SERIES column, as in
+        the last row of compute_indicator_frame (empty before the first bar)
+        """
+        if not self.latest:
+            return {}
+
+        latest = self.latest
+        close, vwap, atr = latest['current_price'], latest['vwap'], latest['atr']
+        values = {
+            'SMA_20': latest['sma_20'],
+            'SMA_50': latest['sma_50'],
+            'SMA_200': latest['sma_200'],
+            'RSI': latest['rsi'],
+            'MACD': latest['macd'],
+            'MACD_Signal': latest['macd_signal'],
+            'BB_Upper': latest['bb_upper'],
+            'BB_Middle': latest['bb_middle'],
+            'BB_Lower': latest['bb_lower'],
+            'Volume_SMA': latest['volume_sma'],
+            'ATR': atr,
+            'VWAP': vwap,
+            'Volume_Ratio': _ratio(latest['volume'], latest['volume_sma']),
+            'Uncertainty_Score': latest['uncertainty_score'],
+            'ATR_Percent': _ratio(atr, close) * 100,
+            'Price_VWAP_Pct': _ratio(close - vwap, vwap) * 100,
+        }
+        for name in SMA_SERIES:
+            values[f'{name}_Deviation'] = _ratio(close - values[name], values[name]) * 100
+        return values
+
+    def to_dict(self):
+        """JSON-serializable snapshot of the state"""
+        return {
+            'vwap_window_days': self.vwap_window_days,
+            'params': self.params,
+            'bars': self.bars,
+            'last_date': self.last_date,
+            'prev_close': self.prev_close,
+            'closes': list(self.closes),
+            'close_sums': {str(window): total for window, total in self.close_sums.items()},
+            'bb_sum_sq': self.bb_sum_sq,
+            'gains': list(self.gains),
+            'losses': list(self.losses),
+            'gain_sum': self.gain_sum,
+            'loss_sum': self.loss_sum,
+            'true_ranges': list(self.true_ranges),
+            'tr_sum': self.tr_sum,
+            'volumes': list(self.volumes),
+            'volume_sum': self.volume_sum,
+            'ema_fast': self.ema_fast,
+            'ema_slow': self.ema_slow,
+            'macd_signal': self.macd_signal,
+            'cum_pv': self.cum_pv,
+            'cum_volume': self.cum_volume,
+            'vwap_bars': [list(bar) for bar in self.vwap_bars],
+            'latest': self.latest,
+            'before_last': self._before_last
+        }
+
+    def _restore(self, data):
+        self.bars = data['bars']
+        self.last_date = data['last_date']
+        self.prev_close = data['prev_close']
+        self.closes = deque(data['closes'], maxlen=self.closes.maxlen)
+        self.close_sums = {int(window): total for window, total in data['close_sums'].items()}
+        self.bb_sum_sq = data['bb_sum_sq']
+        self.gains = deque(data['gains'], maxlen=self.gains.maxlen)
+        self.losses = deque(data['losses'], maxlen=self.losses.maxlen)
+        self.gain_sum = data['gain_sum']
+        self.loss_sum = data['loss_sum']
+        self.true_ranges = deque(data['true_ranges'], maxlen=self.true_ranges.maxlen)
+        self.tr_sum = data['tr_sum']
+        self.volumes = deque(data['volumes'], maxlen=self.volumes.maxlen)
+        self.volume_sum = data['volume_sum']
+        self.ema_fast = data['ema_fast']
+        self.ema_slow = data['ema_slow']
+        self.macd_signal = data['macd_signal']
+        self.cum_pv = data['cum_pv']
+        self.cum_volume = data['cum_volume']
+        self.vwap_bars = deque(tuple(bar) for bar in data['vwap_bars'])
+        self.latest = dict(data['latest'])
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a state saved with to_dict"""
+        state = cls(vwap_window_days=data['vwap_window_days'], params=data['params'])
+        state._restore(data)
+        state._before_last = data['before_last']
+        return state
+
+
+def refresh_indicator_state(store, ticker, hist_data):
+    """
+    Bring a ticker's persisted indicator state up to date and return its indicators
+
+    Only bars dated on or after the persisted last_date are applied, so a daily
+    refresh costs one update per new bar. Without a saved state (or with one
+    saved for another VWAP window or other indicator parameters), the state is seeded from the last
+    ANALYSIS_WINDOW_DAYS of the ticker's stored bars (falling back to
+    hist_data): the same window the agent analyzes, so a short daily delta
+    still yields 200-day indicators and the cumulative VWAP matches.
+
+    Args:
+        store: TickerDatabase holding the indicator_state and ticker_data tables
+        ticker: Yahoo Finance ticker symbol
+        hist_data: OHLCV DataFrame covering at least the bars since the last
+            refresh (raw provider frames with a tz-aware index are accepted)
+
+    Returns:
+        Indicators dict in the calculate_all_indicators layout, or None if no bars
+    """
+    hist_data = normalize_bars(hist_data)
+    saved = store.load_indicator_state(ticker)
+    if (saved is not None and saved.get('vwap_window_days') == ANALYSIS_WINDOW_DAYS
+            and saved.get('params') == indicator_params()):
+        state = IncrementalIndicatorState.from_dict(saved)
+        if state.last_date is not None:
+            hist_data = hist_data[hist_data.index >= pd.Timestamp(state.last_date)]
+        state.update_from_history(hist_data)
+    else:
+        stored = store.get_price_history(ticker)
+        seed = stored if len(stored) > len(hist_data) else hist_data
+        if not seed.empty:
+            seed = seed[seed.index >= seed.index[-1] - pd.Timedelta(days=ANALYSIS_WINDOW_DAYS)]
+        state = IncrementalIndicatorState.from_history(seed, vwap_window_days=ANALYSIS_WINDOW_DAYS)
+        state.update_from_history(hist_data)
+
+    if state.last_date is None:
+        return None
+
+    store.save_indicator_state(ticker, state.last_date, state.to_dict())
+    return state.indicators()
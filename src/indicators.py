@@ -0,0 +1,243 @@
+"""
+Indicator registry resolved as a dependency DAG
+
+Each indicator is registered with the names of the series it consumes
+(raw OHLCV columns or other indicators) and its parameters. An
+IndicatorRun resolves requested indicators depth-first with a per-run
+memo, so every intermediate series (true range, EMAs, volume SMA, ...) is
+computed exactly once and shared by every consumer in that run: the
+indicator frame, percentiles, the chart and PDF scoring.
+
+Adding an indicator only needs a register_indicator call:
+
+    @register_indicator('EMA_50', inputs=['Close'], span=50)
+    def ema_50(close, span):
+        return ema(close, span)
+"""
+
+import numpy as np
+import pandas as pd
+
+BASE_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+class Indicator:
+    """A registered indicator: name, input series, parameters and compute function"""
+
+    def __init__(self, name, inputs, func, params=None):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.func = func
+        self.params = params or {}
+
+    def compute(self, *series):
+        return self.func(*series, **self.params)
+
+
+INDICATOR_REGISTRY = {}
+
+
+def register_indicator(name, inputs, registry=None, **params):
+    """
+    Decorator registering an indicator function
+
+    Args:
+        name: Series name produced (column name in the indicator frame)
+        inputs: Names of the series passed positionally to the function
+        registry: Registry dict (defaults to INDICATOR_REGISTRY)
+        **params: Keyword parameters passed to the function
+    """
+    target = INDICATOR_REGISTRY if registry is None else registry
+
+    def decorator(func):
+        target[name] = Indicator(name, inputs, func, params)
+        return func
+
+    return decorator
+
+
+def indicator_param(name, key, registry=None):
+    """
+    Current value of a registered indicator's parameter
+
+    Code that reimplements an indicator outside IndicatorRun (the panel and
+    streaming paths) reads its windows here at call time, so they follow
+    the registry.
+    """
+    target = INDICATOR_REGISTRY if registry is None else registry
+    return target[name].params[key]
+
+
+class IndicatorRun:
+    """Resolve indicators for one price history, memoizing every series produced"""
+
+    def __init__(self, data, registry=None):
+        """
+        Args:
+            data: OHLCV DataFrame
+            registry: Indicator registry (defaults to INDICATOR_REGISTRY)
+        """
+        self.data = data
+        self.registry = INDICATOR_REGISTRY if registry is None else registry
+        self.memo = {}
+        self.computed = []
+
+    def get(self, name):
+        """Return a series, computing it (and its inputs) on first use"""
+        if name in self.memo:
+            return self.memo[name]
+        return self._resolve(name, ())
+
+    def _resolve(self, name, path):
+        if name in self.memo:
+            return self.memo[name]
+        if name in path:
+            raise ValueError(f"Indicator dependency cycle: {' -> '.join(path + (name,))}")
+
+        if name in self.registry:
+            indicator = self.registry[name]
+            inputs = [self._resolve(dep, path + (name,)) for dep in indicator.inputs]
+            series = indicator.compute(*inputs)
+            self.computed.append(name)
+        elif name in self.data.columns:
+            series = self.data[name]
+        else:
+            raise KeyError(f"Unknown indicator or column: {name}")
+
+        self.memo[name] = series
+        return series
+
+    def frame(self, names):
+        """DataFrame of the input data plus the requested indicator columns"""
+        df = self.data.copy()
+        for name in names:
+            df[name] = self.get(name)
+        return df
+
+
+# ---------------------------------------------------------------------------
+# Building blocks
+# ---------------------------------------------------------------------------
+
+def sma(series, window):
+    """Simple moving average"""
+    return series.rolling(window=window).mean()
+
+
+def ema(series, span):
+    """Exponential moving average (recursive, adjust=False)"""
+    return series.ewm(span=span, adjust=False).mean()
+
+
+def rsi(close, period=14):
+    """Relative Strength Index from simple averages of gains and losses"""
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+
+def true_range(high, low, close):
+    """Largest of high-low and the gaps from the previous close"""
+    tr1 = high - low  # Current high - current low
+    tr2 = abs(high - close.shift())  # Current high - previous close
+    tr3 = abs(low - close.shift())  # Current low - previous close
+    return pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+
+
+def vwap(high, low, close, volume):
+    """Cumulative volume weighted average of the typical price"""
+    typical_price = (high + low + close) / 3
+    return (typical_price * volume).cumsum() / volume.cumsum()
+
+
+def uncertainty_score(close, atr, vwap_series, volume_ratio):
+    """
+    Pricing uncertainty (0-100): price deviation from VWAP x volume ratio x
+    ATR as a fraction of price, squashed with tanh
+    """
+    # Buy-Sell Pressure = Price Action × Volume Ratio
+    price_deviation = abs(close - vwap_series) / vwap_series
+    buy_sell_pressure = price_deviation * volume_ratio
+
+    # Pricing Uncertainty = Buy-Sell Pressure × Volatility
+    uncertainty_raw = buy_sell_pressure * (atr / close)
+
+    # tanh squashes values to [-1, 1], we scale to [0, 100]
+    return 50 * (1 + np.tanh(uncertainty_raw * 10))
+
+
+# ---------------------------------------------------------------------------
+# Registered indicators
+# ---------------------------------------------------------------------------
+
+for _window in (20, 50, 200):
+    register_indicator(f'SMA_{_window}', inputs=['Close'], window=_window)(sma)
+
+register_indicator('RSI', inputs=['Close'], period=14)(rsi)
+
+register_indicator('EMA_12', inputs=['Close'], span=12)(ema)
+register_indicator('EMA_26', inputs=['Close'], span=26)(ema)
+
+
+@register_indicator('MACD', inputs=['EMA_12', 'EMA_26'])
+def macd(fast_ema, slow_ema):
+    return fast_ema - slow_ema
+
+
+register_indicator('MACD_Signal', inputs=['MACD'], span=9)(ema)
+
+
+@register_indicator('BB_Std', inputs=['Close'], window=20)
+def rolling_std(close, window):
+    return close.rolling(window=window).std()
+
+
+@register_indicator('BB_Middle', inputs=['SMA_20'])
+def bb_middle(sma_20):
+    return sma_20
+
+
+@register_indicator('BB_Upper', inputs=['BB_Middle', 'BB_Std'], num_std=2)
+def bb_upper(middle, std, num_std):
+    return middle + (std * num_std)
+
+
+@register_indicator('BB_Lower', inputs=['BB_Middle', 'BB_Std'], num_std=2)
+def bb_lower(middle, std, num_std):
+    return middle - (std * num_std)
+
+
+register_indicator('Volume_SMA', inputs=['Volume'], window=20)(sma)
+register_indicator('True_Range', inputs=['High', 'Low', 'Close'])(true_range)
+register_indicator('ATR', inputs=['True_Range'], window=14)(sma)
+register_indicator('VWAP', inputs=['High', 'Low', 'Close', 'Volume'])(vwap)
+
+
+@register_indicator('Volume_Ratio', inputs=['Volume', 'Volume_SMA'])
+def volume_ratio(volume, volume_sma):
+    return volume / volume_sma
+
+
+register_indicator('Uncertainty_Score', inputs=['Close', 'ATR', 'VWAP', 'Volume_Ratio'])(uncertainty_score)
+
+
+@register_indicator('ATR_Percent', inputs=['ATR', 'Close'])
+def atr_percent(atr, close):
+    return (atr / close) * 100
+
+
+@register_indicator('Price_VWAP_Pct', inputs=['Close', 'VWAP'])
+def price_vwap_pct(close, vwap_series):
+    return ((close - vwap_series) / vwap_series) * 100
+
+
+def sma_deviation(close, sma_series):
+    """Close above (+) or below (-) a moving average, in percent"""
+    return (close - sma_series) / sma_series * 100
+
+
+for _window in (20, 50, 200):
+    register_indicator(f'SMA_{_window}_Deviation', inputs=['Close', f'SMA_{_window}'])(sma_deviation)
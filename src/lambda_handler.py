@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 from src.line_bot import LineBot
@@ -5,6 +6,10 @@ from src.line_bot import LineBot
 # Initialize bot (cold start optimization)
 bot = None
 
+# One event loop per container: the OpenAI client keeps its async HTTP connections
+# bound to the loop that opened them, so each invocation reuses it instead of asyncio.run
+loop = None
+
 def get_bot():
     """Get or create bot instance"""
     global bot
@@ -12,6 +17,13 @@ def get_bot():
         bot = LineBot()
     return bot
 
+def get_loop():
+    """Get or create the container's event loop"""
+    global loop
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+    return loop
+
 def lambda_handler(event, context):
     """
     AWS Lambda handler for LINE bot webhook
@@ -31,7 +43,10 @@ def lambda_handler(event, context):
 
     # Handle webhook
     try:
-        result = line_bot.handle_webhook(body, signature)
+        # Async path: the events of one delivery are analyzed and replied to concurrently
+        result = get_loop().run_until_complete(line_bot.ahandle_webhook(body, signature))
+        # Replies are already sent: store the background scores before Lambda can freeze
+        line_bot.agent.drain_scoring()
         return result
     except Exception as e:
         print(f"Error handling webhook: {str(e)}")
@@ -3,14 +3,21 @@ import os
 import hmac
 import hashlib
 import base64
+import asyncio
 import requests
 from src.agent import TickerAnalysisAgent
+from src.config import SCORING_MODE_SET
+from src.tracing import traced
 
 class LineBot:
     def __init__(self):
         self.channel_access_token = os.getenv("LINE_CHANNEL_ACCESS_TOKEN")
         self.channel_secret = os.getenv("LINE_CHANNEL_SECRET")
         self.agent = TickerAnalysisAgent()
+        if not SCORING_MODE_SET:
+            # LINE replies never show narrative scores: by default score after replying
+            # (lambda_handler drains the queued jobs before the invocation returns)
+            self.agent.scoring_mode = 'background'
 
     def verify_signature(self, body, signature):
         """Verify LINE webhook signature"""
@@ -30,9 +37,10 @@ class LineBot:
         computed_signature = base64.b64encode(hash_digest).decode('utf-8')
         return hmac.compare_digest(signature, computed_signature)
 
-    def reply_message(self, reply_token, text):
-        """Send reply message via LINE Messaging API"""
-        url = "https://api.line.me/v2/bot/message/reply"
+    REPLY_URL = "https://api.line.me/v2/bot/message/reply"
+
+    def _reply_request(self, reply_token, text):
+        """Headers and JSON body for a reply, split into LINE-sized messages"""
 
         headers = {
             "Content-Type": "application/json",
@@ -54,40 +62,82 @@ class LineBot:
             "replyToken": reply_token,
             "messages": messages
         }
+        return headers, data
+
+    @traced("line.reply")
+    def reply_message(self, reply_token, text):
+        """Send reply message via LINE Messaging API"""
+        headers, data = self._reply_request(reply_token, text)
+        response = requests.post(self.REPLY_URL, headers=headers, json=data)
+        return response.status_code == 200
+
+    @traced("line.reply")
+    async def areply_message(self, reply_token, text):
+        """Async reply_message (non-blocking HTTP)"""
+        import httpx  # only the async webhook path needs it; kept off the cold start
 
-        response = requests.post(url, headers=headers, json=data)
+        headers, data = self._reply_request(reply_token, text)
+        async with httpx.AsyncClient(timeout=30) as client:
+            response = await client.post(self.REPLY_URL, headers=headers, json=data)
         return response.status_code == 200
 
-    def handle_message(self, event):
-        """Handle incoming message"""
+    def _message_ticker(self, event):
+        """
+        Ticker text from a message event
+
+        Returns:
+            (ticker, None) for a ticker request, (None, reply) when the event
+            needs a fixed reply, or (None, None) to ignore it
+        """
         message_type = event.get("type")
 
         if message_type != "message":
-            return None
+            return None, None
 
         message = event.get("message", {})
         if message.get("type") != "text":
-            return "กรุณาส่งชื่อ ticker เป็นข้อความ"
+            return None, "กรุณาส่งชื่อ ticker เป็นข้อความ"
 
         text = message.get("text", "").strip()
 
         # Check if it's a ticker request
         if not text:
-            return "กรุณาส่งชื่อ ticker เช่น DBS19, UOB19"
+            return None, "กรุณาส่งชื่อ ticker เช่น DBS19, UOB19"
+
+        return text, None
+
+    def handle_message(self, event):
+        """Handle incoming message"""
+        ticker, reply = self._message_ticker(event)
+        if ticker is None:
+            return reply
 
         # Show processing message
-        processing_msg = f"🔍 กำลังวิเคราะห์ {text.upper()}...\nโปรดรอสักครู่"
+        processing_msg = f"🔍 กำลังวิเคราะห์ {ticker.upper()}...\nโปรดรอสักครู่"
 
         # Generate report
-        report = self.agent.analyze_ticker(text)
+        report = self.agent.analyze_ticker(ticker)
 
         return report
 
-    def handle_webhook(self, body, signature):
-        """Handle LINE webhook"""
+    async def ahandle_message(self, event):
+        """Async handle_message (runs the agent's async graph)"""
+        ticker, reply = self._message_ticker(event)
+        if ticker is None:
+            return reply
+
+        return await self.agent.aanalyze_ticker(ticker)
+
+    def _parse_webhook(self, body, signature):
+        """
+        Verify and parse a webhook body
+
+        Returns:
+            (events, None) on success, or (None, error response)
+        """
         # Verify signature
         if not self.verify_signature(body, signature):
-            return {
+            return None, {
                 "statusCode": 403,
                 "body": json.dumps({"error": "Invalid signature"})
             }
@@ -96,14 +146,20 @@ class LineBot:
         try:
             data = json.loads(body)
         except json.JSONDecodeError:
-            return {
+            return None, {
                 "statusCode": 400,
                 "body": json.dumps({"error": "Invalid JSON"})
             }
 
-        # Process events
-        events = data.get("events", [])
+        return data.get("events", []), None
+
+    def handle_webhook(self, body, signature):
+        """Handle LINE webhook"""
+        events, error_response = self._parse_webhook(body, signature)
+        if error_response:
+            return error_response
 
+        # Process events
         for event in events:
             reply_token = event.get("replyToken")
 
@@ -120,3 +176,25 @@ class LineBot:
             "statusCode": 200,
             "body": json.dumps({"message": "OK"})
         }
+
+    async def ahandle_webhook(self, body, signature):
+        """Async handle_webhook: events in one delivery are answered concurrently"""
+        events, error_response = self._parse_webhook(body, signature)
+        if error_response:
+            return error_response
+
+        async def handle_event(event):
+            reply_token = event.get("replyToken")
+            if not reply_token:
+                return
+
+            response_text = await self.ahandle_message(event)
+            if response_text:
+                await self.areply_message(reply_token, response_text)
+
+        await asyncio.gather(*(handle_event(event) for event in events))
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps({"message": "OK"})
+        }
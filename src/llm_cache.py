@@ -0,0 +1,219 @@
+"""
+Persistent LLM response cache
+
+Re-analyzing a ticker on the same trading day rebuilds an identical prompt.
+CachedLLM wraps a LangChain chat model and answers repeated prompts from a
+SQLite table keyed by a hash of (model, temperature, messages), so they cost
+no API call. Entries expire after a TTL and the least recently used ones are
+evicted once the table exceeds max_entries.
+
+    llm = CachedLLM(ChatOpenAI(model="gpt-4o"), LLMCache("data/llm_cache.db"))
+    llm.invoke(messages)                     # cached
+    llm.invoke(messages, bypass_cache=True)  # fresh answer, cache refreshed
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from langchain_core.messages import AIMessage
+
+from src.tracing import trace_methods
+
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 5000
+
+
+def cache_key(model, temperature, messages):
+    """SHA-256 of the model, temperature and message types/contents"""
+    payload = json.dumps({
+        'model': model,
+        'temperature': temperature,
+        'messages': [[message.type, message.content] for message in messages]
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+@trace_methods('sqlite.llm_cache', names=('get', 'set'))
+class LLMCache:
+    """SQLite store of LLM responses with TTL expiry and LRU size eviction"""
+
+    def __init__(self, db_path="data/llm_cache.db", ttl_seconds=DEFAULT_TTL_SECONDS,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        Args:
+            db_path: SQLite file (created if missing)
+            ttl_seconds: Seconds an entry stays valid after it is stored
+            max_entries: Least recently used entries are dropped beyond this size
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def init_db(self):
+        """Initialize database schema"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                content TEXT NOT NULL,
+                usage TEXT,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache (last_used)")
+        conn.commit()
+        conn.close()
+
+    def get(self, key):
+        """
+        Return the cached entry, or None if missing or expired
+
+        Returns:
+            Dict with 'content' and 'usage' (token usage of the original call)
+        """
+        now = time.time()
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT content, usage, created_at FROM llm_cache WHERE key = ?", (key,))
+        row = cursor.fetchone()
+
+        entry = None
+        if row is not None and now - row[2] < self.ttl_seconds:
+            cursor.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+            entry = {'content': row[0], 'usage': json.loads(row[1]) if row[1] else None}
+        elif row is not None:
+            cursor.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+        conn.commit()
+        conn.close()
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def set(self, key, content, model=None, usage=None):
+        """Store a response, evicting expired and least recently used entries"""
+        now = time.time()
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT OR REPLACE INTO llm_cache (key, model, content, usage, created_at, last_used)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (key, model, content, json.dumps(usage) if usage else None, now, now))
+        cursor.execute("DELETE FROM llm_cache WHERE created_at <= ?", (now - self.ttl_seconds,))
+        cursor.execute("""
+            DELETE FROM llm_cache WHERE key IN (
+                SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+        conn.commit()
+        conn.close()
+
+    def size(self):
+        conn = self._connect()
+        count = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        conn.close()
+        return count
+
+    def clear(self):
+        """Drop all entries and reset counters"""
+        conn = self._connect()
+        conn.execute("DELETE FROM llm_cache")
+        conn.commit()
+        conn.close()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Get hit/miss counters"""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': (hits / total * 100) if total else 0.0,
+            'size': self.size(),
+            'ttl_seconds': self.ttl_seconds,
+            'max_entries': self.max_entries
+        }
+
+
+class CachedLLM:
+    """
+    Chat model wrapper answering repeated prompts from an LLMCache
+
+    Cache hits return an AIMessage with response_metadata {'cached': True}
+    and no usage_metadata (no tokens were spent). Other attributes are
+    delegated to the wrapped model.
+    """
+
+    def __init__(self, llm, cache, bypass=False):
+        """
+        Args:
+            llm: LangChain chat model
+            cache: LLMCache
+            bypass: Always call the model (the cache is still refreshed)
+        """
+        self.llm = llm
+        self.cache = cache
+        self.bypass = bypass
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    @property
+    def model(self):
+        return getattr(self.llm, 'model_name', None) or getattr(self.llm, 'model', None)
+
+    def _key(self, messages):
+        return cache_key(self.model, getattr(self.llm, 'temperature', None), messages)
+
+    def _cached_response(self, key, bypass_cache):
+        if self.bypass or bypass_cache:
+            return None
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        return AIMessage(content=entry['content'], response_metadata={'cached': True})
+
+    def _store(self, key, response):
+        usage = getattr(response, 'usage_metadata', None)
+        if isinstance(response.content, str) and response.content:
+            self.cache.set(key, response.content, model=self.model,
+                           usage=dict(usage) if isinstance(usage, dict) else None)
+        return response
+
+    def invoke(self, messages, bypass_cache=False, **kwargs):
+        """llm.invoke, served from the cache unless bypassed"""
+        key = self._key(messages)
+        cached = self._cached_response(key, bypass_cache)
+        if cached is not None:
+            return cached
+        return self._store(key, self.llm.invoke(messages, **kwargs))
+
+    async def ainvoke(self, messages, bypass_cache=False, **kwargs):
+        """llm.ainvoke, served from the cache unless bypassed (SQLite runs on a worker thread)"""
+        key = self._key(messages)
+        cached = await asyncio.to_thread(self._cached_response, key, bypass_cache)
+        if cached is not None:
+            return cached
+        response = await self.llm.ainvoke(messages, **kwargs)
+        return await asyncio.to_thread(self._store, key, response)
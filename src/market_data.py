@@ -0,0 +1,210 @@
+"""
+Market data providers behind DataFetcher and NewsFetcher
+
+- YahooFinanceProvider: live data from yfinance (default)
+- RecordingProvider: wraps another provider and captures every response to disk
+- ReplayProvider: serves recorded responses back deterministically, with
+  optional artificial latency, so the pipeline can be benchmarked offline
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from src.tracing import trace_methods
+from src.config import (
+    MARKET_DATA_PROVIDER,
+    MARKET_DATA_RECORD_DIR,
+    MARKET_DATA_REPLAY_LATENCY,
+)
+
+
+def _yfinance():
+    """yfinance, imported on the first live request (replay never needs it)"""
+    import yfinance
+    return yfinance
+
+
+class MarketDataProvider(ABC):
+    """Interface for the market data calls the pipeline makes (incomplete providers fail at construction)"""
+
+    @abstractmethod
+    def history(self, ticker: str, period: Optional[str] = None,
+                start: Optional[str] = None) -> pd.DataFrame:
+        """Daily OHLCV history, either for a yfinance period or from a start date"""
+
+    @abstractmethod
+    def info(self, ticker: str) -> Dict:
+        """Fundamentals dictionary (yfinance `.info` layout)"""
+
+    @abstractmethod
+    def news(self, ticker: str) -> List[Dict]:
+        """Raw news items (yfinance `.news` layout)"""
+
+    @abstractmethod
+    def download(self, tickers: List[str], period: str) -> pd.DataFrame:
+        """Grouped multi-ticker history panel (columns: ticker -> OHLCV)"""
+
+
+@trace_methods('yahoo')
+class YahooFinanceProvider(MarketDataProvider):
+    """Live Yahoo Finance data via yfinance"""
+
+    def history(self, ticker, period=None, start=None):
+        stock = _yfinance().Ticker(ticker)
+        if start is not None:
+            return stock.history(start=start)
+        return stock.history(period=period)
+
+    def info(self, ticker):
+        return _yfinance().Ticker(ticker).info
+
+    def news(self, ticker):
+        return _yfinance().Ticker(ticker).news
+
+    def download(self, tickers, period):
+        return _yfinance().download(
+            tickers, period=period, group_by='ticker', auto_adjust=True,
+            actions=False, threads=True, progress=False
+        )
+
+
+def _recording_key(method: str, args: Dict) -> str:
+    """Stable file name for a provider call"""
+    payload = json.dumps({'method': method, **args}, sort_keys=True, default=str)
+    digest = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+    ticker = str(args.get('ticker', 'batch')).replace('/', '_')
+    return f"{method}__{ticker}__{digest}.pkl"
+
+
+class RecordingProvider(MarketDataProvider):
+    """Pass calls through to another provider and save each response to disk"""
+
+    def __init__(self, inner: MarketDataProvider, record_dir: str = MARKET_DATA_RECORD_DIR):
+        self.inner = inner
+        self.record_dir = record_dir
+        os.makedirs(record_dir, exist_ok=True)
+
+    def _record(self, method, args, value):
+        path = os.path.join(self.record_dir, _recording_key(method, args))
+        with open(path, 'wb') as f:
+            pickle.dump({'method': method, 'args': args, 'value': value}, f)
+        return value
+
+    def history(self, ticker, period=None, start=None):
+        args = {'ticker': ticker, 'period': period, 'start': start}
+        return self._record('history', args, self.inner.history(ticker, period=period, start=start))
+
+    def info(self, ticker):
+        return self._record('info', {'ticker': ticker}, self.inner.info(ticker))
+
+    def news(self, ticker):
+        return self._record('news', {'ticker': ticker}, self.inner.news(ticker))
+
+    def download(self, tickers, period):
+        args = {'tickers': list(tickers), 'period': period}
+        return self._record('download', args, self.inner.download(tickers, period))
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Serve responses captured by RecordingProvider, without network access
+
+    History requests that were not recorded verbatim (e.g. an incremental
+    `start=` request on a later day) are answered by slicing the longest
+    recorded history for that ticker; batch downloads fall back to
+    assembling recorded per-ticker histories.
+    """
+
+    def __init__(self, record_dir: str = MARKET_DATA_RECORD_DIR,
+                 latency: float = MARKET_DATA_REPLAY_LATENCY):
+        """
+        Args:
+            record_dir: Directory written by RecordingProvider
+            latency: Artificial delay in seconds added to every call
+        """
+        self.record_dir = record_dir
+        self.latency = latency
+        self.calls = 0
+        self._recordings = {}
+        self._histories = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.isdir(self.record_dir):
+            raise FileNotFoundError(f"No recordings found in {self.record_dir}")
+
+        for name in sorted(os.listdir(self.record_dir)):
+            if not name.endswith('.pkl'):
+                continue
+            with open(os.path.join(self.record_dir, name), 'rb') as f:
+                entry = pickle.load(f)
+            self._recordings[name] = entry['value']
+
+            if entry['method'] == 'history' and not entry['value'].empty:
+                ticker = entry['args']['ticker']
+                current = self._histories.get(ticker)
+                if current is None or len(entry['value']) > len(current):
+                    self._histories[ticker] = entry['value']
+
+    def last_date(self):
+        """Date of the newest recorded daily bar (None without recorded histories)"""
+        dates = [hist.index[-1].date() for hist in self._histories.values()]
+        return max(dates, default=None)
+
+    def _replay(self, method, args):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        key = _recording_key(method, args)
+        if key in self._recordings:
+            return self._recordings[key]
+        raise KeyError(f"No recording for {method} {args}")
+
+    def history(self, ticker, period=None, start=None):
+        try:
+            return self._replay('history', {'ticker': ticker, 'period': period, 'start': start})
+        except KeyError:
+            hist = self._histories.get(ticker)
+            if hist is None:
+                raise
+            if start is not None:
+                return hist[hist.index.date >= pd.Timestamp(start).date()]
+            return hist
+
+    def info(self, ticker):
+        return self._replay('info', {'ticker': ticker})
+
+    def news(self, ticker):
+        return self._replay('news', {'ticker': ticker})
+
+    def download(self, tickers, period):
+        try:
+            return self._replay('download', {'tickers': list(tickers), 'period': period})
+        except KeyError:
+            frames = {ticker: self._histories[ticker] for ticker in tickers if ticker in self._histories}
+            if not frames:
+                raise
+            return pd.concat(frames, axis=1)
+
+
+def get_market_data_provider(kind: Optional[str] = None) -> MarketDataProvider:
+    """
+    Build the configured provider
+
+    Args:
+        kind: 'yahoo', 'record' or 'replay' (defaults to MARKET_DATA_PROVIDER)
+    """
+    kind = (kind or MARKET_DATA_PROVIDER).lower()
+    if kind == 'record':
+        return RecordingProvider(YahooFinanceProvider())
+    if kind == 'replay':
+        return ReplayProvider()
+    return YahooFinanceProvider()
@@ -1,7 +1,7 @@
-import yfinance as yf
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import re
+from src.market_data import get_market_data_provider
 
 class NewsFetcher:
     """Fetch and filter high-impact news from Yahoo Finance"""
@@ -48,8 +48,13 @@ class NewsFetcher:
         'record', 'strong', 'robust', 'exceed', 'outperform'
     ]
 
-    def __init__(self):
-        pass
+    def __init__(self, provider=None):
+        """
+        Args:
+            provider: MarketDataProvider to read news from (defaults to the
+                configured provider)
+        """
+        self.provider = provider or get_market_data_provider()
 
     def fetch_news(self, ticker: str, max_news: int = 20) -> List[Dict]:
         """
@@ -63,8 +68,7 @@ class NewsFetcher:
             List of news dictionaries with title, link, publisher, and timestamp
         """
         try:
-            stock = yf.Ticker(ticker)
-            news = stock.news
+            news = self.provider.news(ticker)
 
             if not news:
                 return []
@@ -0,0 +1,280 @@
+"""
+Cross-sectional (panel) technical analysis for many tickers at once
+
+Prices for N tickers are laid out as (dates x tickers) arrays, right-aligned
+so row -1 is every ticker's latest bar and shorter histories are padded with
+NaN at the top. Every indicator, the uncertainty score and the percentile
+statistics are then computed column-wise in vectorized NumPy, producing the
+same per-ticker `indicators` / `percentiles` dicts as
+TechnicalAnalyzer.calculate_all_indicators_with_percentiles.
+"""
+
+import warnings
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.indicators import indicator_param
+from src.percentile_engine import FREQUENCY_THRESHOLDS
+from src.technical_analysis import TechnicalAnalyzer
+
+PANEL_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def build_price_panel(histories):
+    """
+    Right-align per-ticker OHLCV histories into (dates x tickers) arrays
+
+    Args:
+        histories: Dict of ticker -> OHLCV DataFrame
+
+    Returns:
+        Dict with 'tickers' (list) and one float array per PANEL_FIELDS entry
+    """
+    tickers = [ticker for ticker, hist in histories.items() if hist is not None and not hist.empty]
+    length = max((len(histories[ticker]) for ticker in tickers), default=0)
+
+    panel = {'tickers': tickers}
+    for field in PANEL_FIELDS:
+        values = np.full((length, len(tickers)), np.nan)
+        for j, ticker in enumerate(tickers):
+            column = histories[ticker][field].to_numpy(dtype=float)
+            values[length - len(column):, j] = column
+        panel[field] = values
+    return panel
+
+
+def _rolling(values, window, func, **kwargs):
+    """Trailing-window reduction down each column; NaN until a full window of data"""
+    result = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        windows = sliding_window_view(values, window, axis=0)
+        result[window - 1:] = func(windows, axis=-1, **kwargs)
+    return result
+
+
+def _ema(values, span):
+    """EMA down each column (pandas ewm(adjust=False)), seeded at each column's first value"""
+    alpha = 2.0 / (span + 1.0)
+    result = np.full(values.shape, np.nan)
+    current = np.full(values.shape[1], np.nan)
+    for i, row in enumerate(values):
+        current = np.where(np.isnan(current), row, current + alpha * (row - current))
+        result[i] = current
+    return result
+
+
+class PanelAnalyzer:
+    """Vectorized TechnicalAnalyzer over a tickers x dates price panel"""
+
+    def __init__(self, technical_analyzer=None):
+        self.technical_analyzer = technical_analyzer or TechnicalAnalyzer()
+
+    def compute_indicator_panel(self, close, high, low, volume):
+        """
+        Compute every indicator series for all tickers at once
+
+        Windows, spans and band widths are read from INDICATOR_REGISTRY.
+
+        Args:
+            close, high, low, volume: (dates x tickers) arrays, NaN-padded at the top
+
+        Returns:
+            Dict of indicator column name (as in INDICATOR_SERIES) -> (dates x tickers) array
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            has_bar = ~np.isnan(close)
+            out = {}
+
+            # Moving averages and Bollinger Bands
+            for sma_period in [20, 50, 200]:
+                name = f'SMA_{sma_period}'
+                out[name] = _rolling(close, indicator_param(name, 'window'), np.mean)
+            bb_std = _rolling(close, indicator_param('BB_Std', 'window'), np.std, ddof=1)
+            out['BB_Middle'] = out['SMA_20']
+            out['BB_Upper'] = out['BB_Middle'] + bb_std * indicator_param('BB_Upper', 'num_std')
+            out['BB_Lower'] = out['BB_Middle'] - bb_std * indicator_param('BB_Lower', 'num_std')
+
+            # RSI (simple averages of gains/losses; each ticker's first change counts as 0)
+            rsi_period = indicator_param('RSI', 'period')
+            delta = np.vstack([np.full((1, close.shape[1]), np.nan), np.diff(close, axis=0)])
+            gain = np.where(has_bar, np.where(delta > 0, delta, 0.0), np.nan)
+            loss = np.where(has_bar, np.where(delta < 0, -delta, 0.0), np.nan)
+            rs = _rolling(gain, rsi_period, np.mean) / _rolling(loss, rsi_period, np.mean)
+            out['RSI'] = 100 - (100 / (1 + rs))
+
+            # MACD
+            out['MACD'] = (_ema(close, indicator_param('EMA_12', 'span'))
+                           - _ema(close, indicator_param('EMA_26', 'span')))
+            out['MACD_Signal'] = _ema(out['MACD'], indicator_param('MACD_Signal', 'span'))
+
+            # Volume SMA
+            out['Volume_SMA'] = _rolling(volume, indicator_param('Volume_SMA', 'window'), np.mean)
+
+            # ATR: true range skips the missing previous close on each ticker's first bar
+            prev_close = np.vstack([np.full((1, close.shape[1]), np.nan), close[:-1]])
+            true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+            out['ATR'] = _rolling(true_range, indicator_param('ATR', 'window'), np.mean)
+
+            # VWAP (cumulative from each ticker's first bar)
+            typical_price = (high + low + close) / 3
+            cum_pv = np.nancumsum(typical_price * volume, axis=0)
+            cum_volume = np.nancumsum(volume, axis=0)
+            out['VWAP'] = np.where(has_bar, cum_pv / cum_volume, np.nan)
+
+            # Uncertainty score and derived percentages
+            out['Volume_Ratio'] = volume / out['Volume_SMA']
+            uncertainty_raw = (np.abs(close - out['VWAP']) / out['VWAP'] * out['Volume_Ratio']
+                               * (out['ATR'] / close))
+            out['Uncertainty_Score'] = 50 * (1 + np.tanh(uncertainty_raw * 10))
+            out['ATR_Percent'] = (out['ATR'] / close) * 100
+            out['Price_VWAP_Pct'] = ((close - out['VWAP']) / out['VWAP']) * 100
+            for sma_period in [20, 50, 200]:
+                sma = out[f'SMA_{sma_period}']
+                out[f'SMA_{sma_period}_Deviation'] = (close - sma) / sma * 100
+
+        return {name: out[name] for name in TechnicalAnalyzer.INDICATOR_SERIES}
+
+    def _percentile_panel(self, indicators):
+        """Historical series behind each percentile key, as (dates x tickers) arrays"""
+        series = {
+            'rsi': indicators['RSI'],
+            'macd': indicators['MACD'],
+            'uncertainty_score': indicators['Uncertainty_Score'],
+            'atr_percent': indicators['ATR_Percent'],
+            'price_vwap_percent': indicators['Price_VWAP_Pct'],
+            'volume_ratio': indicators['Volume_Ratio'],
+        }
+        for sma_period in [20, 50, 200]:
+            series[f'sma_{sma_period}_deviation'] = indicators[f'SMA_{sma_period}_Deviation']
+        return series
+
+    def _panel_percentiles(self, series, valid_rows, current_values):
+        """
+        Percentile statistics for one indicator across all tickers
+
+        Args:
+            series: (dates x tickers) historical values
+            valid_rows: (dates x tickers) mask of rows kept (the single-ticker dropna)
+            current_values: (tickers,) current values, NaN where not applicable
+
+        Returns:
+            (stats, values, counts): dict of statistic name -> (tickers,) array,
+            the masked history and the per-ticker row counts
+        """
+        values = np.where(valid_rows, series, np.nan)
+        counts = valid_rows.sum(axis=0)
+
+        with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+            # Tickers with no valid rows produce all-NaN columns
+            warnings.simplefilter('ignore', RuntimeWarning)
+            left = (values < current_values).sum(axis=0)
+            right = (values <= current_values).sum(axis=0)
+            percentile = (left + right + (right > left)) * 50.0 / counts
+            percentile = np.where(np.isnan(current_values), np.nan, percentile)
+
+            stats = {
+                'percentile': percentile,
+                'mean': np.nanmean(values, axis=0),
+                'std': np.nanstd(values, axis=0, ddof=1),
+                'min': np.nanmin(values, axis=0),
+                'max': np.nanmax(values, axis=0)
+            }
+        return stats, values, counts
+
+    def analyze(self, histories):
+        """
+        Indicators and percentiles for many tickers in one vectorized pass
+
+        Args:
+            histories: Dict of ticker -> OHLCV DataFrame
+
+        Returns:
+            Dict of ticker -> {'indicators': ..., 'percentiles': ...} in the
+            calculate_all_indicators_with_percentiles layout
+        """
+        panel = build_price_panel(histories)
+        return self.analyze_panel(panel['tickers'], panel['Close'], panel['High'],
+                                  panel['Low'], panel['Volume'])
+
+    def analyze_panel(self, tickers, close, high, low, volume):
+        """
+        Indicators and percentiles from aligned (dates x tickers) arrays
+
+        Args:
+            tickers: Column labels
+            close, high, low, volume: (dates x tickers) arrays, right-aligned and
+                NaN-padded at the top
+
+        Returns:
+            Dict of ticker -> {'indicators': ..., 'percentiles': ...}
+        """
+        if len(tickers) == 0 or len(close) == 0:
+            return {}
+
+        try:
+            indicators = self.compute_indicator_panel(close, high, low, volume)
+
+            # Rows the single-ticker path keeps after dropna: bar present and every indicator defined
+            valid_rows = ~np.isnan(close) & ~np.isnan(high) & ~np.isnan(low) & ~np.isnan(volume)
+            for values in indicators.values():
+                valid_rows &= ~np.isnan(values)
+
+            # Current indicators come from the last row
+            current = []
+            for j in range(len(tickers)):
+                current.append({
+                    'sma_20': indicators['SMA_20'][-1, j],
+                    'sma_50': indicators['SMA_50'][-1, j],
+                    'sma_200': indicators['SMA_200'][-1, j],
+                    'rsi': indicators['RSI'][-1, j],
+                    'macd': indicators['MACD'][-1, j],
+                    'macd_signal': indicators['MACD_Signal'][-1, j],
+                    'bb_upper': indicators['BB_Upper'][-1, j],
+                    'bb_middle': indicators['BB_Middle'][-1, j],
+                    'bb_lower': indicators['BB_Lower'][-1, j],
+                    'volume_sma': indicators['Volume_SMA'][-1, j],
+                    'current_price': close[-1, j],
+                    'volume': volume[-1, j],
+                    'uncertainty_score': indicators['Uncertainty_Score'][-1, j],
+                    'atr': indicators['ATR'][-1, j],
+                    'vwap': indicators['VWAP'][-1, j]
+                })
+
+            current_values = [self.technical_analyzer._current_percentile_values(c) for c in current]
+            percentiles = [{} for _ in tickers]
+            has_history = valid_rows.any(axis=0)
+
+            for key, series in self._percentile_panel(indicators).items():
+                applies = np.array([key in values for values in current_values]) & has_history
+                if not applies.any():
+                    continue
+
+                current_vector = np.array([values.get(key, np.nan) for values in current_values], dtype=float)
+                stats, values, counts = self._panel_percentiles(series, valid_rows, current_vector)
+
+                frequencies = {}
+                for name, op, threshold in FREQUENCY_THRESHOLDS.get(key, []):
+                    hits = (values > threshold) if op == '>' else (values < threshold)
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        frequencies[name] = hits.sum(axis=0) / counts * 100
+
+                for j in np.flatnonzero(applies):
+                    result = {'current_value': current_values[j][key]}
+                    result.update({name: stats[name][j] for name in stats})
+                    result.update({name: freq[j] for name, freq in frequencies.items()})
+                    percentiles[j][key] = result
+
+            return {
+                ticker: {
+                    'indicators': current[j],
+                    'percentiles': percentiles[j] if has_history[j] else {}
+                }
+                for j, ticker in enumerate(tickers)
+            }
+
+        except Exception as e:
+            print(f"Error in panel analysis: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return {}
@@ -0,0 +1,123 @@
+"""
+Vectorized percentile engine for historical indicator distributions
+
+All indicator columns are stacked into one 2-D matrix and sorted once.
+Percentile ranks and threshold frequencies are answered by binary search on
+the sorted columns, and mean/std/min/max come from a single vectorized pass
+over the matrix, instead of a full scan per statistic per indicator.
+
+rolling_percentile_rank gives the full time series of ranks against a
+trailing window from pandas' compiled rolling rank.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Threshold frequencies reported per indicator: (result key, operator, threshold)
+FREQUENCY_THRESHOLDS = {
+    'rsi': [('frequency_above_70', '>', 70), ('frequency_below_30', '<', 30)],
+    'macd': [('frequency_positive', '>', 0)],
+    'uncertainty_score': [('frequency_low', '<', 25), ('frequency_high', '>', 75)],
+    'atr_percent': [('frequency_low_volatility', '<', 1), ('frequency_high_volatility', '>', 4)],
+    'price_vwap_percent': [('frequency_above_3pct', '>', 3), ('frequency_below_neg3pct', '<', -3)],
+    'volume_ratio': [('frequency_high_volume', '>', 2.0), ('frequency_low_volume', '<', 0.7)],
+    'sma_20_deviation': [('frequency_above_sma', '>', 0)],
+    'sma_50_deviation': [('frequency_above_sma', '>', 0)],
+    'sma_200_deviation': [('frequency_above_sma', '>', 0)],
+}
+
+
+def percentile_rank(sorted_values, value):
+    """
+    Percentile rank of value in an ascending array (scipy percentileofscore, kind='rank')
+
+    Two binary searches give the counts strictly below and at-or-below the value.
+    """
+    n = len(sorted_values)
+    if n == 0 or np.isnan(value):
+        return np.nan
+    left = np.searchsorted(sorted_values, value, side='left')
+    right = np.searchsorted(sorted_values, value, side='right')
+    return (left + right + (1 if right > left else 0)) * 50.0 / n
+
+
+def frequency(sorted_values, op, threshold):
+    """Percentage of values strictly above ('>') or below ('<') a threshold"""
+    n = len(sorted_values)
+    if op == '>':
+        count = n - np.searchsorted(sorted_values, threshold, side='right')
+    else:
+        count = np.searchsorted(sorted_values, threshold, side='left')
+    return count / n * 100
+
+
+def compute_percentiles(columns, current_values, thresholds=None):
+    """
+    Percentile statistics for several equal-length indicator columns at once
+
+    Args:
+        columns: Dict of result key -> 1-D array of historical values (NaN-free,
+            all the same length)
+        current_values: Dict of result key -> current value
+        thresholds: Dict of result key -> [(name, op, threshold)]
+            (defaults to FREQUENCY_THRESHOLDS)
+
+    Returns:
+        Dict of result key -> {'current_value', 'percentile', 'mean', 'std',
+        'min', 'max', <frequency keys>}
+    """
+    if not columns:
+        return {}
+
+    thresholds = FREQUENCY_THRESHOLDS if thresholds is None else thresholds
+    keys = list(columns)
+    # Column-major so each indicator is contiguous for the per-column reductions
+    matrix = np.asfortranarray(np.column_stack([np.asarray(columns[key], dtype=float) for key in keys]))
+    if matrix.shape[0] == 0:
+        return {}
+
+    sorted_matrix = np.sort(matrix, axis=0)
+    means = matrix.mean(axis=0)
+    stds = matrix.std(axis=0, ddof=1) if matrix.shape[0] > 1 else np.full(len(keys), np.nan)
+
+    results = {}
+    for i, key in enumerate(keys):
+        sorted_values = sorted_matrix[:, i]
+        current_value = current_values[key]
+        result = {
+            'current_value': current_value,
+            'percentile': percentile_rank(sorted_values, current_value),
+            'mean': means[i],
+            'std': stds[i],
+            'min': sorted_values[0],
+            'max': sorted_values[-1]
+        }
+        for name, op, threshold in thresholds.get(key, []):
+            result[name] = frequency(sorted_values, op, threshold)
+        results[key] = result
+
+    return results
+
+
+def rolling_percentile_rank(values, window, min_periods=None):
+    """
+    Percentile rank of each value within its own trailing window
+
+    Uses the same kind='rank' definition as percentile_rank, which is the
+    average-tie rank divided by the window count: pandas' compiled rolling
+    rank (a skiplist, O(log window) per row) computes it without a Python
+    loop over rows.
+
+    Args:
+        values: 1-D array (NaN entries are skipped and ranked as NaN)
+        window: Trailing window length in rows, including the current row
+        min_periods: Minimum non-NaN values in the window to produce a rank
+            (defaults to window)
+
+    Returns:
+        1-D float array of percentile ranks (0-100), NaN where undefined
+    """
+    values = np.asarray(values, dtype=float)
+    min_periods = window if min_periods is None else min_periods
+    ranks = pd.Series(values).rolling(window, min_periods=min_periods).rank(method='average', pct=True)
+    return ranks.to_numpy() * 100.0
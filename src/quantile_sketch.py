@@ -0,0 +1,282 @@
+"""
+Mergeable quantile sketches for indicator distributions
+
+A QuantileSketch is a compact, mergeable summary of a value distribution
+(a merging t-digest: sorted centroids whose size limit shrinks towards the
+tails). Per ticker and indicator, one sketch is kept per calendar month in
+SQLite; a lookback window (1y/3y/5y) is answered by merging the monthly
+sketches it covers, so percentile ranks and threshold frequencies never
+need the raw history in memory.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+# Scale factor: larger keeps more centroids (more accurate, bigger sketches)
+DEFAULT_COMPRESSION = 100
+
+# Lookback windows answerable from monthly sketches
+LOOKBACK_MONTHS = {'1y': 12, '3y': 36, '5y': 60}
+
+
+class QuantileSketch:
+    """Mergeable centroid sketch with exact count/min/max/mean/std"""
+
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def add(self, values):
+        """Add a batch of values (NaN values are ignored)"""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.total += float(values.sum())
+        self.total_sq += float((values ** 2).sum())
+
+        self.means = np.concatenate([self.means, values])
+        self.weights = np.concatenate([self.weights, np.ones(len(values))])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Fold another sketch into this one"""
+        if other.count == 0:
+            return self
+
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.total += other.total
+        self.total_sq += other.total_sq
+
+        self.means = np.concatenate([self.means, other.means])
+        self.weights = np.concatenate([self.weights, other.weights])
+        self._compress()
+        return self
+
+    def _compress(self):
+        """Merge neighbouring centroids while they stay under the t-digest size limit"""
+        order = np.argsort(self.means, kind='mergesort')
+        means = self.means[order].tolist()
+        weights = self.weights[order].tolist()
+        total = sum(weights)
+
+        merged_means, merged_weights = [], []
+        current_mean, current_weight = means[0], weights[0]
+        cumulative = 0.0
+
+        for mean, weight in zip(means[1:], weights[1:]):
+            combined = current_weight + weight
+            q = (cumulative + combined / 2) / total
+            limit = max(4 * total * q * (1 - q) / self.compression, 1.0)
+            if combined <= limit or mean == current_mean:
+                current_mean += (mean - current_mean) * weight / combined
+                current_weight = combined
+            else:
+                merged_means.append(current_mean)
+                merged_weights.append(current_weight)
+                cumulative += current_weight
+                current_mean, current_weight = mean, weight
+
+        merged_means.append(current_mean)
+        merged_weights.append(current_weight)
+        self.means = np.array(merged_means)
+        self.weights = np.array(merged_weights)
+
+    def cdf_count(self, value):
+        """Approximate number of values below `value` (interpolated between centroids)"""
+        if self.count == 0 or np.isnan(value):
+            return np.nan
+        if value < self.min:
+            return 0.0
+        if value > self.max:
+            return float(self.count)
+
+        # Each centroid's mass is centred on its mean
+        midpoints = np.cumsum(self.weights) - self.weights / 2
+        xs = np.concatenate([[self.min], self.means, [self.max]])
+        ys = np.concatenate([[0.0], midpoints, [float(self.count)]])
+        return float(np.interp(value, xs, ys))
+
+    def percentile_rank(self, value):
+        """Approximate percentile rank (0-100) of a value"""
+        return self.cdf_count(value) / self.count * 100 if self.count else np.nan
+
+    def frequency(self, op, threshold):
+        """Approximate percentage of values above ('>') or below ('<') a threshold"""
+        if self.count == 0:
+            return np.nan
+        below = self.cdf_count(threshold)
+        count = self.count - below if op == '>' else below
+        return count / self.count * 100
+
+    def mean(self):
+        return self.total / self.count if self.count else np.nan
+
+    def std(self):
+        """Sample standard deviation (ddof=1, like pandas)"""
+        if self.count < 2:
+            return np.nan
+        variance = (self.total_sq - self.total ** 2 / self.count) / (self.count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def summary(self, current_value, thresholds):
+        """
+        Percentile entry in the calculate_percentiles layout
+
+        Args:
+            current_value: Value to rank
+            thresholds: [(name, op, threshold)] frequencies to report
+        """
+        result = {
+            'current_value': current_value,
+            'percentile': self.percentile_rank(current_value),
+            'mean': self.mean(),
+            'std': self.std(),
+            'min': self.min,
+            'max': self.max
+        }
+        for name, op, threshold in thresholds:
+            result[name] = self.frequency(op, threshold)
+        return result
+
+    def to_dict(self):
+        return {
+            'compression': self.compression,
+            'means': self.means.tolist(),
+            'weights': self.weights.tolist(),
+            'count': self.count,
+            'min': self.min,
+            'max': self.max,
+            'total': self.total,
+            'total_sq': self.total_sq
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(compression=data['compression'])
+        sketch.means = np.array(data['means'], dtype=float)
+        sketch.weights = np.array(data['weights'], dtype=float)
+        sketch.count = data['count']
+        sketch.min = data['min']
+        sketch.max = data['max']
+        sketch.total = data['total']
+        sketch.total_sq = data['total_sq']
+        return sketch
+
+
+def update_indicator_sketches(store, ticker, series):
+    """
+    Fold new indicator values into a ticker's monthly sketches
+
+    Only dates after the stored last date are added. A month whose rows are all
+    present in `series` is rebuilt rather than appended to, so revised bars
+    (e.g. a refreshed intraday bar) replace their earlier values. The stored
+    state is read with one query and every changed month is written in one
+    transaction.
+
+    Args:
+        store: TickerDatabase holding the indicator_sketches table
+        ticker: Yahoo Finance ticker symbol
+        series: Dict of indicator key -> date-indexed Series of values
+
+    Returns:
+        Number of monthly sketches written
+    """
+    latest = store.get_latest_indicator_sketches(ticker)
+    sketches = []
+    for indicator, values in series.items():
+        values = values.dropna()
+        if values.empty:
+            continue
+
+        # Only the newest stored month can be appended to: older ones end before last_date
+        latest_month, latest_sketch, last_date = latest.get(indicator, (None, None, None))
+        months = values.index.strftime('%Y-%m')
+        first_full_month = months[0] if values.index[0].day == 1 else None
+
+        for month in sorted(set(months)):
+            month_values = values[months == month]
+            month_last = month_values.index[-1].strftime('%Y-%m-%d')
+            if last_date is not None and month_last < last_date:
+                continue
+
+            covers_month = month > months[0] or month == first_full_month
+            if month == latest_month and not covers_month:
+                # Partial month in this frame: append only the new rows
+                sketch = QuantileSketch.from_dict(latest_sketch)
+                # Compare on date strings: the index may be tz-aware
+                sketch.add(month_values[month_values.index.strftime('%Y-%m-%d') > last_date].to_numpy())
+            else:
+                sketch = QuantileSketch().add(month_values.to_numpy())
+
+            sketches.append((indicator, month, sketch.to_dict(), month_last))
+
+    store.save_indicator_sketches(ticker, sketches)
+    return len(sketches)
+
+
+def lookback_window(lookback='1y', as_of=None):
+    """
+    First and last month (YYYY-MM) of a lookback window
+
+    The window is resolved at month granularity: the last `lookback` worth of
+    calendar months up to and including the month of `as_of` (default today).
+    """
+    months = LOOKBACK_MONTHS.get(lookback)
+    if months is None:
+        raise ValueError(f"Unsupported lookback '{lookback}' (expected one of {list(LOOKBACK_MONTHS)})")
+
+    as_of = pd.Timestamp(as_of) if as_of is not None else pd.Timestamp.today()
+    return (as_of - pd.DateOffset(months=months - 1)).strftime('%Y-%m'), as_of.strftime('%Y-%m')
+
+
+def load_lookback_sketch(store, ticker, indicator, lookback='1y', as_of=None):
+    """
+    Merge the monthly sketches covering a lookback window (see lookback_window)
+
+    Returns:
+        QuantileSketch (empty if nothing is stored)
+    """
+    start_month, end_month = lookback_window(lookback, as_of)
+
+    sketch = QuantileSketch()
+    for _, data, _ in store.get_indicator_sketches(ticker, indicator, start_month=start_month,
+                                                   end_month=end_month):
+        sketch.merge(QuantileSketch.from_dict(data))
+    return sketch
+
+
+def lookback_coverage(store, ticker, lookback='1y', as_of=None):
+    """
+    How much of a lookback window the stored sketches actually cover
+
+    Returns:
+        Dict with lookback, months (requested), months_covered, first_month
+        and last_month (None when nothing is stored) and complete (every
+        month of the window has a sketch)
+    """
+    start_month, end_month = lookback_window(lookback, as_of)
+    stored = store.get_sketch_months(ticker, start_month=start_month, end_month=end_month)
+    return {
+        'lookback': lookback,
+        'months': LOOKBACK_MONTHS[lookback],
+        'months_covered': len(stored),
+        'first_month': stored[0] if stored else None,
+        'last_month': stored[-1] if stored else None,
+        'complete': len(stored) == LOOKBACK_MONTHS[lookback]
+    }
@@ -0,0 +1,108 @@
+"""
+Background narrative scoring
+
+Faithfulness, completeness and reasoning-quality scores only describe a
+finished report; no reply needs them. With SCORING_MODE=background the
+agent submits each report to a ScoringWorker instead of scoring it inside
+generate_report. The worker's task stores the scores in the report_scores
+table, and callers that want them wait for the pending job by key (or
+read the table once it has finished).
+
+    worker = ScoringWorker()
+    worker.submit(('DBS.SI', '2025-01-02'), score_report, ...)
+    scores = worker.wait(('DBS.SI', '2025-01-02'), timeout=30)
+
+A caller whose process may be frozen once it returns (a Lambda invocation)
+calls drain() after its reply has been sent, so queued scores are stored.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, wait
+
+
+class ScoringWorker:
+    """Thread pool running scoring jobs, with the pending job per report key"""
+
+    def __init__(self, max_workers=1):
+        """
+        Args:
+            max_workers: Concurrent scoring jobs (scoring is CPU-bound Python,
+                so more threads mostly add GIL contention)
+        """
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scoring')
+        self._pending = {}
+        # Every unfinished job, including ones replaced in _pending by a newer job
+        self._unfinished = set()
+        self._lock = threading.Lock()
+
+    def submit(self, key, func, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) on the worker
+
+        Args:
+            key: Report key (e.g. (ticker, date)); a newer job replaces the
+                pending one for the same key
+
+        Returns:
+            Future of func's result
+        """
+        future = self._pool.submit(func, *args, **kwargs)
+        with self._lock:
+            self._pending[key] = future
+            self._unfinished.add(future)
+        future.add_done_callback(lambda done: self._finished(key, done))
+        return future
+
+    def _finished(self, key, future):
+        with self._lock:
+            self._unfinished.discard(future)
+            if self._pending.get(key) is future:
+                del self._pending[key]
+        if not future.cancelled() and future.exception() is not None:
+            print(f"⚠️  Background scoring failed for {key}: {future.exception()}")
+
+    def pending(self, key):
+        """Future of the unfinished job for key, or None"""
+        with self._lock:
+            return self._pending.get(key)
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def wait(self, key, timeout=None):
+        """
+        Wait for the pending job for key
+
+        Returns:
+            The job's result, or None if there is no pending job, it failed
+            or it did not finish within timeout seconds
+        """
+        future = self.pending(key)
+        if future is None:
+            return None
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            print(f"⚠️  Scores for {key} not ready after {timeout}s")
+            return None
+        except Exception:
+            return None
+
+    def drain(self, timeout=None):
+        """
+        Wait for every submitted job to finish
+
+        Returns:
+            Number of jobs still running after timeout seconds
+        """
+        with self._lock:
+            futures = list(self._unfinished)
+        _, not_done = wait(futures, timeout=timeout)
+        if not_done:
+            print(f"⚠️  {len(not_done)} scoring jobs still running after {timeout}s")
+        return len(not_done)
+
+    def shutdown(self, wait=True):
+        """Stop the worker (wait=True lets queued jobs finish)"""
+        self._pool.shutdown(wait=wait)
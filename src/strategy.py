@@ -1,23 +1,236 @@
 """
-Strategy backtesting module stub
+SMA crossover strategy backtesting
+
+Vectorized engine: crossovers come from array shifts of the fast/slow SMA
+spread, positions from forward-filled signal states and trades from pairing
+entry and exit indices with a binary search - no per-bar Python loops. The
+signal/position/metric helpers work on 1-D (one strategy) or 2-D
+(dates x strategies) arrays so many parameter sets can be evaluated at once.
+
+- Buy signal: fast SMA crosses above the slow SMA
+- Sell signal: fast SMA crosses below the slow SMA
+- buy_only: go long at each buy signal's close, exit at the next sell signal
+- sell_only: go short at each sell signal's close, cover at the next buy signal
 """
+import numpy as np
 import pandas as pd
 
+TRADING_DAYS_PER_YEAR = 252
+
+
+def rolling_mean(values, window):
+    """Trailing mean down axis 0 (NaN for the first window-1 rows)"""
+    values = np.asarray(values, dtype=float)
+    result = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        cumsum = np.cumsum(values, axis=0)
+        cumsum = np.concatenate([np.zeros((1,) + values.shape[1:]), cumsum])
+        result[window - 1:] = (cumsum[window:] - cumsum[:-window]) / window
+    return result
+
+
+def ffill(values):
+    """Forward-fill NaN down axis 0 (leading NaN stay NaN); works on 1-D and 2-D arrays"""
+    rows = np.arange(len(values)).reshape((-1,) + (1,) * (values.ndim - 1))
+    last_valid = np.where(np.isnan(values), 0, rows)
+    last_valid = np.maximum.accumulate(last_valid, axis=0)
+    return np.take_along_axis(values, last_valid, axis=0)
+
+
+def crossover_signals(fast, slow):
+    """
+    Golden/death crosses of a fast over a slow moving average
+
+    Ties (fast == slow) keep the previous side, so buy and sell signals
+    strictly alternate.
+
+    Returns:
+        (buy, sell) boolean arrays shaped like the inputs
+    """
+    side = np.sign(np.asarray(fast) - np.asarray(slow))
+    side = ffill(np.where(side == 0, np.nan, side))
+    previous = np.concatenate([np.full((1,) + side.shape[1:], np.nan), side[:-1]])
+    return (side == 1) & (previous == -1), (side == -1) & (previous == 1)
+
+
+def strategy_returns(close, buy, sell, direction):
+    """
+    Daily returns of holding the strategy position
+
+    The position is opened at the close of an entry signal bar and closed at
+    the close of the next exit signal bar.
+
+    Args:
+        close: Prices (dates,) or (dates, n)
+        buy, sell: Signal arrays from crossover_signals
+        direction: 1 for buy_only (long), -1 for sell_only (short)
+
+    Returns:
+        Array of daily strategy returns shaped like buy/sell (0 when flat)
+    """
+    close = np.asarray(close, dtype=float)
+    entry, exit_ = (buy, sell) if direction == 1 else (sell, buy)
+
+    state = np.where(entry, 1.0, np.where(exit_, 0.0, np.nan))
+    state = np.nan_to_num(ffill(state), nan=0.0)
+    held = np.concatenate([np.zeros((1,) + state.shape[1:]), state[:-1]])
+
+    price_returns = np.zeros(close.shape)
+    price_returns[1:] = close[1:] / close[:-1] - 1
+    if price_returns.ndim < held.ndim:
+        price_returns = price_returns[:, None]
+    return direction * held * price_returns
+
+
+def last_true_index(mask):
+    """Position of the last True in a 1-D boolean array, or -1 if there is none"""
+    mask = np.asarray(mask, dtype=bool)
+    if not mask.any():
+        return -1
+    return len(mask) - 1 - int(np.argmax(mask[::-1]))
+
+
+def sharpe_ratio(daily_returns):
+    """Annualized Sharpe ratio (zero risk-free rate) down axis 0"""
+    mean = daily_returns.mean(axis=0)
+    std = daily_returns.std(axis=0, ddof=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(TRADING_DAYS_PER_YEAR), 0.0)
+    return sharpe
+
+
+def max_drawdown_pct(daily_returns):
+    """Largest peak-to-trough fall of the compounded equity curve, in percent (<= 0)"""
+    equity = np.cumprod(1 + daily_returns, axis=0)
+    peak = np.maximum.accumulate(np.maximum(equity, 1.0), axis=0)
+    return ((equity / peak) - 1).min(axis=0) * 100
+
+
 class SMAStrategyBacktester:
-    """Simple Moving Average Strategy Backtester - stub implementation"""
-    
+    """Simple Moving Average crossover strategy backtester"""
+
     def __init__(self, fast_period=20, slow_period=50):
         self.fast_period = fast_period
         self.slow_period = slow_period
-    
+
     def detect_signals(self, hist_data):
-        """Detect buy/sell signals - stub"""
-        return None
-    
-    def backtest_buy_only(self, hist_data):
-        """Backtest buy-only strategy - stub"""
-        return None
-    
-    def backtest_sell_only(self, hist_data):
-        """Backtest sell-only strategy - stub"""
-        return None
+        """
+        Detect buy/sell crossover signals
+
+        Returns:
+            Copy of hist_data with SMA_Fast, SMA_Slow, Buy_Signal and
+            Sell_Signal columns, or None if there is not enough data
+        """
+        if hist_data is None or len(hist_data) <= self.slow_period:
+            return None
+
+        df = hist_data.copy()
+        close = df['Close'].to_numpy(dtype=float)
+        df['SMA_Fast'] = rolling_mean(close, self.fast_period)
+        df['SMA_Slow'] = rolling_mean(close, self.slow_period)
+        df['Buy_Signal'], df['Sell_Signal'] = crossover_signals(df['SMA_Fast'].to_numpy(),
+                                                                df['SMA_Slow'].to_numpy())
+        return df
+
+    def _trades(self, index, close, entry, exit_, direction):
+        """Pair each entry with the next exit (or the last bar if still open)"""
+        entries = np.flatnonzero(entry)
+        exits = np.flatnonzero(exit_)
+
+        # Entries without a later exit are marked to market at the last bar
+        exit_positions = np.searchsorted(exits, entries, side='right')
+        exit_indices = np.append(exits, len(close) - 1)[exit_positions]
+        is_open = exit_positions == len(exits)
+
+        entry_prices = close[entries]
+        exit_prices = close[exit_indices]
+        returns = direction * (exit_prices - entry_prices) / entry_prices
+
+        labels = index.strftime('%Y-%m-%d') if isinstance(index, pd.DatetimeIndex) else index.astype(str)
+        trades = [
+            {
+                'entry_date': labels[i],
+                'entry_price': float(entry_price),
+                'exit_date': labels[j],
+                'exit_price': float(exit_price),
+                'return_pct': float(ret * 100),
+                'holding_days': int(j - i),
+                'open': bool(still_open)
+            }
+            for i, j, entry_price, exit_price, ret, still_open
+            in zip(entries, exit_indices, entry_prices, exit_prices, returns, is_open)
+        ]
+        return trades, returns
+
+    def _backtest(self, hist_data, direction, signals=None):
+        df = self.detect_signals(hist_data) if signals is None else signals
+        if df is None:
+            return None
+
+        close = df['Close'].to_numpy(dtype=float)
+        buy = df['Buy_Signal'].to_numpy()
+        sell = df['Sell_Signal'].to_numpy()
+        entry, exit_ = (buy, sell) if direction == 1 else (sell, buy)
+
+        daily = strategy_returns(close, buy, sell, direction)
+        trades, returns = self._trades(df.index, close, entry, exit_, direction)
+
+        return {
+            'strategy': 'buy_only' if direction == 1 else 'sell_only',
+            'fast_period': self.fast_period,
+            'slow_period': self.slow_period,
+            'total_return_pct': float((np.prod(1 + returns) - 1) * 100),
+            'avg_return_pct': float(returns.mean() * 100) if len(returns) else 0.0,
+            'sharpe_ratio': float(sharpe_ratio(daily)),
+            'win_rate': float((returns > 0).mean() * 100) if len(returns) else 0.0,
+            'max_drawdown_pct': float(max_drawdown_pct(daily)),
+            'num_trades': len(trades),
+            'trades': trades
+        }
+
+    def backtest_buy_only(self, hist_data, signals=None):
+        """
+        Backtest going long on buy signals and exiting on the next sell signal
+
+        Args:
+            hist_data: OHLCV DataFrame
+            signals: Optional detect_signals() frame to reuse instead of recomputing
+        """
+        return self._backtest(hist_data, direction=1, signals=signals)
+
+    def backtest_sell_only(self, hist_data, signals=None):
+        """
+        Backtest going short on sell signals and covering on the next buy signal
+
+        Args:
+            hist_data: OHLCV DataFrame
+            signals: Optional detect_signals() frame to reuse instead of recomputing
+        """
+        return self._backtest(hist_data, direction=-1, signals=signals)
+
+    def last_signal(self, signals, column):
+        """
+        Most recent signal of one kind from a detect_signals() frame
+
+        Args:
+            signals: detect_signals() frame
+            column: 'Buy_Signal' or 'Sell_Signal'
+
+        Returns:
+            Dict with date, price, sma_fast and sma_slow, or None if there is no signal
+        """
+        if signals is None or signals.empty:
+            return None
+
+        position = last_true_index(signals[column].to_numpy())
+        if position < 0:
+            return None
+
+        sma_fast = signals['SMA_Fast'].iat[position]
+        sma_slow = signals['SMA_Slow'].iat[position]
+        return {
+            'date': signals.index[position],
+            'price': float(signals['Close'].iat[position]),
+            'sma_fast': float(sma_fast) if pd.notna(sma_fast) else None,
+            'sma_slow': float(sma_slow) if pd.notna(sma_slow) else None
+        }
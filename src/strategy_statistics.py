@@ -0,0 +1,214 @@
+"""
+Bootstrap confidence intervals for SMA strategy performance
+
+Backtest metrics (total/average return, win rate, Sharpe) are point estimates
+from a handful of trades. StrategyBootstrap resamples them with a circular
+block bootstrap, computing every metric for all resamples in one vectorized
+pass. Trade returns drive the return and win-rate intervals (one
+resamples x trades matrix); the daily strategy returns drive the Sharpe
+interval, with blocks keeping the serial dependence of consecutive days.
+Daily resamples are never materialized: each one's sum and sum of squares
+come from circular block sums read off a prefix sum.
+
+bootstrap_many runs the same statistics for many tickers in a process pool.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.strategy import TRADING_DAYS_PER_YEAR, SMAStrategyBacktester, strategy_returns
+
+DEFAULT_RESAMPLES = 2000
+DEFAULT_CONFIDENCE = 0.95
+# Fewer trades than this give no meaningful interval
+MIN_TRADES = 2
+
+
+def block_bootstrap_starts(n, n_resamples, block_size, rng):
+    """Random block start positions, (n_resamples, ceil(n / block_size))"""
+    return rng.integers(0, n, size=(n_resamples, -(-n // block_size)))
+
+
+def block_bootstrap_indices(n, starts, block_size):
+    """
+    Circular block bootstrap sample positions
+
+    Returns:
+        (n_resamples, n) int array; each row strings together blocks of
+        block_size consecutive positions (wrapping at the end) from its starts
+    """
+    positions = (starts[:, :, None] + np.arange(block_size)) % n
+    return positions.reshape(len(starts), -1)[:, :n]
+
+
+def block_bootstrap_sums(values, starts, block_size):
+    """
+    Sum of each block-bootstrap resample without materializing it
+
+    Every circular window sum is read off one prefix sum, so a resample costs
+    one lookup per block instead of one per observation. Matches
+    values[block_bootstrap_indices(...)].sum(axis=1).
+    """
+    n = len(values)
+    last_block = n - (starts.shape[1] - 1) * block_size
+    prefix = np.concatenate([[0.0], np.cumsum(np.concatenate([values, values[:block_size]]))])
+    full = prefix[np.arange(n) + block_size] - prefix[:n]
+    partial = prefix[np.arange(n) + last_block] - prefix[:n]
+    return full[starts[:, :-1]].sum(axis=1) + partial[starts[:, -1]]
+
+
+def default_block_size(n):
+    """Cube-root rule for the block length"""
+    return max(1, int(round(n ** (1 / 3))))
+
+
+class StrategyBootstrap:
+    """Block-bootstrap confidence intervals for backtest results"""
+
+    def __init__(self, n_resamples=DEFAULT_RESAMPLES, confidence=DEFAULT_CONFIDENCE,
+                 block_size=None, seed=0):
+        """
+        Args:
+            n_resamples: Bootstrap resamples per series
+            confidence: Two-sided interval coverage (e.g. 0.95)
+            block_size: Block length (default: cube root of the series length)
+            seed: Random seed, fixed by default so reports are reproducible
+        """
+        self.n_resamples = n_resamples
+        self.confidence = confidence
+        self.block_size = block_size
+        self.seed = seed
+
+    def _interval(self, samples):
+        tail = (1 - self.confidence) / 2 * 100
+        lower, upper = np.percentile(samples, [tail, 100 - tail])
+        return {'lower': float(lower), 'upper': float(upper)}
+
+    def _block_size(self, n):
+        return min(self.block_size or default_block_size(n), n)
+
+    def _sharpe_samples(self, daily_returns, rng):
+        """Annualized Sharpe of each resample of the daily returns, from block sums"""
+        n = len(daily_returns)
+        block_size = self._block_size(n)
+        starts = block_bootstrap_starts(n, self.n_resamples, block_size, rng)
+        total = block_bootstrap_sums(daily_returns, starts, block_size)
+        total_sq = block_bootstrap_sums(daily_returns ** 2, starts, block_size)
+
+        mean = total / n
+        variance = np.maximum((total_sq - total * mean) / (n - 1), 0.0)
+        std = np.sqrt(variance)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Treat round-off-level variance as zero, like a flat equity curve
+            return np.where(std > 1e-12, mean / std * np.sqrt(TRADING_DAYS_PER_YEAR), 0.0)
+
+    def confidence_intervals(self, trade_returns, daily_returns):
+        """
+        Confidence intervals for one strategy's metrics
+
+        Args:
+            trade_returns: Per-trade returns (fractions, e.g. 0.05 for +5%)
+            daily_returns: Daily strategy returns (0 on flat days)
+
+        Returns:
+            Dict of metric -> {'lower', 'upper'} plus 'confidence' and
+            'n_resamples', or None if there are fewer than MIN_TRADES trades
+        """
+        trade_returns = np.asarray(trade_returns, dtype=float)
+        daily_returns = np.asarray(daily_returns, dtype=float)
+        if len(trade_returns) < MIN_TRADES or len(daily_returns) < 2:
+            return None
+
+        rng = np.random.default_rng(self.seed)
+        n_trades = len(trade_returns)
+        block_size = self._block_size(n_trades)
+        starts = block_bootstrap_starts(n_trades, self.n_resamples, block_size, rng)
+        trades = trade_returns[block_bootstrap_indices(n_trades, starts, block_size)]
+        sharpe = self._sharpe_samples(daily_returns, rng)
+
+        return {
+            'total_return_pct': self._interval((np.prod(1 + trades, axis=1) - 1) * 100),
+            'avg_return_pct': self._interval(trades.mean(axis=1) * 100),
+            'win_rate': self._interval((trades > 0).mean(axis=1) * 100),
+            'sharpe_ratio': self._interval(sharpe),
+            'confidence': self.confidence,
+            'n_resamples': self.n_resamples
+        }
+
+    def attach(self, strategy_performance, signals):
+        """
+        Add 'confidence_intervals' to the buy_only / sell_only results in place
+
+        Args:
+            strategy_performance: Agent strategy_performance dict
+            signals: The detect_signals() frame the backtests were run on
+
+        Returns:
+            strategy_performance
+        """
+        if not strategy_performance or signals is None:
+            return strategy_performance
+
+        close = signals['Close'].to_numpy(dtype=float)
+        buy = signals['Buy_Signal'].to_numpy()
+        sell = signals['Sell_Signal'].to_numpy()
+
+        for key, direction in [('buy_only', 1), ('sell_only', -1)]:
+            result = strategy_performance.get(key)
+            if not result:
+                continue
+            trade_returns = np.array([trade['return_pct'] for trade in result['trades']]) / 100
+            daily = strategy_returns(close, buy, sell, direction)
+            result['confidence_intervals'] = self.confidence_intervals(trade_returns, daily)
+
+        return strategy_performance
+
+
+def _bootstrap_ticker(ticker, close, fast_period, slow_period, bootstrap):
+    """Pool task: backtest one ticker and attach confidence intervals"""
+    backtester = SMAStrategyBacktester(fast_period=fast_period, slow_period=slow_period)
+    hist = pd.DataFrame({'Close': close})
+    signals = backtester.detect_signals(hist)
+    if signals is None:
+        return ticker, {}
+
+    performance = {
+        'buy_only': backtester.backtest_buy_only(hist, signals=signals),
+        'sell_only': backtester.backtest_sell_only(hist, signals=signals)
+    }
+    return ticker, bootstrap.attach(performance, signals)
+
+
+def bootstrap_many(histories, fast_period=20, slow_period=50, bootstrap=None, max_workers=None):
+    """
+    Strategy backtests with confidence intervals for many tickers
+
+    Args:
+        histories: Dict of ticker -> OHLCV DataFrame
+        fast_period, slow_period: SMA crossover periods
+        bootstrap: StrategyBootstrap settings (default: StrategyBootstrap())
+        max_workers: Worker processes (default: CPU count); 1 runs in-process
+
+    Returns:
+        Dict of ticker -> {'buy_only': ..., 'sell_only': ...} with
+        'confidence_intervals' on each result ({} if the history is too short)
+    """
+    bootstrap = bootstrap or StrategyBootstrap()
+    # Only the close prices cross the process boundary
+    tasks = [(ticker, hist['Close'].dropna().to_numpy(dtype=float))
+             for ticker, hist in histories.items() if hist is not None and not hist.empty]
+    if not tasks:
+        return {}
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    if max_workers == 1:
+        return dict(_bootstrap_ticker(ticker, close, fast_period, slow_period, bootstrap)
+                    for ticker, close in tasks)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(_bootstrap_ticker, ticker, close, fast_period, slow_period, bootstrap)
+                   for ticker, close in tasks]
+        return dict(future.result() for future in futures)
@@ -0,0 +1,238 @@
+"""
+SMA parameter sweeps across many tickers
+
+Every (fast, slow) pair of a grid is backtested at once per ticker: the
+moving average for each distinct window is computed one time, stacked into
+(dates x pairs) arrays and run through the 2-D signal/position/metric helpers
+in src.strategy. Tickers are spread over a process pool. Close prices sit in
+one shared-memory block (dates x tickers, right-aligned like the price panel)
+that each worker attaches to once, so a task is just a column index - no
+DataFrame is pickled per task and throughput grows with the number of cores.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from src.strategy import crossover_signals, ffill, max_drawdown_pct, rolling_mean, sharpe_ratio, strategy_returns
+
+DEFAULT_FAST_PERIODS = tuple(range(5, 55, 5))
+DEFAULT_SLOW_PERIODS = tuple(range(20, 210, 10))
+STRATEGY_DIRECTIONS = {'buy_only': 1, 'sell_only': -1}
+METRIC_COLUMNS = ['total_return_pct', 'avg_return_pct', 'sharpe_ratio', 'win_rate',
+                  'max_drawdown_pct', 'num_trades']
+
+
+def parameter_grid(fast_periods=DEFAULT_FAST_PERIODS, slow_periods=DEFAULT_SLOW_PERIODS):
+    """All (fast, slow) pairs with fast < slow, as an (n, 2) int array"""
+    pairs = [(fast, slow) for fast in fast_periods for slow in slow_periods if fast < slow]
+    return np.array(pairs, dtype=int).reshape(-1, 2)
+
+
+def grid_signals(close, pairs):
+    """
+    Crossover signals for every (fast, slow) pair of a grid
+
+    Returns:
+        (buy, sell) boolean arrays of shape (dates, pairs)
+    """
+    averages = {window: rolling_mean(close, window) for window in np.unique(pairs)}
+    fast = np.column_stack([averages[window] for window in pairs[:, 0]])
+    slow = np.column_stack([averages[window] for window in pairs[:, 1]])
+    return crossover_signals(fast, slow)
+
+
+def grid_metrics(close, buy, sell, direction):
+    """
+    Backtest metrics for every column of (dates x strategies) signal arrays
+
+    Matches SMAStrategyBacktester: trades open at the close of an entry
+    signal, close at the next exit signal, and a trade still open at the end
+    is marked to market at the last bar.
+
+    Returns:
+        Dict of METRIC_COLUMNS name -> (strategies,) array
+    """
+    close = np.asarray(close, dtype=float)
+    entry, exit_ = (buy, sell) if direction == 1 else (sell, buy)
+    prices = np.broadcast_to(close[:, None], entry.shape)
+
+    state = np.where(entry, 1.0, np.where(exit_, 0.0, np.nan))
+    state = np.nan_to_num(ffill(state), nan=0.0)
+    held_before = np.concatenate([np.zeros((1, state.shape[1])), state[:-1]])
+
+    entry_price = ffill(np.where(entry, prices, np.nan))
+    entry_before = np.concatenate([np.full((1, state.shape[1]), np.nan), entry_price[:-1]])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        closed = np.where(exit_ & (held_before == 1),
+                          direction * (prices - entry_before) / entry_before, np.nan)
+        still_open = np.where(state[-1] == 1,
+                              direction * (close[-1] - entry_price[-1]) / entry_price[-1], np.nan)
+    trade_returns = np.vstack([closed, still_open])
+
+    num_trades = (~np.isnan(trade_returns)).sum(axis=0)
+    has_trades = num_trades > 0
+    wins = (trade_returns > 0).sum(axis=0)
+    daily = strategy_returns(close, buy, sell, direction)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'total_return_pct': (np.nanprod(1 + trade_returns, axis=0) - 1) * 100,
+            'avg_return_pct': np.where(has_trades, np.nansum(trade_returns, axis=0) / num_trades * 100, 0.0),
+            'sharpe_ratio': sharpe_ratio(daily),
+            'win_rate': np.where(has_trades, wins / num_trades * 100, 0.0),
+            'max_drawdown_pct': max_drawdown_pct(daily),
+            'num_trades': num_trades
+        }
+
+
+def sweep_prices(close, pairs, strategies=tuple(STRATEGY_DIRECTIONS)):
+    """
+    Backtest a grid of SMA pairs on one close-price series
+
+    Args:
+        close: 1-D close prices (no NaN)
+        pairs: (n, 2) array of (fast, slow) periods
+        strategies: Strategy names from STRATEGY_DIRECTIONS
+
+    Returns:
+        Dict of strategy -> metrics dict (each metric an (n,) array)
+    """
+    close = np.asarray(close, dtype=float)
+    # Pairs whose slow SMA never forms are skipped, like detect_signals
+    usable = pairs[:, 1] < len(close)
+    signals = grid_signals(close, pairs[usable]) if usable.any() else None
+
+    results = {}
+    for strategy in strategies:
+        metrics = {name: np.full(len(pairs), np.nan) for name in METRIC_COLUMNS}
+        if signals is not None:
+            for name, values in grid_metrics(close, *signals, STRATEGY_DIRECTIONS[strategy]).items():
+                metrics[name][usable] = values
+        results[strategy] = metrics
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Process pool workers (prices read from shared memory)
+# ---------------------------------------------------------------------------
+
+_shared_block = None
+_shared_prices = None
+
+
+def _attach_shared_prices(name, shape):
+    """Pool initializer: map the shared close-price panel once per worker"""
+    global _shared_block, _shared_prices
+    _shared_block = shared_memory.SharedMemory(name=name)
+    _shared_prices = np.ndarray(shape, dtype=np.float64, buffer=_shared_block.buf)
+
+
+def _sweep_shared_column(column, length, pairs, strategies):
+    """Pool task: sweep one ticker's column of the shared panel"""
+    close = np.array(_shared_prices[-length:, column])
+    return column, sweep_prices(close, pairs, strategies)
+
+
+def _results_frame(tickers, pairs, results, rank_by):
+    rows = []
+    for ticker, per_strategy in zip(tickers, results):
+        for strategy, metrics in per_strategy.items():
+            frame = pd.DataFrame(metrics)
+            frame.insert(0, 'slow_period', pairs[:, 1])
+            frame.insert(0, 'fast_period', pairs[:, 0])
+            frame.insert(0, 'strategy', strategy)
+            frame.insert(0, 'ticker', ticker)
+            rows.append(frame.dropna(subset=['num_trades']))
+
+    columns = ['ticker', 'strategy', 'fast_period', 'slow_period'] + METRIC_COLUMNS + ['rank']
+    if not rows:
+        return pd.DataFrame(columns=columns)
+
+    table = pd.concat(rows, ignore_index=True)
+    table['num_trades'] = table['num_trades'].astype(int)
+    table['rank'] = (table.groupby(['ticker', 'strategy'])[rank_by]
+                     .rank(method='first', ascending=False).astype(int))
+    return table.sort_values(['ticker', 'strategy', 'rank']).reset_index(drop=True)[columns]
+
+
+def sweep_sma_grid(histories, fast_periods=DEFAULT_FAST_PERIODS, slow_periods=DEFAULT_SLOW_PERIODS,
+                   strategies=tuple(STRATEGY_DIRECTIONS), rank_by='sharpe_ratio', max_workers=None):
+    """
+    Backtest every (fast, slow) SMA pair on every ticker
+
+    Args:
+        histories: Dict of ticker -> OHLCV DataFrame
+        fast_periods, slow_periods: Candidate periods (pairs need fast < slow)
+        strategies: 'buy_only' and/or 'sell_only'
+        rank_by: Metric column ranked (descending) within each ticker and strategy
+        max_workers: Worker processes (default: CPU count); 1 runs in-process
+
+    Returns:
+        DataFrame with one row per ticker/strategy/pair: ticker, strategy,
+        fast_period, slow_period, the metric columns and rank (1 = best)
+    """
+    if rank_by not in METRIC_COLUMNS:
+        raise ValueError(f"Unknown rank_by '{rank_by}' (expected one of {METRIC_COLUMNS})")
+
+    pairs = parameter_grid(fast_periods, slow_periods)
+    strategies = tuple(strategies)
+    closes = {}
+    for ticker, hist in histories.items():
+        if hist is None or hist.empty:
+            continue
+        close = hist['Close'].dropna().to_numpy(dtype=float)
+        if len(close):
+            closes[ticker] = close
+    tickers = list(closes)
+    if not tickers or len(pairs) == 0:
+        return _results_frame([], pairs, [], rank_by)
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(tickers))
+    if max_workers == 1:
+        results = [sweep_prices(closes[ticker], pairs, strategies) for ticker in tickers]
+        return _results_frame(tickers, pairs, results, rank_by)
+
+    # Right-aligned (dates x tickers) panel in shared memory, NaN-padded at the top
+    lengths = [len(closes[ticker]) for ticker in tickers]
+    shape = (max(lengths), len(tickers))
+    block = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+    try:
+        panel = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+        panel[:] = np.nan
+        for column, ticker in enumerate(tickers):
+            panel[shape[0] - lengths[column]:, column] = closes[ticker]
+
+        results = [None] * len(tickers)
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_attach_shared_prices,
+                                 initargs=(block.name, shape)) as pool:
+            futures = [pool.submit(_sweep_shared_column, column, lengths[column], pairs, strategies)
+                       for column in range(len(tickers))]
+            for future in futures:
+                column, result = future.result()
+                results[column] = result
+        del panel
+    finally:
+        block.close()
+        block.unlink()
+
+    return _results_frame(tickers, pairs, results, rank_by)
+
+
+def best_parameters(results):
+    """
+    Top-ranked pair per ticker and strategy from a sweep_sma_grid table
+
+    Returns:
+        Dict of ticker -> {strategy: {'fast_period', 'slow_period', <metrics>}}
+    """
+    best = {}
+    for row in results[results['rank'] == 1].itertuples(index=False):
+        entry = {'fast_period': int(row.fast_period), 'slow_period': int(row.slow_period)}
+        entry.update({name: getattr(row, name) for name in METRIC_COLUMNS})
+        best.setdefault(row.ticker, {})[row.strategy] = entry
+    return best
@@ -1,42 +1,49 @@
 import pandas as pd
-import numpy as np
-from scipy import stats
+
+from src import indicators
+from src.indicators import INDICATOR_REGISTRY, Indicator, IndicatorRun
+from src.percentile_engine import FREQUENCY_THRESHOLDS, compute_percentiles, rolling_percentile_rank
+from src.quantile_sketch import load_lookback_sketch, update_indicator_sketches
 
 class TechnicalAnalyzer:
+    # Indicator columns produced by compute_indicator_frame
+    INDICATOR_SERIES = (
+        'SMA_20', 'SMA_50', 'SMA_200', 'RSI', 'MACD', 'MACD_Signal',
+        'BB_Upper', 'BB_Middle', 'BB_Lower', 'Volume_SMA', 'ATR', 'VWAP',
+        'Volume_Ratio', 'Uncertainty_Score', 'ATR_Percent', 'Price_VWAP_Pct',
+        'SMA_20_Deviation', 'SMA_50_Deviation', 'SMA_200_Deviation'
+    )
+
+    # Percentile keys derived from the cumulative VWAP: their values depend on
+    # the frame's first bar, so they are never sketched and are always ranked
+    # over the fetched history
+    UNSKETCHED_PERCENTILES = ('uncertainty_score', 'price_vwap_percent')
+
     def __init__(self):
         pass
 
     def calculate_sma(self, data, window):
         """Calculate Simple Moving Average"""
-        return data['Close'].rolling(window=window).mean()
+        return indicators.sma(data['Close'], window)
 
     def calculate_rsi(self, data, period=14):
         """Calculate Relative Strength Index"""
-        delta = data['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
+        return indicators.rsi(data['Close'], period)
 
     def calculate_macd(self, data, fast=12, slow=26, signal=9):
         """Calculate MACD"""
-        exp1 = data['Close'].ewm(span=fast, adjust=False).mean()
-        exp2 = data['Close'].ewm(span=slow, adjust=False).mean()
-
-        macd = exp1 - exp2
-        signal_line = macd.ewm(span=signal, adjust=False).mean()
+        macd = indicators.ema(data['Close'], fast) - indicators.ema(data['Close'], slow)
+        signal_line = indicators.ema(macd, signal)
 
         return macd, signal_line
 
     def calculate_bollinger_bands(self, data, window=20, num_std=2):
         """Calculate Bollinger Bands"""
-        sma = data['Close'].rolling(window=window).mean()
-        std = data['Close'].rolling(window=window).std()
+        sma = indicators.sma(data['Close'], window)
+        std = indicators.rolling_std(data['Close'], window)
 
-        upper_band = sma + (std * num_std)
-        lower_band = sma - (std * num_std)
+        upper_band = indicators.bb_upper(sma, std, num_std)
+        lower_band = indicators.bb_lower(sma, std, num_std)
 
         return upper_band, sma, lower_band
 
@@ -45,22 +52,9 @@ class TechnicalAnalyzer:
         Calculate Average True Range (ATR) - Volatility Indicator
         ATR measures market volatility by decomposing the entire range of price movement
         """
-        high = data['High']
-        low = data['Low']
-        close = data['Close']
-        
-        # True Range calculation
-        tr1 = high - low  # Current high - current low
-        tr2 = abs(high - close.shift())  # Current high - previous close
-        tr3 = abs(low - close.shift())  # Current low - previous close
-        
-        # True Range is the maximum of the three
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        
         # ATR is the moving average of True Range
-        atr = tr.rolling(window=period).mean()
-        
-        return atr
+        tr = indicators.true_range(data['High'], data['Low'], data['Close'])
+        return indicators.sma(tr, period)
 
     def calculate_vwap(self, data):
         """
@@ -68,10 +62,7 @@ class TechnicalAnalyzer:
         VWAP = Sum(Price * Volume) / Sum(Volume)
         Represents the average price weighted by volume
         """
-        typical_price = (data['High'] + data['Low'] + data['Close']) / 3
-        vwap = (typical_price * data['Volume']).cumsum() / data['Volume'].cumsum()
-        
-        return vwap
+        return indicators.vwap(data['High'], data['Low'], data['Close'], data['Volume'])
 
     def calculate_uncertainty_score(self, data, atr_period=14):
         """
@@ -92,38 +83,61 @@ class TechnicalAnalyzer:
         75-100: Extreme uncertainty (volatile with strong buy/sell pressure)
         """
         try:
-            # Calculate ATR (volatility component)
-            atr = self.calculate_atr(data, period=atr_period)
-            
-            # Calculate VWAP (price action component)
-            vwap = self.calculate_vwap(data)
-            
-            # Calculate volume ratio (volume pressure component)
-            volume_sma = data['Volume'].rolling(window=20).mean()
-            volume_ratio = data['Volume'] / volume_sma
-            
-            # Calculate price deviation from VWAP (price action component)
-            price_deviation = abs(data['Close'] - vwap) / vwap
-            
-            # Buy-Sell Pressure = Price Action × Volume Ratio
-            buy_sell_pressure = price_deviation * volume_ratio
-            
-            # Normalize ATR as percentage of price
-            atr_normalized = atr / data['Close']
-            
-            # Pricing Uncertainty = Buy-Sell Pressure × Volatility
-            uncertainty_raw = buy_sell_pressure * atr_normalized
-            
-            # Normalize to 0-100 scale using tanh function for smooth bounded output
-            # tanh squashes values to [-1, 1], we scale to [0, 100]
-            uncertainty_score = 50 * (1 + np.tanh(uncertainty_raw * 10))
-            
-            return uncertainty_score, atr, vwap
+            registry = INDICATOR_REGISTRY
+            if atr_period != INDICATOR_REGISTRY['ATR'].params['window']:
+                registry = dict(INDICATOR_REGISTRY)
+                registry['ATR'] = Indicator('ATR', ['True_Range'], indicators.sma, {'window': atr_period})
+
+            run = IndicatorRun(data, registry=registry)
+            return run.get('Uncertainty_Score'), run.get('ATR'), run.get('VWAP')
             
         except Exception as e:
             print(f"Error calculating uncertainty score: {str(e)}")
             return None, None, None
 
+    def compute_indicator_frame(self, hist_data, run=None):
+        """
+        Single-pass indicator engine: compute every indicator series exactly
+        once into one shared column set
+
+        Series are resolved through the indicator registry (src/indicators.py),
+        so shared intermediates (true range, EMAs, ATR, VWAP, 20-day volume
+        SMA) are computed once and reused by every dependent indicator. The
+        computed column names are listed in INDICATOR_SERIES and in
+        frame.attrs['computed_series'].
+
+        Args:
+            hist_data: OHLCV DataFrame
+            run: Optional IndicatorRun over hist_data whose memo should be reused
+        """
+        run = run or IndicatorRun(hist_data)
+        df = run.frame(self.INDICATOR_SERIES)
+        df.attrs['computed_series'] = list(self.INDICATOR_SERIES)
+        return df
+
+    def _indicators_from_frame(self, df):
+        """Build the current-value indicators dict from the last row of an indicator frame"""
+        latest = df.iloc[-1]
+
+        return {
+            'sma_20': latest['SMA_20'],
+            'sma_50': latest['SMA_50'],
+            'sma_200': latest['SMA_200'],
+            'rsi': latest['RSI'],
+            'macd': latest['MACD'],
+            'macd_signal': latest['MACD_Signal'],
+            'bb_upper': latest['BB_Upper'],
+            'bb_middle': latest['BB_Middle'],
+            'bb_lower': latest['BB_Lower'],
+            'volume_sma': latest['Volume_SMA'],
+            'current_price': latest['Close'],
+            'volume': latest['Volume'],
+            # New uncertainty indicators
+            'uncertainty_score': latest['Uncertainty_Score'],
+            'atr': latest['ATR'],
+            'vwap': latest['VWAP']
+        }
+
     def calculate_historical_indicators(self, hist_data):
         """
         Calculate all technical indicators for entire historical period
@@ -133,176 +147,77 @@ class TechnicalAnalyzer:
             return None
 
         try:
-            df = hist_data.copy()
+            return self.compute_indicator_frame(hist_data)
 
-            # Moving Averages
-            df['SMA_20'] = self.calculate_sma(df, 20)
-            df['SMA_50'] = self.calculate_sma(df, 50)
-            df['SMA_200'] = self.calculate_sma(df, 200)
-
-            # RSI
-            df['RSI'] = self.calculate_rsi(df)
+        except Exception as e:
+            print(f"Error calculating historical indicators: {str(e)}")
+            return None
 
-            # MACD
-            df['MACD'], df['MACD_Signal'] = self.calculate_macd(df)
+    def _percentile_series(self, data):
+        """Historical series behind each percentile indicator, keyed by percentile result key"""
+        series = {}
+        for key, col in [('rsi', 'RSI'), ('macd', 'MACD'), ('uncertainty_score', 'Uncertainty_Score'),
+                         ('atr_percent', 'ATR_Percent'), ('price_vwap_percent', 'Price_VWAP_Pct'),
+                         ('volume_ratio', 'Volume_Ratio')]:
+            if col in data.columns:
+                series[key] = data[col]
 
-            # Bollinger Bands
-            df['BB_Upper'], df['BB_Middle'], df['BB_Lower'] = self.calculate_bollinger_bands(df)
+        # SMA deviation (%) for all periods (registered as SMA_<n>_Deviation)
+        for sma_period in [20, 50, 200]:
+            sma_col = f'SMA_{sma_period}'
+            deviation_col = f'{sma_col}_Deviation'
+            if deviation_col in data.columns:
+                series[f'sma_{sma_period}_deviation'] = data[deviation_col]
+            elif sma_col in data.columns:
+                series[f'sma_{sma_period}_deviation'] = indicators.sma_deviation(data['Close'], data[sma_col])
 
-            # Volume SMA
-            df['Volume_SMA'] = df['Volume'].rolling(window=20).mean()
+        return series
 
-            # Pricing Uncertainty Score Components
-            df['Uncertainty_Score'], df['ATR'], df['VWAP'] = self.calculate_uncertainty_score(df)
+    def _current_percentile_values(self, current_indicators):
+        """Current value of each percentile indicator, keyed by percentile result key"""
+        values = {}
 
-            # Calculate ATR as percentage of price
-            df['ATR_Percent'] = (df['ATR'] / df['Close']) * 100
+        for key in ['rsi', 'macd', 'uncertainty_score']:
+            if current_indicators.get(key) is not None:
+                values[key] = current_indicators[key]
 
-            # Calculate price vs VWAP percentage
-            df['Price_VWAP_Pct'] = ((df['Close'] - df['VWAP']) / df['VWAP']) * 100
+        current_price = current_indicators.get('current_price', 0)
 
-            # Calculate volume ratio
-            df['Volume_Ratio'] = df['Volume'] / df['Volume_SMA']
+        if current_indicators.get('atr') is not None and current_price > 0:
+            values['atr_percent'] = (current_indicators['atr'] / current_price) * 100
 
-            return df
+        if current_indicators.get('vwap') is not None:
+            current_vwap = current_indicators.get('vwap', 0)
+            if current_vwap > 0:
+                values['price_vwap_percent'] = ((current_price - current_vwap) / current_vwap) * 100
 
-        except Exception as e:
-            print(f"Error calculating historical indicators: {str(e)}")
-            return None
+        if current_indicators.get('volume') is not None:
+            volume_sma = current_indicators.get('volume_sma', 1)
+            if volume_sma > 0:
+                values['volume_ratio'] = current_indicators.get('volume', 0) / volume_sma
 
-    def _calculate_single_percentile(self, historical_values, current_value, frequency_functions=None):
-        """Calculate percentile for a single indicator"""
-        if len(historical_values) == 0:
-            return None
-        
-        percentile = stats.percentileofscore(historical_values, current_value, kind='rank')
-        result = {
-            'current_value': current_value,
-            'percentile': percentile,
-            'mean': historical_values.mean(),
-            'std': historical_values.std(),
-            'min': historical_values.min(),
-            'max': historical_values.max()
-        }
-        
-        if frequency_functions:
-            for key, func in frequency_functions.items():
-                result[key] = func(historical_values).sum() / len(historical_values) * 100
-        
-        return result
-    
-    def _calculate_rsi_percentile(self, valid_data, current_indicators):
-        """Calculate RSI percentile"""
-        if 'RSI' not in valid_data.columns or current_indicators.get('rsi') is None:
-            return None
-        
-        rsi_values = valid_data['RSI'].dropna()
-        freq_funcs = {
-            'frequency_above_70': lambda x: x > 70,
-            'frequency_below_30': lambda x: x < 30
-        }
-        return self._calculate_single_percentile(rsi_values, current_indicators['rsi'], freq_funcs)
-    
-    def _calculate_macd_percentile(self, valid_data, current_indicators):
-        """Calculate MACD percentile"""
-        if 'MACD' not in valid_data.columns or current_indicators.get('macd') is None:
-            return None
-        
-        macd_values = valid_data['MACD'].dropna()
-        freq_funcs = {'frequency_positive': lambda x: x > 0}
-        return self._calculate_single_percentile(macd_values, current_indicators['macd'], freq_funcs)
-    
-    def _calculate_uncertainty_percentile(self, valid_data, current_indicators):
-        """Calculate Uncertainty Score percentile"""
-        if 'Uncertainty_Score' not in valid_data.columns or current_indicators.get('uncertainty_score') is None:
-            return None
-        
-        uncertainty_values = valid_data['Uncertainty_Score'].dropna()
-        freq_funcs = {
-            'frequency_low': lambda x: x < 25,
-            'frequency_high': lambda x: x > 75
-        }
-        return self._calculate_single_percentile(uncertainty_values, current_indicators['uncertainty_score'], freq_funcs)
-    
-    def _calculate_atr_percent_percentile(self, valid_data, current_indicators):
-        """Calculate ATR percent percentile"""
-        if 'ATR_Percent' not in valid_data.columns or current_indicators.get('atr') is None:
-            return None
-        
-        atr_pct_values = valid_data['ATR_Percent'].dropna()
-        current_price = current_indicators.get('current_price', 0)
-        if current_price <= 0 or len(atr_pct_values) == 0:
-            return None
-        
-        current_atr_pct = (current_indicators['atr'] / current_price) * 100
-        freq_funcs = {
-            'frequency_low_volatility': lambda x: x < 1,
-            'frequency_high_volatility': lambda x: x > 4
-        }
-        return self._calculate_single_percentile(atr_pct_values, current_atr_pct, freq_funcs)
-    
-    def _calculate_vwap_percent_percentile(self, valid_data, current_indicators):
-        """Calculate Price vs VWAP percent percentile"""
-        if 'Price_VWAP_Pct' not in valid_data.columns or current_indicators.get('vwap') is None:
-            return None
-        
-        vwap_pct_values = valid_data['Price_VWAP_Pct'].dropna()
-        current_price = current_indicators.get('current_price', 0)
-        current_vwap = current_indicators.get('vwap', 0)
-        if current_vwap <= 0 or len(vwap_pct_values) == 0:
-            return None
-        
-        current_vwap_pct = ((current_price - current_vwap) / current_vwap) * 100
-        freq_funcs = {
-            'frequency_above_3pct': lambda x: x > 3,
-            'frequency_below_neg3pct': lambda x: x < -3
-        }
-        return self._calculate_single_percentile(vwap_pct_values, current_vwap_pct, freq_funcs)
-    
-    def _calculate_volume_ratio_percentile(self, valid_data, current_indicators):
-        """Calculate Volume Ratio percentile"""
-        if 'Volume_Ratio' not in valid_data.columns or current_indicators.get('volume') is None:
-            return None
-        
-        volume_ratio_values = valid_data['Volume_Ratio'].dropna()
-        current_volume = current_indicators.get('volume', 0)
-        volume_sma = current_indicators.get('volume_sma', 1)
-        if volume_sma <= 0 or len(volume_ratio_values) == 0:
-            return None
-        
-        current_volume_ratio = current_volume / volume_sma
-        freq_funcs = {
-            'frequency_high_volume': lambda x: x > 2.0,
-            'frequency_low_volume': lambda x: x < 0.7
-        }
-        return self._calculate_single_percentile(volume_ratio_values, current_volume_ratio, freq_funcs)
-    
-    def _calculate_sma_percentiles(self, valid_data, current_indicators):
-        """Calculate SMA deviation percentiles for all periods"""
-        sma_percentiles = {}
-        
         for sma_period in [20, 50, 200]:
-            sma_col = f'SMA_{sma_period}'
             sma_key = f'sma_{sma_period}'
-            
-            if sma_col not in valid_data.columns or current_indicators.get(sma_key) is None:
-                continue
-            
-            current_sma = current_indicators[sma_key]
-            current_price = current_indicators.get('current_price', 0)
-            if current_price <= 0:
-                continue
-            
-            sma_diff_pct = ((current_price - current_sma) / current_sma) * 100
-            sma_diff_values = ((valid_data['Close'] - valid_data[sma_col]) / valid_data[sma_col] * 100).dropna()
-            
-            if len(sma_diff_values) > 0:
-                freq_funcs = {'frequency_above_sma': lambda x: x > 0}
-                result = self._calculate_single_percentile(sma_diff_values, sma_diff_pct, freq_funcs)
-                if result:
-                    sma_percentiles[f'{sma_key}_deviation'] = result
-        
-        return sma_percentiles
+            if current_indicators.get(sma_key) is not None and current_price > 0:
+                current_sma = current_indicators[sma_key]
+                values[f'{sma_key}_deviation'] = ((current_price - current_sma) / current_sma) * 100
+
+        return values
+
+    def _percentile_inputs(self, valid_data, current_indicators):
+        """
+        Collect the historical column and current value for each percentile indicator
+
+        Returns:
+            (columns, current_values) dicts keyed by percentile result key
+        """
+        current_values = self._current_percentile_values(current_indicators)
+        columns = {
+            key: values.to_numpy(dtype=float)
+            for key, values in self._percentile_series(valid_data).items()
+            if key in current_values
+        }
+        return columns, {key: current_values[key] for key in columns}
 
     def calculate_percentiles(self, historical_df, current_indicators):
         """
@@ -319,40 +234,14 @@ class TechnicalAnalyzer:
             return {}
 
         try:
-            percentiles = {}
             valid_data = historical_df.dropna()
             
             if valid_data.empty:
                 return {}
 
-            # Calculate each indicator percentile using helper methods
-            rsi_result = self._calculate_rsi_percentile(valid_data, current_indicators)
-            if rsi_result:
-                percentiles['rsi'] = rsi_result
-
-            macd_result = self._calculate_macd_percentile(valid_data, current_indicators)
-            if macd_result:
-                percentiles['macd'] = macd_result
-
-            uncertainty_result = self._calculate_uncertainty_percentile(valid_data, current_indicators)
-            if uncertainty_result:
-                percentiles['uncertainty_score'] = uncertainty_result
-
-            atr_result = self._calculate_atr_percent_percentile(valid_data, current_indicators)
-            if atr_result:
-                percentiles['atr_percent'] = atr_result
-
-            vwap_result = self._calculate_vwap_percent_percentile(valid_data, current_indicators)
-            if vwap_result:
-                percentiles['price_vwap_percent'] = vwap_result
-
-            volume_result = self._calculate_volume_ratio_percentile(valid_data, current_indicators)
-            if volume_result:
-                percentiles['volume_ratio'] = volume_result
-
-            # SMA percentiles
-            sma_percentiles = self._calculate_sma_percentiles(valid_data, current_indicators)
-            percentiles.update(sma_percentiles)
+            # Sort each indicator column once and answer every statistic from it
+            columns, current_values = self._percentile_inputs(valid_data, current_indicators)
+            percentiles = compute_percentiles(columns, current_values)
 
             return percentiles
 
@@ -362,57 +251,102 @@ class TechnicalAnalyzer:
             traceback.print_exc()
             return {}
 
-    def calculate_all_indicators(self, hist_data):
-        """Calculate all technical indicators"""
-        if hist_data is None or hist_data.empty:
+    def calculate_rolling_percentiles(self, data, window=252, min_periods=None, columns=None):
+        """
+        Rolling percentile rank of every indicator against its own trailing window
+
+        Args:
+            data: Indicator frame from calculate_historical_indicators, or raw
+                OHLCV history (indicators are computed first)
+            window: Trailing window length in rows (252 ~ one trading year)
+            min_periods: Minimum non-NaN values in the window (defaults to window)
+            columns: Indicator columns to rank (defaults to INDICATOR_SERIES)
+
+        Returns:
+            DataFrame of 0-100 percentile ranks aligned with the indicator frame
+        """
+        if data is None or data.empty:
             return None
 
         try:
-            df = hist_data.copy()
+            if not set(self.INDICATOR_SERIES) <= set(data.columns):
+                data = self.compute_indicator_frame(data)
 
-            # Moving Averages
-            df['SMA_20'] = self.calculate_sma(df, 20)
-            df['SMA_50'] = self.calculate_sma(df, 50)
-            df['SMA_200'] = self.calculate_sma(df, 200)
+            columns = [col for col in (columns or self.INDICATOR_SERIES) if col in data.columns]
+            ranks = {
+                col: rolling_percentile_rank(data[col].to_numpy(dtype=float), window, min_periods)
+                for col in columns
+            }
+            return pd.DataFrame(ranks, index=data.index)
 
-            # RSI
-            df['RSI'] = self.calculate_rsi(df)
+        except Exception as e:
+            print(f"Error calculating rolling percentiles: {str(e)}")
+            return None
 
-            # MACD
-            df['MACD'], df['MACD_Signal'] = self.calculate_macd(df)
+    def update_percentile_sketches(self, store, ticker, indicator_df):
+        """
+        Fold an indicator frame into the ticker's persisted monthly quantile sketches
 
-            # Bollinger Bands
-            df['BB_Upper'], df['BB_Middle'], df['BB_Lower'] = self.calculate_bollinger_bands(df)
+        Args:
+            store: TickerDatabase
+            ticker: Yahoo Finance ticker symbol
+            indicator_df: Frame from calculate_historical_indicators
 
-            # Volume SMA
-            df['Volume_SMA'] = df['Volume'].rolling(window=20).mean()
+        Returns:
+            Number of monthly sketches written
+        """
+        if indicator_df is None or indicator_df.empty:
+            return 0
 
-            # Pricing Uncertainty Score Components
-            df['Uncertainty_Score'], df['ATR'], df['VWAP'] = self.calculate_uncertainty_score(df)
+        try:
+            # Same row-wise dropna as calculate_percentiles, so both rank the same rows
+            series = self._percentile_series(indicator_df.dropna())
+            return update_indicator_sketches(store, ticker, {
+                key: values for key, values in series.items() if key not in self.UNSKETCHED_PERCENTILES
+            })
+        except Exception as e:
+            print(f"Error updating percentile sketches: {str(e)}")
+            return 0
 
-            # Get latest indicators
-            latest = df.iloc[-1]
-
-            indicators = {
-                'sma_20': latest['SMA_20'],
-                'sma_50': latest['SMA_50'],
-                'sma_200': latest['SMA_200'],
-                'rsi': latest['RSI'],
-                'macd': latest['MACD'],
-                'macd_signal': latest['MACD_Signal'],
-                'bb_upper': latest['BB_Upper'],
-                'bb_middle': latest['BB_Middle'],
-                'bb_lower': latest['BB_Lower'],
-                'volume_sma': latest['Volume_SMA'],
-                'current_price': latest['Close'],
-                'volume': latest['Volume'],
-                # New uncertainty indicators
-                'uncertainty_score': latest['Uncertainty_Score'],
-                'atr': latest['ATR'],
-                'vwap': latest['VWAP']
-            }
+    def calculate_sketch_percentiles(self, store, ticker, current_indicators, lookback='1y', as_of=None):
+        """
+        Percentiles from persisted quantile sketches instead of the raw history
+
+        Returns the same dict shape as calculate_percentiles; ranks and
+        frequencies are approximate, count/mean/std/min/max are exact. Keys in
+        UNSKETCHED_PERCENTILES are left out.
+
+        Args:
+            store: TickerDatabase holding the ticker's sketches
+            ticker: Yahoo Finance ticker symbol
+            current_indicators: Dict with current indicator values
+            lookback: '1y', '3y' or '5y'
+            as_of: End of the lookback window (defaults to today)
+        """
+        try:
+            percentiles = {}
+            for key, current_value in self._current_percentile_values(current_indicators).items():
+                if key in self.UNSKETCHED_PERCENTILES:
+                    continue
+                sketch = load_lookback_sketch(store, ticker, key, lookback, as_of)
+                if sketch.count:
+                    percentiles[key] = sketch.summary(current_value, FREQUENCY_THRESHOLDS.get(key, []))
+            return percentiles
 
-            return indicators
+        except Exception as e:
+            print(f"Error calculating sketch percentiles: {str(e)}")
+            return {}
+
+    def calculate_all_indicators(self, hist_data):
+        """Calculate all technical indicators"""
+        if hist_data is None or hist_data.empty:
+            return None
+
+        try:
+            df = self.compute_indicator_frame(hist_data)
+
+            # Get latest indicators
+            return self._indicators_from_frame(df)
         except Exception as e:
             print(f"Error calculating indicators: {str(e)}")
             return None
@@ -421,31 +355,35 @@ class TechnicalAnalyzer:
         """
         Calculate all technical indicators with percentile analysis
         
+        Indicators are computed once; the current values are read from the
+        last row of the same frame the percentiles are computed over.
+
         Returns:
-            Dict with 'indicators' (current values) and 'percentiles' (statistical analysis)
+            Dict with 'indicators' (current values), 'percentiles' (statistical
+            analysis), 'computed_series' (indicator columns computed) and
+            'indicator_frame' (the shared per-date series, e.g. for charting)
         """
         if hist_data is None or hist_data.empty:
             return None
 
         try:
-            # Calculate historical indicators for all periods
-            historical_df = self.calculate_historical_indicators(hist_data)
+            # Calculate indicators for all periods in a single pass
+            historical_df = self.compute_indicator_frame(hist_data)
             
             if historical_df is None or historical_df.empty:
                 return None
 
-            # Get current indicators
-            current_indicators = self.calculate_all_indicators(hist_data)
-            
-            if current_indicators is None:
-                return None
+            # Current indicators come from the last row
+            current_indicators = self._indicators_from_frame(historical_df)
 
             # Calculate percentiles
             percentiles = self.calculate_percentiles(historical_df, current_indicators)
 
             return {
                 'indicators': current_indicators,
-                'percentiles': percentiles
+                'percentiles': percentiles,
+                'computed_series': historical_df.attrs['computed_series'],
+                'indicator_frame': historical_df
             }
 
         except Exception as e:
@@ -0,0 +1,325 @@
+"""
+Lightweight tracing: timed spans, per-request traces and latency histograms
+
+Graph nodes and external calls (Yahoo, OpenAI, Botnoi, ElevenLabs, LINE,
+SQLite) run inside tracer.span(name). Every finished span feeds an
+in-process latency histogram for its name (p50/p95/p99), and spans opened
+inside tracer.trace(...) are also collected into that request's Trace,
+which exports to JSON. The active trace and parent span live in
+contextvars, so they follow asyncio tasks and LangGraph's worker threads.
+
+When tracing is disabled (the default, TRACING_ENABLED=false), span()
+returns a shared no-op context manager and traced functions call straight
+through after one flag check.
+
+    with tracer.trace("analyze_ticker", ticker="DBS19") as trace:
+        with tracer.span("yahoo.history"):
+            ...
+    trace.to_json()
+    tracer.latency_summary()
+"""
+
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from src.config import TRACE_EXPORT_DIR, TRACING_ENABLED
+
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+_current_span = contextvars.ContextVar('current_span', default=None)
+_span_ids = itertools.count(1)
+
+# Samples kept per histogram; percentiles describe the most recent calls
+HISTOGRAM_SAMPLES = 2048
+
+
+class _NoopSpan:
+    """Shared span used when tracing is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class LatencyHistogram:
+    """Count/mean/max over all samples, percentiles over the most recent ones"""
+
+    def __init__(self, max_samples=HISTOGRAM_SAMPLES):
+        self.samples = deque(maxlen=max_samples)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        """Nearest-rank percentile (0-100) of the retained samples"""
+        with self._lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return 0.0
+        rank = max(1, -(-len(ordered) * q // 100))
+        return ordered[int(rank) - 1]
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.max
+        }
+
+
+class Span:
+    """One timed operation"""
+
+    def __init__(self, tracer, name, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.span_id = next(_span_ids)
+        self.parent_id = None
+        self.trace = None
+        self.start = 0.0
+        self.duration = 0.0
+        self.error = None
+        self._token = None
+
+    def set(self, **attributes):
+        """Attach attributes (e.g. token counts) while the span is open"""
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        parent = _current_span.get()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.trace = _current_trace.get()
+        self._token = _current_span.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.tracer._finish(self)
+        return False
+
+    def to_dict(self, origin):
+        return {
+            'name': self.name,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start': self.start - origin,
+            'duration': self.duration,
+            'attributes': self.attributes,
+            'error': self.error
+        }
+
+
+class Trace:
+    """Spans of one request"""
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.spans = []
+        self.root = None
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    @property
+    def duration(self):
+        return self.root.duration if self.root is not None else 0.0
+
+    def to_dict(self):
+        origin = self.root.start if self.root is not None else 0.0
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start)
+        return {
+            'name': self.name,
+            'attributes': self.attributes,
+            'duration': self.duration,
+            'spans': [span.to_dict(origin) for span in spans]
+        }
+
+    def to_json(self, indent=None):
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=indent, default=str)
+
+    def export(self, path):
+        """Write the trace as JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_json(indent=2))
+        return path
+
+
+class Tracer:
+    """Creates spans and traces and aggregates span latencies by name"""
+
+    def __init__(self, enabled=False, export_dir=None):
+        """
+        Args:
+            enabled: Record spans (False makes every span a no-op)
+            export_dir: Optional directory each finished trace is written to
+        """
+        self.enabled = enabled
+        self.export_dir = export_dir
+        self.histograms = {}
+        self.last_trace = None
+        self._lock = threading.Lock()
+
+    def span(self, name, **attributes):
+        """Context manager timing one operation"""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def trace(self, name, **attributes):
+        """
+        Context manager collecting every span opened inside it into a new Trace
+
+        Inside an active trace (e.g. analyze_ticker called from an API
+        handler) this opens a span of that trace instead.
+        """
+        if not self.enabled:
+            return _NOOP_TRACE
+        if _current_trace.get() is not None:
+            return Span(self, name, attributes)
+        return _TraceContext(self, name, attributes)
+
+    def _finish(self, span):
+        with self._lock:
+            histogram = self.histograms.get(span.name)
+            if histogram is None:
+                histogram = self.histograms[span.name] = LatencyHistogram()
+        histogram.record(span.duration)
+        if span.trace is not None:
+            span.trace.add(span)
+
+    def latency_summary(self):
+        """Histogram summary per span name: count, mean, p50, p95, p99, max (seconds)"""
+        with self._lock:
+            histograms = dict(self.histograms)
+        return {name: histogram.summary() for name, histogram in sorted(histograms.items())}
+
+    def reset(self):
+        """Drop histograms and the last trace"""
+        with self._lock:
+            self.histograms = {}
+            self.last_trace = None
+
+
+class _NoopTrace:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_TRACE = _NoopTrace()
+
+
+class _TraceContext:
+    def __init__(self, tracer, name, attributes):
+        self.tracer = tracer
+        self.trace = Trace(name, attributes)
+        self._root = None
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current_trace.set(self.trace)
+        self._root = Span(self.tracer, self.trace.name, dict(self.trace.attributes))
+        self.trace.root = self._root
+        self._root.__enter__()
+        return self.trace
+
+    def __exit__(self, exc_type, exc, tb):
+        self._root.__exit__(exc_type, exc, tb)
+        _current_trace.reset(self._token)
+        self.tracer.last_trace = self.trace
+        if self.tracer.export_dir:
+            os.makedirs(self.tracer.export_dir, exist_ok=True)
+            self.trace.export(os.path.join(
+                self.tracer.export_dir, f"{self.trace.name}-{int(time.time() * 1000)}-{self._root.span_id}.json"))
+        return False
+
+
+tracer = Tracer(enabled=TRACING_ENABLED, export_dir=TRACE_EXPORT_DIR)
+
+
+def traced(name):
+    """Decorator running a sync or async function inside tracer.span(name)"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not tracer.enabled:
+                    return await func(*args, **kwargs)
+                with tracer.span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def trace_methods(prefix, names=None):
+    """
+    Class decorator wrapping public methods in spans named '<prefix>.<method>'
+
+    Args:
+        prefix: Span name prefix (e.g. 'sqlite')
+        names: Methods to wrap (default: every public function defined on the class)
+    """
+    def decorator(cls):
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith('_') or not inspect.isfunction(value):
+                continue
+            if names is not None and attr not in names:
+                continue
+            setattr(cls, attr, traced(f"{prefix}.{attr}")(value))
+        return cls
+
+    return decorator
+
+
+def format_latency_summary(summary):
+    """Table of span latencies in milliseconds"""
+    lines = [f"{'span':<36} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"]
+    for name, stats in summary.items():
+        lines.append(f"{name:<36} {stats['count']:>6} {stats['p50'] * 1000:>8.1f}ms {stats['p95'] * 1000:>8.1f}ms "
+                     f"{stats['p99'] * 1000:>8.1f}ms {stats['max'] * 1000:>8.1f}ms")
+    return "\n".join(lines)
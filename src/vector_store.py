@@ -1,10 +1,11 @@
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
-from langchain_openai import OpenAIEmbeddings
 import os
 
 class VectorStore:
     def __init__(self, collection_name="ticker_reports"):
+        # qdrant_client and langchain_openai are slow to import; only load them when a store is created
+        from qdrant_client import QdrantClient
+        from langchain_openai import OpenAIEmbeddings
+
         self.collection_name = collection_name
         # For Lambda, use in-memory mode
         self.client = QdrantClient(":memory:")
@@ -15,6 +16,8 @@ class VectorStore:
 
     def initialize_collection(self):
         """Initialize Qdrant collection"""
+        from qdrant_client.models import Distance, VectorParams
+
         try:
             # Check if collection exists
             collections = self.client.get_collections()
@@ -31,6 +34,8 @@ class VectorStore:
 
     def store_report(self, ticker, report_text, metadata=None):
         """Store report in vector database"""
+        from qdrant_client.models import PointStruct
+
         try:
             # Generate embedding
             embedding = self.embeddings.embed_query(report_text)
@@ -0,0 +1,14 @@
+"""
+pytest configuration
+
+Databases that are built with their default paths (e.g. the agent's lazily
+created TickerDatabase) go to a temporary directory, so test runs never
+write into data/. Set before any src module reads src.config.
+"""
+
+import os
+import tempfile
+
+_data_dir = tempfile.mkdtemp(prefix='ticker-tests-')
+os.environ['SQLITE_DB_PATH'] = os.path.join(_data_dir, 'ticker_data.db')
+os.environ['LLM_CACHE_PATH'] = os.path.join(_data_dir, 'llm_cache.db')
@@ -0,0 +1,82 @@
+"""
+Shared test fixtures
+
+Test modules import these after adding the repository root to sys.path, so
+they work both under pytest and when a test file is run as a script:
+
+    from tests.helpers import make_agent, make_history
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def make_history(periods=300, seed=0, start='2023-01-02', end=None, volatility=0.015,
+                 open_noise=0.0, range_noise=0.01, volume=(100_000, 1_000_000)):
+    """
+    Synthetic daily OHLCV history (geometric random walk on business days)
+
+    Args:
+        periods: Number of bars
+        seed: Random seed (the same arguments always give the same frame)
+        start: First date (ignored when end is given)
+        end: Last date, to anchor the history at its end instead
+        volatility: Daily log-return standard deviation
+        open_noise: Relative noise on Open (0 sets Open to Close)
+        range_noise: Relative noise of High/Low around Close (None for a fixed ±1% range)
+        volume: (low, high) range of the random integer volumes
+
+    Returns:
+        DataFrame with Open/High/Low/Close/Volume columns
+    """
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, volatility, periods)))
+    open_ = close * (1 + rng.normal(0, open_noise, periods)) if open_noise else close
+    if range_noise is None:
+        high, low = close * 1.01, close * 0.99
+    else:
+        high = close * (1 + np.abs(rng.normal(0, range_noise, periods)))
+        low = close * (1 - np.abs(rng.normal(0, range_noise, periods)))
+    dates = pd.bdate_range(end=end, periods=periods) if end is not None else pd.bdate_range(start, periods=periods)
+    return pd.DataFrame({
+        'Open': open_,
+        'High': high,
+        'Low': low,
+        'Close': close,
+        'Volume': rng.integers(*volume, periods).astype(float)
+    }, index=dates)
+
+
+def make_yf_history(start, periods):
+    """
+    yfinance-shaped daily history: tz-aware ('Asia/Singapore') calendar-day
+    index, Close rising linearly from 100 to 120, and the Dividends and
+    Stock Splits columns the provider returns
+    """
+    dates = pd.date_range(start, periods=periods, freq='D', tz='Asia/Singapore')
+    close = np.linspace(100, 120, periods)
+    return pd.DataFrame({
+        'Open': close - 1,
+        'High': close + 1,
+        'Low': close - 2,
+        'Close': close,
+        'Volume': np.full(periods, 1_000_000),
+        'Dividends': 0.0,
+        'Stock Splits': 0.0
+    }, index=dates)
+
+
+def make_agent(**attributes):
+    """
+    TickerAnalysisAgent built without __init__ (no OpenAI client, database or
+    network), with only the given attributes set
+
+        agent = make_agent(report_mode='two_pass', llm=MagicMock())
+    """
+    # Imported here so tests that never build an agent skip the LangChain imports
+    from src.agent import TickerAnalysisAgent
+
+    agent = TickerAnalysisAgent.__new__(TickerAnalysisAgent)
+    for name, value in attributes.items():
+        setattr(agent, name, value)
+    return agent
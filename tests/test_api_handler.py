@@ -324,6 +324,32 @@ def test_ticker_uppercase():
             print("⚠️  Ticker uppercase test skipped (requires agent setup)")
 
 
+@patch('src.api_handler.get_agent')
+def test_percentile_lookback_parameter(mock_get_agent):
+    """?lookback is passed to the graph; unsupported windows are rejected"""
+    print("\n🔍 Testing lookback parameter...")
+
+    mock_agent = MagicMock()
+    coverage = {'lookback': '3y', 'months': 36, 'months_covered': 14, 'first_month': '2025-09',
+                'last_month': '2026-10', 'complete': False}
+    mock_agent.graph.invoke.return_value = {'ticker': 'AAPL', 'ticker_data': {}, 'report': 'Test', 'error': '',
+                                            'percentile_coverage': coverage}
+    mock_get_agent.return_value = mock_agent
+
+    result = api_handler({'queryStringParameters': {'ticker': 'AAPL', 'lookback': '10y'}}, None)
+    assert result['statusCode'] == 400, "Unsupported lookback should return 400"
+    assert '10y' in json.loads(result['body'])['error']
+    mock_agent.graph.invoke.assert_not_called()
+
+    result = api_handler({'queryStringParameters': {'ticker': 'AAPL', 'lookback': '3y'}}, None)
+    assert result['statusCode'] == 200
+    assert mock_agent.initial_state.call_args.kwargs['percentile_lookback'] == '3y'
+    mock_agent.graph.invoke.assert_called_once_with(mock_agent.initial_state.return_value)
+    assert json.loads(result['body'])['percentile_coverage'] == coverage, "Response should flag partial coverage"
+
+    print("✅ Lookback parameter test passed")
+
+
 def run_all_tests():
     """Run all tests"""
     print("=" * 80)
@@ -338,6 +364,7 @@ def run_all_tests():
         ("Sanitize dictionary", test_sanitize_dict),
         ("JSON serialization", test_json_serialization),
         ("CORS headers", test_cors_headers),
+        ("Percentile lookback parameter", test_percentile_lookback_parameter),
         ("Ticker uppercase", test_ticker_uppercase),
     ]
     
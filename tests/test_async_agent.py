@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Test suite for the async agent API (ainvoke graph, async TTS/LINE/API handlers)
+
+External services are replaced with httpx mock transports and AsyncMock LLMs,
+so no network or API keys are needed.
+"""
+
+import asyncio
+import base64
+import json
+import os
+import sys
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.agent import GRAPH_DEPENDENCIES
+from src.api_handler import aapi_handler
+from src.audio_generator import AudioGenerator, BotnoiGenerator
+from src.line_bot import LineBot
+from tests.helpers import make_agent
+
+RealAsyncClient = httpx.AsyncClient
+
+
+def _mock_client(handler):
+    """httpx.AsyncClient factory routing every request to handler"""
+    def factory(**kwargs):
+        return RealAsyncClient(transport=httpx.MockTransport(handler), **kwargs)
+    return factory
+
+
+def _stub_async_agent(node_seconds=0.1):
+    """Agent whose async nodes sleep without blocking the event loop"""
+    agent = make_agent()
+
+    def make_node(name):
+        async def node(state):
+            await asyncio.sleep(node_seconds)
+            if name == "generate_report":
+                state["report"] = f"report for {state['ticker']}"
+            return state
+        return node
+
+    for name in GRAPH_DEPENDENCIES:
+        setattr(agent, f"a{name}", make_node(name))
+    agent.async_graph = agent.build_graph(asynchronous=True)
+    return agent
+
+
+def test_async_graph_serves_concurrent_requests():
+    """Many aanalyze_ticker calls share one event loop and overlap"""
+    print("\n🔍 Testing concurrent aanalyze_ticker...")
+
+    agent = _stub_async_agent()
+    tickers = [f"T{i}" for i in range(10)]
+
+    async def run():
+        return await asyncio.gather(*(agent.aanalyze_ticker(ticker) for ticker in tickers))
+
+    start = time.perf_counter()
+    reports = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+
+    # Critical path is 4 nodes x 0.1s; ten sequential runs would take 4s+
+    print(f"   10 tickers in {elapsed:.2f}s")
+    assert reports == [f"report for {ticker}" for ticker in tickers]
+    assert elapsed < 1.5
+
+    print("✅ Concurrent aanalyze_ticker test passed")
+
+
+def test_async_nodes_delegate_blocking_work():
+    """Blocking nodes run through their sync implementation off the event loop"""
+    print("\n🔍 Testing async wrappers of blocking nodes...")
+
+    agent = make_agent()
+    threads = []
+
+    def fetch_data(state):
+        threads.append(threading.current_thread())
+        state["ticker_data"] = {"close": 1.0}
+        return state
+
+    agent.fetch_data = fetch_data
+    state = asyncio.run(agent.afetch_data({"ticker": "TEST"}))
+
+    assert state["ticker_data"] == {"close": 1.0}
+    assert threads and threads[0] is not threading.main_thread()
+
+    print("✅ Async wrapper test passed")
+
+
+def test_agenerate_report_awaits_llm():
+    """agenerate_report awaits llm.ainvoke for both passes and never calls invoke"""
+    print("\n🔍 Testing agenerate_report...")
+
+    agent = make_agent(report_mode="two_pass", llm=MagicMock(),
+                       _report_prompt=MagicMock(return_value="prompt"),
+                       _needs_strategy_pass=MagicMock(return_value=True),
+                       _finish_report=lambda state, report: {**state, "report": report})
+    agent.llm.ainvoke = AsyncMock(side_effect=[MagicMock(content="first pass BUY"),
+                                               MagicMock(content="second pass")])
+
+    state = asyncio.run(agent.agenerate_report({"ticker": "TEST", "strategy_performance": {"buy_only": {}}}))
+
+    assert state["report"] == "second pass"
+    assert agent.llm.ainvoke.await_count == 2
+    agent.llm.invoke.assert_not_called()
+
+    print("✅ agenerate_report test passed")
+
+
+def test_audio_nodes_sync_and_async():
+    """Sync and async audio nodes run the same steps; only the client calls differ"""
+    print("\n🔍 Testing audio nodes...")
+
+    generator = MagicMock()
+    generator.clean_text_for_tts.side_effect = lambda text: text.strip()
+    generator.generate_audio_base64.side_effect = lambda text, language, **kwargs: f"{language}:{text}"
+    generator.agenerate_audio_base64 = AsyncMock(side_effect=lambda text, language, **kwargs: f"{language}:{text}")
+    generator.translate_to_english.return_value = " english "
+    generator.atranslate_to_english = AsyncMock(return_value=" english ")
+    agent = make_agent(audio_generator=generator, llm=MagicMock(), _save_english_audio=MagicMock())
+
+    state = {"ticker": "TEST", "report": " รายงาน ", "error": ""}
+    sync_state = agent.generate_audio_english(agent.generate_audio_thai(dict(state)))
+    async_state = asyncio.run(agent.agenerate_audio_english(
+        asyncio.run(agent.agenerate_audio_thai(dict(state)))))
+
+    assert sync_state["audio_base64"] == async_state["audio_base64"] == "th:รายงาน"
+    assert sync_state["audio_english_base64"] == async_state["audio_english_base64"] == "en:english"
+    assert generator.generate_audio_base64.call_count == 2
+    assert generator.agenerate_audio_base64.await_count == 2
+
+    # Failures leave the audio empty without failing the request
+    generator.agenerate_audio_base64.side_effect = RuntimeError("TTS down")
+    failed = asyncio.run(agent.agenerate_audio_thai(dict(state)))
+    assert failed["audio_base64"] == "" and failed["error"] == ""
+
+    # No report, no audio
+    assert agent.generate_audio_english({**state, "report": ""})["audio_english_base64"] == ""
+
+    print("✅ Audio nodes test passed")
+
+
+def test_botnoi_async_http():
+    """Botnoi async TTS posts the request and downloads the audio URL"""
+    print("\n🔍 Testing async Botnoi request...")
+
+    requests_seen = []
+
+    def handler(request):
+        requests_seen.append(request)
+        if request.method == "POST":
+            assert json.loads(request.content)["speaker"] == "1"
+            return httpx.Response(200, json={"audio_url": "https://audio.example/file.mp3"})
+        return httpx.Response(200, content=b"mp3-bytes")
+
+    generator = BotnoiGenerator(api_key="key", voice_id="1")
+    with patch("src.audio_generator.httpx.AsyncClient", _mock_client(handler)):
+        audio = asyncio.run(generator.agenerate_audio("สวัสดี"))
+
+    assert audio == b"mp3-bytes"
+    assert [r.method for r in requests_seen] == ["POST", "GET"]
+    assert requests_seen[0].headers["botnoi-token"] == "key"
+
+    print("✅ Async Botnoi test passed")
+
+
+def test_audio_generator_async_base64_and_errors():
+    """agenerate_audio_base64 encodes the audio; HTTP errors surface as RequestException"""
+    print("\n🔍 Testing async audio generator...")
+
+    import requests
+
+    generator = AudioGenerator(botnoi_api_key="key", botnoi_voice_id="1",
+                               elevenlabs_api_key="key", elevenlabs_voice_id="voice")
+
+    with patch("src.audio_generator.httpx.AsyncClient",
+               _mock_client(lambda request: httpx.Response(200, content=b"english"))):
+        encoded = asyncio.run(generator.agenerate_audio_base64("hello", language='en'))
+    assert base64.b64decode(encoded) == b"english"
+
+    with patch("src.audio_generator.httpx.AsyncClient",
+               _mock_client(lambda request: httpx.Response(401, json={"detail": "bad key"}))):
+        try:
+            asyncio.run(generator.agenerate_audio("hello", language='en'))
+            assert False, "Expected RequestException"
+        except requests.exceptions.RequestException as e:
+            assert "ElevenLabs API error" in str(e) and "bad key" in str(e)
+
+    print("✅ Async audio generator test passed")
+
+
+def test_line_async_webhook():
+    """ahandle_webhook answers every event via the async agent and async reply"""
+    print("\n🔍 Testing async LINE webhook...")
+
+    bot = LineBot.__new__(LineBot)
+    bot.channel_access_token = "token"
+    bot.channel_secret = None
+    bot.agent = MagicMock()
+    bot.agent.aanalyze_ticker = AsyncMock(side_effect=lambda ticker: f"report {ticker}")
+
+    replies = []
+
+    def handler(request):
+        replies.append(json.loads(request.content))
+        return httpx.Response(200, json={})
+
+    body = json.dumps({"events": [
+        {"type": "message", "replyToken": "t1", "message": {"type": "text", "text": "DBS19"}},
+        {"type": "message", "replyToken": "t2", "message": {"type": "text", "text": "UOB19"}},
+        {"type": "message", "replyToken": "t3", "message": {"type": "sticker"}},
+    ]})
+
+    # line_bot imports httpx inside areply_message, so patch the package attribute
+    with patch("httpx.AsyncClient", _mock_client(handler)):
+        result = asyncio.run(bot.ahandle_webhook(body, "test_signature"))
+
+    assert result["statusCode"] == 200
+    texts = {reply["replyToken"]: reply["messages"][0]["text"] for reply in replies}
+    assert texts == {"t1": "report DBS19", "t2": "report UOB19", "t3": "กรุณาส่งชื่อ ticker เป็นข้อความ"}
+    bot.agent.analyze_ticker.assert_not_called()
+
+    print("✅ Async LINE webhook test passed")
+
+
+def test_aapi_handler():
+    """aapi_handler awaits the async graph and builds the same response as api_handler"""
+    print("\n🔍 Testing aapi_handler...")
+
+    mock_agent = MagicMock()
+    mock_agent.async_graph.ainvoke = AsyncMock(return_value={
+        "ticker_data": {"company_name": "Test"},
+        "indicators": {"rsi": 50.0},
+        "percentiles": {},
+        "news": [],
+        "news_summary": {},
+        "chart_base64": "",
+        "report": "report",
+        "error": ""
+    })
+
+    with patch("src.api_handler.get_agent", return_value=mock_agent):
+        result = asyncio.run(aapi_handler({"queryStringParameters": {"ticker": "test"}}, None))
+        missing = asyncio.run(aapi_handler({"queryStringParameters": None}, None))
+
+    assert result["statusCode"] == 200
+    body = json.loads(result["body"])
+    assert body["ticker"] == "TEST" and body["report"] == "report"
+    assert mock_agent.initial_state.call_args.args[0] == "TEST"
+    mock_agent.async_graph.ainvoke.assert_awaited_once_with(mock_agent.initial_state.return_value)
+    mock_agent.graph.invoke.assert_not_called()
+    assert missing["statusCode"] == 400
+
+    print("✅ aapi_handler test passed")
+
+
+def run_all_tests():
+    """Run all async agent tests"""
+    print("=" * 60)
+    print("🧪 Running Async Agent Tests")
+    print("=" * 60)
+
+    test_async_graph_serves_concurrent_requests()
+    test_async_nodes_delegate_blocking_work()
+    test_agenerate_report_awaits_llm()
+    test_audio_nodes_sync_and_async()
+    test_botnoi_async_http()
+    test_audio_generator_async_base64_and_errors()
+    test_line_async_webhook()
+    test_aapi_handler()
+
+    print("\n" + "=" * 60)
+    print("✅ All async agent tests passed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    run_all_tests()
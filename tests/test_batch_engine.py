@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Test suite for the concurrent batch report engine
+
+The agent is a stub whose graph makes one market data call and one LLM
+call with fixed latencies, so the tests check concurrency caps, rate
+limits and the summary without network, LLM or PDF work.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import src.batch_engine as batch_engine
+from src.batch_engine import (BatchEngine, RateLimited, ResourceLimiter, TokenBucket, format_batch_summary,
+                              summarize_batch)
+from src.llm_cache import CachedLLM, LLMCache
+
+LLM_SECONDS = 0.2
+YAHOO_SECONDS = 0.05
+
+
+class FakeLLM:
+    """Chat model that sleeps and counts calls in flight"""
+
+    model_name = "fake"
+    temperature = 0.0
+
+    def __init__(self):
+        self.calls = 0
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    async def ainvoke(self, messages, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(LLM_SECONDS)
+        with self._lock:
+            self.in_flight -= 1
+        return AIMessage(content=f"report: {messages[0].content}")
+
+
+class FakeProvider:
+    def history(self, ticker, period=None, start=None):
+        time.sleep(YAHOO_SECONDS)
+        return ticker
+
+
+class StubAgent:
+    """Just what BatchEngine touches on TickerAnalysisAgent"""
+
+    def __init__(self, llm, fail=(), classifier_llm=None):
+        self.llm = llm
+        self.classifier_llm = classifier_llm
+        self.classifier_llm_limit = None
+        self.market_data = FakeProvider()
+        self.data_fetcher = SimpleNamespace(provider=self.market_data)
+        self.news_fetcher = SimpleNamespace(provider=self.market_data)
+        self.audio_generator = None
+        self.pdf_generator = MagicMock()
+        self.pdf_generator.generate_report.return_value = b"%PDF-1.4"
+        self.async_graph = SimpleNamespace(ainvoke=self._run_graph)
+        self.fail = set(fail)
+        self.prefetched = None
+        self.prefetch_cleared = False
+
+    def prefetch(self, tickers):
+        self.prefetched = list(tickers)
+        return {}
+
+    def clear_prefetch(self):
+        self.prefetch_cleared = True
+
+    def initial_state(self, ticker):
+        return {"ticker": ticker}
+
+    async def _run_graph(self, state):
+        ticker = state["ticker"]
+        start = time.perf_counter()
+        await asyncio.to_thread(self.market_data.history, ticker)
+        fetched = time.perf_counter()
+        if ticker in self.fail:
+            return {**state, "error": f"No data for {ticker}",
+                    "node_timings": {"fetch_data": {"duration": fetched - start}}}
+        response = await self.llm.ainvoke([HumanMessage(content=ticker)])
+        return {**state, "report": response.content, "faithfulness_score": SimpleNamespace(overall_score=90.0),
+                "node_timings": {"fetch_data": {"duration": fetched - start},
+                                 "generate_report": {"duration": time.perf_counter() - fetched}}}
+
+
+def test_token_bucket_rate():
+    """Calls beyond the burst are spaced 1/rate apart, from threads and coroutines"""
+    print("\n🔍 Testing token bucket...")
+
+    bucket = TokenBucket(rate=50, burst=1)
+    start = time.perf_counter()
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert time.perf_counter() - start >= 5 / 50 - 0.01
+
+    async def acquire_all():
+        await asyncio.gather(*(bucket.aacquire() for _ in range(5)))
+
+    start = time.perf_counter()
+    asyncio.run(acquire_all())
+    assert time.perf_counter() - start >= 4 / 50 - 0.01
+
+    print("✅ Token bucket test passed")
+
+
+def test_resource_limiter_caps_concurrency():
+    """limit() and alimit() never let more than `concurrency` calls run at once"""
+    print("\n🔍 Testing resource limiter...")
+
+    limiter = ResourceLimiter('yahoo', concurrency=2)
+    proxy = RateLimited(FakeProvider(), limiter, ['history'])
+    threads = [threading.Thread(target=proxy.history, args=("T",)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = limiter.stats()
+    assert stats['calls'] == 6
+    assert stats['peak_active'] == 2
+    assert stats['wait_seconds'] > 0
+
+    llm = FakeLLM()
+    async_limiter = ResourceLimiter('openai', concurrency=3)
+    limited_llm = RateLimited(llm, async_limiter, ['ainvoke'])
+
+    async def invoke_all():
+        await asyncio.gather(*(limited_llm.ainvoke([HumanMessage(content="x")]) for _ in range(7)))
+
+    asyncio.run(invoke_all())
+    assert llm.calls == 7 and llm.peak == 3
+    # Unlisted attributes pass straight through
+    assert limited_llm.model_name == "fake"
+
+    print("✅ Resource limiter test passed")
+
+
+def test_engine_runs_tickers_concurrently():
+    """Runtime tracks the slowest ticker and the caps, not the sum of tickers"""
+    print("\n🔍 Testing concurrent batch run...")
+
+    tickers = [f"T{i}" for i in range(8)]
+    llm = FakeLLM()
+    agent = StubAgent(llm, fail={"T7"})
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        engine = BatchEngine(agent, output_dir=output_dir, max_tickers=8, llm_concurrency=4,
+                             yahoo_concurrency=8, pdf_workers=0)
+        summary = engine.run(tickers)
+
+    print(f"   wall {summary['wall_seconds']:.2f}s | serial {summary['sum_ticker_seconds']:.2f}s")
+    serial = len(tickers) * (LLM_SECONDS + YAHOO_SECONDS)
+    assert summary['wall_seconds'] < serial / 2
+    assert llm.peak == 4, "LLM concurrency cap not applied"
+    assert agent.prefetched == tickers
+    assert agent.prefetch_cleared, "prefetched histories must not outlive the run"
+
+    assert summary['succeeded'] == 7 and summary['failed'] == 1
+    failed = [r for r in summary['results'] if r['status'] == 'failed']
+    assert failed[0]['ticker'] == "T7" and failed[0]['error'] == "No data for T7"
+    assert [r['ticker'] for r in summary['results']] == tickers
+
+    assert summary['stages']['generate_report']['count'] == 7
+    assert summary['stages']['render_pdf']['count'] == 7
+    assert summary['resources']['openai']['calls'] == 7
+    assert summary['resources']['openai']['peak_active'] == 4
+    assert summary['resources']['yahoo']['calls'] == 8
+    assert agent.pdf_generator.generate_report.call_count == 7
+    assert all(r['pdf_size'] == len(b"%PDF-1.4") for r in summary['results'] if r['status'] == 'success')
+
+    text = format_batch_summary(summary)
+    assert "7/8 succeeded" in text and "render_pdf" in text and "openai" in text
+
+    print("✅ Concurrent batch run test passed")
+
+
+def test_cached_llm_hits_skip_limiter():
+    """With a CachedLLM only calls that reach the model count against the OpenAI limit"""
+    print("\n🔍 Testing cache-aware LLM limit...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        llm = FakeLLM()
+        cached = CachedLLM(llm, LLMCache(os.path.join(tmp, 'llm_cache.db')))
+        agent = StubAgent(cached)
+        engine = BatchEngine(agent, output_dir=tmp, llm_concurrency=1, pdf_workers=0)
+
+        assert agent.llm is cached, "the cache wrapper must stay outermost"
+        engine.run(["DBS19"], prefetch=False)
+        engine.run(["DBS19"], prefetch=False)
+
+    assert llm.calls == 1
+    assert engine.limiters['openai'].stats()['calls'] == 1
+
+    print("✅ Cache-aware LLM limit test passed")
+
+
+def test_classifier_llm_shares_limit():
+    """The 'classify' mode's small model counts against the same OpenAI limit"""
+    print("\n🔍 Testing classifier LLM limit...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        classifier = FakeLLM()
+        agent = StubAgent(FakeLLM(), classifier_llm=CachedLLM(classifier, LLMCache(os.path.join(tmp, 'llm_cache.db'))))
+        engine = BatchEngine(agent, output_dir=tmp, llm_concurrency=1, pdf_workers=0)
+
+        async def classify_and_report():
+            await asyncio.gather(agent.classifier_llm.ainvoke([HumanMessage(content="classify")]),
+                                 agent.llm.ainvoke([HumanMessage(content="report")]))
+
+        asyncio.run(classify_and_report())
+
+        assert isinstance(agent.classifier_llm, CachedLLM), "the cache wrapper must stay outermost"
+        assert classifier.calls == 1
+        assert engine.limiters['openai'].stats()['calls'] == 2
+        assert engine.limiters['openai'].stats()['peak_active'] == 1
+
+        # Not built yet (any mode but 'classify'): the engine leaves it unbuilt and
+        # hands the agent its limit for when it is
+        agent = StubAgent(FakeLLM())
+        engine = BatchEngine(agent, output_dir=tmp, llm_concurrency=1, pdf_workers=0)
+        assert agent.classifier_llm is None
+        limited = agent.classifier_llm_limit(FakeLLM())
+        asyncio.run(limited.ainvoke([HumanMessage(content="classify")]))
+        assert engine.limiters['openai'].stats()['calls'] == 1
+
+    print("✅ Classifier LLM limit test passed")
+
+
+def test_render_pdf_job_reuses_generator():
+    """The process pool task builds one PDF generator per process and returns only the size"""
+    print("\n🔍 Testing PDF render task...")
+
+    batch_engine._process_pdf_generator = None
+    with patch('src.pdf_generator.PDFReportGenerator') as generator_class:
+        generator_class.return_value.generate_report.return_value = b"x" * 1024
+        sizes = [batch_engine._render_pdf_job("DBS19", {'report': "r"}, f"/tmp/{i}.pdf") for i in range(3)]
+    batch_engine._process_pdf_generator = None
+
+    assert sizes == [1024] * 3
+    assert generator_class.call_count == 1
+    generator_class.return_value.generate_report.assert_called_with(
+        ticker="DBS19", output_path="/tmp/2.pdf", report="r")
+
+    summary = summarize_batch([], 0.0)
+    assert summary['total'] == 0 and summary['slowest_ticker'] is None
+
+    print("✅ PDF render task test passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("=" * 60)
+    print("Running Batch Engine Tests")
+    print("=" * 60)
+
+    test_token_bucket_rate()
+    test_resource_limiter_caps_concurrency()
+    test_engine_runs_tickers_concurrently()
+    test_cached_llm_hits_skip_limiter()
+    test_classifier_llm_shares_limit()
+    test_render_pdf_job_reuses_generator()
+
+    print("\n" + "=" * 60)
+    print("✅ All batch engine tests passed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test suite for the fundamentals TTL cache shared by DataFetcher methods
+"""
+
+import os
+import sys
+import time
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.cache import TTLCache
+from src.data_fetcher import DataFetcher
+from src.market_data import MarketDataProvider
+
+
+def test_single_info_request_per_ticker():
+    """fetch_ticker_data + get_ticker_info should read `.info` once"""
+    print("\n🔍 Testing single `.info` request per ticker...")
+
+    cache = TTLCache(ttl_seconds=60)
+    hist = pd.DataFrame({
+        'Open': [1.0], 'High': [1.0], 'Low': [1.0], 'Close': [1.0], 'Volume': [100]
+    }, index=pd.date_range('2024-01-01', periods=1))
+
+    provider = MagicMock(spec=MarketDataProvider)
+    provider.history.return_value = hist
+    provider.info.return_value = {'longName': 'Test Co', 'trailingPE': 10.0}
+
+    fetcher = DataFetcher(info_cache=cache, provider=provider)
+    data = fetcher.fetch_ticker_data('TEST.SI')
+    info = fetcher.get_ticker_info('TEST.SI')
+
+    assert provider.info.call_count == 1, f"`.info` should be read once, got {provider.info.call_count}"
+    assert data['pe_ratio'] == 10.0 and info['pe_ratio'] == 10.0
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1, f"Unexpected stats: {stats}"
+
+    print("✅ Single `.info` request test passed")
+
+
+def test_ttl_expiry_and_failures():
+    """Expired entries reload and empty results are not cached"""
+    print("\n🔍 Testing TTL expiry...")
+
+    cache = TTLCache(ttl_seconds=0.05)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return {'value': len(loads)}
+
+    assert cache.get_or_load('A', loader) == {'value': 1}
+    assert cache.get_or_load('A', loader) == {'value': 1}, "Should hit before expiry"
+    time.sleep(0.06)
+    assert cache.get_or_load('A', loader) == {'value': 2}, "Should reload after expiry"
+
+    assert cache.get_or_load('B', lambda: {}) == {}
+    assert cache.get('B') is None, "Empty results should not be cached"
+
+    print("✅ TTL expiry test passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("=" * 80)
+    print("Fundamentals Cache Test Suite")
+    print("=" * 80)
+
+    tests = [
+        ("Single info request", test_single_info_request_per_ticker),
+        ("TTL expiry", test_ttl_expiry_and_failures),
+    ]
+
+    results = []
+    for name, test_func in tests:
+        try:
+            test_func()
+            results.append(True)
+        except Exception as e:
+            print(f"❌ {name} test failed: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            results.append(False)
+
+    print("\n" + "=" * 80)
+    passed = sum(results)
+    print(f"Passed: {passed}/{len(results)}")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Import-time regression check for the src entry points
+
+Fails when an entry point (src.agent, the API/LINE handlers) loads a
+deferred heavy dependency at import time. Import times are printed against
+IMPORT_BUDGETS and only fail the run with IMPORT_BUDGETS_ENFORCE=true, since
+wall-clock time depends on the machine.
+"""
+
+import os
+import sys
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.import_profile import check_budgets, format_profile, import_subtree, parse_importtime
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       100 |        100 |   site
+import time:       300 |        300 |     numpy.core
+import time:       200 |        500 |   numpy
+import time:        50 |        550 | mymodule
+"""
+
+
+def test_parse_importtime():
+    """importtime lines become per-module timings with their nesting depth"""
+    print("\n🔍 Testing importtime parsing...")
+
+    entries = parse_importtime(SAMPLE)
+    assert [e['module'] for e in entries] == ['site', 'numpy.core', 'numpy', 'mymodule']
+    assert entries[2]['cumulative_seconds'] == 0.0005
+    assert [e['depth'] for e in entries] == [1, 2, 1, 0]
+
+    # Every deeper entry right above mymodule was imported by it, site included
+    assert [e['module'] for e in import_subtree(entries, 'mymodule')] == ['site', 'numpy.core', 'numpy']
+
+    # A top-level import that finished earlier is a sibling, not part of the subtree
+    sibling = parse_importtime("import time:        80 |         80 | encodings\n" + SAMPLE)
+    assert [e['module'] for e in import_subtree(sibling, 'mymodule')] == ['site', 'numpy.core', 'numpy']
+    profile = {'module': 'mymodule', 'seconds': 0.00055, 'entries': entries}
+    assert format_profile(profile).splitlines()[0] == "mymodule: 1 ms"
+
+    print("✅ importtime parsing test passed")
+
+
+def test_entry_points_within_budget():
+    """Entry points import without deferred dependencies (time budgets are reported)"""
+    print("\n🔍 Testing import budgets...")
+
+    profiles, violations = check_budgets()
+    for module, profile in profiles.items():
+        flag = " ⚠️ over budget" if profile['over_budget'] else ""
+        print(f"   {module}: {profile['seconds'] * 1000:.0f} ms (budget {profile['budget'] * 1000:.0f} ms){flag}")
+
+    assert not violations, "\n".join(violations)
+
+    print("✅ Import budget test passed")
+
+
+def test_violations_reported():
+    """Over-budget imports and eagerly loaded deferred packages are reported"""
+    print("\n🔍 Testing budget violations...")
+
+    _, violations = check_budgets({'src.config': 0.0}, deferred=('dotenv',), retries=0, enforce_time=True)
+    assert any('budget' in violation for violation in violations)
+    assert "src.config: loads dotenv at import time" in violations
+
+    # Not enforced: the overrun is flagged on the profile, not reported as a violation
+    profiles, violations = check_budgets({'src.config': 0.0}, deferred=(), enforce_time=False)
+    assert profiles['src.config']['over_budget'] and not violations
+
+    print("✅ Budget violation test passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("=" * 60)
+    print("Running Import Budget Tests")
+    print("=" * 60)
+
+    test_parse_importtime()
+    test_entry_points_within_budget()
+    test_violations_reported()
+
+    print("\n" + "=" * 60)
+    print("✅ All import budget tests passed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test suite for the single-pass indicator engine in TechnicalAnalyzer
+"""
+
+import os
+import sys
+from unittest.mock import patch
+
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.indicators import INDICATOR_REGISTRY, IndicatorRun, register_indicator
+from src.technical_analysis import TechnicalAnalyzer
+from tests.helpers import make_history
+
+HISTORY = dict(seed=42, volatility=0.01, open_noise=0.002, range_noise=None)
+
+
+def test_each_series_computed_once():
+    """Shared intermediates are computed once per analysis, not per consumer"""
+    print("\n🔍 Testing single-pass computation...")
+
+    analyzer = TechnicalAnalyzer()
+    calls = {}
+
+    def counting(name, func):
+        def wrapper(*args, **kwargs):
+            calls[name] = calls.get(name, 0) + 1
+            return func(*args, **kwargs)
+        return wrapper
+
+    shared = ['True_Range', 'ATR', 'VWAP', 'Volume_SMA', 'EMA_12', 'SMA_20']
+    patches = [patch.object(INDICATOR_REGISTRY[name], 'func', counting(name, INDICATOR_REGISTRY[name].func))
+               for name in shared]
+    for p in patches:
+        p.start()
+    try:
+        result = analyzer.calculate_all_indicators_with_percentiles(make_history(**HISTORY))
+    finally:
+        for p in patches:
+            p.stop()
+
+    assert result is not None
+    for name in shared:
+        assert calls.get(name) == 1, f"{name} computed {calls.get(name)} times"
+    assert result['computed_series'] == list(TechnicalAnalyzer.INDICATOR_SERIES)
+
+    print("✅ Single-pass computation test passed")
+
+
+def test_registry_plugs_in_new_indicators():
+    """New indicators resolve through the DAG without touching the orchestration"""
+    print("\n🔍 Testing indicator registry...")
+
+    registry = dict(INDICATOR_REGISTRY)
+    register_indicator('ATR_Band_Upper', inputs=['SMA_20', 'ATR'], registry=registry, mult=2)(
+        lambda sma, atr, mult: sma + mult * atr
+    )
+    register_indicator('Loop_A', inputs=['Loop_B'], registry=registry)(lambda x: x)
+    register_indicator('Loop_B', inputs=['Loop_A'], registry=registry)(lambda x: x)
+
+    hist = make_history(**HISTORY)
+    run = IndicatorRun(hist, registry=registry)
+    band = run.get('ATR_Band_Upper')
+
+    expected = hist['Close'].rolling(20).mean() + 2 * TechnicalAnalyzer().calculate_atr(hist)
+    pd.testing.assert_series_equal(band, expected, check_names=False)
+    assert run.computed == ['SMA_20', 'True_Range', 'ATR', 'ATR_Band_Upper']
+    assert 'ATR_Band_Upper' not in INDICATOR_REGISTRY, "Private registries should not leak"
+
+    try:
+        run.get('Loop_A')
+        assert False, "Cycles should be rejected"
+    except ValueError as e:
+        assert 'cycle' in str(e)
+
+    print("✅ Indicator registry test passed")
+
+
+def test_current_values_match_last_row():
+    """The current indicators dict is the last row of the indicator frame"""
+    print("\n🔍 Testing current values...")
+
+    analyzer = TechnicalAnalyzer()
+    hist = make_history(**HISTORY)
+    frame = analyzer.compute_indicator_frame(hist)
+    current = analyzer.calculate_all_indicators(hist)
+
+    assert set(TechnicalAnalyzer.INDICATOR_SERIES) <= set(frame.columns)
+    assert current['rsi'] == frame['RSI'].iloc[-1]
+    assert current['uncertainty_score'] == frame['Uncertainty_Score'].iloc[-1]
+
+    score, atr, vwap = analyzer.calculate_uncertainty_score(hist)
+    pd.testing.assert_series_equal(score, frame['Uncertainty_Score'], check_names=False)
+
+    print("✅ Current values test passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("=" * 80)
+    print("Indicator Engine Test Suite")
+    print("=" * 80)
+
+    tests = [
+        ("Each series computed once", test_each_series_computed_once),
+        ("Registry plugs in new indicators", test_registry_plugs_in_new_indicators),
+        ("Current values match last row", test_current_values_match_last_row),
+    ]
+
+    results = []
+    for name, test_func in tests:
+        try:
+            test_func()
+            results.append(True)
+        except Exception as e:
+            print(f"❌ {name} test failed: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            results.append(False)
+
+    print("\n" + "=" * 80)
+    passed = sum(results)
+    print(f"Passed: {passed}/{len(results)}")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Test suite for the incremental indicator state
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.database import TickerDatabase
+from src.indicators import INDICATOR_REGISTRY, true_range
+from src.indicator_state import ANALYSIS_WINDOW_DAYS, IncrementalIndicatorState, refresh_indicator_state
+from src.panel_analysis import PanelAnalyzer, build_price_panel
+from src.technical_analysis import TechnicalAnalyzer
+from tests.helpers import make_history
+
+HISTORY = dict(seed=7, open_noise=0.003)
+
+
+def assert_indicators_match(expected, actual, rtol=1e-9):
+    assert set(expected) == set(actual), f"Key mismatch: {set(expected) ^ set(actual)}"
+    for key in expected:
+        assert np.isclose(expected[key], actual[key], rtol=rtol, equal_nan=True), \
+            f"{key}: expected {expected[key]}, got {actual[key]}"
+
+
+def analysis_window(hist):
+    """The bars the agent fetches when it analyzes on the last bar's date"""
+    return hist[hist.index >= hist.index[-1] - pd.Timedelta(days=ANALYSIS_WINDOW_DAYS)]
+
+
+def test_streaming_matches_batch():
+    """Bar-by-bar updates reproduce calculate_all_indicators"""
+    print("\n🔍 Testing streaming vs batch indicators...")
+
+    hist = make_history(**HISTORY)
+    expected = TechnicalAnalyzer().calculate_all_indicators(hist)
+    state = IncrementalIndicatorState.from_history(hist)
+
+    assert_indicators_match(expected, state.indicators())
+
+    # Short histories leave long windows undefined, like the rolling versions
+    short = IncrementalIndicatorState.from_history(hist.iloc[:30])
+    assert np.isnan(short.indicators()['sma_50'])
+    assert_indicators_match(TechnicalAnalyzer().calculate_all_indicators(hist.iloc[:30]), short.indicators())
+
+    print("✅ Streaming vs batch test passed")
+
+
+def test_serialize_and_revise_bar():
+    """State survives a JSON round trip and a same-day bar replaces the last one"""
+    print("\n🔍 Testing serialization and bar revision...")
+
+    hist = make_history(**HISTORY)
+    state = IncrementalIndicatorState.from_history(hist.iloc[:-1])
+    state = IncrementalIndicatorState.from_dict(state.to_dict())
+
+    last = hist.iloc[-1]
+    state.update(hist.index[-1], last['Open'], last['High'], last['Low'], last['Close'] * 1.05, last['Volume'])
+    state.update(hist.index[-1], last['Open'], last['High'], last['Low'], last['Close'], last['Volume'])
+    assert not state.update(hist.index[-2], 1, 1, 1, 1, 1), "Older bars should be ignored"
+
+    assert_indicators_match(TechnicalAnalyzer().calculate_all_indicators(hist), state.indicators())
+
+    # The undo record holds what one bar changes, not copies of the buffers
+    undo = state.to_dict()['before_last']
+    assert not any(isinstance(value, list) and len(value) > 1 for value in undo.values())
+
+    print("✅ Serialization and bar revision test passed")
+
+
+def test_nan_volume_bar():
+    """A bar without volume counts as zero volume and is skipped by VWAP"""
+    print("\n🔍 Testing NaN volume bar...")
+
+    hist = make_history(**HISTORY)
+    hist.iloc[150, hist.columns.get_loc('Volume')] = np.nan
+    state = IncrementalIndicatorState.from_history(hist)
+
+    assert np.isfinite(state.cum_volume) and np.isfinite(state.volume_sum)
+    expected = TechnicalAnalyzer().calculate_all_indicators(hist.fillna({'Volume': 0.0}))
+    assert_indicators_match(expected, state.indicators())
+    assert np.isclose(state.indicators()['vwap'], TechnicalAnalyzer().calculate_all_indicators(hist)['vwap'])
+
+    # A volume-less latest bar (live intraday) leaves VWAP defined
+    last = hist.iloc[-1]
+    state.update(hist.index[-1], last['Open'], last['High'], last['Low'], last['Close'], np.nan)
+    assert np.isnan(state.indicators()['volume']) and np.isfinite(state.indicators()['vwap'])
+
+    print("✅ NaN volume bar test passed")
+
+
+def test_windowed_vwap():
+    """A VWAP window only accumulates the bars of the trailing calendar window"""
+    print("\n🔍 Testing windowed VWAP...")
+
+    hist = make_history(**HISTORY)
+    state = IncrementalIndicatorState.from_history(hist.iloc[:-1], vwap_window_days=ANALYSIS_WINDOW_DAYS)
+    state = IncrementalIndicatorState.from_dict(state.to_dict())
+    last = hist.iloc[-1]
+    state.update(hist.index[-1], last['Open'], last['High'], last['Low'], last['Close'] * 1.05, last['Volume'])
+    state.update(hist.index[-1], last['Open'], last['High'], last['Low'], last['Close'], last['Volume'])
+
+    expected = TechnicalAnalyzer().calculate_all_indicators(analysis_window(hist))
+    assert np.isclose(state.indicators()['vwap'], expected['vwap'], rtol=1e-9)
+    assert np.isclose(state.indicators()['uncertainty_score'], expected['uncertainty_score'], rtol=1e-9)
+
+    print("✅ Windowed VWAP test passed")
+
+
+def test_refresh_persisted_state():
+    """refresh_indicator_state only applies bars newer than the stored state and matches the agent's window"""
+    print("\n🔍 Testing persisted state refresh...")
+
+    store = TickerDatabase(db_path=os.path.join(tempfile.mkdtemp(), 'ticker_data.db'))
+    hist = make_history(**HISTORY)
+
+    refresh_indicator_state(store, 'TEST.SI', hist.iloc[:-3])
+    indicators = refresh_indicator_state(store, 'TEST.SI', hist)
+
+    # The EMAs were seeded three bars before the agent's window starts: equal up to their decay
+    assert_indicators_match(TechnicalAnalyzer().calculate_all_indicators(analysis_window(hist)), indicators,
+                            rtol=1e-6)
+    assert store.load_indicator_state('TEST.SI')['last_date'] == hist.index[-1].strftime('%Y-%m-%d')
+
+    print("✅ Persisted state refresh test passed")
+
+
+def test_refresh_provider_frames():
+    """Tz-aware provider frames are normalized and a short delta is seeded from stored bars"""
+    print("\n🔍 Testing refresh from provider frames...")
+
+    store = TickerDatabase(db_path=os.path.join(tempfile.mkdtemp(), 'ticker_data.db'))
+    hist = make_history(**HISTORY)
+    store.upsert_price_history('TEST.SI', hist)
+
+    # Yahoo returns exchange-local timestamps; the daily job passes a 30-day window
+    provider_frame = hist.iloc[-30:].tz_localize('Asia/Singapore')
+    expected = TechnicalAnalyzer().calculate_all_indicators(analysis_window(hist))
+    indicators = refresh_indicator_state(store, 'TEST.SI', provider_frame)
+    assert_indicators_match(expected, indicators)
+
+    indicators = refresh_indicator_state(store, 'TEST.SI', provider_frame.iloc[-5:])
+    assert_indicators_match(expected, indicators)
+    assert store.load_indicator_state('TEST.SI')['last_date'] == hist.index[-1].strftime('%Y-%m-%d')
+
+    print("✅ Provider frame refresh test passed")
+
+
+def _three_paths(hist):
+    """Last-bar INDICATOR_SERIES values from the frame, panel and streaming paths"""
+    frame = TechnicalAnalyzer().compute_indicator_frame(hist).iloc[-1]
+    panel = build_price_panel({'TEST': hist})
+    indicators = PanelAnalyzer().compute_indicator_panel(panel['Close'], panel['High'], panel['Low'], panel['Volume'])
+    streaming = IncrementalIndicatorState.from_history(hist).series()
+    return ({name: frame[name] for name in TechnicalAnalyzer.INDICATOR_SERIES},
+            {name: indicators[name][-1, 0] for name in TechnicalAnalyzer.INDICATOR_SERIES},
+            streaming)
+
+
+def test_registry_parity():
+    """Frame, panel and streaming paths agree on every INDICATOR_SERIES column, using registry params"""
+    print("\n🔍 Testing registry parameter parity...")
+
+    hist = make_history(**HISTORY)
+    atr = INDICATOR_REGISTRY['ATR']
+    default_window = atr.params['window']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TickerDatabase(os.path.join(tmp, 'ticker_data.db'))
+        store.upsert_price_history('TEST.SI', hist.iloc[:-1])
+        refresh_indicator_state(store, 'TEST.SI', hist.iloc[:-1])
+
+        try:
+            atr.params['window'] = 10
+            frame, panel, streaming = _three_paths(hist)
+            assert_indicators_match(frame, panel)
+            assert_indicators_match(frame, streaming)
+            assert np.isclose(frame['ATR'], true_range(hist['High'], hist['Low'], hist['Close']).iloc[-10:].mean())
+
+            # A state persisted with the old window is re-seeded, not extended
+            store.upsert_price_history('TEST.SI', hist.iloc[-1:])
+            indicators = refresh_indicator_state(store, 'TEST.SI', hist.iloc[-1:])
+            assert np.isclose(indicators['atr'], TechnicalAnalyzer().calculate_all_indicators(analysis_window(hist))['atr'])
+            assert store.load_indicator_state('TEST.SI')['params']['atr_window'] == 10
+        finally:
+            atr.params['window'] = default_window
+
+    frame, panel, streaming = _three_paths(hist)
+    assert_indicators_match(frame, panel)
+    assert_indicators_match(frame, streaming)
+
+    print("✅ Registry parameter parity test passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("=" * 80)
+    print("Incremental Indicator State Test Suite")
+    print("=" * 80)
+
+    tests = [
+        ("Streaming matches batch", test_streaming_matches_batch),
+        ("Serialize and revise bar", test_serialize_and_revise_bar),
+        ("NaN volume bar", test_nan_volume_bar),
+        ("Windowed VWAP", test_windowed_vwap),
+        ("Refresh persisted state", test_refresh_persisted_state),
+        ("Refresh provider frames", test_refresh_provider_frames),
+        ("Registry parameter parity", test_registry_parity),
+    ]
+
+    results = []
+    for name, test_func in tests:
+        try:
+            test_func()
+            results.append(True)
+        except Exception as e:
+            print(f"❌ {name} test failed: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            results.append(False)
+
+    print("\n" + "=" * 80)
+    passed = sum(results)
+    print(f"Passed: {passed}/{len(results)}")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test suite for lazily constructed TickerAnalysisAgent components
+"""
+
+import os
+import sys
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.agent import TickerAnalysisAgent
+from src.cache import format_component_timings, lazy_component
+
+COMPONENT_CLASSES = ['TickerDatabase', 'DataFetcher', 'TechnicalAnalyzer', 'NewsFetcher', 'FaithfulnessScorer',
+                     'CompletenessScorer', 'ReasoningQualityScorer', 'get_market_data_provider', 'LLMCache']
+# Imported inside the component builders
+DEFERRED_CLASSES = {'ChatOpenAI': 'langchain_openai', 'ChartGenerator': 'src.chart_generator',
+                    'PDFReportGenerator': 'src.pdf_generator', 'AudioGenerator': 'src.audio_generator'}
+
+
+def _patched_components():
+    """Patch every component constructor used by src.agent with a MagicMock"""
+    patchers = {name: patch(f'src.agent.{name}') for name in COMPONENT_CLASSES}
+    patchers.update({name: patch(f'{module}.{name}') for name, module in DEFERRED_CLASSES.items()})
+    return patchers, {name: patcher.start() for name, patcher in patchers.items()}
+
+
+def test_constructor_builds_nothing():
+    """TickerAnalysisAgent() defers every component"""
+    print("\n🔍 Testing lazy constructor...")
+
+    patchers, mocks = _patched_components()
+    try:
+        agent = TickerAnalysisAgent()
+        for name, mock in mocks.items():
+            assert not mock.called, f"{name} built at construction"
+        assert agent.component_timings == {}
+
+        # A LINE reply touches the fetchers and the database, never the PDF generator
+        agent.data_fetcher
+        assert mocks['DataFetcher'].call_count == 1
+        assert mocks['TickerDatabase'].call_count == 1
+        assert mocks['get_market_data_provider'].call_count == 1
+        assert not mocks['PDFReportGenerator'].called
+        assert set(agent.component_timings) == {'data_fetcher', 'db', 'market_data'}
+    finally:
+        for patcher in patchers.values():
+            patcher.stop()
+
+    print("✅ Lazy constructor test passed")
+
+
+def test_component_built_once():
+    """Repeated and concurrent first accesses build a component once"""
+    print("\n🔍 Testing single construction...")
+
+    calls = []
+
+    class Holder:
+        @lazy_component
+        def component(self):
+            calls.append(1)
+            time.sleep(0.05)
+            return object()
+
+    holder = Holder()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(holder.component)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert holder.component is results[0]
+    assert holder.component_timings['component'] >= 0.05
+
+    print("✅ Single construction test passed")
+
+
+def test_assignment_overrides_component():
+    """Assigned attributes (test doubles, swapped providers) win over the builder"""
+    print("\n🔍 Testing attribute override...")
+
+    patchers, mocks = _patched_components()
+    try:
+        agent = TickerAnalysisAgent()
+        provider = MagicMock()
+        agent.market_data = provider
+        agent.news_fetcher
+        mocks['NewsFetcher'].assert_called_once_with(provider=provider)
+        assert not mocks['get_market_data_provider'].called
+    finally:
+        for patcher in patchers.values():
+            patcher.stop()
+
+    print("✅ Attribute override test passed")
+
+
+def test_new_component_timings():
+    """Each component's cold-start cost is reported once"""
+    print("\n🔍 Testing cold-start timing report...")
+
+    patchers, mocks = _patched_components()
+    try:
+        agent = TickerAnalysisAgent()
+        agent.db
+        agent.chart_generator
+        first = agent.new_component_timings()
+        assert set(first) == {'db', 'chart_generator'}
+
+        agent.pdf_generator
+        assert set(agent.new_component_timings()) == {'pdf_generator'}
+        assert agent.new_component_timings() == {}
+    finally:
+        for patcher in patchers.values():
+            patcher.stop()
+
+    line = format_component_timings({'db': 0.002, 'pdf_generator': 0.150})
+    assert line.startswith("🧊 Built 2 components: pdf_generator 150.0ms")
+    assert line.index("pdf_generator") < line.index("db")
+
+    print("✅ Cold-start timing report test passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("=" * 60)
+    print("Running Lazy Agent Tests")
+    print("=" * 60)
+
+    test_constructor_builds_nothing()
+    test_component_built_once()
+    test_assignment_overrides_component()
+    test_new_component_timings()
+
+    print("\n" + "=" * 60)
+    print("✅ All lazy agent tests passed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    run_all_tests()
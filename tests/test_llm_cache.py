@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Test suite for the persistent LLM response cache (LLMCache / CachedLLM)
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.audio_generator import AudioGenerator
+from src.llm_cache import CachedLLM, LLMCache, cache_key
+from tests.helpers import make_agent
+
+
+def _cache(**kwargs):
+    path = os.path.join(tempfile.mkdtemp(), "llm_cache.db")
+    return LLMCache(path, **kwargs)
+
+
+def _llm(model="gpt-4o", temperature=0.8):
+    llm = MagicMock()
+    llm.model_name = model
+    llm.temperature = temperature
+    llm.invoke.side_effect = lambda messages, **kwargs: AIMessage(
+        content=f"answer {llm.invoke.call_count}",
+        usage_metadata={'input_tokens': 10, 'output_tokens': 5, 'total_tokens': 15})
+    return llm
+
+
+def test_cache_key():
+    """Keys depend on model, temperature and every message"""
+    print("\n🔍 Testing cache keys...")
+
+    messages = [HumanMessage(content="วิเคราะห์ DBS19")]
+    key = cache_key("gpt-4o", 0.8, messages)
+    assert key == cache_key("gpt-4o", 0.8, [HumanMessage(content="วิเคราะห์ DBS19")])
+    assert key != cache_key("gpt-4o-mini", 0.8, messages)
+    assert key != cache_key("gpt-4o", 0.0, messages)
+    assert key != cache_key("gpt-4o", 0.8, [HumanMessage(content="วิเคราะห์ UOB19")])
+
+    print("✅ Cache key test passed")
+
+
+def test_repeated_prompt_served_from_cache():
+    """The second identical prompt never reaches the model"""
+    print("\n🔍 Testing cache hits...")
+
+    llm = _llm()
+    cached = CachedLLM(llm, _cache())
+    messages = [HumanMessage(content="prompt")]
+
+    first = cached.invoke(messages)
+    second = cached.invoke(messages)
+
+    assert llm.invoke.call_count == 1
+    assert second.content == first.content == "answer 1"
+    assert second.response_metadata == {'cached': True}
+    assert second.usage_metadata is None
+    stats = cached.cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1 and stats['size'] == 1
+    assert cached.model_name == "gpt-4o"  # delegated
+
+    print("✅ Cache hit test passed")
+
+
+def test_bypass_refreshes_entry():
+    """bypass_cache calls the model and stores the fresh answer"""
+    print("\n🔍 Testing cache bypass...")
+
+    llm = _llm()
+    cached = CachedLLM(llm, _cache())
+    messages = [HumanMessage(content="prompt")]
+
+    cached.invoke(messages)
+    fresh = cached.invoke(messages, bypass_cache=True)
+    assert llm.invoke.call_count == 2
+    assert fresh.content == "answer 2"
+    assert cached.invoke(messages).content == "answer 2"
+
+    always_fresh = CachedLLM(llm, cached.cache, bypass=True)
+    always_fresh.invoke(messages)
+    assert llm.invoke.call_count == 3
+
+    print("✅ Cache bypass test passed")
+
+
+def test_ttl_and_lru_eviction():
+    """Expired entries miss; the least recently used entry is evicted first"""
+    print("\n🔍 Testing TTL and eviction...")
+
+    expired = _cache(ttl_seconds=0)
+    expired.set("key", "value")
+    assert expired.get("key") is None
+
+    cache = _cache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a")['content'] == "1"  # "b" is now least recently used
+    cache.set("c", "3")
+
+    assert cache.size() == 2
+    assert cache.get("b") is None
+    assert cache.get("a")['content'] == "1" and cache.get("c")['content'] == "3"
+
+    print("✅ TTL and eviction test passed")
+
+
+def test_async_invoke_cached():
+    """ainvoke shares the cache with invoke"""
+    print("\n🔍 Testing async cache...")
+
+    llm = _llm()
+    llm.ainvoke = AsyncMock(return_value=AIMessage(content="async answer"))
+    cached = CachedLLM(llm, _cache())
+    messages = [HumanMessage(content="prompt")]
+
+    assert asyncio.run(cached.ainvoke(messages)).content == "async answer"
+    assert cached.invoke(messages).content == "async answer"
+    assert asyncio.run(cached.ainvoke(messages)).content == "async answer"
+    assert llm.ainvoke.await_count == 1
+    llm.invoke.assert_not_called()
+
+    print("✅ Async cache test passed")
+
+
+def test_translation_cached():
+    """AudioGenerator.translate_to_english reuses cached translations"""
+    print("\n🔍 Testing cached translation...")
+
+    llm = _llm()
+    cached = CachedLLM(llm, _cache())
+    generator = AudioGenerator.__new__(AudioGenerator)
+
+    first = generator.translate_to_english("รายงาน", cached)
+    second = generator.translate_to_english("รายงาน", cached)
+    assert first == second and llm.invoke.call_count == 1
+
+    print("✅ Cached translation test passed")
+
+
+def test_report_fresh_flag():
+    """generate_report counts cache hits and honours state['fresh']"""
+    print("\n🔍 Testing report cache integration...")
+
+    llm = _llm()
+    agent = make_agent(report_mode="two_pass", llm=CachedLLM(llm, _cache()),
+                       _report_prompt=lambda state, strategy_performance=None: "prompt",
+                       _finish_report=lambda state, report: {**state, "report": report})
+    state = {"ticker": "TEST", "strategy_performance": {}}
+
+    first = agent.generate_report(dict(state))
+    second = agent.generate_report(dict(state))
+    assert first["report_metrics"]['llm_calls'] == 1
+    assert second["report_metrics"]['llm_calls'] == 0
+    assert second["report_metrics"]['cache_hits'] == 1
+    assert second["report_metrics"]['total_tokens'] == 0
+    assert second["report"] == first["report"]
+
+    fresh = agent.generate_report({**state, "fresh": True})
+    assert fresh["report_metrics"]['llm_calls'] == 1
+    assert llm.invoke.call_count == 2
+
+    print("✅ Report cache integration test passed")
+
+
+def test_news_section_stable():
+    """News items show their publish time, so the prompt does not change as time passes"""
+    print("\n🔍 Testing news section stability...")
+
+    agent = make_agent()
+    published = datetime(2026, 10, 15, 9, 30, tzinfo=timezone.utc)
+    news = [{'title': "Earnings beat", 'sentiment': 'positive', 'impact_score': 80, 'timestamp': published}]
+
+    first = agent._format_news_section(news, {})
+    with patch('src.agent.datetime') as mock_datetime:
+        mock_datetime.now.return_value = published + timedelta(hours=5)
+        later = agent._format_news_section(news, {})
+    assert first == later
+    assert "Published: 2026-10-15 09:30" in first
+
+    print("✅ News section stability test passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("=" * 60)
+    print("Running LLM Cache Tests")
+    print("=" * 60)
+
+    test_cache_key()
+    test_repeated_prompt_served_from_cache()
+    test_bypass_refreshes_entry()
+    test_ttl_and_lru_eviction()
+    test_async_invoke_cached()
+    test_translation_cached()
+    test_report_fresh_flag()
+    test_news_section_stable()
+
+    print("\n" + "=" * 60)
+    print("✅ All LLM cache tests passed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Test suite for market data providers (record / replay)
+"""
+
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.cache import TTLCache
+from src.data_fetcher import DataFetcher
+from src.database import TickerDatabase
+from src.market_data import MarketDataProvider, RecordingProvider, ReplayProvider
+from src.news_fetcher import NewsFetcher
+
+
+def make_live_provider():
+    """Fake live provider with canned responses"""
+    dates = pd.date_range('2024-01-01', periods=30, freq='D')
+    close = np.linspace(100, 130, 30)
+    hist = pd.DataFrame({
+        'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+        'Volume': np.full(30, 1000)
+    }, index=dates)
+
+    live = MagicMock(spec=MarketDataProvider)
+    live.history.return_value = hist
+    live.info.return_value = {'longName': 'Test Co', 'trailingPE': 15.0}
+    live.news.return_value = [{'title': 'Test Co beats earnings', 'providerPublishTime': 1700000000}]
+    return live
+
+
+def test_record_then_replay():
+    """Replay serves exactly what was recorded, without touching the live provider"""
+    print("\n🔍 Testing record / replay...")
+
+    record_dir = tempfile.mkdtemp()
+    live = make_live_provider()
+    recorder = RecordingProvider(live, record_dir=record_dir)
+
+    recorded = DataFetcher(provider=recorder, info_cache=TTLCache(60)).fetch_ticker_data('TEST.SI', period='1mo')
+    recorded_news = NewsFetcher(provider=recorder).fetch_news('TEST.SI')
+
+    replay = ReplayProvider(record_dir=record_dir)
+    replayed = DataFetcher(provider=replay, info_cache=TTLCache(60)).fetch_ticker_data('TEST.SI', period='1mo')
+    replayed_news = NewsFetcher(provider=replay).fetch_news('TEST.SI')
+
+    assert replayed['close'] == recorded['close'], "Replayed close should match recording"
+    assert replayed['pe_ratio'] == 15.0, "Replayed fundamentals should match recording"
+    pd.testing.assert_frame_equal(replayed['history'], recorded['history'])
+    assert replayed_news[0]['title'] == recorded_news[0]['title']
+    assert replay.calls == 3, f"Expected 3 replayed calls, got {replay.calls}"
+
+    print("✅ Record / replay test passed")
+
+
+def test_replay_slices_unrecorded_start_requests():
+    """Incremental start= requests fall back to slicing the recorded history"""
+    print("\n🔍 Testing replay fallback for start= requests...")
+
+    record_dir = tempfile.mkdtemp()
+    RecordingProvider(make_live_provider(), record_dir=record_dir).history('TEST.SI', period='1mo')
+
+    replay = ReplayProvider(record_dir=record_dir)
+    delta = replay.history('TEST.SI', start='2024-01-28')
+
+    assert len(delta) == 3, f"Expected 3 bars from 2024-01-28, got {len(delta)}"
+
+    try:
+        replay.info('MISSING.SI')
+        assert False, "Unrecorded calls should raise"
+    except KeyError:
+        pass
+
+    print("✅ Replay fallback test passed")
+
+
+def test_replay_window_anchored_to_recording():
+    """With a bar store, replayed periods count back from the recording's last bar, not today"""
+    print("\n🔍 Testing replay window anchoring...")
+
+    record_dir = tempfile.mkdtemp()
+    recorder = RecordingProvider(make_live_provider(), record_dir=record_dir)
+    recorder.history('TEST.SI', period='1mo')
+    recorder.info('TEST.SI')
+    replay = ReplayProvider(record_dir=record_dir)
+    assert replay.last_date() == pd.Timestamp('2024-01-30').date()
+
+    store = TickerDatabase(db_path=os.path.join(tempfile.mkdtemp(), 'ticker_data.db'))
+    fetcher = DataFetcher(store=store, provider=replay, info_cache=TTLCache(60), as_of=replay.last_date())
+    cold = fetcher.fetch_ticker_data('TEST.SI', period='1mo')
+    warm = fetcher.fetch_ticker_data('TEST.SI', period='1mo')
+
+    assert len(cold['history']) == 30 and len(warm['history']) == 30, "The recording should not shrink with age"
+    pd.testing.assert_frame_equal(cold['history'], warm['history'], check_freq=False)
+
+    print("✅ Replay window anchoring test passed")
+
+
+def test_replay_latency():
+    """Replay adds the configured artificial latency per call"""
+    print("\n🔍 Testing replay latency...")
+
+    record_dir = tempfile.mkdtemp()
+    RecordingProvider(make_live_provider(), record_dir=record_dir).info('TEST.SI')
+
+    replay = ReplayProvider(record_dir=record_dir, latency=0.05)
+    start = time.perf_counter()
+    replay.info('TEST.SI')
+    elapsed = time.perf_counter() - start
+
+    assert elapsed >= 0.05, f"Latency should be applied, took {elapsed:.3f}s"
+
+    print("✅ Replay latency test passed")
+
+
+def test_incomplete_provider_fails_at_construction():
+    """A provider missing an interface method cannot be instantiated"""
+    print("\n🔍 Testing provider interface...")
+
+    class HistoryOnlyProvider(MarketDataProvider):
+        def history(self, ticker, period=None, start=None):
+            return pd.DataFrame()
+
+    try:
+        HistoryOnlyProvider()
+    except TypeError as e:
+        assert 'download' in str(e) and 'info' in str(e) and 'news' in str(e)
+    else:
+        raise AssertionError("Incomplete provider should not be constructible")
+
+    print("✅ Provider interface test passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("=" * 80)
+    print("Market Data Provider Test Suite")
+    print("=" * 80)
+
+    tests = [
+        ("Record then replay", test_record_then_replay),
+        ("Replay start= fallback", test_replay_slices_unrecorded_start_requests),
+        ("Replay window anchoring", test_replay_window_anchored_to_recording),
+        ("Replay latency", test_replay_latency),
+        ("Incomplete provider", test_incomplete_provider_fails_at_construction),
+    ]
+
+    results = []
+    for name, test_func in tests:
+        try:
+            test_func()
+            results.append(True)
+        except Exception as e:
+            print(f"❌ {name} test failed: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            results.append(False)
+
+    print("\n" + "=" * 80)
+    passed = sum(results)
+    print(f"Passed: {passed}/{len(results)}")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
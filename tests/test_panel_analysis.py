@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test suite for cross-sectional (panel) technical analysis
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.panel_analysis import PanelAnalyzer, build_price_panel
+from src.technical_analysis import TechnicalAnalyzer
+from tests.helpers import make_history
+
+
+def test_panel_matches_single_ticker():
+    """Panel results equal calculate_all_indicators_with_percentiles per ticker"""
+    print("\n🔍 Testing panel vs single-ticker analysis...")
+
+    # Mixed lengths, including one too short for SMA 200 and one too short for any percentile
+    histories = {f'T{i}.BK': make_history(periods, seed=i, end='2024-06-28')
+                 for i, periods in enumerate([300, 250, 120, 15])}
+    analyzer = TechnicalAnalyzer()
+    panel_results = PanelAnalyzer(analyzer).analyze(histories)
+
+    assert list(panel_results) == list(histories)
+    for ticker, hist in histories.items():
+        expected = analyzer.calculate_all_indicators_with_percentiles(hist)
+        actual = panel_results[ticker]
+
+        for key, value in expected['indicators'].items():
+            assert np.isclose(value, actual['indicators'][key], rtol=1e-9, equal_nan=True), \
+                f"{ticker} {key}: expected {value}, got {actual['indicators'][key]}"
+
+        assert list(expected['percentiles']) == list(actual['percentiles']), f"{ticker} percentile keys differ"
+        for key, stats in expected['percentiles'].items():
+            assert list(stats) == list(actual['percentiles'][key])
+            for name, value in stats.items():
+                assert np.isclose(value, actual['percentiles'][key][name], rtol=1e-9, equal_nan=True), \
+                    f"{ticker} {key}.{name}: expected {value}, got {actual['percentiles'][key][name]}"
+
+    print("✅ Panel vs single-ticker test passed")
+
+
+def test_build_price_panel_right_aligns():
+    """Shorter histories are NaN-padded at the top so the last row is the latest bar"""
+    print("\n🔍 Testing panel layout...")
+
+    panel = build_price_panel({'A': make_history(5, seed=1, end='2024-06-28'),
+                               'B': make_history(3, seed=2, end='2024-06-28'), 'C': pd.DataFrame()})
+
+    assert panel['tickers'] == ['A', 'B']
+    assert panel['Close'].shape == (5, 2)
+    assert np.isnan(panel['Close'][:2, 1]).all() and not np.isnan(panel['Close'][2:, 1]).any()
+
+    print("✅ Panel layout test passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("=" * 80)
+    print("Panel Analysis Test Suite")
+    print("=" * 80)
+
+    tests = [
+        ("Panel matches single ticker", test_panel_matches_single_ticker),
+        ("Panel layout", test_build_price_panel_right_aligns),
+    ]
+
+    results = []
+    for name, test_func in tests:
+        try:
+            test_func()
+            results.append(True)
+        except Exception as e:
+            print(f"❌ {name} test failed: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            results.append(False)
+
+    print("\n" + "=" * 80)
+    passed = sum(results)
+    print(f"Passed: {passed}/{len(results)}")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test suite for the vectorized percentile engine
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.percentile_engine import compute_percentiles, frequency, percentile_rank, rolling_percentile_rank
+from src.technical_analysis import TechnicalAnalyzer
+
+
+def test_percentile_rank_matches_scipy():
+    """Binary-search rank equals percentileofscore(kind='rank'), ties included"""
+    print("\n🔍 Testing percentile rank...")
+
+    rng = np.random.default_rng(0)
+    values = np.round(rng.normal(50, 10, 500))  # rounded, so ties are common
+    sorted_values = np.sort(values)
+
+    for score in [values.min() - 1, 30, 50, 50.5, 71, values.max(), values.max() + 1]:
+        expected = stats.percentileofscore(values, score, kind='rank')
+        actual = percentile_rank(sorted_values, score)
+        assert np.isclose(expected, actual, rtol=1e-12), f"{score}: expected {expected}, got {actual}"
+
+    assert np.isnan(percentile_rank(sorted_values, np.nan))
+
+    print("✅ Percentile rank test passed")
+
+
+def test_compute_percentiles_matches_per_column_scan():
+    """Matrix statistics equal the per-indicator pandas-style computation"""
+    print("\n🔍 Testing compute_percentiles...")
+
+    rng = np.random.default_rng(1)
+    rsi = rng.uniform(0, 100, 250)
+    macd = rng.normal(0, 1, 250)
+    result = compute_percentiles({'rsi': rsi, 'macd': macd}, {'rsi': 72.0, 'macd': -0.2})
+
+    assert list(result['rsi']) == ['current_value', 'percentile', 'mean', 'std', 'min', 'max',
+                                   'frequency_above_70', 'frequency_below_30']
+    assert np.isclose(result['rsi']['std'], np.std(rsi, ddof=1))
+    assert result['rsi']['min'] == rsi.min() and result['rsi']['max'] == rsi.max()
+    assert np.isclose(result['rsi']['frequency_above_70'], (rsi > 70).mean() * 100)
+    assert np.isclose(result['rsi']['frequency_below_30'], (rsi < 30).mean() * 100)
+    assert np.isclose(result['macd']['frequency_positive'], (macd > 0).mean() * 100)
+    assert np.isclose(result['macd']['percentile'], stats.percentileofscore(macd, -0.2, kind='rank'))
+
+    # Thresholds equal to a value are strict on both sides
+    assert frequency(np.array([1.0, 2.0, 2.0, 3.0]), '>', 2.0) == 25.0
+    assert frequency(np.array([1.0, 2.0, 2.0, 3.0]), '<', 2.0) == 25.0
+
+    print("✅ compute_percentiles test passed")
+
+
+def test_rolling_percentile_rank_matches_window_scan():
+    """Rolling ranks equal a brute-force scan of each trailing window"""
+    print("\n🔍 Testing rolling percentile rank...")
+
+    rng = np.random.default_rng(2)
+    values = np.round(rng.normal(0, 3, 400))
+    values[[5, 120, 121]] = np.nan
+    window = 60
+
+    ranks = rolling_percentile_rank(values, window, min_periods=30)
+
+    for i in range(len(values)):
+        trailing = values[max(0, i - window + 1):i + 1]
+        trailing = trailing[~np.isnan(trailing)]
+        if np.isnan(values[i]) or len(trailing) < 30:
+            assert np.isnan(ranks[i]), f"Row {i} should be NaN"
+        else:
+            expected = stats.percentileofscore(trailing, values[i], kind='rank')
+            assert np.isclose(ranks[i], expected, rtol=1e-12), f"Row {i}: expected {expected}, got {ranks[i]}"
+
+    # A window longer than the series ranks against everything seen so far
+    expanding = rolling_percentile_rank(values[:50], 500, min_periods=1)
+    assert np.isclose(expanding[49], stats.percentileofscore(values[:50][~np.isnan(values[:50])], values[49], kind='rank'))
+
+    print("✅ Rolling percentile rank test passed")
+
+
+def test_rolling_percentiles_frame():
+    """calculate_rolling_percentiles returns one rank column per indicator, aligned by date"""
+    print("\n🔍 Testing rolling percentile frame...")
+
+    rng = np.random.default_rng(3)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 600)))
+    hist = pd.DataFrame({
+        'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+        'Volume': rng.integers(100_000, 1_000_000, 600).astype(float)
+    }, index=pd.bdate_range('2022-01-03', periods=600))
+
+    ranks = TechnicalAnalyzer().calculate_rolling_percentiles(hist, window=100)
+
+    assert list(ranks.columns) == list(TechnicalAnalyzer.INDICATOR_SERIES)
+    assert ranks.index.equals(hist.index)
+    assert ranks['RSI'].iloc[-1] >= 0 and ranks['RSI'].iloc[-1] <= 100
+    assert np.isnan(ranks['SMA_200'].iloc[250]), "SMA_200 needs a full window of defined values"
+
+    print("✅ Rolling percentile frame test passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("=" * 80)
+    print("Percentile Engine Test Suite")
+    print("=" * 80)
+
+    tests = [
+        ("Percentile rank", test_percentile_rank_matches_scipy),
+        ("Compute percentiles", test_compute_percentiles_matches_per_column_scan),
+        ("Rolling percentile rank", test_rolling_percentile_rank_matches_window_scan),
+        ("Rolling percentile frame", test_rolling_percentiles_frame),
+    ]
+
+    results = []
+    for name, test_func in tests:
+        try:
+            test_func()
+            results.append(True)
+        except Exception as e:
+            print(f"❌ {name} test failed: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            results.append(False)
+
+    print("\n" + "=" * 80)
+    passed = sum(results)
+    print(f"Passed: {passed}/{len(results)}")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
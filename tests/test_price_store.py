@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Test suite for DataFetcher price history loading (bar store and batch downloads)
+
+Tests:
+- Cold store is seeded with a single full download
+- Warm store only asks Yahoo for bars after the last stored date
+- A split in the delta re-downloads the whole stored span
+- Stored fundamentals survive bar refreshes
+- Batch downloads record per-ticker failures
+- Bars without volume are stored with NULL volume
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.data_fetcher import DataFetcher
+from src.database import TickerDatabase
+from src.market_data import MarketDataProvider
+from tests.helpers import make_yf_history
+
+
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def make_provider(history=None, info=None):
+    """Fake MarketDataProvider returning canned responses"""
+    provider = MagicMock(spec=MarketDataProvider)
+    provider.history.return_value = history
+    provider.info.return_value = info or {}
+    return provider
+
+
+def make_store():
+    tmp_dir = tempfile.mkdtemp()
+    return TickerDatabase(db_path=os.path.join(tmp_dir, 'ticker_data.db'))
+
+
+def test_cold_store_full_download():
+    """First fetch downloads the full period and seeds the store"""
+    print("\n🔍 Testing cold bar store...")
+
+    store = make_store()
+    start = datetime.now().date() - timedelta(days=364)
+    full = make_yf_history(start, 365)
+
+    provider = make_provider(history=full, info={'longName': 'Test Co'})
+    data = DataFetcher(store=store, provider=provider).fetch_ticker_data('TEST.SI')
+
+    assert data is not None, "Should return data"
+    provider.history.assert_called_once_with('TEST.SI', period='1y')
+    assert len(store.get_price_history('TEST.SI')) == 365, "All bars should be stored"
+    assert data['history'].index.tz is None, "History should use the store's naive daily index"
+    assert list(data['history'].columns) == ['Open', 'High', 'Low', 'Close', 'Volume']
+
+    print("✅ Cold bar store test passed")
+
+
+def test_warm_store_delta_download():
+    """Later fetches only request bars from the last stored date onwards"""
+    print("\n🔍 Testing warm bar store...")
+
+    store = make_store()
+    start = datetime.now().date() - timedelta(days=364)
+    full = make_yf_history(start, 365)
+    store.upsert_price_history('TEST.SI', DataFetcher(provider=make_provider())._normalize_bars(full.iloc[:-1]))
+
+    last_stored = full.index[-2].date()
+    delta = full.iloc[-2:].copy()
+    delta.loc[delta.index[-1], 'Close'] = 999.0
+
+    provider = make_provider(history=delta)
+    data = DataFetcher(store=store, provider=provider).fetch_ticker_data('TEST.SI')
+
+    provider.history.assert_called_once_with('TEST.SI', start=last_stored.strftime('%Y-%m-%d'))
+    assert data['close'] == 999.0, "Latest close should come from the delta bar"
+    assert len(store.get_price_history('TEST.SI')) == 365, "Delta should append exactly one bar"
+
+    print("✅ Warm bar store test passed")
+
+
+def test_split_in_delta_reseeds_store():
+    """A split after the last stored bar re-downloads and re-adjusts every stored bar"""
+    print("\n🔍 Testing split in delta...")
+
+    store = make_store()
+    start = datetime.now().date() - timedelta(days=364)
+    unadjusted = make_yf_history(start, 365)
+    store.upsert_price_history('TEST.SI', DataFetcher(provider=make_provider())._normalize_bars(unadjusted.iloc[:-1]))
+
+    # 2:1 split on the newest bar: Yahoo now reports every earlier bar halved
+    adjusted = unadjusted.copy()
+    adjusted[['Open', 'High', 'Low', 'Close']] /= 2
+    adjusted.loc[adjusted.index[-1], 'Stock Splits'] = 2.0
+
+    period_start = datetime.now().date() - timedelta(days=365)
+    last_stored = unadjusted.index[-2].date()
+
+    def fake_history(ticker, period=None, start=None):
+        return adjusted[adjusted.index.date >= pd.Timestamp(start).date()]
+
+    provider = make_provider()
+    provider.history.side_effect = fake_history
+    data = DataFetcher(store=store, provider=provider).fetch_ticker_data('TEST.SI')
+
+    assert [c.kwargs['start'] for c in provider.history.call_args_list] == [
+        last_stored.strftime('%Y-%m-%d'), period_start.strftime('%Y-%m-%d')
+    ], f"Unexpected requests: {provider.history.call_args_list}"
+    stored = store.get_price_history('TEST.SI')
+    assert len(stored) == 365
+    assert np.allclose(stored['Close'].to_numpy(), adjusted['Close'].to_numpy()), "Every stored bar should be re-adjusted"
+    assert np.allclose(data['history']['Close'].to_numpy(), adjusted['Close'].to_numpy())
+
+    # A dividend already stored on the last bar does not trigger another re-download
+    provider.history.reset_mock()
+    provider.history.side_effect = fake_history
+    DataFetcher(store=store, provider=provider).fetch_ticker_data('TEST.SI')
+    assert provider.history.call_count == 1
+
+    print("✅ Split in delta test passed")
+
+
+def test_refresh_keeps_fundamentals():
+    """Refreshing a bar does not wipe fundamentals saved by insert_ticker_data"""
+    print("\n🔍 Testing fundamentals survive bar refresh...")
+
+    store = make_store()
+    bars = DataFetcher(provider=make_provider())._normalize_bars(make_yf_history('2024-01-01', 3))
+    store.upsert_price_history('TEST.SI', bars)
+    store.insert_ticker_data('TEST19', 'TEST.SI', '2024-01-03', {
+        'open': 1, 'high': 2, 'low': 0.5, 'close': 1.5, 'volume': 10, 'pe_ratio': 12.5
+    })
+    store.upsert_price_history('TEST.SI', bars)
+
+    rows = store.get_latest_data('TEST.SI', days=1)
+    assert rows[0][1] == 'TEST19', "Symbol should be preserved"
+    assert rows[0][10] == 12.5, "P/E ratio should be preserved"
+
+    print("✅ Fundamentals preservation test passed")
+
+
+def test_fetch_many_records_failures():
+    """Batch download splits a grouped panel and records per-ticker failures"""
+    print("\n🔍 Testing batch download...")
+
+    good = make_yf_history('2024-01-01', 5)[['Open', 'High', 'Low', 'Close', 'Volume']]
+    empty = good * np.nan
+    panel = pd.concat({'AAA.SI': good, 'BBB.SI': empty}, axis=1)
+
+    def fake_download(batch, **kwargs):
+        if 'CCC.SI' in batch:
+            raise RuntimeError("rate limited")
+        return panel
+
+    provider = make_provider()
+    provider.download.side_effect = fake_download
+    fetcher = DataFetcher(provider=provider)
+    frames, failed = fetcher.fetch_many(['AAA.SI', 'BBB.SI', 'CCC.SI'], batch_size=2)
+
+    assert provider.download.call_count == 2, "Should issue one request per batch"
+    assert list(frames) == ['AAA.SI'], f"Only AAA.SI should succeed, got {list(frames)}"
+    assert len(frames['AAA.SI']) == 5
+    assert set(failed) == {'BBB.SI', 'CCC.SI'}, f"Unexpected failures: {failed}"
+    assert 'rate limited' in failed['CCC.SI']
+
+    print("✅ Batch download test passed")
+
+
+def test_nan_volume_bar_is_stored():
+    """A bar without volume (Yahoo's live intraday bar) is stored with NULL volume"""
+    print("\n🔍 Testing NaN volume bar...")
+
+    store = make_store()
+    start = datetime.now().date() - timedelta(days=364)
+    full = make_yf_history(start, 365)
+    full.iloc[-1, full.columns.get_loc('Volume')] = np.nan
+
+    data = DataFetcher(store=store, provider=make_provider(history=full)).fetch_ticker_data('TEST.SI')
+    assert data is not None, "A NaN volume must not fail the ticker"
+    stored = store.get_price_history('TEST.SI')
+    assert len(stored) == 365
+    assert np.isnan(stored['Volume'].iloc[-1]) and stored['Volume'].iloc[-2] == 1_000_000
+
+    # In a batch, the ticker is stored too and the others are unaffected
+    panel = pd.concat({'AAA.SI': full[OHLCV], 'BBB.SI': make_yf_history(start, 365)[OHLCV]}, axis=1)
+    provider = make_provider()
+    provider.download.return_value = panel
+    frames, failed = DataFetcher(store=store, provider=provider).fetch_many(['AAA.SI', 'BBB.SI'])
+    assert set(frames) == {'AAA.SI', 'BBB.SI'} and failed == {}
+    assert len(store.get_price_history('AAA.SI')) == 365
+
+    print("✅ NaN volume bar test passed")
+
+
+def test_prefetched_history_skips_download():
+    """fetch_ticker_data serves prefetched histories from memory until they are cleared"""
+    print("\n🔍 Testing prefetched history...")
+
+    provider = make_provider()
+    fetcher = DataFetcher(provider=provider)
+    bars = fetcher._normalize_bars(make_yf_history('2024-01-01', 5))
+    fetcher.prefetched_history[('AAA.SI', '1y')] = bars
+
+    data = fetcher.fetch_ticker_data('AAA.SI')
+
+    provider.history.assert_not_called()
+    assert data['close'] == bars['Close'].iloc[-1]
+
+    # After the batch the provider is asked again
+    fetcher.clear_prefetched()
+    provider.history.return_value = make_yf_history('2024-01-01', 6)
+    fetcher.fetch_ticker_data('AAA.SI')
+    provider.history.assert_called_once()
+
+    print("✅ Prefetched history test passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("=" * 80)
+    print("Price Store Test Suite")
+    print("=" * 80)
+
+    tests = [
+        ("Cold store full download", test_cold_store_full_download),
+        ("Warm store delta download", test_warm_store_delta_download),
+        ("Split in delta", test_split_in_delta_reseeds_store),
+        ("Refresh keeps fundamentals", test_refresh_keeps_fundamentals),
+        ("Batch download failures", test_fetch_many_records_failures),
+        ("NaN volume bar", test_nan_volume_bar_is_stored),
+        ("Prefetched history", test_prefetched_history_skips_download),
+    ]
+
+    results = []
+    for name, test_func in tests:
+        try:
+            test_func()
+            results.append(True)
+        except Exception as e:
+            print(f"❌ {name} test failed: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            results.append(False)
+
+    print("\n" + "=" * 80)
+    passed = sum(results)
+    print(f"Passed: {passed}/{len(results)}")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
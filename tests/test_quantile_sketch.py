@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test suite for persisted quantile sketches
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.database import TickerDatabase
+from src.quantile_sketch import QuantileSketch, lookback_coverage
+from src.technical_analysis import TechnicalAnalyzer
+from tests.helpers import make_history
+
+HISTORY = dict(periods=900, seed=11, start='2022-01-03')
+
+
+def test_sketch_accuracy_and_merge():
+    """Merged sketches approximate exact ranks; moments are exact"""
+    print("\n🔍 Testing sketch accuracy...")
+
+    rng = np.random.default_rng(0)
+    values = rng.normal(50, 15, 5000)
+    parts = np.array_split(values, 12)
+
+    merged = QuantileSketch()
+    for part in parts:
+        merged.merge(QuantileSketch.from_dict(QuantileSketch().add(part).to_dict()))
+
+    assert merged.count == 5000
+    assert len(merged.means) < 500, f"Sketch should stay compact, has {len(merged.means)} centroids"
+    assert np.isclose(merged.mean(), values.mean()) and np.isclose(merged.std(), values.std(ddof=1))
+    assert merged.min == values.min() and merged.max == values.max()
+
+    for score in [10, 35, 50, 70, 95]:
+        exact = stats.percentileofscore(values, score, kind='rank')
+        assert abs(merged.percentile_rank(score) - exact) < 1.0, f"Rank of {score} too far from {exact}"
+    assert abs(merged.frequency('>', 70) - (values > 70).mean() * 100) < 1.0
+
+    print("✅ Sketch accuracy test passed")
+
+
+def test_incremental_sketch_percentiles():
+    """Incrementally updated monthly sketches answer percentiles close to the exact ones"""
+    print("\n🔍 Testing persisted sketch percentiles...")
+
+    analyzer = TechnicalAnalyzer()
+    store = TickerDatabase(db_path=os.path.join(tempfile.mkdtemp(), 'ticker_data.db'))
+    frame = analyzer.compute_indicator_frame(make_history(**HISTORY))
+
+    analyzer.update_percentile_sketches(store, 'TEST.SI', frame.iloc[:-25])
+    written = analyzer.update_percentile_sketches(store, 'TEST.SI', frame.iloc[-260:])
+    assert 0 < written <= 7 * 3, f"Only the latest months should be rewritten, wrote {written}"
+
+    current = analyzer.calculate_all_indicators(make_history(**HISTORY))
+    as_of = frame.index[-1]
+    sketched = analyzer.calculate_sketch_percentiles(store, 'TEST.SI', current, lookback='3y', as_of=as_of)
+    exact = analyzer.calculate_percentiles(frame, current)
+
+    # Cumulative-VWAP keys depend on the frame's first bar and are not sketched
+    assert not set(sketched) & set(TechnicalAnalyzer.UNSKETCHED_PERCENTILES)
+    assert list(sketched) == [key for key in exact if key not in TechnicalAnalyzer.UNSKETCHED_PERCENTILES]
+    for key in sketched:
+        assert list(sketched[key]) == list(exact[key]), f"{key} layout differs"
+        assert abs(sketched[key]['percentile'] - exact[key]['percentile']) < 2.0, key
+
+    # Moments are exact over the months in the lookback window, on the rows calculate_percentiles ranks
+    valid = frame.dropna()
+    window = valid[valid.index >= (as_of - pd.DateOffset(months=35)).replace(day=1)]
+    assert np.isclose(sketched['rsi']['mean'], window['RSI'].mean())
+    assert sketched['rsi']['max'] == window['RSI'].max()
+
+    print("✅ Persisted sketch percentiles test passed")
+
+
+def test_tz_aware_partial_month_append():
+    """Appending to a stored month works when the indicator index is tz-aware"""
+    print("\n🔍 Testing tz-aware sketch append...")
+
+    analyzer = TechnicalAnalyzer()
+    store = TickerDatabase(db_path=os.path.join(tempfile.mkdtemp(), 'ticker_data.db'))
+    frame = analyzer.compute_indicator_frame(make_history(**HISTORY)).tz_localize('Asia/Singapore')
+
+    analyzer.update_percentile_sketches(store, 'TEST.SI', frame.iloc[:-5])
+    # Starts mid-month, so the stored month is appended to rather than rebuilt
+    assert analyzer.update_percentile_sketches(store, 'TEST.SI', frame.iloc[-8:]) > 0
+
+    month = frame.index[-1].strftime('%Y-%m')
+    (_, data, last_date), = store.get_indicator_sketches('TEST.SI', 'rsi', start_month=month, end_month=month)
+    month_rsi = frame['RSI'][frame.index.strftime('%Y-%m') == month].dropna()
+    assert QuantileSketch.from_dict(data).count == len(month_rsi)
+    assert last_date == frame.index[-1].strftime('%Y-%m-%d')
+
+    print("✅ Tz-aware sketch append test passed")
+
+
+def test_seed_from_stored_bars_and_coverage():
+    """Sketches seeded from the stored bars report how much of a lookback they cover"""
+    print("\n🔍 Testing sketch seeding and lookback coverage...")
+
+    analyzer = TechnicalAnalyzer()
+    store = TickerDatabase(db_path=os.path.join(tempfile.mkdtemp(), 'ticker_data.db'))
+    store.upsert_price_history('TEST.SI', make_history(**dict(HISTORY, periods=1200)))
+    frame = analyzer.compute_indicator_frame(store.get_price_history('TEST.SI'))
+
+    # One read of the stored state and one write transaction, however many months change
+    with patch('src.database.sqlite3.connect', wraps=sqlite3.connect) as connect:
+        written = analyzer.update_percentile_sketches(store, 'TEST.SI', frame)
+    assert written > 7 * 36, f"Seeding should write every stored month, wrote {written}"
+    assert connect.call_count == 2, f"Fold opened {connect.call_count} connections"
+
+    as_of = frame.index[-1]
+    three_years = lookback_coverage(store, 'TEST.SI', '3y', as_of=as_of)
+    assert three_years['complete'] and three_years['months_covered'] == 36
+    five_years = lookback_coverage(store, 'TEST.SI', '5y', as_of=as_of)
+    first_month = frame.dropna().index[0].strftime('%Y-%m')
+    assert not five_years['complete'] and five_years['first_month'] == first_month
+    assert five_years['months_covered'] < 60 and five_years['last_month'] == as_of.strftime('%Y-%m')
+
+    empty = lookback_coverage(store, 'OTHER.SI', '1y', as_of=as_of)
+    assert empty['months_covered'] == 0 and empty['first_month'] is None and not empty['complete']
+
+    print("✅ Sketch seeding and coverage test passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("=" * 80)
+    print("Quantile Sketch Test Suite")
+    print("=" * 80)
+
+    tests = [
+        ("Sketch accuracy and merge", test_sketch_accuracy_and_merge),
+        ("Incremental sketch percentiles", test_incremental_sketch_percentiles),
+        ("Tz-aware partial month append", test_tz_aware_partial_month_append),
+        ("Seed from stored bars and coverage", test_seed_from_stored_bars_and_coverage),
+    ]
+
+    results = []
+    for name, test_func in tests:
+        try:
+            test_func()
+            results.append(True)
+        except Exception as e:
+            print(f"❌ {name} test failed: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            results.append(False)
+
+    print("\n" + "=" * 80)
+    passed = sum(results)
+    print(f"Passed: {passed}/{len(results)}")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
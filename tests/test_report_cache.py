@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Test suite for serving stored reports (check_cache node, pre-fetch lookup, API fresh flag)
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.api_handler import api_handler
+from src.database import TickerDatabase
+from tests.helpers import make_agent
+
+BAR_DATE = date(2026, 10, 15)
+BAR_CLOSE = 35.25
+
+
+def _agent():
+    agent = make_agent(db=TickerDatabase(os.path.join(tempfile.mkdtemp(), "ticker_data.db")),
+                       ticker_map={"DBS19": "D05.SI"})
+    agent.db.save_report("D05.SI", BAR_DATE, {'report_text': "stored report", 'close': BAR_CLOSE})
+    return agent
+
+
+def _state(bar_date=BAR_DATE, close=BAR_CLOSE, news=None, use_report_cache=True):
+    return {"ticker": "DBS19", "ticker_data": {"date": bar_date, "close": close}, "news": news or [],
+            "use_report_cache": use_report_cache, "error": ""}
+
+
+def test_serves_report_for_latest_bar():
+    """A report saved for the latest bar's date is returned"""
+    print("\n🔍 Testing cache hit...")
+
+    state = _agent().check_cache(_state())
+
+    assert state["cache_hit"] is True
+    assert state["report"] == "stored report"
+
+    print("✅ Cache hit test passed")
+
+
+def test_newer_bar_invalidates():
+    """A new trading day has no stored report yet"""
+    print("\n🔍 Testing newer bar invalidation...")
+
+    state = _agent().check_cache(_state(bar_date=BAR_DATE + timedelta(days=1)))
+    assert state["cache_hit"] is False
+    assert "report" not in state
+
+    print("✅ Newer bar invalidation test passed")
+
+
+def test_revised_bar_invalidates():
+    """A revised intraday bar (same date, new close) forces a new report"""
+    print("\n🔍 Testing revised bar invalidation...")
+
+    agent = _agent()
+    assert agent.check_cache(_state(close=35.5))["cache_hit"] is False
+    assert agent.check_cache(_state(close=None))["cache_hit"] is True
+
+    # Reports saved before the close was stored are never reused for a known close
+    agent.db.save_report("D05.SI", BAR_DATE, {'report_text': "old report"})
+    assert agent.check_cache(_state())["cache_hit"] is False
+
+    print("✅ Revised bar invalidation test passed")
+
+
+def test_reports_close_migration():
+    """Databases created before the close column get it on open"""
+    print("\n🔍 Testing reports table migration...")
+
+    db_path = os.path.join(tempfile.mkdtemp(), "ticker_data.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE reports (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, ticker TEXT NOT NULL, date DATE NOT NULL,
+            report_text TEXT, technical_summary TEXT, fundamental_summary TEXT, sector_analysis TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, UNIQUE(ticker, date)
+        )
+    """)
+    conn.commit()
+    conn.close()
+
+    db = TickerDatabase(db_path)
+    db.save_report("D05.SI", BAR_DATE, {'report_text': "report", 'close': BAR_CLOSE})
+    assert db.get_cached_report("D05.SI", BAR_DATE, close=BAR_CLOSE) == "report"
+
+    print("✅ Reports table migration test passed")
+
+
+def test_newer_news_invalidates():
+    """High-impact news published after the report forces a new one"""
+    print("\n🔍 Testing news invalidation...")
+
+    agent = _agent()
+    later = datetime.now(timezone.utc) + timedelta(minutes=5)
+    earlier = datetime.now(timezone.utc) - timedelta(days=2)
+
+    assert agent.check_cache(_state(news=[{'timestamp': later}]))["cache_hit"] is False
+    assert agent.check_cache(_state(news=[{'timestamp': earlier}]))["cache_hit"] is True
+    # Naive timestamps are local time
+    naive_earlier = datetime.now() - timedelta(days=2)
+    assert agent.check_cache(_state(news=[{'timestamp': naive_earlier}]))["cache_hit"] is True
+
+    print("✅ News invalidation test passed")
+
+
+def test_cache_opt_in():
+    """Runs that need every artifact (PDF, batch) never get a stored report"""
+    print("\n🔍 Testing cache opt-in...")
+
+    agent = _agent()
+    assert agent.check_cache(_state(use_report_cache=False))["cache_hit"] is False
+    with patch('src.agent.REPORT_CACHE_ENABLED', False):
+        assert agent.check_cache(_state())["cache_hit"] is False
+
+    state = agent.initial_state("DBS19")
+    assert state["use_report_cache"] is False and state["fresh"] is False
+
+    print("✅ Cache opt-in test passed")
+
+
+def test_analyze_ticker_fresh():
+    """analyze_ticker uses the stored report unless fresh=True"""
+    print("\n🔍 Testing analyze_ticker fresh flag...")
+
+    agent = _agent()
+    agent.graph = MagicMock()
+    agent.graph.invoke.return_value = {"report": "report", "node_timings": {}}
+
+    agent.analyze_ticker("DBS19")
+    state = agent.graph.invoke.call_args.args[0]
+    assert state["use_report_cache"] is True and state["fresh"] is False
+
+    agent.analyze_ticker("DBS19", fresh=True)
+    state = agent.graph.invoke.call_args.args[0]
+    assert state["use_report_cache"] is False and state["fresh"] is True
+
+    print("✅ analyze_ticker fresh flag test passed")
+
+
+def _store_bar(agent, close=BAR_CLOSE):
+    bar = pd.DataFrame({'Open': [close], 'High': [close], 'Low': [close], 'Close': [close], 'Volume': [1e6]},
+                       index=pd.DatetimeIndex([pd.Timestamp(BAR_DATE)]))
+    agent.db.upsert_price_history("D05.SI", bar)
+
+
+def test_stored_report_skips_graph():
+    """Text-only requests answer from the latest stored bar without fetching"""
+    print("\n🔍 Testing pre-fetch stored report...")
+
+    agent = _agent()
+    agent.graph = MagicMock()
+    agent.graph.invoke.return_value = {"report": "new report", "node_timings": {}}
+
+    # Nothing stored for the ticker yet
+    assert agent.stored_report("DBS19") is None
+
+    _store_bar(agent)
+    assert agent.analyze_ticker("DBS19") == "stored report"
+    assert asyncio.run(agent.aanalyze_ticker("DBS19")) == "stored report"
+    agent.graph.invoke.assert_not_called()
+
+    # fresh=True always runs the graph
+    assert agent.analyze_ticker("DBS19", fresh=True) == "new report"
+
+    print("✅ Pre-fetch stored report test passed")
+
+
+def test_stored_report_invalidation():
+    """A revised stored close or an old report falls through to the graph"""
+    print("\n🔍 Testing pre-fetch invalidation...")
+
+    agent = _agent()
+    _store_bar(agent, close=35.5)
+    assert agent.stored_report("DBS19") is None
+
+    _store_bar(agent)
+    assert agent.stored_report("DBS19") == "stored report"
+    with patch('src.agent.REPORT_CACHE_MAX_AGE', 0):
+        assert agent.stored_report("DBS19") is None
+
+    # Reports older than REPORT_CACHE_MAX_AGE may predate newer bars or news
+    conn = sqlite3.connect(agent.db.db_path)
+    conn.execute("UPDATE reports SET created_at = datetime('now', '-1 day')")
+    conn.commit()
+    conn.close()
+    assert agent.stored_report("DBS19") is None
+
+    print("✅ Pre-fetch invalidation test passed")
+
+
+@patch('src.api_handler.get_agent')
+def test_api_fresh_parameter(mock_get_agent):
+    """?fresh=true skips the stored report; responses say whether they were cached"""
+    print("\n🔍 Testing API fresh parameter...")
+
+    mock_agent = MagicMock()
+    mock_agent.graph.invoke.return_value = {
+        "ticker": "DBS19", "ticker_data": {}, "report": "stored report", "cache_hit": True, "error": ""
+    }
+    mock_get_agent.return_value = mock_agent
+
+    result = api_handler({'queryStringParameters': {'ticker': 'DBS19'}}, None)
+    options = mock_agent.initial_state.call_args.kwargs
+    assert options["use_report_cache"] is True
+    assert json.loads(result['body'])['cached'] is True
+
+    api_handler({'queryStringParameters': {'ticker': 'DBS19', 'fresh': 'true'}}, None)
+    options = mock_agent.initial_state.call_args.kwargs
+    assert options["use_report_cache"] is False and options["fresh"] is True
+
+    print("✅ API fresh parameter test passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("=" * 60)
+    print("Running Report Cache Tests")
+    print("=" * 60)
+
+    test_serves_report_for_latest_bar()
+    test_newer_bar_invalidates()
+    test_revised_bar_invalidates()
+    test_reports_close_migration()
+    test_newer_news_invalidates()
+    test_cache_opt_in()
+    test_analyze_ticker_fresh()
+    test_stored_report_skips_graph()
+    test_stored_report_invalidation()
+    test_api_fresh_parameter()
+
+    print("\n" + "=" * 60)
+    print("✅ All report cache tests passed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Test suite for the generate_report modes (two_pass, rule, classify, concurrent)
+
+The LLMs are mocks, so no OpenAI key is needed.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.agent import summarize_report_metrics
+from tests.helpers import make_agent
+
+BULLISH = {'current_price': 110, 'sma_20': 105, 'sma_50': 100, 'macd': 1.5, 'macd_signal': 1.0, 'rsi': 55}
+BEARISH = {'current_price': 90, 'sma_20': 95, 'sma_50': 100, 'macd': -1.5, 'macd_signal': -1.0, 'rsi': 45}
+ALIGNED_STRATEGY = {
+    'buy_only': {'total_return_pct': 12.0, 'sharpe_ratio': 1.1, 'win_rate': 60},
+    'sell_only': {'total_return_pct': -8.0, 'sharpe_ratio': -0.4, 'win_rate': 30}
+}
+
+
+def _response(text, input_tokens=100, output_tokens=50):
+    response = MagicMock(content=text)
+    response.usage_metadata = {'input_tokens': input_tokens, 'output_tokens': output_tokens,
+                               'total_tokens': input_tokens + output_tokens}
+    return response
+
+
+def _agent(mode, llm=None):
+    return make_agent(
+        report_mode=mode,
+        llm=llm or MagicMock(),
+        classifier_llm=None,
+        _report_prompt=lambda state, strategy_performance=None: (
+            "with strategy" if strategy_performance else "plain"),
+        _finish_report=lambda state, report: {**state, "report": report},
+    )
+
+
+def _state(indicators=BULLISH, strategy=ALIGNED_STRATEGY):
+    return {"ticker": "TEST", "ticker_data": {}, "indicators": indicators, "strategy_performance": strategy}
+
+
+def _prompts(llm):
+    return [call.args[0][0].content for call in llm.invoke.call_args_list]
+
+
+def test_two_pass_regenerates_when_aligned():
+    """two_pass keeps the original behaviour: draft, then regenerate with strategy data"""
+    print("\n🔍 Testing two_pass mode...")
+
+    agent = _agent("two_pass")
+    agent.llm.invoke.side_effect = [_response("แนะนำ BUY"), _response("BUY with strategy")]
+
+    state = agent.generate_report(_state())
+
+    assert state["report"] == "BUY with strategy"
+    assert _prompts(agent.llm) == ["plain", "with strategy"]
+    metrics = state["report_metrics"]
+    assert metrics['mode'] == "two_pass" and metrics['llm_calls'] == 2
+    assert metrics['input_tokens'] == 200 and metrics['total_tokens'] == 300
+
+    print("✅ two_pass test passed")
+
+
+def test_rule_mode_single_call():
+    """rule mode decides from the indicators and calls the main LLM once"""
+    print("\n🔍 Testing rule mode...")
+
+    agent = _agent("rule")
+    agent.llm.invoke.return_value = _response("report")
+    state = agent.generate_report(_state(BULLISH))
+    assert _prompts(agent.llm) == ["with strategy"]
+    assert state["report_metrics"]['llm_calls'] == 1
+
+    # Bearish indicators give SELL, which the sell_only results do not support
+    agent = _agent("rule")
+    agent.llm.invoke.return_value = _response("report")
+    agent.generate_report(_state(BEARISH))
+    assert _prompts(agent.llm) == ["plain"]
+
+    print("✅ rule mode test passed")
+
+
+def test_rule_recommendation():
+    """Trend, MACD and RSI votes map to BUY/SELL/HOLD"""
+    print("\n🔍 Testing rule recommendation...")
+
+    agent = _agent("rule")
+    assert agent._rule_recommendation(BULLISH) == 'BUY'
+    assert agent._rule_recommendation(BEARISH) == 'SELL'
+    assert agent._rule_recommendation({**BULLISH, 'macd': 0.5, 'rsi': 75}) == 'HOLD'
+    assert agent._rule_recommendation({}) == 'HOLD'
+
+    print("✅ Rule recommendation test passed")
+
+
+def test_classify_mode_uses_small_model():
+    """classify mode asks the classifier for one word, then generates once"""
+    print("\n🔍 Testing classify mode...")
+
+    agent = _agent("classify")
+    agent.prepare_context = MagicMock(return_value="context")
+    agent.classifier_llm = MagicMock()
+    agent.classifier_llm.invoke.return_value = _response("BUY", input_tokens=80, output_tokens=1)
+    agent.llm.invoke.return_value = _response("report")
+
+    state = agent.generate_report(_state())
+
+    assert _prompts(agent.llm) == ["with strategy"]
+    assert agent.classifier_llm.invoke.call_count == 1
+    metrics = state["report_metrics"]
+    assert metrics['llm_calls'] == 2
+    assert metrics['output_tokens'] == 51
+
+    assert agent._parse_recommendation("  sell.") == 'SELL'
+    assert agent._parse_recommendation("unsure") == 'HOLD'
+
+    print("✅ classify mode test passed")
+
+
+def test_classifier_llm_built_with_limit():
+    """The classifier model is built on first use, wrapped by classifier_llm_limit"""
+    print("\n🔍 Testing classifier construction...")
+
+    agent = make_agent(classifier_llm=None, llm_cache=None,
+                       classifier_llm_limit=lambda llm: ("limited", llm))
+    with patch('langchain_openai.ChatOpenAI') as chat_openai:
+        classifier = agent._get_classifier_llm()
+        assert agent._get_classifier_llm() is classifier
+    assert classifier == ("limited", chat_openai.return_value)
+    chat_openai.assert_called_once()
+
+    print("✅ Classifier construction test passed")
+
+
+def test_concurrent_mode_overlaps_calls():
+    """concurrent mode runs both generations at once and keeps the aligned one"""
+    print("\n🔍 Testing concurrent mode...")
+
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def invoke(messages):
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.1)
+        with lock:
+            active.pop()
+        text = "BUY with strategy" if messages[0].content == "with strategy" else "แนะนำ BUY"
+        return _response(text)
+
+    agent = _agent("concurrent")
+    agent.llm.invoke.side_effect = invoke
+    state = agent.generate_report(_state())
+
+    assert max(peak) == 2
+    assert state["report"] == "BUY with strategy"
+    assert state["report_metrics"]['llm_calls'] == 2
+    assert state["report_metrics"]['latency_seconds'] < 0.19
+
+    # A HOLD draft keeps the plain report
+    agent = _agent("concurrent")
+    agent.llm.invoke.side_effect = lambda messages: _response(
+        "with strategy text" if messages[0].content == "with strategy" else "HOLD")
+    assert agent.generate_report(_state())["report"] == "HOLD"
+
+    print("✅ concurrent mode test passed")
+
+
+def test_unalignable_strategy_single_call():
+    """Every mode makes one call when strategy data could never be included"""
+    print("\n🔍 Testing single call without usable strategy data...")
+
+    for mode in ["two_pass", "rule", "classify", "concurrent"]:
+        agent = _agent(mode)
+        agent.classifier_llm = MagicMock()
+        agent.llm.invoke.return_value = _response("BUY")
+        state = agent.generate_report(_state(strategy={}))
+        assert _prompts(agent.llm) == ["plain"], mode
+        assert state["report_metrics"]['llm_calls'] == 1
+        agent.classifier_llm.invoke.assert_not_called()
+
+    print("✅ Single call test passed")
+
+
+def test_async_modes():
+    """agenerate_report supports the same modes with ainvoke"""
+    print("\n🔍 Testing async report modes...")
+
+    async def ainvoke(messages):
+        await asyncio.sleep(0.1)
+        return _response("BUY with strategy" if messages[0].content == "with strategy" else "แนะนำ BUY")
+
+    agent = _agent("concurrent")
+    agent.llm.ainvoke = AsyncMock(side_effect=ainvoke)
+    state = asyncio.run(agent.agenerate_report(_state()))
+    assert state["report"] == "BUY with strategy"
+    assert state["report_metrics"]['latency_seconds'] < 0.19
+    agent.llm.invoke.assert_not_called()
+
+    agent = _agent("rule")
+    agent.llm.ainvoke = AsyncMock(side_effect=ainvoke)
+    state = asyncio.run(agent.agenerate_report(_state()))
+    assert agent.llm.ainvoke.await_count == 1
+    assert state["report_metrics"]['mode'] == "rule"
+
+    print("✅ Async report modes test passed")
+
+
+def test_summarize_report_metrics():
+    """Per-mode averages for picking a default"""
+    print("\n🔍 Testing report metrics summary...")
+
+    metrics = [
+        {'mode': 'two_pass', 'llm_calls': 2, 'latency_seconds': 4.0, 'input_tokens': 200,
+         'output_tokens': 100, 'total_tokens': 300},
+        {'mode': 'two_pass', 'llm_calls': 1, 'latency_seconds': 2.0, 'input_tokens': 100,
+         'output_tokens': 50, 'total_tokens': 150},
+        {'mode': 'rule', 'llm_calls': 1, 'latency_seconds': 2.0, 'input_tokens': 120,
+         'output_tokens': 50, 'total_tokens': 170},
+    ]
+    summary = summarize_report_metrics(metrics)
+
+    assert summary['two_pass']['reports'] == 2
+    assert summary['two_pass']['mean_latency_seconds'] == 3.0
+    assert summary['two_pass']['mean_llm_calls'] == 1.5
+    assert summary['rule']['mean_total_tokens'] == 170
+
+    print("✅ Report metrics summary test passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("=" * 60)
+    print("Running Report Mode Tests")
+    print("=" * 60)
+
+    test_two_pass_regenerates_when_aligned()
+    test_rule_mode_single_call()
+    test_rule_recommendation()
+    test_classify_mode_uses_small_model()
+    test_classifier_llm_built_with_limit()
+    test_concurrent_mode_overlaps_calls()
+    test_unalignable_strategy_single_call()
+    test_async_modes()
+    test_summarize_report_metrics()
+
+    print("\n" + "=" * 60)
+    print("✅ All report mode tests passed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    run_all_tests()
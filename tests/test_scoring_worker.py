@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Test suite for background narrative scoring (SCORING_MODE=background)
+
+Scorers are replaced with stubs that sleep and return fixed scores, so the
+tests check what runs on the request path, what is stored and how callers
+get the scores, without computing real scores.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.agent import TickerAnalysisAgent
+from src.api_handler import _analysis_response, _with_scores
+from src.completeness_scorer import CompletenessScore
+from src.database import TickerDatabase
+from src.faithfulness_scorer import FaithfulnessScore
+from src.reasoning_quality_scorer import ReasoningQualityScore
+from src.scoring_worker import ScoringWorker
+
+SCORE_SECONDS = 0.3
+
+
+def _stub_agent(db_path, scoring_mode):
+    """Agent with a temp database and scorers that take SCORE_SECONDS in total"""
+    agent = TickerAnalysisAgent()
+    agent.scoring_mode = scoring_mode
+    agent.db = TickerDatabase(db_path)
+    agent.ticker_map = {'DBS19': 'D05.SI'}
+    agent.news_fetcher = MagicMock()
+    agent.technical_analyzer = MagicMock()
+    agent.technical_analyzer.analyze_trend.return_value = "uptrend"
+    for scorer in ('faithfulness_scorer', 'completeness_scorer', 'reasoning_quality_scorer'):
+        setattr(agent, scorer, MagicMock(**{'format_score_report.return_value': scorer}))
+
+    def slow(score):
+        def score_narrative(*args, **kwargs):
+            time.sleep(SCORE_SECONDS / 3)
+            return score
+        return score_narrative
+
+    agent._score_narrative_faithfulness = slow(FaithfulnessScore(91.0, {'numbers': 91.0}, [], ['rsi']))
+    agent._score_narrative_completeness = slow(CompletenessScore(80.0, {'risk': 80.0}, [], ['risk']))
+    agent._score_reasoning_quality = slow(ReasoningQualityScore(70.0, {'causal': 70.0}, ['vague'], []))
+    return agent
+
+
+def _report_state():
+    return {
+        "ticker": "DBS19",
+        "ticker_data": {"date": "2025-01-02", "pe_ratio": 10.0, "sector": "Financial"},
+        "indicators": {"current_price": 35.0},
+        "percentiles": {},
+        "news": [],
+        "faithfulness_score": {},
+        "completeness_score": {},
+        "reasoning_quality_score": {},
+        "scores_pending": False,
+        "error": ""
+    }
+
+
+def test_worker_wait_and_failures():
+    """wait returns the pending job's result; failures and timeouts return None"""
+    print("\n🔍 Testing scoring worker...")
+
+    worker = ScoringWorker()
+    release = threading.Event()
+    worker.submit('slow', lambda: release.wait() and 'done')
+    assert worker.pending('slow') is not None
+    assert worker.wait('slow', timeout=0.05) is None
+    release.set()
+    assert worker.wait('slow', timeout=5) == 'done'
+
+    def fail():
+        raise RuntimeError("scorer crashed")
+
+    worker.submit('broken', fail).exception(timeout=5)
+    assert worker.wait('broken') is None
+    assert worker.wait('unknown') is None
+
+    worker.shutdown()
+    assert worker.pending_count() == 0
+
+    print("✅ Scoring worker test passed")
+
+
+def test_worker_drain():
+    """drain waits for every submitted job, including ones replaced by a newer job"""
+    print("\n🔍 Testing scoring worker drain...")
+
+    worker = ScoringWorker(max_workers=2)
+    finished = []
+    release = threading.Event()
+
+    def job(name):
+        release.wait()
+        time.sleep(0.05)
+        finished.append(name)
+
+    worker.submit('key', job, 'first')
+    worker.submit('key', job, 'second')
+    assert worker.drain(timeout=0.05) == 2
+    release.set()
+    assert worker.drain(timeout=5) == 0
+    assert sorted(finished) == ['first', 'second']
+    worker.shutdown()
+
+    print("✅ Scoring worker drain test passed")
+
+
+def test_report_scores_table():
+    """Scores are stored per report and ignored once the report changes"""
+    print("\n🔍 Testing report_scores table...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = TickerDatabase(os.path.join(tmp, 'ticker_data.db'))
+        assert db.get_report_scores('D05.SI', '2025-01-02') is None
+
+        db.save_report_scores('D05.SI', '2025-01-02', "report v1", {'faithfulness_score': {'overall_score': 90.0}})
+        assert db.get_report_scores('D05.SI', '2025-01-02')['faithfulness_score']['overall_score'] == 90.0
+        assert db.get_report_scores('D05.SI', '2025-01-02', report_text="report v1") is not None
+        assert db.get_report_scores('D05.SI', '2025-01-02', report_text="report v2") is None
+
+    print("✅ report_scores table test passed")
+
+
+def test_sync_mode_scores_in_state():
+    """Sync mode scores inside generate_report and stores the scores"""
+    print("\n🔍 Testing sync scoring...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        agent = _stub_agent(os.path.join(tmp, 'ticker_data.db'), 'sync')
+        start = time.perf_counter()
+        state = agent._finish_report(_report_state(), "รายงาน DBS19")
+        elapsed = time.perf_counter() - start
+
+        assert elapsed >= SCORE_SECONDS
+        assert state["faithfulness_score"].overall_score == 91.0
+        assert not state["scores_pending"]
+        stored = agent.db.get_report_scores('D05.SI', '2025-01-02', report_text=state["report"])
+        assert stored['reasoning_quality_score']['issues'] == ['vague']
+        assert 'scoring_worker' not in agent.__dict__, "sync mode must not start the worker"
+
+    print("✅ Sync scoring test passed")
+
+
+def test_background_mode_off_critical_path():
+    """Background mode returns before scoring; callers can wait for the scores"""
+    print("\n🔍 Testing background scoring...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        agent = _stub_agent(os.path.join(tmp, 'ticker_data.db'), 'background')
+        start = time.perf_counter()
+        state = agent._finish_report(_report_state(), "รายงาน DBS19")
+        elapsed = time.perf_counter() - start
+        print(f"   report finished in {elapsed * 1000:.0f} ms (scoring takes {SCORE_SECONDS * 1000:.0f} ms)")
+
+        assert elapsed < SCORE_SECONDS
+        assert state["scores_pending"]
+        assert state["faithfulness_score"] == {}
+
+        # Without ?scores=true the response does not wait
+        body = json.loads(_analysis_response("DBS19", state)['body'])
+        assert body['scores_pending'] is True
+        assert body['faithfulness_score'] == {}
+
+        # With it, the pending job is awaited
+        scored = _with_scores(agent, state)
+        assert not scored["scores_pending"]
+        body = json.loads(_analysis_response("DBS19", scored)['body'])
+        assert body['faithfulness_score']['overall_score'] == 91.0
+        assert body['completeness_score']['overall_score'] == 80.0
+        assert body['scores_pending'] is False
+
+        # Once the job is done, the scores come from the database as score objects
+        agent.scoring_worker.shutdown()
+        assert agent.scoring_worker.pending_count() == 0
+        scores = agent.get_report_scores(state)
+        assert isinstance(scores["completeness_score"], CompletenessScore)
+        assert scores["reasoning_quality_score"].overall_score == 70.0
+
+        # A different report for the same day has no scores yet
+        assert agent.get_report_scores({**state, "report": "another report"}) == {}
+
+    print("✅ Background scoring test passed")
+
+
+def test_line_bot_scoring_mode():
+    """The LINE bot scores in the background unless SCORING_MODE is set explicitly"""
+    print("\n🔍 Testing LINE bot scoring mode...")
+
+    from src.line_bot import LineBot
+
+    with patch('src.line_bot.SCORING_MODE_SET', False):
+        assert LineBot().agent.scoring_mode == 'background'
+    with patch('src.line_bot.SCORING_MODE_SET', True), patch('src.agent.SCORING_MODE', 'sync'):
+        assert LineBot().agent.scoring_mode == 'sync'
+
+    print("✅ LINE bot scoring mode test passed")
+
+
+def test_lambda_waits_for_background_scores():
+    """The Lambda handler runs the async webhook and stores queued LINE scores before returning"""
+    print("\n🔍 Testing Lambda scoring drain...")
+
+    from src import lambda_handler
+
+    with tempfile.TemporaryDirectory() as tmp:
+        agent = _stub_agent(os.path.join(tmp, 'ticker_data.db'), 'background')
+        bot = MagicMock()
+        bot.agent = agent
+
+        async def ahandle_webhook(body, signature):
+            agent._finish_report(_report_state(), "รายงาน DBS19")
+            return {"statusCode": 200}
+
+        bot.ahandle_webhook.side_effect = ahandle_webhook
+        with patch.object(lambda_handler, 'bot', bot):
+            result = lambda_handler.lambda_handler({'body': '{}', 'headers': {}}, None)
+            # Warm invocations reuse the container's event loop
+            loop = lambda_handler.get_loop()
+            assert lambda_handler.lambda_handler({'body': '{}', 'headers': {}}, None)["statusCode"] == 200
+            assert lambda_handler.get_loop() is loop
+
+        assert result["statusCode"] == 200
+        bot.handle_webhook.assert_not_called()
+        assert agent.db.get_report_scores('D05.SI', '2025-01-02') is not None, "Scores must be stored"
+
+    print("✅ Lambda scoring drain test passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("=" * 60)
+    print("Running Scoring Worker Tests")
+    print("=" * 60)
+
+    test_worker_wait_and_failures()
+    test_worker_drain()
+    test_report_scores_table()
+    test_sync_mode_scores_in_state()
+    test_background_mode_off_critical_path()
+    test_line_bot_scoring_mode()
+    test_lambda_waits_for_background_scores()
+
+    print("\n" + "=" * 60)
+    print("✅ All scoring worker tests passed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Test suite for the vectorized SMA crossover backtester
+"""
+
+import os
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.strategy import SMAStrategyBacktester, crossover_signals, last_true_index, rolling_mean
+from tests.helpers import make_agent, make_history
+
+HISTORY = dict(start='2020-01-01', volatility=0.02, range_noise=None, volume=(1_000_000, 5_000_000))
+
+
+def _loop_trades(close, entry, exit_, direction):
+    """Reference trade returns from a plain bar-by-bar loop"""
+    returns, entry_price = [], None
+    for i in range(len(close)):
+        if entry_price is None and entry[i]:
+            entry_price = close[i]
+        elif entry_price is not None and exit_[i]:
+            returns.append(direction * (close[i] - entry_price) / entry_price)
+            entry_price = None
+    if entry_price is not None:
+        returns.append(direction * (close[-1] - entry_price) / entry_price)
+    return np.array(returns)
+
+
+def test_signals_match_pandas_and_alternate():
+    """SMAs match pandas rolling means and buy/sell signals strictly alternate"""
+    print("\n🔍 Testing crossover signals...")
+
+    hist = make_history(600, **HISTORY)
+    df = SMAStrategyBacktester(20, 50).detect_signals(hist)
+
+    pd.testing.assert_series_equal(df['SMA_Fast'], hist['Close'].rolling(20).mean(),
+                                   check_names=False, rtol=1e-9)
+    pd.testing.assert_series_equal(df['SMA_Slow'], hist['Close'].rolling(50).mean(),
+                                   check_names=False, rtol=1e-9)
+
+    events = df.loc[df['Buy_Signal'] | df['Sell_Signal'], 'Buy_Signal'].to_numpy()
+    assert len(events) > 2
+    assert (events[1:] != events[:-1]).all(), "Signals should alternate buy/sell"
+    assert not (df['Buy_Signal'] & df['Sell_Signal']).any()
+
+    print("✅ Crossover signals test passed")
+
+
+def test_crossover_signals_2d():
+    """Column-wise signals on a (dates x strategies) array equal the 1-D results"""
+    print("\n🔍 Testing 2-D crossover signals...")
+
+    close = make_history(600, **HISTORY)['Close'].to_numpy()
+    fast = np.column_stack([rolling_mean(close, w) for w in (5, 10, 20)])
+    slow = np.column_stack([rolling_mean(close, w) for w in (30, 50, 100)])
+
+    buy, sell = crossover_signals(fast, slow)
+    for j in range(3):
+        buy_1d, sell_1d = crossover_signals(fast[:, j], slow[:, j])
+        assert (buy[:, j] == buy_1d).all() and (sell[:, j] == sell_1d).all()
+
+    print("✅ 2-D crossover signals test passed")
+
+
+def test_trades_match_loop():
+    """Vectorized trade pairing equals a bar-by-bar reference loop for both directions"""
+    print("\n🔍 Testing trade returns...")
+
+    hist = make_history(600, seed=3, **HISTORY)
+    backtester = SMAStrategyBacktester(10, 30)
+    df = backtester.detect_signals(hist)
+    close = df['Close'].to_numpy()
+    buy, sell = df['Buy_Signal'].to_numpy(), df['Sell_Signal'].to_numpy()
+
+    for result, expected in [
+        (backtester.backtest_buy_only(hist), _loop_trades(close, buy, sell, 1)),
+        (backtester.backtest_sell_only(hist), _loop_trades(close, sell, buy, -1)),
+    ]:
+        actual = np.array([trade['return_pct'] for trade in result['trades']]) / 100
+        np.testing.assert_allclose(actual, expected, rtol=1e-12)
+        assert result['num_trades'] == len(expected)
+        assert np.isclose(result['total_return_pct'], (np.prod(1 + expected) - 1) * 100)
+        assert np.isclose(result['win_rate'], (expected > 0).mean() * 100)
+        assert result['max_drawdown_pct'] <= 0
+
+    print("✅ Trade returns test passed")
+
+
+def test_backtest_result_layout():
+    """Results carry the keys the agent's strategy alignment check reads"""
+    print("\n🔍 Testing backtest result layout...")
+
+    hist = make_history(600, **HISTORY)
+    backtester = SMAStrategyBacktester()
+
+    result = backtester.backtest_buy_only(hist)
+    for key in ['total_return_pct', 'avg_return_pct', 'sharpe_ratio', 'win_rate',
+                'max_drawdown_pct', 'num_trades', 'trades']:
+        assert key in result, f"Missing {key}"
+    assert result['strategy'] == 'buy_only'
+    assert set(result['trades'][0]) == {'entry_date', 'entry_price', 'exit_date', 'exit_price',
+                                        'return_pct', 'holding_days', 'open'}
+
+    assert backtester.backtest_buy_only(hist.iloc[:50]) is None
+    assert backtester.detect_signals(None) is None
+
+    print("✅ Backtest result layout test passed")
+
+
+def test_last_true_index():
+    """Reverse argmax finds the last True position"""
+    print("\n🔍 Testing last_true_index...")
+
+    assert last_true_index(np.array([False, True, False, True, False])) == 3
+    assert last_true_index(np.array([True, False])) == 0
+    assert last_true_index(np.array([False, False])) == -1
+    assert last_true_index(np.array([], dtype=bool)) == -1
+
+    print("✅ last_true_index test passed")
+
+
+def test_last_signal_matches_filtering():
+    """last_signal equals filtering the signal frame and taking iloc[-1]"""
+    print("\n🔍 Testing last signal lookup...")
+
+    hist = make_history(600, seed=5, **HISTORY)
+    backtester = SMAStrategyBacktester()
+    signals = backtester.detect_signals(hist)
+
+    for column in ['Buy_Signal', 'Sell_Signal']:
+        expected = signals[signals[column]].iloc[-1]
+        actual = backtester.last_signal(signals, column)
+        assert actual['date'] == expected.name
+        assert actual['price'] == expected['Close']
+        assert actual['sma_fast'] == expected['SMA_Fast']
+        assert actual['sma_slow'] == expected['SMA_Slow']
+
+    flat = signals.assign(Buy_Signal=False)
+    assert backtester.last_signal(flat, 'Buy_Signal') is None
+    assert backtester.last_signal(None, 'Buy_Signal') is None
+
+    print("✅ Last signal lookup test passed")
+
+
+def test_agent_detects_signals_once():
+    """analyze_technical runs one signal pass for both backtests and both last-signal lookups"""
+    print("\n🔍 Testing single signal pass in analyze_technical...")
+
+    hist = make_history(600, seed=2, **HISTORY)
+    agent = make_agent(strategy_backtester=SMAStrategyBacktester(), strategy_bootstrap=None,
+                       technical_analyzer=MagicMock(), db=MagicMock(), ticker_map={'TEST': 'TEST.BK'})
+    agent.technical_analyzer.calculate_all_indicators_with_percentiles.return_value = {
+        'indicators': {'rsi': 50.0}
+    }
+
+    state = {'ticker': 'TEST', 'ticker_data': {'history': hist, 'date': '2022-01-01'}}
+    with patch.object(SMAStrategyBacktester, 'detect_signals',
+                      autospec=True, side_effect=SMAStrategyBacktester.detect_signals) as detect:
+        state = agent.analyze_technical(state)
+
+    assert detect.call_count == 1
+    performance = state['strategy_performance']
+    assert performance['buy_only'] == agent.strategy_backtester.backtest_buy_only(hist)
+    assert performance['sell_only'] == agent.strategy_backtester.backtest_sell_only(hist)
+    assert performance['last_buy_signal'] == agent._get_last_buy_signal(hist)
+    assert performance['last_sell_signal'] == agent._get_last_sell_signal(hist)
+
+    print("✅ Single signal pass test passed")
+
+
+def test_backtest_speed():
+    """A 10-year daily history backtests in well under a second"""
+    print("\n🔍 Testing backtest speed...")
+
+    hist = make_history(2520, seed=7, **HISTORY)
+    backtester = SMAStrategyBacktester()
+
+    start = time.perf_counter()
+    for _ in range(20):
+        backtester.backtest_buy_only(hist)
+        backtester.backtest_sell_only(hist)
+    elapsed = (time.perf_counter() - start) / 40
+
+    print(f"   {elapsed * 1000:.2f} ms per backtest")
+    assert elapsed < 0.1
+
+    print("✅ Backtest speed test passed")
+
+
+def run_all_tests():
+    """Run all strategy tests"""
+    print("=" * 60)
+    print("🧪 Running Strategy Backtester Tests")
+    print("=" * 60)
+
+    test_signals_match_pandas_and_alternate()
+    test_crossover_signals_2d()
+    test_trades_match_loop()
+    test_backtest_result_layout()
+    test_last_true_index()
+    test_last_signal_matches_filtering()
+    test_agent_detects_signals_once()
+    test_backtest_speed()
+
+    print("\n" + "=" * 60)
+    print("✅ All strategy tests passed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    run_all_tests()
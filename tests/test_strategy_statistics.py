@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Test suite for bootstrap confidence intervals on strategy performance
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.strategy import SMAStrategyBacktester
+from src.strategy_statistics import (StrategyBootstrap, block_bootstrap_indices, block_bootstrap_starts,
+                                     block_bootstrap_sums, bootstrap_many)
+from tests.helpers import make_history
+
+HISTORY = dict(start='2015-01-01', volatility=0.02, range_noise=None, volume=(1_000_000, 5_000_000))
+
+
+def _performance(hist):
+    backtester = SMAStrategyBacktester()
+    signals = backtester.detect_signals(hist)
+    performance = {
+        'buy_only': backtester.backtest_buy_only(hist, signals=signals),
+        'sell_only': backtester.backtest_sell_only(hist, signals=signals)
+    }
+    return performance, signals
+
+
+def test_block_indices_are_circular_blocks():
+    """Each resample is made of consecutive (wrapping) runs of block_size positions"""
+    print("\n🔍 Testing block bootstrap indices...")
+
+    rng = np.random.default_rng(0)
+    starts = block_bootstrap_starts(10, 50, 3, rng)
+    indices = block_bootstrap_indices(10, starts, 3)
+
+    assert indices.shape == (50, 10)
+    assert starts.shape == (50, 4)
+    for row, row_starts in zip(indices, starts):
+        expected = np.concatenate([(start + np.arange(3)) % 10 for start in row_starts])[:10]
+        assert (row == expected).all()
+
+    print("✅ Block bootstrap indices test passed")
+
+
+def test_block_sums_match_materialized_resamples():
+    """Prefix-sum block sums equal summing the materialized resamples"""
+    print("\n🔍 Testing block bootstrap sums...")
+
+    rng = np.random.default_rng(1)
+    values = rng.normal(0, 0.01, 257)
+    for block_size in [1, 6, 10, 257]:
+        starts = block_bootstrap_starts(len(values), 300, block_size, rng)
+        expected = values[block_bootstrap_indices(len(values), starts, block_size)].sum(axis=1)
+        np.testing.assert_allclose(block_bootstrap_sums(values, starts, block_size), expected,
+                                   rtol=1e-10, atol=1e-12)
+
+    print("✅ Block bootstrap sums test passed")
+
+
+def test_intervals_bracket_point_estimates():
+    """Intervals are ordered, reproducible and contain the backtest's point estimates"""
+    print("\n🔍 Testing confidence intervals...")
+
+    performance, signals = _performance(make_history(1500, seed=3, **HISTORY))
+    StrategyBootstrap().attach(performance, signals)
+
+    for key in ['buy_only', 'sell_only']:
+        result = performance[key]
+        intervals = result['confidence_intervals']
+        assert intervals['confidence'] == 0.95
+        for metric in ['total_return_pct', 'avg_return_pct', 'win_rate', 'sharpe_ratio']:
+            assert intervals[metric]['lower'] <= intervals[metric]['upper']
+        for metric in ['avg_return_pct', 'win_rate', 'sharpe_ratio']:
+            assert intervals[metric]['lower'] <= result[metric] <= intervals[metric]['upper'], metric
+
+    # Fixed seed: the same inputs give the same intervals
+    again, signals = _performance(make_history(1500, seed=3, **HISTORY))
+    StrategyBootstrap().attach(again, signals)
+    assert again['buy_only']['confidence_intervals'] == performance['buy_only']['confidence_intervals']
+
+    print("✅ Confidence intervals test passed")
+
+
+def test_too_few_trades_gives_no_interval():
+    """Fewer than two trades leave confidence_intervals as None"""
+    print("\n🔍 Testing short trade lists...")
+
+    bootstrap = StrategyBootstrap()
+    assert bootstrap.confidence_intervals([0.05], np.zeros(100)) is None
+    assert bootstrap.confidence_intervals([], np.zeros(100)) is None
+
+    print("✅ Short trade list test passed")
+
+
+def test_bootstrap_speed():
+    """Both strategies on a 10-year history take well under 100 ms"""
+    print("\n🔍 Testing bootstrap speed...")
+
+    performance, signals = _performance(make_history(2520, seed=4, **HISTORY))
+    bootstrap = StrategyBootstrap()
+
+    start = time.perf_counter()
+    for _ in range(5):
+        bootstrap.attach(performance, signals)
+    elapsed = (time.perf_counter() - start) / 5
+
+    print(f"   {elapsed * 1000:.1f} ms per ticker ({bootstrap.n_resamples} resamples)")
+    assert elapsed < 0.1
+
+    print("✅ Bootstrap speed test passed")
+
+
+def test_bootstrap_many_pool_matches_inline():
+    """Batch mode gives the same intervals in a process pool as in-process"""
+    print("\n🔍 Testing batch bootstrap...")
+
+    histories = {f'T{i}.BK': make_history(600, seed=i, **HISTORY) for i in range(3)}
+    histories['SHORT.BK'] = make_history(30, seed=9, **HISTORY)
+
+    inline = bootstrap_many(histories, bootstrap=StrategyBootstrap(n_resamples=500), max_workers=1)
+    pooled = bootstrap_many(histories, bootstrap=StrategyBootstrap(n_resamples=500), max_workers=2)
+
+    assert inline == pooled
+    assert inline['SHORT.BK'] == {}
+    assert 'confidence_intervals' in inline['T0.BK']['buy_only']
+
+    print("✅ Batch bootstrap test passed")
+
+
+def run_all_tests():
+    """Run all strategy statistics tests"""
+    print("=" * 60)
+    print("🧪 Running Strategy Statistics Tests")
+    print("=" * 60)
+
+    test_block_indices_are_circular_blocks()
+    test_block_sums_match_materialized_resamples()
+    test_intervals_bracket_point_estimates()
+    test_too_few_trades_gives_no_interval()
+    test_bootstrap_speed()
+    test_bootstrap_many_pool_matches_inline()
+
+    print("\n" + "=" * 60)
+    print("✅ All strategy statistics tests passed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    run_all_tests()
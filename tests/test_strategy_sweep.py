@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test suite for SMA parameter sweeps
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.strategy import SMAStrategyBacktester
+from src.strategy_sweep import METRIC_COLUMNS, best_parameters, parameter_grid, sweep_sma_grid
+from tests.helpers import make_history
+
+HISTORY = dict(start='2015-01-01', volatility=0.02, range_noise=None, volume=(1_000_000, 5_000_000))
+
+
+def _histories():
+    return {f'T{i}.BK': make_history(900 - i * 200, seed=i, **HISTORY) for i in range(3)}
+
+
+def test_parameter_grid():
+    """Only pairs with fast < slow are kept"""
+    print("\n🔍 Testing parameter grid...")
+
+    pairs = parameter_grid([5, 20, 50], [20, 50])
+    assert pairs.tolist() == [[5, 20], [5, 50], [20, 50]]
+
+    print("✅ Parameter grid test passed")
+
+
+def test_sweep_matches_single_backtests():
+    """Every grid row equals SMAStrategyBacktester run on that pair"""
+    print("\n🔍 Testing sweep against single backtests...")
+
+    histories = _histories()
+    results = sweep_sma_grid(histories, fast_periods=[5, 10, 20], slow_periods=[30, 50],
+                             max_workers=1)
+    assert len(results) == 3 * 2 * 6
+
+    for row in results.itertuples(index=False):
+        backtester = SMAStrategyBacktester(row.fast_period, row.slow_period)
+        expected = (backtester.backtest_buy_only if row.strategy == 'buy_only'
+                    else backtester.backtest_sell_only)(histories[row.ticker])
+        for metric in METRIC_COLUMNS:
+            assert np.isclose(getattr(row, metric), expected[metric], rtol=1e-9, atol=1e-9), \
+                f"{row.ticker} {row.strategy} {row.fast_period}/{row.slow_period} {metric}"
+
+    print("✅ Sweep equivalence test passed")
+
+
+def test_sweep_ranking_and_best_parameters():
+    """Rows are ranked by the chosen metric within each ticker and strategy"""
+    print("\n🔍 Testing sweep ranking...")
+
+    results = sweep_sma_grid(_histories(), fast_periods=[5, 10, 20], slow_periods=[30, 50, 100],
+                             rank_by='total_return_pct', max_workers=1)
+
+    for _, group in results.groupby(['ticker', 'strategy']):
+        assert group['rank'].tolist() == list(range(1, len(group) + 1))
+        assert group['total_return_pct'].is_monotonic_decreasing
+
+    best = best_parameters(results)
+    assert set(best) == {'T0.BK', 'T1.BK', 'T2.BK'}
+    top = results[(results['ticker'] == 'T0.BK') & (results['strategy'] == 'buy_only')].iloc[0]
+    assert best['T0.BK']['buy_only']['fast_period'] == top['fast_period']
+    assert best['T0.BK']['buy_only']['total_return_pct'] == top['total_return_pct']
+
+    print("✅ Sweep ranking test passed")
+
+
+def test_sweep_process_pool_matches_inline():
+    """The shared-memory process pool produces the same table as the in-process sweep"""
+    print("\n🔍 Testing process pool sweep...")
+
+    histories = _histories()
+    histories['EMPTY.BK'] = pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+
+    inline = sweep_sma_grid(histories, fast_periods=[5, 10], slow_periods=[30, 50], max_workers=1)
+    pooled = sweep_sma_grid(histories, fast_periods=[5, 10], slow_periods=[30, 50], max_workers=2)
+
+    pd.testing.assert_frame_equal(inline, pooled)
+    assert 'EMPTY.BK' not in set(pooled['ticker'])
+
+    print("✅ Process pool sweep test passed")
+
+
+def test_sweep_skips_pairs_longer_than_history():
+    """Pairs whose slow SMA needs more bars than available are left out"""
+    print("\n🔍 Testing short histories...")
+
+    results = sweep_sma_grid({'SHORT': make_history(60, seed=9, **HISTORY)}, fast_periods=[5],
+                             slow_periods=[20, 100], max_workers=1)
+    assert results['slow_period'].tolist() == [20, 20]
+
+    print("✅ Short history test passed")
+
+
+def run_all_tests():
+    """Run all strategy sweep tests"""
+    print("=" * 60)
+    print("🧪 Running Strategy Sweep Tests")
+    print("=" * 60)
+
+    test_parameter_grid()
+    test_sweep_matches_single_backtests()
+    test_sweep_ranking_and_best_parameters()
+    test_sweep_process_pool_matches_inline()
+    test_sweep_skips_pairs_longer_than_history()
+
+    print("\n" + "=" * 60)
+    print("✅ All strategy sweep tests passed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Test suite for tracing spans, per-request traces and latency histograms
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.tracing import (LatencyHistogram, Tracer, format_latency_summary, trace_methods, traced,
+                         tracer)
+from tests.test_agent_graph import GRAPH_DEPENDENCIES, _initial_state, _stub_agent
+
+
+def test_disabled_tracer_is_noop():
+    """A disabled tracer records nothing and hands out the shared no-op span"""
+    print("\n🔍 Testing disabled tracer...")
+
+    disabled = Tracer(enabled=False)
+    with disabled.trace("request") as trace:
+        with disabled.span("work") as span:
+            span.set(tokens=10)
+    assert trace is None
+    assert disabled.span("a") is disabled.span("b")
+    assert disabled.latency_summary() == {}
+    assert disabled.last_trace is None
+
+    print("✅ Disabled tracer test passed")
+
+
+def test_spans_nest_under_trace():
+    """Spans record their parent, attributes and errors and join the active trace"""
+    print("\n🔍 Testing span nesting...")
+
+    local = Tracer(enabled=True)
+    with local.trace("request", ticker="DBS19") as trace:
+        with local.span("outer") as outer:
+            with local.span("inner") as inner:
+                inner.set(total_tokens=42)
+        try:
+            with local.span("failing"):
+                raise ValueError("boom")
+        except ValueError:
+            pass
+        # A nested trace becomes a span of the active one
+        with local.trace("nested") as nested:
+            pass
+
+    assert local.last_trace is trace
+    spans = {span['name']: span for span in trace.to_dict()['spans']}
+    assert set(spans) == {"request", "outer", "inner", "failing", "nested"}
+    assert spans['request']['span_id'] == trace.root.span_id
+    assert spans['inner']['parent_id'] == spans['outer']['span_id']
+    assert spans['outer']['parent_id'] == trace.root.span_id
+    assert spans['inner']['attributes'] == {'total_tokens': 42}
+    assert spans['failing']['error'] == "ValueError: boom"
+    assert nested.name == "nested"
+    assert trace.to_dict()['attributes'] == {'ticker': 'DBS19'}
+
+    # Spans outside a trace still feed the histograms
+    with local.span("outer"):
+        pass
+    assert local.latency_summary()['outer']['count'] == 2
+    assert local.latency_summary()['request']['count'] == 1
+
+    print("✅ Span nesting test passed")
+
+
+def test_histogram_percentiles():
+    """Nearest-rank percentiles over the retained samples"""
+    print("\n🔍 Testing latency histogram...")
+
+    histogram = LatencyHistogram()
+    for ms in range(1, 101):
+        histogram.record(ms / 1000)
+    summary = histogram.summary()
+    assert summary['count'] == 100
+    assert summary['p50'] == 0.050
+    assert summary['p95'] == 0.095
+    assert summary['p99'] == 0.099
+    assert summary['max'] == 0.100
+    assert abs(summary['mean'] - 0.0505) < 1e-9
+
+    # Percentiles cover the most recent samples, count/max everything
+    bounded = LatencyHistogram(max_samples=10)
+    for seconds in [5.0] + [0.001] * 10:
+        bounded.record(seconds)
+    assert bounded.percentile(99) == 0.001
+    assert bounded.summary()['max'] == 5.0
+    assert bounded.summary()['count'] == 11
+    assert LatencyHistogram().percentile(50) == 0.0
+
+    table = format_latency_summary({'yahoo.history': summary})
+    assert "yahoo.history" in table and "50.0ms" in table
+
+    print("✅ Latency histogram test passed")
+
+
+def test_trace_export():
+    """Finished traces are written as JSON to the export directory"""
+    print("\n🔍 Testing trace export...")
+
+    with tempfile.TemporaryDirectory() as export_dir:
+        local = Tracer(enabled=True, export_dir=export_dir)
+        with local.trace("analyze_ticker", ticker="DBS19"):
+            with local.span("openai.chat", cached=False):
+                pass
+
+        files = os.listdir(export_dir)
+        assert len(files) == 1 and files[0].startswith("analyze_ticker-")
+        with open(os.path.join(export_dir, files[0]), encoding='utf-8') as f:
+            exported = json.load(f)
+
+    root, chat = exported['spans']
+    assert exported['name'] == root['name'] == "analyze_ticker"
+    assert root['start'] == 0 and root['parent_id'] is None
+    assert chat['name'] == "openai.chat"
+    assert chat['attributes'] == {'cached': False}
+    assert chat['start'] >= 0 and chat['parent_id'] == root['span_id']
+
+    print("✅ Trace export test passed")
+
+
+def test_traced_decorators():
+    """traced wraps sync and async functions; trace_methods wraps public methods"""
+    print("\n🔍 Testing traced decorators...")
+
+    @trace_methods('store')
+    class Store:
+        def get(self):
+            return self._helper()
+
+        def _helper(self):
+            return 'value'
+
+    @traced("fetch")
+    async def fetch():
+        await asyncio.sleep(0)
+        return 'fetched'
+
+    with patch.object(tracer, 'enabled', True):
+        tracer.reset()
+        assert Store().get() == 'value'
+        assert asyncio.run(fetch()) == 'fetched'
+        summary = tracer.latency_summary()
+        tracer.reset()
+
+    assert set(summary) == {'store.get', 'fetch'}
+    assert Store.get.__name__ == 'get'
+
+    print("✅ Traced decorators test passed")
+
+
+def test_graph_node_spans():
+    """Every graph node runs in a span parented to the request trace, across worker threads"""
+    print("\n🔍 Testing graph node spans...")
+
+    agent = _stub_agent()
+    with patch.object(tracer, 'enabled', True):
+        tracer.reset()
+        start = time.perf_counter()
+        with tracer.trace("analyze_ticker", ticker="TEST") as trace:
+            agent.graph.invoke(_initial_state())
+        elapsed = time.perf_counter() - start
+        summary = tracer.latency_summary()
+        tracer.reset()
+
+    spans = trace.to_dict()['spans']
+    node_spans = {span['name']: span for span in spans if span['name'].startswith('node.')}
+    assert set(node_spans) == {f"node.{name}" for name in GRAPH_DEPENDENCIES}
+    for span in node_spans.values():
+        assert span['parent_id'] == trace.root.span_id, f"{span['name']} lost the trace context"
+    assert trace.duration <= elapsed
+    assert summary['node.generate_report']['count'] == 1
+
+    print("✅ Graph node spans test passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("=" * 60)
+    print("Running Tracing Tests")
+    print("=" * 60)
+
+    test_disabled_tracer_is_noop()
+    test_spans_nest_under_trace()
+    test_histogram_percentiles()
+    test_trace_export()
+    test_traced_decorators()
+    test_graph_node_spans()
+
+    print("\n" + "=" * 60)
+    print("✅ All tracing tests passed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    run_all_tests()